@@ -0,0 +1,11 @@
+-- market_news 幂等写入：Python 写入器为每行生成 idempotency_key，
+-- 配合 on_conflict=idempotency_key + resolution=ignore-duplicates，
+-- 重试或 outbox 补发时不会插入重复行。
+ALTER TABLE public.market_news
+ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS market_news_idempotency_key_idx
+ON public.market_news (idempotency_key);
+
+-- 刷新 PostgREST schema 缓存
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,526 @@
+"""
+Report Engine ASGI接口。
+
+Flask 蓝图的 SSE 接口在 WSGI 服务器下每个订阅者独占一个工作线程，数百个旁观者
+同时订阅同一任务时线程池会被耗尽。本模块提供同一组接口的 ASGI 版本：
+
+- ``/stream/<task_id>``：原生 asyncio 实现，订阅 ``flask_interface`` 中同一个事件源
+  （``stream_subscribers`` + 任务历史 + 磁盘事件日志），每个连接只是一个协程；
+- ``/inputs/stream``：三引擎输入就绪状态推送，同样以协程订阅；
+- 其余接口（status/generate/progress/result/export 等）通过内置的 WSGI 桥在线程池中
+  调用原有 Flask 蓝图，行为与 Flask 部署完全一致；响应体逐块转发，不整体缓存。
+
+不依赖任何 ASGI 框架，使用任意 ASGI 服务器启动即可，例如::
+
+    uvicorn ReportEngine.asgi_interface:app --port 5000
+"""
+
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from queue import Empty
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from flask import Flask
+from loguru import logger
+
+from . import flask_interface
+from .flask_interface import (
+    INPUTS_STREAM_KEY,
+    STREAM_HEARTBEAT_INTERVAL,
+    STREAM_IDLE_TIMEOUT,
+    STREAM_TERMINAL_STATUSES,
+    _current_inputs_event,
+    _format_sse,
+    _get_task,
+    _heartbeat_event,
+    _parse_last_event_id,
+    _register_stream,
+    _unregister_stream,
+    report_bp,
+)
+from .utils.config import settings
+from .utils.event_log import TaskEventLog, has_event_log
+from .utils.stream_events import (
+    AsyncSubscriberQueue,
+    acollect_chunk_batch,
+    iter_coalesced_chunk_events,
+    parse_client_batching,
+)
+
+DEFAULT_URL_PREFIX = '/api/report'
+# 历史/磁盘日志回放时每次从线程池取出的事件数，连接不必等全部读完才开始推送
+REPLAY_BATCH_SIZE = 200
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class ClientDisconnected(Exception):
+    """客户端已断开，停止向其写入。"""
+
+
+def create_flask_app(url_prefix: str = DEFAULT_URL_PREFIX) -> Flask:
+    """
+    创建仅挂载 report_bp 的 Flask 应用，作为非流式接口的执行体。
+
+    参数:
+        url_prefix: 蓝图挂载前缀。
+
+    返回:
+        Flask: 已注册蓝图的应用。
+    """
+    flask_app = Flask(__name__)
+    flask_app.register_blueprint(report_bp, url_prefix=url_prefix)
+    return flask_app
+
+
+def _build_environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+    """把 ASGI HTTP scope 转换为 WSGI environ（PEP 3333）。"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] if server[1] is not None else 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': str(client[0]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class _WSGIResponse:
+    """
+    在工作线程中逐块读取 WSGI 响应体。
+
+    ``start`` 调用 WSGI 应用并取出第一块（生成器式响应在首次迭代时才调用
+    ``start_response``），之后每次 ``next_chunk`` 只取一块，导出文件等大响应
+    不会整体驻留内存。所有方法都会阻塞，应在线程池中调用。
+    """
+
+    def __init__(self, wsgi_app, environ: Dict[str, Any]):
+        self._wsgi_app = wsgi_app
+        self._environ = environ
+        self._result = None
+        self._iterator = None
+        self._written: List[bytes] = []
+        self.status = 500
+        self.headers: List[Tuple[bytes, bytes]] = []
+
+    def _start_response(self, status, headers, exc_info=None):
+        self.status = int(status.split(' ', 1)[0])
+        self.headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+        ]
+        return self._written.append
+
+    def start(self) -> bytes:
+        """执行应用并返回第一块响应体（可能为空）。"""
+        self._result = self._wsgi_app(self._environ, self._start_response)
+        self._iterator = iter(self._result)
+        return self.next_chunk() or b''
+
+    def next_chunk(self) -> Optional[bytes]:
+        """返回下一块非空响应体，读完返回 None。"""
+        while True:
+            chunk = next(self._iterator, None)
+            if self._written:
+                # 旧式 write() 写入的数据排在本次迭代产出之前
+                chunk = b''.join(self._written) + (chunk or b'')
+                self._written.clear()
+                return chunk
+            if chunk is None or chunk:
+                return chunk
+
+    def close(self) -> None:
+        close = getattr(self._result, 'close', None)
+        if close is not None:
+            close()
+
+
+async def _read_body(receive: Receive) -> bytes:
+    """读取完整请求体。"""
+    parts = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ClientDisconnected()
+        parts.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(parts)
+
+
+async def _send_json(send: Send, status: int, body: bytes) -> None:
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class SSEWriter:
+    """
+    把事件写入 ASGI 响应，并在后台监听 ``http.disconnect``。
+
+    断开后再写入会抛出 ClientDisconnected，调用方据此收口。
+    """
+
+    def __init__(self, receive: Receive, send: Send):
+        self._receive = receive
+        self._send = send
+        self.disconnected = asyncio.Event()
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self._send({'type': 'http.response.start', 'status': 200, 'headers': SSE_HEADERS})
+        self._watcher = asyncio.ensure_future(self._watch_disconnect())
+
+    async def _watch_disconnect(self) -> None:
+        while True:
+            message = await self._receive()
+            if message['type'] == 'http.disconnect':
+                self.disconnected.set()
+                return
+
+    async def write(self, event: Dict[str, Any]) -> None:
+        if self.disconnected.is_set():
+            raise ClientDisconnected()
+        try:
+            await self._send({
+                'type': 'http.response.body',
+                'body': _format_sse(event).encode('utf-8'),
+                'more_body': True,
+            })
+        except (OSError, RuntimeError) as exc:
+            self.disconnected.set()
+            raise ClientDisconnected() from exc
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if not self.disconnected.is_set():
+            try:
+                await self._send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            except (OSError, RuntimeError):
+                pass
+
+
+class ReportASGIApp:
+    """
+    Report Engine 的 ASGI 应用。
+
+    SSE 在事件循环中推送，其他请求转交给 Flask 应用在线程池中处理。
+    线程池在 lifespan 启动（或首个请求）时才创建，lifespan 关闭时释放，
+    导入本模块不会启动任何线程。
+    """
+
+    def __init__(
+        self,
+        flask_app: Optional[Flask] = None,
+        url_prefix: str = DEFAULT_URL_PREFIX,
+        max_workers: Optional[int] = None,
+        initialize: bool = True,
+    ):
+        """
+        参数:
+            flask_app: 已注册 report_bp 的 Flask 应用，默认新建。
+            url_prefix: 蓝图挂载前缀，需与 flask_app 中一致。
+            max_workers: WSGI 桥线程池大小，默认读取 ASGI_WSGI_WORKERS。
+            initialize: lifespan 启动时是否初始化 ReportAgent（已初始化则跳过）。
+        """
+        self.flask_app = flask_app or create_flask_app(url_prefix)
+        self.url_prefix = url_prefix.rstrip('/')
+        self.initialize = initialize
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """WSGI 桥与阻塞读取共用的线程池（首次使用时创建）。"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers or settings.ASGI_WSGI_WORKERS,
+                        thread_name_prefix='report-asgi',
+                    )
+        return self._executor
+
+    def shutdown(self, wait: bool = False) -> None:
+        """释放线程池；之后的请求会按需重新创建。"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    async def _next_batch(self, events: Iterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """在线程池中从阻塞迭代器（内存历史或磁盘日志）取出至多 REPLAY_BATCH_SIZE 个事件。"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: list(islice(events, REPLAY_BATCH_SIZE)))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        task_id = self._match_stream(scope)
+        try:
+            if scope['method'] == 'GET' and scope['path'] == f"{self.url_prefix}/inputs/stream":
+                await self._stream_inputs(scope, receive, send)
+            elif task_id is not None:
+                await self._stream(scope, receive, send, task_id)
+            else:
+                await self._forward(scope, receive, send)
+        except ClientDisconnected:
+            logger.info(f"ASGI客户端已断开: {scope.get('path')}")
+
+    def _match_stream(self, scope: Scope) -> Optional[str]:
+        """匹配 GET {prefix}/stream/<task_id>，返回任务ID。"""
+        if scope['method'] != 'GET':
+            return None
+        prefix = f"{self.url_prefix}/stream/"
+        path = scope['path']
+        if not path.startswith(prefix):
+            return None
+        task_id = path[len(prefix):]
+        if not task_id or '/' in task_id:
+            return None
+        return task_id
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                executor = self.executor
+                if self.initialize and flask_interface.report_agent is None:
+                    await loop.run_in_executor(executor, flask_interface.initialize_report_engine)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _forward(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """通过 WSGI 桥调用 Flask 蓝图。"""
+        body = await _read_body(receive)
+        response = _WSGIResponse(self.flask_app.wsgi_app, _build_environ(scope, body))
+        loop = asyncio.get_running_loop()
+        try:
+            chunk = await loop.run_in_executor(self.executor, response.start)
+            await send({'type': 'http.response.start', 'status': response.status, 'headers': response.headers})
+            while chunk is not None:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, response.next_chunk)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await loop.run_in_executor(self.executor, response.close)
+
+    async def _stream(self, scope: Scope, receive: Receive, send: Send, task_id: str) -> None:
+        """
+        SSE推送：语义与 Flask 版 ``stream_task`` 一致（历史补发、心跳、
+        客户端批量参数、积压重新同步、磁盘日志回放）。
+        """
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        last_event_id = _parse_last_event_id(headers.get('last-event-id'))
+        batching = parse_client_batching(args, settings.STREAM_CHUNK_FLUSH_BYTES)
+        loop = asyncio.get_running_loop()
+
+        task = _get_task(task_id)
+        if not task:
+            if settings.EVENT_LOG_ENABLED and has_event_log(settings.EVENT_LOG_DIR, task_id):
+                await self._replay_event_log(receive, send, task_id, last_event_id, batching['max_bytes'])
+                return
+            await _send_json(send, 404, '{"success": false, "error": "任务不存在"}'.encode('utf-8'))
+            return
+
+        writer = SSEWriter(receive, send)
+        queue = _register_stream(task_id, AsyncSubscriberQueue(settings.STREAM_SUBSCRIBER_QUEUE_SIZE, loop))
+        last_data_ts = loop.time()
+
+        async def replay(since: Optional[int]) -> bool:
+            """补发 since 之后的历史（分批在线程池中读取，边读边推），返回是否含终态事件。"""
+            nonlocal last_data_ts
+            events = iter_coalesced_chunk_events(task.iter_history_since(since), batching['max_bytes'])
+            terminal = False
+            try:
+                while True:
+                    batch = await self._next_batch(events)
+                    if not batch:
+                        return terminal
+                    for event in batch:
+                        await writer.write(event)
+                        queue.mark_delivered(event.get('id'))
+                        last_data_ts = loop.time()
+                        terminal = terminal or event.get('type') in STREAM_TERMINAL_STATUSES
+            finally:
+                events.close()
+
+        try:
+            await writer.start()
+            await replay(last_event_id)
+
+            finished = task.status in STREAM_TERMINAL_STATUSES
+            carried_event = None
+            while not writer.disconnected.is_set():
+                if finished and carried_event is None and not queue.needs_resync and not queue.qsize():
+                    break
+                if queue.needs_resync:
+                    resync_from = queue.begin_resync()
+                    carried_event = None
+                    logger.info(
+                        f"SSE订阅者积压，从事件 {resync_from} 之后重新同步（task {task_id}）: {queue.stats()}"
+                    )
+                    finished = await replay(resync_from) or finished
+                    continue
+                try:
+                    if carried_event is not None:
+                        event, carried_event = carried_event, None
+                    else:
+                        event = await queue.aget(timeout=STREAM_HEARTBEAT_INTERVAL)
+                    event, carried_event = await acollect_chunk_batch(
+                        event, queue, batching['window_ms'], batching['max_bytes']
+                    )
+                except Empty:
+                    if task.status in STREAM_TERMINAL_STATUSES:
+                        logger.info(f"任务 {task_id} 已结束且无新事件，SSE自动收口")
+                        break
+                    event = _heartbeat_event(task_id, task.status)
+
+                await writer.write(event)
+                if event.get('type') != 'heartbeat':
+                    last_data_ts = loop.time()
+
+                if event.get('type') in STREAM_TERMINAL_STATUSES:
+                    finished = True
+                else:
+                    finished = finished or task.status in STREAM_TERMINAL_STATUSES
+
+                if task.status in STREAM_TERMINAL_STATUSES:
+                    idle_for = loop.time() - last_data_ts
+                    if idle_for > STREAM_IDLE_TIMEOUT:
+                        logger.info(f"任务 {task_id} 已终态且空闲 {int(idle_for)}s，主动关闭SSE")
+                        break
+        except ClientDisconnected:
+            logger.info(f"SSE客户端已断开，停止推送: {task_id}")
+        finally:
+            _unregister_stream(task_id, queue)
+            await writer.close()
+
+    async def _stream_inputs(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """输入就绪状态SSE：语义与 Flask 版 ``stream_inputs`` 一致（首帧快照 + 变化推送 + 心跳）。"""
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        last_event_id = _parse_last_event_id(headers.get('last-event-id'))
+        loop = asyncio.get_running_loop()
+
+        writer = SSEWriter(receive, send)
+        queue = _register_stream(
+            INPUTS_STREAM_KEY, AsyncSubscriberQueue(settings.STREAM_SUBSCRIBER_QUEUE_SIZE, loop)
+        )
+        try:
+            await writer.start()
+            event = await loop.run_in_executor(self.executor, _current_inputs_event, last_event_id)
+            if event is not None:
+                queue.mark_delivered(event['id'])
+                await writer.write(event)
+            while not writer.disconnected.is_set():
+                try:
+                    event = await queue.aget(timeout=STREAM_HEARTBEAT_INTERVAL)
+                except Empty:
+                    watcher = flask_interface.input_watcher
+                    event = _heartbeat_event(INPUTS_STREAM_KEY, watcher.mode if watcher else 'disabled')
+                await writer.write(event)
+        except ClientDisconnected:
+            logger.info("输入状态SSE客户端已断开")
+        finally:
+            _unregister_stream(INPUTS_STREAM_KEY, queue)
+            await writer.close()
+
+    async def _replay_event_log(
+        self,
+        receive: Receive,
+        send: Send,
+        task_id: str,
+        last_event_id: Optional[int],
+        max_bytes: int,
+    ) -> None:
+        """任务已不在内存时，从磁盘事件日志回放后结束连接。"""
+        logger.info(f"任务 {task_id} 不在内存中，从磁盘事件日志回放（Last-Event-ID={last_event_id}）")
+        loop = asyncio.get_running_loop()
+        event_log = await loop.run_in_executor(self.executor, TaskEventLog, settings.EVENT_LOG_DIR, task_id)
+        events = iter_coalesced_chunk_events(event_log.iter_since(last_event_id), max_bytes)
+        writer = SSEWriter(receive, send)
+        try:
+            await writer.start()
+            while True:
+                batch = await self._next_batch(events)
+                if not batch:
+                    break
+                for event in batch:
+                    await writer.write(event)
+        finally:
+            events.close()
+            await writer.close()
+
+
+def create_asgi_app(
+    flask_app: Optional[Flask] = None,
+    url_prefix: str = DEFAULT_URL_PREFIX,
+    **kwargs: Any,
+) -> ReportASGIApp:
+    """
+    创建 Report Engine 的 ASGI 应用。
+
+    参数:
+        flask_app: 已注册 report_bp 的 Flask 应用（与现有部署共用时传入）。
+        url_prefix: 接口前缀。
+        **kwargs: 透传给 ReportASGIApp（max_workers/initialize）。
+    """
+    return ReportASGIApp(flask_app, url_prefix, **kwargs)
+
+
+app = create_asgi_app()
+
+
+__all__ = [
+    'ReportASGIApp',
+    'create_asgi_app',
+    'create_flask_app',
+    'app',
+]
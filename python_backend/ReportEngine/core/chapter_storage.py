@@ -3,17 +3,47 @@
 
 每一章在流式生成时会立即写入raw文件，完成校验后再写入
 格式化的chapter.json，并在manifest中记录元数据，便于后续装订。
+
+manifest 由两部分组成：
+
+- ``manifest.json``：快照，格式与前端/调试工具读取的完整清单一致；
+- ``manifest.journal``：只追加的 JSON Lines 日志，每行一条完整的章节状态记录。
+
+章节状态变化只追加一行日志（O(1)），累计到 ``compact_every`` 条或显式调用
+``compact_manifest`` 时才把日志合并进快照并清空日志。读取方（断点续跑、监控工具）
+通过 ``read_manifest`` 得到“快照 + 日志尾部”合并后的结果，同一章节以最后一条记录为准。
+
+并发：追加与读取持有 ``manifest.lock`` 的共享锁，压缩持有排他锁；追加使用
+``O_APPEND`` 单次写入整行，多个线程/进程可同时写同一 run 目录。没有 fcntl 的平台
+（Windows）退化为进程内互斥锁。
 """
 
 from __future__ import annotations
 
-import json
+import os
+import threading
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Generator, List, Optional
 
+from ..utils.serialization import dumps, dumps_bytes, loads
+from .stream_capture import (
+    STREAM_COMPRESSIONS,
+    StreamCaptureWriter,
+    raw_stream_suffix,
+    read_raw_stream,
+    resolve_compression,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 无 fcntl
+    fcntl = None
+
+FSYNC_POLICIES = ("always", "compact", "never")
+
 
 @dataclass
 class ChapterRecord:
@@ -57,16 +87,35 @@ class ChapterStorage:
         - 校验通过后持久化 `chapter.json` 并更新manifest状态。
     """
 
-    def __init__(self, base_dir: str):
+    def __init__(
+        self,
+        base_dir: str,
+        fsync: str = "compact",
+        compact_every: int = 64,
+        stream_compression: str = "none",
+        stream_flush_interval: float = 0.5,
+    ):
         """
         创建章节存储器。
 
         Args:
             base_dir: 所有输出run目录的根路径
+            fsync: manifest落盘策略：always 每次追加都 fsync；compact 仅在写快照时 fsync；
+                never 完全交给操作系统
+            compact_every: 日志累计多少条记录后自动合并进快照
+            stream_compression: stream.raw 的压缩方式：none/gzip/zstd
+            stream_flush_interval: stream.raw 后台写盘的最长间隔（秒）
         """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的fsync策略: {fsync}（可选: {', '.join(FSYNC_POLICIES)}）")
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
-        self._manifests: Dict[str, Dict[str, object]] = {}
+        self.fsync = fsync
+        self.compact_every = max(1, int(compact_every))
+        self.stream_compression = resolve_compression(stream_compression)
+        self.stream_flush_interval = stream_flush_interval
+        self._lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
 
     # ======== 会话与清单 ========
 
@@ -91,8 +140,10 @@ class ChapterStorage:
             "metadata": metadata,
             "chapters": [],
         }
-        self._manifests[self._key(run_dir)] = manifest
-        self._write_manifest(run_dir, manifest)
+        with self._manifest_lock(run_dir, exclusive=True):
+            self._write_manifest(run_dir, manifest)
+            self._journal_path(run_dir).unlink(missing_ok=True)
+        self._pending[self._key(run_dir)] = 0
         return run_dir
 
     def begin_chapter(self, run_dir: Path, chapter_meta: Dict[str, object]) -> Path:
@@ -158,7 +209,7 @@ class ChapterStorage:
         )
         final_path = chapter_dir / "chapter.json"
         final_path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
+            dumps(payload),
             encoding="utf-8",
         )
 
@@ -197,9 +248,9 @@ class ChapterStorage:
             if not chapter_path.exists():
                 continue
             try:
-                payload = json.loads(chapter_path.read_text(encoding="utf-8"))
+                payload = loads(chapter_path.read_bytes())
                 payloads.append(payload)
-            except json.JSONDecodeError:
+            except ValueError:
                 continue
         payloads.sort(key=lambda x: x.get("order", 0))
         return payloads
@@ -209,20 +260,36 @@ class ChapterStorage:
     @contextmanager
     def capture_stream(self, chapter_dir: Path) -> Generator:
         """
-        将流式输出实时写入raw文件。
+        将流式输出写入raw文件。
 
-        通过 contextmanager 暴露文件句柄，简化章节节点的写入逻辑。
+        返回的写入器只在调用线程中缓冲delta，由后台线程批量写盘（可选压缩），
+        退出上下文时写完剩余内容。
 
         参数:
             chapter_dir: 当前章节目录。
 
         返回:
-            Generator[TextIO]: 作为上下文管理器使用的文件对象。
+            Generator[StreamCaptureWriter]: 提供 ``write(str)`` 的写入器。
         """
         raw_path = self._raw_stream_path(chapter_dir)
-        raw_path.parent.mkdir(parents=True, exist_ok=True)
-        with raw_path.open("w", encoding="utf-8") as fp:
-            yield fp
+        with StreamCaptureWriter(
+            raw_path,
+            compression=self.stream_compression,
+            flush_interval=self.stream_flush_interval,
+        ) as writer:
+            yield writer
+
+    def read_stream(self, chapter_dir: Path) -> str:
+        """
+        读取章节的原始流式输出，供调试工具使用。
+
+        兼容任意压缩方式写出的 stream.raw；不存在时返回空字符串。
+        """
+        for compression in STREAM_COMPRESSIONS:
+            path = Path(chapter_dir) / f"stream.raw{raw_stream_suffix(compression)}"
+            if path.exists():
+                return read_raw_stream(path)
+        return ""
 
     # ======== 内部工具 ========
 
@@ -240,51 +307,134 @@ class ChapterStorage:
         return slug or "section"
 
     def _raw_stream_path(self, chapter_dir: Path) -> Path:
-        """返回某章节流式输出对应的raw文件路径。"""
-        return chapter_dir / "stream.raw"
+        """返回某章节流式输出对应的raw文件路径（按压缩方式追加后缀）。"""
+        return chapter_dir / f"stream.raw{raw_stream_suffix(self.stream_compression)}"
 
     def _key(self, run_dir: Path) -> str:
         """将run目录解析为字典缓存的键，避免重复读取磁盘。"""
         return str(run_dir.resolve())
 
     def _manifest_path(self, run_dir: Path) -> Path:
-        """获取manifest.json的实际文件路径。"""
+        """获取manifest.json（快照）的实际文件路径。"""
         return run_dir / "manifest.json"
 
-    def _write_manifest(self, run_dir: Path, manifest: Dict[str, object]):
-        """将内存中的manifest快照全量写回磁盘。"""
-        self._manifest_path(run_dir).write_text(
-            json.dumps(manifest, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+    def _journal_path(self, run_dir: Path) -> Path:
+        """获取manifest追加日志的路径。"""
+        return run_dir / "manifest.journal"
+
+    @contextmanager
+    def _manifest_lock(self, run_dir: Path, exclusive: bool) -> Generator:
+        """
+        获取run目录的manifest锁。
+
+        进程内用互斥锁串行化；有 fcntl 时再对 ``manifest.lock`` 加 flock，
+        追加/读取用共享锁，压缩/重建快照用排他锁。
+        """
+        if fcntl is None:
+            with self._lock:
+                yield
+            return
+        run_dir.mkdir(parents=True, exist_ok=True)
+        with open(run_dir / "manifest.lock", "a+b") as lock_fp:
+            fcntl.flock(lock_fp.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fp.fileno(), fcntl.LOCK_UN)
 
-    def _read_manifest(self, run_dir: Path) -> Dict[str, object]:
+    def _write_manifest(self, run_dir: Path, manifest: Dict[str, object]):
+        """将完整manifest写成快照：先写临时文件，再原子替换。"""
+        path = self._manifest_path(run_dir)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as fp:
+            fp.write(dumps_bytes(manifest, indent=True))
+            if self.fsync != "never":
+                fp.flush()
+                os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+
+    def _replay_manifest(self, run_dir: Path) -> tuple[Dict[str, object], int]:
         """
-        从磁盘读取已有manifest。
+        合并快照与日志，返回 (manifest, 日志记录数)。
 
-        进程重启或多实例写盘时可借助它恢复上下文。
+        日志中无法解析的行（如进程崩溃时写了一半的末行）会被跳过。
         """
         manifest_path = self._manifest_path(run_dir)
         if manifest_path.exists():
-            return json.loads(manifest_path.read_text(encoding="utf-8"))
-        return {"reportId": run_dir.name, "chapters": []}
+            manifest = loads(manifest_path.read_bytes())
+        else:
+            manifest = {"reportId": run_dir.name, "chapters": []}
+        chapters = {
+            c.get("chapterId"): c for c in manifest.get("chapters", []) or []
+        }
+        journal_records = 0
+        journal_path = self._journal_path(run_dir)
+        if journal_path.exists():
+            with open(journal_path, "rb") as fp:
+                for line in fp:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = loads(line)
+                    except ValueError:
+                        continue
+                    chapters[record.get("chapterId")] = record
+                    manifest["updatedAt"] = record.get("updatedAt")
+                    journal_records += 1
+        manifest["chapters"] = sorted(chapters.values(), key=lambda x: x.get("order", 0))
+        return manifest, journal_records
+
+    def read_manifest(self, run_dir: Path) -> Dict[str, object]:
+        """
+        读取当前manifest（快照 + 日志尾部）。
+
+        进程重启、断点续跑或监控工具可借助它恢复上下文，可与写入端并发调用。
+        """
+        with self._manifest_lock(Path(run_dir), exclusive=False):
+            manifest, _ = self._replay_manifest(Path(run_dir))
+        return manifest
+
+    def compact_manifest(self, run_dir: Path) -> Dict[str, object]:
+        """
+        把日志合并进 ``manifest.json`` 快照并清空日志，返回合并后的manifest。
+
+        先替换快照再截断日志：两步之间崩溃只会让日志被重复回放，
+        而每条记录都是章节的完整状态，重复回放结果不变。
+        """
+        run_dir = Path(run_dir)
+        with self._manifest_lock(run_dir, exclusive=True):
+            manifest, journal_records = self._replay_manifest(run_dir)
+            if journal_records:
+                self._write_manifest(run_dir, manifest)
+                with open(self._journal_path(run_dir), "wb") as fp:
+                    if self.fsync != "never":
+                        os.fsync(fp.fileno())
+        self._pending[self._key(run_dir)] = 0
+        return manifest
 
     def _upsert_record(self, run_dir: Path, record: ChapterRecord):
         """
-        更新或追加manifest中的章节记录，保证顺序一致。
+        追加一条章节状态记录到manifest日志。
 
-        内部会自动排序并写回缓存+磁盘。
+        单次 ``O_APPEND`` 写入整行，不读取也不重写已有清单；
+        累计记录数达到 ``compact_every`` 时顺带压缩。
         """
+        line = dumps_bytes(record.to_dict()) + b"\n"
+        with self._manifest_lock(run_dir, exclusive=False):
+            fd = os.open(
+                self._journal_path(run_dir), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+            )
+            try:
+                os.write(fd, line)
+                if self.fsync == "always":
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
         key = self._key(run_dir)
-        manifest = self._manifests.get(key) or self._read_manifest(run_dir)
-        chapters: List[Dict[str, object]] = manifest.get("chapters", [])
-        chapters = [c for c in chapters if c.get("chapterId") != record.chapter_id]
-        chapters.append(record.to_dict())
-        chapters.sort(key=lambda x: x.get("order", 0))
-        manifest["chapters"] = chapters
-        manifest.setdefault("updatedAt", datetime.utcnow().isoformat() + "Z")
-        self._manifests[key] = manifest
-        self._write_manifest(run_dir, manifest)
-
+        with self._lock:
+            pending = self._pending.get(key, 0) + 1
+            self._pending[key] = pending
+        if pending >= self.compact_every:
+            self.compact_manifest(run_dir)
 
 __all__ = ["ChapterStorage", "ChapterRecord"]
@@ -0,0 +1,62 @@
+"""
+stream.raw 后台缓冲写入的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/core/test_stream_capture.py -v
+"""
+
+import time
+
+import pytest
+
+from ReportEngine.core import ChapterStorage
+from ReportEngine.core.stream_capture import StreamCaptureWriter, iter_raw_stream, read_raw_stream
+
+DELTAS = [f"片段{i}-" for i in range(2000)]
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_writes_everything_on_close(tmp_path, compression):
+    path = tmp_path / "stream.raw"
+    with StreamCaptureWriter(path, compression=compression, flush_bytes=256, max_buffer_bytes=1024) as writer:
+        for delta in DELTAS:
+            writer.write(delta)
+    assert read_raw_stream(path) == "".join(DELTAS)
+    # 按小块读取时多字节字符不会被截断
+    assert "".join(iter_raw_stream(path, chunk_size=7)) == "".join(DELTAS)
+
+
+def test_interval_flush_and_explicit_flush(tmp_path):
+    path = tmp_path / "stream.raw"
+    writer = StreamCaptureWriter(path, flush_bytes=1 << 20, flush_interval=0.05)
+    writer.write("开头")
+    deadline = time.monotonic() + 2
+    while path.stat().st_size == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert path.read_text(encoding="utf-8") == "开头"
+
+    writer.flush_interval = 60
+    writer.write("结尾")
+    writer.flush()
+    assert path.read_text(encoding="utf-8") == "开头结尾"
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.write("x")
+
+
+def test_chapter_storage_compressed_capture(tmp_path):
+    storage = ChapterStorage(str(tmp_path), stream_compression="gzip")
+    run_dir = storage.start_session("r1", {})
+    chapter_dir = storage.begin_chapter(run_dir, {"chapterId": "S1", "slug": "s1", "order": 1})
+    with storage.capture_stream(chapter_dir) as stream_fp:
+        for delta in DELTAS:
+            stream_fp.write(delta)
+
+    assert (chapter_dir / "stream.raw.gz").exists()
+    assert storage.read_stream(chapter_dir) == "".join(DELTAS)
+    record = storage.read_manifest(run_dir)["chapters"][0]
+    assert record["files"]["raw"].endswith("stream.raw.gz")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,157 @@
+"""
+知识图谱构建器的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/graphrag/test_graph_builder.py -v
+"""
+
+import pytest
+from ReportEngine.graphrag import (
+    ForumParser,
+    Graph,
+    GraphBuilder,
+    GraphStorage,
+    StateParser,
+)
+from ReportEngine.utils.config import settings
+
+
+def _make_state(engine, sections=4, queries=3, summary="摘要"):
+    """构造一个结构与三引擎输出一致的 ParsedState"""
+    state_json = {
+        "query": "测试主题",
+        "report_title": f"{engine} 报告",
+        "paragraphs": [
+            {
+                "title": f"段落{i}",
+                "order": i,
+                "research": {
+                    "latest_summary": f"{summary}{i}",
+                    "search_history": [
+                        {
+                            "query": f"{engine}-关键词{i}-{j}",
+                            "url": f"https://example.com/{j}",
+                            "title": f"来源{j}",
+                        }
+                        for j in range(queries)
+                    ],
+                },
+            }
+            for i in range(sections)
+        ],
+    }
+    return StateParser().parse(engine, state_json)
+
+
+FORUM_LOG = "\n".join(
+    ["[10:00:00] [SYSTEM] 开始", "无效行", "[10:00:01] [QUERY] 查询发言"]
+    + [f"[10:00:{i + 2:02d}] [HOST] 主持人总结{i}\\n第二行" for i in range(8)]
+)
+
+
+class TestForumParser:
+    """测试ForumParser的流式解析"""
+
+    def test_iter_parse_matches_parse(self):
+        parser = ForumParser()
+        assert list(parser.iter_parse(FORUM_LOG)) == parser.parse(FORUM_LOG)
+
+    def test_iter_parse_unescapes_newlines(self):
+        entries = ForumParser().parse(FORUM_LOG)
+        assert len(entries) == 10
+        assert entries[2].content == "主持人总结0\n第二行"
+
+    def test_empty_log(self):
+        assert list(ForumParser().iter_parse("")) == []
+
+
+class TestGraphBuilder:
+    """测试GraphBuilder的并行与增量构建"""
+
+    def setup_method(self):
+        self.states = {
+            engine: _make_state(engine)
+            for engine in ["insight", "media", "query"]
+        }
+
+    def test_parallel_build_matches_serial(self):
+        serial = GraphBuilder().build(
+            "测试主题", self.states, ForumParser().parse(FORUM_LOG), max_workers=1
+        )
+        parallel = GraphBuilder().build(
+            "测试主题", self.states, ForumParser().iter_parse(FORUM_LOG), max_workers=3
+        )
+        assert parallel.to_dict() == serial.to_dict()
+        assert len(parallel.get_nodes_by_type("source")) == 3
+        # Host 发言最多取 5 条
+        host_sections = [
+            n for n in parallel.get_nodes_by_type("section") if n.get("engine") == "host"
+        ]
+        assert len(host_sections) == GraphBuilder.MAX_HOST_SECTIONS
+
+    def test_empty_forum_generator_adds_no_host(self):
+        graph = GraphBuilder().build("测试主题", self.states, ForumParser().iter_parse(""))
+        assert graph.get_node("host") is None
+
+    def test_incremental_build_reuses_unchanged_sections(self):
+        previous = Graph.from_dict(GraphBuilder().build("测试主题", self.states).to_dict())
+
+        changed = dict(self.states)
+        changed["media"] = _make_state("media", sections=3, summary="新摘要")
+
+        builder = GraphBuilder()
+        incremental = builder.build("测试主题", changed, previous=previous)
+        fresh = GraphBuilder().build("测试主题", changed)
+
+        assert incremental.to_dict() == fresh.to_dict()
+        delta = builder.last_delta
+        assert delta.reused_sections == 8
+        assert delta.rebuilt_sections == 3
+        # media 少了一个段落及其 3 个搜索词节点
+        assert delta.expired_nodes == 4
+
+    def test_incremental_without_previous_rebuilds_everything(self):
+        builder = GraphBuilder()
+        graph = builder.build("测试主题", self.states)
+        assert builder.last_delta.reused_sections == 0
+        assert builder.last_delta.rebuilt_sections == 12
+        assert builder.last_delta.added_nodes == graph.node_count
+
+
+
+class TestGraphStorage:
+    @pytest.fixture
+    def storage(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "CHAPTER_OUTPUT_DIR", str(tmp_path))
+        return GraphStorage()
+
+    @staticmethod
+    def _graph(topic):
+        graph = Graph()
+        graph.add_node("topic", topic)
+        return graph
+
+    def test_find_previous_graph_reads_only_summaries(self, storage, tmp_path, monkeypatch):
+        storage.save(self._graph("甲"), "task_a", tmp_path / "run_a")
+        storage.save(self._graph("乙"), "task_b", tmp_path / "run_b")
+        current = storage.save(self._graph("甲"), "task_c", tmp_path / "run_c")
+
+        def fail(*_args, **_kwargs):
+            raise AssertionError("不应完整读取图谱文件")
+
+        monkeypatch.setattr(GraphStorage, "_summary_from", staticmethod(fail))
+        assert storage.find_previous_graph("甲", exclude_dir=current.parent) == tmp_path / "run_a" / GraphStorage.FILENAME
+        assert storage.find_previous_graph("丙") is None
+
+    def test_summary_is_backfilled_for_old_graphs(self, storage, tmp_path):
+        path = storage.save(self._graph("甲"), "task_a", tmp_path / "run_a")
+        (tmp_path / "run_a" / GraphStorage.META_FILENAME).unlink()
+
+        assert storage.find_previous_graph("甲") == path
+        assert storage.read_summary(path)["task_id"] == "task_a"
+        assert (tmp_path / "run_a" / GraphStorage.META_FILENAME).exists()
+        assert [g["report_id"] for g in storage.list_all_graphs()] == ["task_a"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
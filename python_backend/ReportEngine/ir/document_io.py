@@ -0,0 +1,175 @@
+"""
+整本 Document IR 的流式读写。
+
+整本IR默认落盘为“一章一行”的紧凑JSON：
+
+    {"version":"1.0","metadata":{...},"chapters":[
+    {...第1章...},
+    {...第2章...}
+    ]}
+
+文件本身仍是合法JSON，``json.load`` 与现有工具可直接读取；同时首行即为文档头
+（除 chapters 外的全部字段），其后每行一个章节，可以逐章解析而无需把整本报告读入内存。
+写入按章节进行，先写临时文件再原子替换，读者不会看到写了一半的文件。
+旧版缩进格式（或 ``pretty=True`` 写出）的文件读取时自动退回 ``json.load``。
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..utils.serialization import dumps, loads
+
+_CHAPTERS_OPEN = '"chapters":['
+_CHAPTERS_CLOSE = "]}"
+
+
+def _split_header(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in (document or {}).items() if key != "chapters"}
+
+
+class DocumentIRWriter:
+    """
+    逐章写出整本IR。
+
+    用法::
+
+        with DocumentIRWriter(path, header) as writer:
+            for chapter in chapters:
+                writer.write_chapter(chapter)
+
+    正常退出时原子替换目标文件；异常退出或调用 ``discard()`` 时丢弃临时文件，目标文件保持不变。
+    """
+
+    def __init__(self, path: str | Path, header: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.header = _split_header(header or {})
+        self.chapters_written = 0
+        self._fp = None
+        self._tmp_path: Optional[str] = None
+        self._discarded = False
+
+    def __enter__(self) -> "DocumentIRWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(
+            prefix=f".{self.path.name}.", suffix=".tmp", dir=str(self.path.parent)
+        )
+        self._fp = os.fdopen(fd, "w", encoding="utf-8", newline="\n")
+        head = dumps(self.header)
+        self._fp.write(head[:-1] + ("," if len(head) > 2 else "") + _CHAPTERS_OPEN)
+        return self
+
+    def write_chapter(self, chapter: Dict[str, Any]) -> None:
+        """追加一个章节（紧凑JSON，不含换行）"""
+        self._fp.write(",\n" if self.chapters_written else "\n")
+        self._fp.write(dumps(chapter))
+        self.chapters_written += 1
+
+    def discard(self) -> None:
+        """放弃本次写入，退出时不替换目标文件"""
+        self._discarded = True
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None and not self._discarded:
+                self._fp.write("\n" + _CHAPTERS_CLOSE + "\n")
+                self._fp.close()
+                os.replace(self._tmp_path, self.path)
+                return
+            self._fp.close()
+        except BaseException:
+            if not self._fp.closed:
+                self._fp.close()
+            raise
+        finally:
+            if self._tmp_path and os.path.exists(self._tmp_path):
+                os.unlink(self._tmp_path)
+
+
+def write_document_ir(
+    path: str | Path,
+    document: Dict[str, Any],
+    pretty: bool = False,
+    chapters: Optional[Iterable[Dict[str, Any]]] = None,
+) -> Path:
+    """
+    保存整本IR。
+
+    参数:
+        path: 目标文件。
+        document: 文档（chapters 字段可省略，改由 chapters 参数逐章提供）。
+        pretty: 是否写成缩进JSON（便于人工阅读，但读取时无法逐章流式解析）。
+        chapters: 可选的章节迭代器，默认使用 document["chapters"]。
+
+    返回:
+        Path: 写入的文件路径。
+    """
+    path = Path(path)
+    chapter_iter = chapters if chapters is not None else (document or {}).get("chapters") or []
+    if pretty:
+        payload = dict(_split_header(document))
+        payload["chapters"] = list(chapter_iter)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(dumps(payload, indent=True), encoding="utf-8")
+        return path
+    with DocumentIRWriter(path, document) as writer:
+        for chapter in chapter_iter:
+            writer.write_chapter(chapter)
+    return path
+
+
+def _open_stream(path: str | Path) -> Tuple[Optional[Dict[str, Any]], Any]:
+    """
+    打开文件并解析首行文档头。
+
+    返回 (header, fp)；文件不是逐章布局时 header 为 None，调用方应整体解析。
+    """
+    fp = open(path, "r", encoding="utf-8")
+    first = fp.readline().rstrip("\n")
+    if not first.endswith(_CHAPTERS_OPEN):
+        fp.seek(0)
+        return None, fp
+    head = first[: -len(_CHAPTERS_OPEN)].rstrip(",")
+    header = loads(head + "}") if head != "{" else {}
+    return header, fp
+
+
+def read_document_header(path: str | Path) -> Dict[str, Any]:
+    """只读取文档头（metadata/themeTokens/... 不含 chapters）"""
+    header, fp = _open_stream(path)
+    with fp:
+        if header is not None:
+            return header
+        return _split_header(loads(fp.read()))
+
+
+def iter_chapters(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """逐章读取整本IR；内存中同时只保留一个章节"""
+    header, fp = _open_stream(path)
+    with fp:
+        if header is None:
+            yield from (loads(fp.read()).get("chapters") or [])
+            return
+        for line in fp:
+            line = line.rstrip("\n")
+            if not line or line == _CHAPTERS_CLOSE:
+                continue
+            yield loads(line[:-1] if line.endswith(",") else line)
+
+
+def load_document_ir(path: str | Path) -> Dict[str, Any]:
+    """读取完整IR（兼容逐章布局与旧版缩进JSON）"""
+    with open(path, "rb") as fp:
+        return loads(fp.read())
+
+
+__all__ = [
+    "DocumentIRWriter",
+    "iter_chapters",
+    "load_document_ir",
+    "read_document_header",
+    "write_document_ir",
+]
@@ -102,6 +102,7 @@ paragraph_block: Dict[str, Any] = {
         "type": {"const": "paragraph"},
         "inlines": {
             "type": "array",
+            "minItems": 1,
             "items": {"$ref": "#/definitions/inlineRun"},
         },
         "align": {"type": "string", "enum": ["left", "center", "right", "justify"]},
@@ -118,6 +119,7 @@ list_block: Dict[str, Any] = {
         "listType": {"type": "string", "enum": ["ordered", "bullet", "task"]},
         "items": {
             "type": "array",
+            "minItems": 1,
             "items": {
                 "type": "array",
                 "items": {"$ref": "#/definitions/block"},
@@ -136,11 +138,13 @@ table_block: Dict[str, Any] = {
         "colgroup": {"type": "array", "items": {"type": "object"}},
         "rows": {
             "type": "array",
+            "minItems": 1,
             "items": {
                 "type": "object",
                 "properties": {
                     "cells": {
                         "type": "array",
+                        "minItems": 1,
                         "items": {
                             "type": "object",
                             "properties": {
@@ -152,6 +156,7 @@ table_block: Dict[str, Any] = {
                                 },
                                 "blocks": {
                                     "type": "array",
+                                    "minItems": 1,
                                     "items": {"$ref": "#/definitions/block"},
                                 },
                             },
@@ -171,10 +176,13 @@ table_block: Dict[str, Any] = {
     "additionalProperties": True,
 }
 
+# SWOT 条目的文字字段：对象形式至少要有一个非空（不全是空白）的字符串
+_SWOT_ITEM_TEXT_FIELDS = ("title", "label", "text", "detail", "description")
+
 swot_item_schema: Dict[str, Any] = {
     "title": "SwotItem",
     "oneOf": [
-        {"type": "string"},
+        {"type": "string", "minLength": 1, "pattern": "\\S"},
         {
             "type": "object",
             "properties": {
@@ -198,6 +206,10 @@ swot_item_schema: Dict[str, Any] = {
                 "priority": {"type": ["string", "number"]},
             },
             "required": [],
+            "anyOf": [
+                {"required": [name], "properties": {name: {"type": "string", "pattern": "\\S"}}}
+                for name in _SWOT_ITEM_TEXT_FIELDS
+            ],
             "additionalProperties": True,
         },
     ],
@@ -309,6 +321,7 @@ blockquote_block: Dict[str, Any] = {
         "type": {"const": "blockquote"},
         "blocks": {
             "type": "array",
+            "minItems": 1,
             "items": {"$ref": "#/definitions/block"},
         },
         "variant": {"type": "string"},
@@ -326,6 +339,7 @@ engine_quote_block: Dict[str, Any] = {
         "title": {"type": "string"},
         "blocks": {
             "type": "array",
+            "minItems": 1,
             "items": {"$ref": "#/definitions/block"},
         },
     },
@@ -419,6 +433,7 @@ callout_block: Dict[str, Any] = {
         "title": {"type": "string"},
         "blocks": {
             "type": "array",
+            "minItems": 1,
             "items": {"$ref": "#/definitions/block"},
         },
     },
@@ -433,6 +448,7 @@ kpi_block: Dict[str, Any] = {
         "type": {"const": "kpiGrid"},
         "items": {
             "type": "array",
+            "minItems": 1,
             "items": {
                 "type": "object",
                 "properties": {
@@ -464,6 +480,10 @@ widget_block: Dict[str, Any] = {
         "dataRef": {"type": "string"},
     },
     "required": ["type", "widgetId", "widgetType"],
+    "anyOf": [
+        {"required": ["data"]},
+        {"required": ["dataRef"]},
+    ],
     "additionalProperties": True,
 }
 
@@ -511,6 +531,7 @@ CHAPTER_JSON_SCHEMA: Dict[str, Any] = {
         "summary": {"type": "string"},
         "blocks": {
             "type": "array",
+            "minItems": 1,
             "items": {"$ref": "#/definitions/block"},
         },
         "xrefs": {"type": "object"},
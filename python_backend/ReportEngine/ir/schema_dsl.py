@@ -0,0 +1,155 @@
+"""
+把 JSON Schema 压缩为提示词用的简写记法（DSL）。
+
+缩进 JSON Schema 中大量的 "type"/"properties"/"items" 等关键字只为机器解析服务，
+对 LLM 而言是纯开销。这里把 ir/schema.py 与各规划节点的 Schema 改写为
+类 TypeScript 的紧凑记法，语义保持一致：
+
+    名称 = {字段!:类型, 字段:类型 /*说明*/}
+    k! 必填；str/num/int/bool/obj/any 基础类型；[T] 数组，[T]+ 非空数组；A|B 任选；"x" 常量；
+    int(1..6) 取值范围；@anyOf(...) 至少出现其一；@if a="x" then b="y" 条件约束。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+DSL_LEGEND = (
+    "记法：k!=必填字段；str/num/int/bool/obj/any=基础类型；[T]=数组；[T]+=非空数组；A|B=任选其一；"
+    '"x"=固定值；int(a..b)=取值范围；/*...*/=字段说明；@anyOf(...)=至少出现其一；'
+    "@if/then=条件约束；对象均允许额外字段。"
+)
+
+_SCALAR_NAMES = {
+    "string": "str",
+    "number": "num",
+    "integer": "int",
+    "boolean": "bool",
+    "object": "obj",
+    "array": "[any]",
+    "null": "null",
+}
+_IGNORED_KEYS = {"$schema", "format", "additionalProperties", "title", "description"}
+
+
+def _literal(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _ref_name(ref: str) -> str:
+    return ref.rsplit("/", 1)[-1]
+
+
+def _range(schema: Dict[str, Any]) -> str:
+    low, high = schema.get("minimum"), schema.get("maximum")
+    if low is None and high is None:
+        return ""
+    return f"({'' if low is None else low}..{'' if high is None else high})"
+
+
+def _is_required_clause(item: Any) -> bool:
+    """anyOf 分支是否只是 required（可附带对这些字段的 properties 限定）"""
+    return isinstance(item, dict) and "required" in item and set(item) <= {"required", "properties"}
+
+
+def _constraints(schema: Dict[str, Any]) -> List[str]:
+    """把 anyOf(required) 与 allOf(if/then) 改写为注解"""
+    notes: List[str] = []
+    any_of = schema.get("anyOf")
+    if any_of and all(_is_required_clause(item) for item in any_of):
+        names = [name for item in any_of for name in item["required"]]
+        notes.append(f"@anyOf({'|'.join(names)})")
+    for rule in schema.get("allOf", []) or []:
+        condition, consequence = rule.get("if"), rule.get("then")
+        if not condition or not consequence:
+            continue
+        notes.append(f"@if {_condition(condition)} then {_condition(consequence)}")
+    return notes
+
+
+def _condition(schema: Dict[str, Any]) -> str:
+    parts = []
+    for name, prop in (schema.get("properties") or {}).items():
+        if "const" in prop:
+            parts.append(f"{name}={_literal(prop['const'])}")
+        elif "enum" in prop:
+            parts.append(f"{name}∈{'|'.join(_literal(v) for v in prop['enum'])}")
+    return " & ".join(parts) or "…"
+
+
+def _object(schema: Dict[str, Any]) -> str:
+    properties = schema.get("properties") or {}
+    required = set(schema.get("required") or [])
+    fields = []
+    for name, prop in properties.items():
+        marker = "!" if name in required else ""
+        field = f"{name}{marker}:{type_expr(prop)}"
+        if isinstance(prop, dict) and prop.get("description"):
+            field += f" /*{prop['description']}*/"
+        fields.append(field)
+    text = "{" + ", ".join(fields) + "}"
+    notes = _constraints(schema)
+    if notes:
+        text += " " + " ".join(notes)
+    return text
+
+
+def type_expr(schema: Any) -> str:
+    """把单个 Schema 节点转为类型表达式"""
+    if not isinstance(schema, dict) or not schema:
+        return "any"
+    if "$ref" in schema:
+        return _ref_name(schema["$ref"])
+    if "const" in schema:
+        return _literal(schema["const"])
+    if "enum" in schema:
+        return "|".join(_literal(value) for value in schema["enum"])
+    for key in ("oneOf", "anyOf"):
+        variants = schema.get(key)
+        if variants and not all(_is_required_clause(item) for item in variants):
+            return " | ".join(type_expr(item) for item in variants)
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        return "|".join(_SCALAR_NAMES.get(t, t) for t in schema_type)
+    if schema_type == "array" or "items" in schema:
+        items = schema.get("items")
+        plus = "+" if schema.get("minItems") else ""
+        return (f"[{type_expr(items)}]" if items else "[any]") + plus
+    if schema_type == "object" or "properties" in schema:
+        if not schema.get("properties"):
+            return "obj"
+        return _object(schema)
+    if schema_type in _SCALAR_NAMES:
+        return _SCALAR_NAMES[schema_type] + _range(schema)
+    return "any"
+
+
+def schema_to_dsl(schema: Dict[str, Any], name: str | None = None) -> str:
+    """
+    把完整 Schema（含 definitions）转为多行 DSL 文本。
+
+    根对象在第一行，其后每个定义一行；``oneOf`` 定义（如 block）按变体逐行展开，
+    变体前标注其 title 便于 LLM 对照。
+    """
+    root_name = name or schema.get("title") or "Root"
+    lines = [f"{root_name} = {type_expr({k: v for k, v in schema.items() if k != 'definitions'})}"]
+    for def_name, definition in (schema.get("definitions") or {}).items():
+        variants = definition.get("oneOf") if isinstance(definition, dict) else None
+        if variants:
+            lines.append(f"{def_name} =")
+            for variant in variants:
+                label = variant.get("title")
+                prefix = f"{label} " if label else ""
+                lines.append(f"  | {prefix}{type_expr(variant)}")
+        else:
+            lines.append(f"{def_name} = {type_expr(definition)}")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "DSL_LEGEND",
+    "schema_to_dsl",
+    "type_expr",
+]
@@ -0,0 +1,73 @@
+"""
+整本IR流式读写的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/ir/test_document_io.py -v
+"""
+
+import json
+
+import pytest
+
+from ReportEngine.ir.document_io import (
+    DocumentIRWriter,
+    iter_chapters,
+    load_document_ir,
+    read_document_header,
+    write_document_ir,
+)
+
+
+def _document():
+    return {
+        "version": "1.0",
+        "metadata": {"title": "报告", "note": "含\n换行与 \"chapters\":[ 字样"},
+        "chapters": [
+            {"chapterId": "S1", "title": "概览", "blocks": [{"type": "paragraph", "inlines": [{"text": "甲"}]}]},
+            {"chapterId": "S2", "title": "结论", "blocks": []},
+        ],
+    }
+
+
+def test_round_trip_is_valid_json_and_streamable(tmp_path):
+    path = write_document_ir(tmp_path / "ir.json", _document())
+    document = _document()
+
+    assert json.loads(path.read_text(encoding="utf-8")) == document
+    assert load_document_ir(path) == document
+    assert read_document_header(path) == {k: v for k, v in document.items() if k != "chapters"}
+    assert list(iter_chapters(path)) == document["chapters"]
+    # 首行为文档头，其后一章一行
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2 + len(document["chapters"])
+
+
+def test_legacy_pretty_files_are_still_readable(tmp_path):
+    document = _document()
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps(document, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    assert read_document_header(path)["metadata"] == document["metadata"]
+    assert list(iter_chapters(path)) == document["chapters"]
+    write_document_ir(tmp_path / "pretty.json", document, pretty=True)
+    assert list(iter_chapters(tmp_path / "pretty.json")) == document["chapters"]
+
+
+def test_empty_document_and_failed_write_keep_target(tmp_path):
+    path = write_document_ir(tmp_path / "empty.json", {})
+    assert load_document_ir(path) == {"chapters": []}
+    assert list(iter_chapters(path)) == []
+
+    with pytest.raises(RuntimeError):
+        with DocumentIRWriter(path, {"metadata": {}}) as writer:
+            writer.write_chapter({"chapterId": "X"})
+            raise RuntimeError("boom")
+    with DocumentIRWriter(path, {"metadata": {}}) as writer:
+        writer.write_chapter({"chapterId": "Y"})
+        writer.discard()
+
+    assert load_document_ir(path) == {"chapters": []}
+    assert [p.name for p in tmp_path.iterdir()] == ["empty.json"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
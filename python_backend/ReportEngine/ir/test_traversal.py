@@ -0,0 +1,116 @@
+"""
+IR 统一遍历工具的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/ir/test_traversal.py -v
+"""
+
+import pytest
+from ReportEngine.ir.traversal import (
+    IRVisitor,
+    build_block_index,
+    iter_document_blocks,
+    walk_document,
+)
+from ReportEngine.renderers.pdf_layout_optimizer import PDFLayoutOptimizer
+
+
+def _paragraph(text):
+    return {"type": "paragraph", "inlines": [{"text": text}]}
+
+
+DOCUMENT = {
+    "metadata": {"hero": {"kpis": [{"label": "A", "value": "123"}]}},
+    "chapters": [
+        {
+            "chapterId": "c1",
+            "blocks": [
+                _paragraph("开头"),
+                {
+                    "type": "callout",
+                    "blocks": [_paragraph("提示"), {"type": "math", "latex": "x^2"}],
+                },
+                {
+                    "type": "list",
+                    "items": [[_paragraph("列表项")], "无效"],
+                },
+            ],
+        },
+        {
+            "chapterId": "c2",
+            "blocks": [
+                {
+                    "type": "table",
+                    "rows": [
+                        {"cells": [{"blocks": [{"type": "widget", "widgetId": "w1"}]}]},
+                    ],
+                },
+                "不是对象",
+                {"type": "widget", "widgetId": "w2"},
+            ],
+        },
+    ],
+}
+
+
+class TestTraversal:
+    """测试先序遍历、路径与索引"""
+
+    def test_preorder_paths(self):
+        paths = [ref.path for ref in iter_document_blocks(DOCUMENT)]
+        assert paths == [
+            "chapters[0].blocks[0]",
+            "chapters[0].blocks[1]",
+            "chapters[0].blocks[1].blocks[0]",
+            "chapters[0].blocks[1].blocks[1]",
+            "chapters[0].blocks[2]",
+            "chapters[0].blocks[2].items[0][0]",
+            "chapters[1].blocks[0]",
+            "chapters[1].blocks[0].rows[0].cells[0].blocks[0]",
+            "chapters[1].blocks[2]",
+        ]
+
+    def test_refs_carry_context(self):
+        index = build_block_index(DOCUMENT)
+        nested = index.by_id["w1"]
+        assert nested.chapter["chapterId"] == "c2"
+        assert nested.parent.type == "table"
+        assert nested.container == "cells"
+        assert nested.nested_in_container
+        assert not index.by_id["w2"].nested_in_container
+        assert [ref.block_id for ref in index.of_type("widget")] == ["w1", "w2"]
+        assert len(index.of_type("paragraph", "math")) == 4
+
+    def test_visitors_share_one_walk(self):
+        class Counter(IRVisitor):
+            def __init__(self):
+                self.widgets = 0
+                self.others = 0
+
+            def visit_widget(self, ref):
+                self.widgets += 1
+
+            def generic_visit(self, ref):
+                self.others += 1
+
+        first, second = Counter(), Counter()
+        index = walk_document(DOCUMENT, [first, second])
+        assert (first.widgets, first.others) == (2, len(index) - 2)
+        assert (second.widgets, second.others) == (first.widgets, first.others)
+
+
+class TestLayoutStatsVisitor:
+    """布局统计走统一遍历后结果保持不变"""
+
+    def test_stats_skip_list_and_table_contents(self):
+        stats = PDFLayoutOptimizer()._analyze_document(DOCUMENT)
+        assert stats["hero_kpi_count"] == 1
+        assert stats["callout_count"] == 1
+        assert stats["table_count"] == 1
+        # 表格单元格中的 w1 不计入
+        assert stats["chart_count"] == 1
+        assert stats["total_content_length"] == len("开头") + len("提示")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
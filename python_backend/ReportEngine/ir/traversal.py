@@ -0,0 +1,262 @@
+"""
+Document IR 的统一遍历工具。
+
+IR 中的 block 可以出现在三类容器里：
+- 任意 block 的 ``blocks``（callout/blockquote/engineQuote 等）；
+- list 的 ``items``（每个 item 是一个 block 数组）；
+- table 的 ``rows[].cells[].blocks``。
+
+过去图表审查、PDF 的图表/词云/公式转换、布局分析与离线校验脚本各自维护
+一份递归逻辑，一次 PDF 导出要完整遍历 IR 五次以上。本模块提供：
+
+- ``iter_blocks`` / ``iter_document_blocks``：先序（DFS）生成 ``BlockRef``，
+  携带 path（与 ``IRValidator`` 相同的 ``chapters[0].blocks[2].items[1][0]`` 语法）、
+  所在章节、父节点与容器类型；
+- ``IRVisitor``：按 ``visit_<type>`` 分派的访问者基类；
+- ``walk_document``：一次遍历同时驱动多个访问者，并返回 ``BlockIndex``，
+  后续步骤可按类型/ID/路径直接定位 block，无需再次遍历。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+@dataclass
+class BlockRef:
+    """遍历过程中某个 block 的位置信息"""
+
+    block: Dict[str, Any]
+    path: str
+    index: int
+    depth: int
+    container: str = "blocks"
+    chapter: Optional[Dict[str, Any]] = None
+    chapter_index: int = -1
+    parent: Optional["BlockRef"] = None
+
+    @property
+    def type(self) -> str:
+        """block 的 type 字段（缺失时为空字符串）"""
+        return self.block.get("type") or ""
+
+    @property
+    def block_id(self) -> Optional[str]:
+        """block 的业务ID（widgetId 优先，其次 id）"""
+        return self.block.get("widgetId") or self.block.get("id")
+
+    @property
+    def nested_in_container(self) -> bool:
+        """是否位于 list item 或表格单元格内部（含祖先）"""
+        ref: Optional[BlockRef] = self
+        while ref is not None:
+            if ref.container != "blocks":
+                return True
+            ref = ref.parent
+        return False
+
+
+def iter_blocks(
+    blocks: Any,
+    path: str = "blocks",
+    *,
+    chapter: Optional[Dict[str, Any]] = None,
+    chapter_index: int = -1,
+    parent: Optional[BlockRef] = None,
+    depth: int = 0,
+    container: str = "blocks",
+) -> Iterator[BlockRef]:
+    """
+    先序遍历 block 列表（含嵌套 blocks、list items、table cells）。
+
+    非 dict 元素会被跳过，但仍占用索引，保证 path 与原始数组下标一致。
+
+    参数:
+        blocks: block 数组
+        path: 该数组在文档中的路径前缀
+        chapter: 所属章节
+        chapter_index: 章节下标
+        parent: 父 block 的 BlockRef
+        depth: 当前嵌套深度
+        container: 数组所属容器类型：blocks/items/cells
+
+    返回:
+        Iterator[BlockRef]: 依次产出每个 block 的位置信息
+    """
+    if not isinstance(blocks, list):
+        return
+    for idx, block in enumerate(blocks):
+        if not isinstance(block, dict):
+            continue
+        block_path = f"{path}[{idx}]"
+        ref = BlockRef(
+            block=block,
+            path=block_path,
+            index=idx,
+            depth=depth,
+            container=container,
+            chapter=chapter,
+            chapter_index=chapter_index,
+            parent=parent,
+        )
+        yield ref
+
+        child_kwargs = {
+            "chapter": chapter,
+            "chapter_index": chapter_index,
+            "parent": ref,
+            "depth": depth + 1,
+        }
+        nested = block.get("blocks")
+        if isinstance(nested, list):
+            yield from iter_blocks(nested, f"{block_path}.blocks", **child_kwargs)
+
+        block_type = block.get("type")
+        if block_type == "list":
+            for item_idx, item in enumerate(block.get("items") or []):
+                if isinstance(item, list):
+                    yield from iter_blocks(
+                        item, f"{block_path}.items[{item_idx}]", container="items", **child_kwargs
+                    )
+        elif block_type == "table":
+            for row_idx, row in enumerate(block.get("rows") or []):
+                if not isinstance(row, dict):
+                    continue
+                for cell_idx, cell in enumerate(row.get("cells") or []):
+                    if isinstance(cell, dict):
+                        yield from iter_blocks(
+                            cell.get("blocks"),
+                            f"{block_path}.rows[{row_idx}].cells[{cell_idx}].blocks",
+                            container="cells",
+                            **child_kwargs,
+                        )
+
+
+def iter_document_blocks(document_ir: Dict[str, Any]) -> Iterator[BlockRef]:
+    """
+    遍历整篇文档的所有 block。
+
+    优先使用 ``chapters``，缺失时兼容旧版 ``sections``；章节的 ``children``
+    子章节会被递归展开，其 block 归属到顶层章节下标。
+    """
+    chapters = (document_ir or {}).get("chapters") or (document_ir or {}).get("sections") or []
+
+    def _walk_chapter(chapter: Dict[str, Any], path: str, chapter_index: int) -> Iterator[BlockRef]:
+        yield from iter_blocks(
+            chapter.get("blocks"),
+            f"{path}.blocks",
+            chapter=chapter,
+            chapter_index=chapter_index,
+        )
+        for child_idx, child in enumerate(chapter.get("children") or []):
+            if isinstance(child, dict):
+                yield from _walk_chapter(child, f"{path}.children[{child_idx}]", chapter_index)
+
+    for chapter_idx, chapter in enumerate(chapters):
+        if isinstance(chapter, dict):
+            yield from _walk_chapter(chapter, f"chapters[{chapter_idx}]", chapter_idx)
+
+
+class IRVisitor:
+    """
+    IR 访问者基类。
+
+    子类实现 ``visit_<type>(ref)``（如 ``visit_widget``、``visit_math``）处理特定类型，
+    或覆盖 ``generic_visit`` 处理所有未单独声明的类型。``begin``/``finish`` 分别在
+    遍历开始前和结束后调用一次。
+    """
+
+    def begin(self, document_ir: Dict[str, Any]) -> None:
+        """遍历开始前调用"""
+
+    def visit(self, ref: BlockRef) -> None:
+        """按 block 类型分派"""
+        method = getattr(self, f"visit_{ref.type}", None) if ref.type else None
+        if method is None:
+            self.generic_visit(ref)
+        else:
+            method(ref)
+
+    def generic_visit(self, ref: BlockRef) -> None:
+        """未声明专用方法的类型默认忽略"""
+
+    def finish(self) -> None:
+        """遍历结束后调用"""
+
+
+@dataclass
+class BlockIndex:
+    """一次遍历得到的 block 索引：按类型、ID、路径定位 block"""
+
+    refs: List[BlockRef] = field(default_factory=list)
+    by_type: Dict[str, List[BlockRef]] = field(default_factory=dict)
+    by_id: Dict[str, BlockRef] = field(default_factory=dict)
+    by_path: Dict[str, BlockRef] = field(default_factory=dict)
+
+    def add(self, ref: BlockRef) -> None:
+        """登记一个 block（同ID重复出现时保留第一个）"""
+        self.refs.append(ref)
+        self.by_type.setdefault(ref.type, []).append(ref)
+        self.by_path[ref.path] = ref
+        block_id = ref.block_id
+        if isinstance(block_id, str) and block_id and block_id not in self.by_id:
+            self.by_id[block_id] = ref
+
+    def of_type(self, *block_types: str) -> List[BlockRef]:
+        """按文档顺序返回指定类型的 block"""
+        if len(block_types) == 1:
+            return list(self.by_type.get(block_types[0], []))
+        wanted = set(block_types)
+        return [ref for ref in self.refs if ref.type in wanted]
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def __iter__(self) -> Iterator[BlockRef]:
+        return iter(self.refs)
+
+
+def walk_document(
+    document_ir: Dict[str, Any],
+    visitors: Sequence[IRVisitor] = (),
+) -> BlockIndex:
+    """
+    单次遍历文档，依次把每个 block 交给所有访问者，并构建 BlockIndex。
+
+    访问顺序为先序：父 block 先于子 block，访问者可以在 visit 中就地修改 block
+    （例如写入 mathId），但不应增删当前正在遍历的数组。
+
+    参数:
+        document_ir: Document IR
+        visitors: 需要融合在同一次遍历中的访问者
+
+    返回:
+        BlockIndex: 本次遍历得到的索引
+    """
+    index = BlockIndex()
+    for visitor in visitors:
+        visitor.begin(document_ir)
+    for ref in iter_document_blocks(document_ir):
+        index.add(ref)
+        for visitor in visitors:
+            visitor.visit(ref)
+    for visitor in visitors:
+        visitor.finish()
+    return index
+
+
+def build_block_index(document_ir: Dict[str, Any]) -> BlockIndex:
+    """构建文档的 block 索引（不带访问者的 walk_document）"""
+    return walk_document(document_ir)
+
+
+__all__ = [
+    "BlockRef",
+    "BlockIndex",
+    "IRVisitor",
+    "iter_blocks",
+    "iter_document_blocks",
+    "walk_document",
+    "build_block_index",
+]
@@ -11,8 +11,9 @@ from loguru import logger
 
 from ..core import TemplateSection
 from ..prompts import (
-    SYSTEM_PROMPT_DOCUMENT_LAYOUT,
     build_document_layout_prompt,
+    get_system_prompt,
+    normalize_encoding,
 )
 from ..utils.json_parser import RobustJSONParser, JSONParseError
 from .base_node import BaseNode
@@ -25,9 +26,10 @@ class DocumentLayoutNode(BaseNode):
     结合模板切片、报告摘要与论坛讨论，指导整本书的视觉与结构基调。
     """
 
-    def __init__(self, llm_client):
-        """记录LLM客户端并设置节点名字，供BaseNode日志使用"""
+    def __init__(self, llm_client, prompt_encoding: str = "pretty"):
+        """记录LLM客户端并设置节点名字，供BaseNode日志使用；prompt_encoding 为提示词编码模式（pretty/compact/dsl）"""
         super().__init__(llm_client, "DocumentLayoutNode")
+        self.prompt_encoding = normalize_encoding(prompt_encoding)
         # 初始化鲁棒JSON解析器，启用所有修复策略
         self.json_parser = RobustJSONParser(
             enable_json_repair=True,
@@ -74,9 +76,9 @@ class DocumentLayoutNode(BaseNode):
             "forumLogs": forum_logs,
         }
 
-        user_message = build_document_layout_prompt(payload)
+        user_message = build_document_layout_prompt(payload, self.prompt_encoding)
         response = self.llm_client.stream_invoke_to_string(
-            SYSTEM_PROMPT_DOCUMENT_LAYOUT,
+            get_system_prompt("document_layout", self.prompt_encoding),
             user_message,
             temperature=0.3,
             top_p=0.9,
@@ -0,0 +1,68 @@
+"""
+章节单遍规整与篇幅统计的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/nodes/test_chapter_sanitizer.py -v
+"""
+
+import pytest
+
+from ReportEngine.nodes.chapter_generation_node import ChapterContentError, ChapterGenerationNode
+
+
+@pytest.fixture
+def node():
+    # 规整逻辑不依赖LLM与存储
+    return ChapterGenerationNode.__new__(ChapterGenerationNode)
+
+
+def _para(text):
+    return {"type": "paragraph", "inlines": [{"text": text, "marks": []}]}
+
+
+def test_single_pass_merges_and_counts(node):
+    chapter = {
+        "title": "测试章节",
+        "blocks": [
+            {"type": "heading", "level": 2, "text": "标题"},
+            _para("第一段"),
+            _para("未完"),
+            "字符串正文",
+            42,
+            {
+                "type": "callout",
+                "tone": "info",
+                "blocks": [["丙", ""], _para("甲"), _para("乙")],
+            },
+            {"type": "list", "listType": "bullet", "items": [[_para("一"), _para("二")], "三"]},
+            {"type": "table", "rows": [{"cells": [{"blocks": [_para("单元格")]}]}]},
+        ],
+    }
+    stats = node._sanitize_chapter_blocks(chapter)
+
+    types = [block["type"] for block in chapter["blocks"]]
+    assert types == ["heading", "paragraph", "callout", "list", "table"]
+    # 相邻短片段与字符串被合并为一段
+    assert [run["text"] for run in chapter["blocks"][1]["inlines"]] == ["第一段", "未完", "字符串正文"]
+    callout_blocks = chapter["blocks"][2]["blocks"]
+    assert [run["text"] for block in callout_blocks for run in block["inlines"]] == ["丙", "甲", "乙"]
+    assert chapter["blocks"][3]["items"] == [[{"type": "paragraph", "inlines": [{"text": "一", "marks": []}, {"text": "二", "marks": []}]}], [_para("三")]]
+
+    assert stats.non_heading_blocks == 4
+    assert stats.narrative_characters == len("第一段未完字符串正文") + 3 + 3
+    assert stats.body_characters == stats.narrative_characters + len("单元格")
+
+
+def test_density_uses_collected_stats(node):
+    chapter = {"title": "稀疏章节", "blocks": [_para("短"), {"type": "hr"}]}
+    stats = node._sanitize_chapter_blocks(chapter)
+    with pytest.raises(ChapterContentError) as exc_info:
+        node._ensure_content_density(chapter, stats)
+    assert exc_info.value.body_characters == stats.body_characters == 1
+
+    rich = {"title": "充实章节", "blocks": [_para("内容。" * 200), _para("补充。" * 120)]}
+    node._ensure_content_density(rich, node._sanitize_chapter_blocks(rich))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -11,8 +11,9 @@ from loguru import logger
 
 from ..core import TemplateSection
 from ..prompts import (
-    SYSTEM_PROMPT_WORD_BUDGET,
     build_word_budget_prompt,
+    get_system_prompt,
+    normalize_encoding,
 )
 from ..utils.json_parser import RobustJSONParser, JSONParseError
 from .base_node import BaseNode
@@ -25,9 +26,10 @@ class WordBudgetNode(BaseNode):
     输出总字数、全局写作准则以及每章/小节的 target/min/max 字数约束。
     """
 
-    def __init__(self, llm_client):
-        """仅记录LLM客户端引用，方便run阶段发起请求"""
+    def __init__(self, llm_client, prompt_encoding: str = "pretty"):
+        """仅记录LLM客户端引用，方便run阶段发起请求；prompt_encoding 为提示词编码模式（pretty/compact/dsl）"""
         super().__init__(llm_client, "WordBudgetNode")
+        self.prompt_encoding = normalize_encoding(prompt_encoding)
         # 初始化鲁棒JSON解析器，启用所有修复策略
         self.json_parser = RobustJSONParser(
             enable_json_repair=True,
@@ -71,9 +73,9 @@ class WordBudgetNode(BaseNode):
             "reports": reports,
             "forumLogs": forum_logs,
         }
-        user = build_word_budget_prompt(payload)
+        user = build_word_budget_prompt(payload, self.prompt_encoding)
         response = self.llm_client.stream_invoke_to_string(
-            SYSTEM_PROMPT_WORD_BUDGET,
+            get_system_prompt("word_budget", self.prompt_encoding),
             user,
             temperature=0.25,
             top_p=0.85,
@@ -20,6 +20,11 @@ from .prompts import (
     build_chapter_recovery_payload,
     build_document_layout_prompt,
     build_word_budget_prompt,
+    PROMPT_ENCODINGS,
+    normalize_encoding,
+    encode_payload,
+    encode_schema,
+    get_system_prompt,
 )
 
 __all__ = [
@@ -38,4 +43,9 @@ __all__ = [
     "build_chapter_recovery_payload",
     "build_document_layout_prompt",
     "build_word_budget_prompt",
+    "PROMPT_ENCODINGS",
+    "normalize_encoding",
+    "encode_payload",
+    "encode_schema",
+    "get_system_prompt",
 ]
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, Iterator, List
 
 from loguru import logger
 
+from ReportEngine.ir.document_io import DocumentIRWriter
 from ReportEngine.utils.chart_review_service import get_chart_review_service
 
 
@@ -37,32 +39,65 @@ class MarkdownRenderer:
             str: Markdown 字符串
         """
         self.document = document_ir or {}
-
-        # 使用统一的 ChartReviewService 进行图表审查与修复
-        # 虽然 Markdown 渲染时图表会降级为表格，但仍需确保数据有效
-        # review_document 返回本次会话的统计信息（线程安全，此处不使用）
-        chart_service = get_chart_review_service()
-        _ = chart_service.review_document(
+        chunks = self.iter_render(
             self.document,
+            self.document.get("chapters", []) or [],
             ir_file_path=ir_file_path,
-            reset_stats=True,
-            save_on_repair=bool(ir_file_path)
         )
+        return "".join(chunks).strip()
 
-        self.metadata = self.document.get("metadata", {}) or {}
+    def iter_render(
+        self,
+        header: Dict[str, Any],
+        chapters: Iterable[Dict[str, Any]],
+        ir_file_path: str | None = None,
+    ) -> Iterator[str]:
+        """
+        逐章渲染Markdown，边读边产出文本片段。
 
-        parts: List[str] = []
-        title = self.metadata.get("title") or self.metadata.get("query") or "报告"
-        if title:
-            parts.append(f"# {self._escape_text(title)}")
-            parts.append("")
+        配合 ``ir.iter_chapters`` 使用时，整本IR不会同时驻留内存：
+        每章独立完成图表审查与渲染后即可丢弃。
 
-        for chapter in self.document.get("chapters", []) or []:
-            chapter_md = self._render_chapter(chapter)
-            if chapter_md:
-                parts.append(chapter_md)
+        参数:
+            header: 文档头（metadata等，chapters字段会被忽略）
+            chapters: 章节迭代器
+            ir_file_path: 可选，IR 文件路径；有图表被修复时，修复后的章节
+                会逐章写回该文件（无修复时文件保持不变）
+
+        返回:
+            Iterator[str]: Markdown 片段，直接拼接即为完整文档
+        """
+        self.metadata = (header or {}).get("metadata", {}) or {}
 
-        return "\n".join(part for part in parts if part is not None).strip()
+        # 使用统一的 ChartReviewService 进行图表审查与修复
+        # 虽然 Markdown 渲染时图表会降级为表格，但仍需确保数据有效
+        chart_service = get_chart_review_service()
+        repaired_total = 0
+
+        writer = DocumentIRWriter(ir_file_path, header) if ir_file_path else None
+        with writer if writer else nullcontext():
+            title = self.metadata.get("title") or self.metadata.get("query") or "报告"
+            if title:
+                yield f"# {self._escape_text(title)}\n"
+
+            for chapter in chapters:
+                stats = chart_service.review_document(
+                    {"metadata": self.metadata, "chapters": [chapter]},
+                    reset_stats=True,
+                    save_on_repair=False,
+                )
+                repaired_total += stats.repaired_total
+                if writer:
+                    writer.write_chapter(chart_service.strip_chapter_metadata(chapter))
+
+                chapter_md = self._render_chapter(chapter)
+                if chapter_md:
+                    yield f"\n{chapter_md}"
+
+            if writer and not repaired_total:
+                writer.discard()
+        if writer and repaired_total:
+            logger.info(f"MarkdownRenderer: 修复后的 IR 已保存到 {ir_file_path}")
 
     # ===== 章节与块级渲染 =====
 
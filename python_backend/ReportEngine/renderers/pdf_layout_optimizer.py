@@ -16,12 +16,79 @@ from __future__ import annotations
 
 import json
 import re
+from array import array
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from loguru import logger
 
+from ReportEngine.ir.traversal import (
+    BlockRef,
+    IRVisitor,
+    iter_document_blocks,
+    walk_document,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:  # pragma: no cover - 可选依赖（随weasyprint安装）
+    TTFont = None
+
+FONTS_DIR = Path(__file__).parent / "assets" / "fonts"
+# 与 PDFRenderer._get_font_path 的优先级一致：完整字体优先，其次子集
+WIDTH_FONT_CANDIDATES = (
+    "SourceHanSerifSC-Medium.otf",
+    "SourceHanSerifSC-Medium-Subset.ttf",
+    "SourceHanSerifSC-Medium-Subset.otf",
+)
+# 字宽表覆盖基本多文种平面，其余码位按字符类别估算
+_BMP_SIZE = 0x10000
+# 短文本逐字查表比NumPy调用开销更低
+_VECTORIZE_MIN_LENGTH = 32
+
+
+def load_glyph_advances(font_path: Optional[str | Path] = None) -> Dict[int, float]:
+    """
+    读取字体中每个码位的字形前进宽度（单位: em）
+
+    参数:
+        font_path: 字体文件路径，为None时使用 assets/fonts 中打包的思源宋体
+
+    返回:
+        Dict[int, float]: 码位 -> 宽度；fontTools缺失或找不到字体时返回空字典
+    """
+    if TTFont is None:
+        logger.info("未安装fontTools，文本宽度按字符类别估算")
+        return {}
+    if font_path is None:
+        font_path = next(
+            (FONTS_DIR / name for name in WIDTH_FONT_CANDIDATES if (FONTS_DIR / name).exists()),
+            None,
+        )
+        if font_path is None:
+            logger.warning(f"未找到字体文件，文本宽度按字符类别估算: {FONTS_DIR}")
+            return {}
+    try:
+        font = TTFont(str(font_path), lazy=True)
+        units_per_em = float(font['head'].unitsPerEm)
+        metrics = font['hmtx'].metrics
+        advances = {
+            code: metrics[glyph][0] / units_per_em
+            for code, glyph in font.getBestCmap().items()
+            if glyph in metrics
+        }
+        font.close()
+    except Exception as exc:
+        logger.warning(f"读取字体字宽失败，文本宽度按字符类别估算: {font_path} ({exc})")
+        return {}
+    return advances
+
 
 @dataclass
 class KPICardLayout:
@@ -156,10 +223,9 @@ class PDFLayoutOptimizer:
     根据内容特征自动优化PDF布局，防止溢出和排版问题。
     """
 
-    # 字符宽度估算系数（基于常见中文字体）
+    # 字符宽度估算系数（基于常见中文字体），仅用于字体未覆盖的字符
     # 中文字符通常是等宽的，约等于字号的像素值
     # 英文和数字约为字号的0.5-0.6倍
-    # 更新：使用更精确的系数以更好地预测溢出
     CHAR_WIDTH_FACTOR = {
         'chinese': 1.05,     # 中文字符（略微增加以确保安全边界）
         'english': 0.58,     # 英文字母
@@ -168,6 +234,13 @@ class PDFLayoutOptimizer:
         'percent': 0.7,      # 百分号等特殊符号
     }
 
+    # 字体实测字宽的安全边界，与中文系数1.05保持一致
+    GLYPH_WIDTH_MARGIN = 1.05
+
+    # 类级缓存的字宽表（BMP码位 -> em）及其ndarray视图，首次估算时构建
+    _width_table = None
+    _width_ndarray = None
+
     def __init__(self, config: Optional[PDFLayoutConfig] = None):
         """
         初始化优化器
@@ -177,6 +250,7 @@ class PDFLayoutOptimizer:
         """
         self.config = config or self._create_default_config()
         self.optimization_log = []
+        self.last_optimization: Optional[Dict[str, Any]] = None
 
     @staticmethod
     def _create_default_config() -> PDFLayoutConfig:
@@ -191,12 +265,18 @@ class PDFLayoutOptimizer:
             data_block=DataBlockLayout(),
         )
 
-    def optimize_for_document(self, document_ir: Dict[str, Any]) -> PDFLayoutConfig:
+    def optimize_for_document(
+        self,
+        document_ir: Dict[str, Any],
+        stats: Optional[Dict[str, Any]] = None
+    ) -> PDFLayoutConfig:
         """
         根据文档IR内容优化布局配置
 
         参数:
             document_ir: Document IR数据
+            stats: 已统计好的文档特征（例如与其他遍历融合时由
+                ``create_stats_visitor`` 得到），为None时自行遍历文档
 
         返回:
             PDFLayoutConfig: 优化后的布局配置
@@ -204,16 +284,21 @@ class PDFLayoutOptimizer:
         logger.info("开始分析文档并优化布局...")
 
         # 分析文档结构
-        stats = self._analyze_document(document_ir)
+        if stats is None:
+            stats = self._analyze_document(document_ir)
 
         # 根据分析结果调整配置
         optimized_config = self._adjust_config_based_on_stats(stats)
 
-        # 记录优化日志
-        self._log_optimization(stats, optimized_config)
+        # 记录优化日志，供调用方保存（_log_optimization 会清空 optimization_log）
+        self.last_optimization = self._log_optimization(stats, optimized_config)
 
         return optimized_config
 
+    def create_stats_visitor(self) -> LayoutStatsVisitor:
+        """创建布局统计访问者，可与其他访问者在同一次 walk_document 中执行"""
+        return LayoutStatsVisitor(self)
+
     def _analyze_document(self, document_ir: Dict[str, Any]) -> Dict[str, Any]:
         """
         分析文档内容特征
@@ -228,7 +313,14 @@ class PDFLayoutOptimizer:
         - hero_kpi_count: Hero区域的KPI数量
         - max_hero_kpi_value_length: Hero区域最长KPI数值长度
         """
-        stats = {
+        visitor = self.create_stats_visitor()
+        walk_document(document_ir, [visitor])
+        return visitor.stats
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        """文档统计的初始值"""
+        return {
             'kpi_count': 0,
             'table_count': 0,
             'chart_count': 0,
@@ -242,7 +334,8 @@ class PDFLayoutOptimizer:
             'max_hero_kpi_value_length': 0,
         }
 
-        # 分析hero区域的KPI
+    def _analyze_hero(self, document_ir: Dict[str, Any], stats: Dict[str, Any]):
+        """分析hero区域的KPI"""
         metadata = document_ir.get('metadata', {})
         hero = metadata.get('hero', {})
         if hero:
@@ -255,33 +348,8 @@ class PDFLayoutOptimizer:
                     len(value)
                 )
 
-        # 优先使用chapters，fallback到sections
-        chapters = document_ir.get('chapters', [])
-        if not chapters:
-            chapters = document_ir.get('sections', [])
-
-        # 遍历章节
-        for chapter in chapters:
-            self._analyze_chapter(chapter, stats)
-
-        logger.info(f"文档分析完成: {stats}")
-        return stats
-
-    def _analyze_chapter(self, chapter: Dict[str, Any], stats: Dict[str, Any]):
-        """分析单个章节"""
-        # 分析章节中的blocks
-        blocks = chapter.get('blocks', [])
-        for block in blocks:
-            self._analyze_block(block, stats)
-
-        # 递归处理子章节（如果有）
-        children = chapter.get('children', [])
-        for child in children:
-            if isinstance(child, dict):
-                self._analyze_chapter(child, stats)
-
     def _analyze_block(self, block: Dict[str, Any], stats: Dict[str, Any]):
-        """分析单个block节点"""
+        """分析单个block节点（不递归，嵌套blocks由遍历器负责）"""
         if not isinstance(block, dict):
             return
 
@@ -341,12 +409,6 @@ class PDFLayoutOptimizer:
             if len(text) > 500:
                 stats['has_long_text'] = True
 
-        # 递归处理嵌套的blocks
-        nested_blocks = block.get('blocks', [])
-        if nested_blocks:
-            for nested in nested_blocks:
-                self._analyze_block(nested, stats)
-
     def _extract_text_from_paragraph(self, paragraph: Dict[str, Any]) -> str:
         """从paragraph block中提取纯文本"""
         text_parts = []
@@ -362,8 +424,72 @@ class PDFLayoutOptimizer:
 
     def _analyze_section(self, section: Dict[str, Any], stats: Dict[str, Any]):
         """递归分析章节（保留用于向后兼容）"""
-        # 这个方法保留用于向后兼容，实际上调用_analyze_chapter
-        self._analyze_chapter(section, stats)
+        for ref in iter_document_blocks({'chapters': [section]}):
+            if not ref.nested_in_container:
+                self._analyze_block(ref.block, stats)
+
+    @classmethod
+    def _char_width_factor(cls, char: str) -> float:
+        """按字符类别返回宽度系数（em），用于字体未覆盖的字符"""
+        if '\u4e00' <= char <= '\u9fff':  # 中文字符范围
+            return cls.CHAR_WIDTH_FACTOR['chinese']
+        if char.isalpha():
+            return cls.CHAR_WIDTH_FACTOR['english']
+        if char.isdigit():
+            return cls.CHAR_WIDTH_FACTOR['number']
+        if char in '%％':  # 百分号
+            return cls.CHAR_WIDTH_FACTOR['percent']
+        return cls.CHAR_WIDTH_FACTOR['symbol']
+
+    @classmethod
+    def _build_width_table(cls, font_path: Optional[str | Path] = None):
+        """
+        构建BMP范围的逐码位字宽表（em）
+
+        先按字符类别填充，再用字体实测字宽（乘以安全边界）覆盖字体包含的码位。
+        返回 array('d')：逐字查表快于NumPy标量索引，批量计算时可零拷贝转为ndarray。
+        """
+        widths = [cls._char_width_factor(chr(code)) for code in range(_BMP_SIZE)]
+        for code, advance in load_glyph_advances(font_path).items():
+            if code < _BMP_SIZE:
+                widths[code] = advance * cls.GLYPH_WIDTH_MARGIN
+        return array('d', widths)
+
+    @classmethod
+    def _get_width_table(cls):
+        """返回类级缓存的字宽表，首次调用时构建"""
+        if cls._width_table is None:
+            table = cls._build_width_table()
+            if np is not None:
+                cls._width_ndarray = np.frombuffer(table, dtype=np.float64)
+            cls._width_table = table
+        return cls._width_table
+
+    def _text_width_units(self, text: str) -> float:
+        """
+        计算文本在1px字号下的宽度（即各字符em宽度之和）
+
+        长文本用NumPy批量查表，短文本逐字查表。
+        """
+        if not text:
+            return 0.0
+        table = self._get_width_table()
+        widths = self._width_ndarray
+        if widths is not None and len(text) >= _VECTORIZE_MIN_LENGTH:
+            codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+            in_bmp = codes < _BMP_SIZE
+            if in_bmp.all():
+                return float(widths[codes].sum())
+            total = float(widths[codes[in_bmp]].sum())
+            total += sum(self._char_width_factor(chr(code)) for code in codes[~in_bmp].tolist())
+            return total
+        if max(text) < '\U00010000':
+            return sum(map(table.__getitem__, map(ord, text)))
+        total = 0.0
+        for char in text:
+            code = ord(char)
+            total += table[code] if code < _BMP_SIZE else self._char_width_factor(char)
+        return total
 
     def _estimate_text_width(self, text: str, font_size: int) -> float:
         """
@@ -378,21 +504,7 @@ class PDFLayoutOptimizer:
         """
         if not text:
             return 0.0
-
-        width = 0.0
-        for char in text:
-            if '\u4e00' <= char <= '\u9fff':  # 中文字符范围
-                width += font_size * self.CHAR_WIDTH_FACTOR['chinese']
-            elif char.isalpha():
-                width += font_size * self.CHAR_WIDTH_FACTOR['english']
-            elif char.isdigit():
-                width += font_size * self.CHAR_WIDTH_FACTOR['number']
-            elif char in '%％':  # 百分号
-                width += font_size * self.CHAR_WIDTH_FACTOR['percent']
-            else:
-                width += font_size * self.CHAR_WIDTH_FACTOR['symbol']
-
-        return width
+        return font_size * self._text_width_units(text)
 
     def _check_text_overflow(self, text: str, font_size: int, max_width: int) -> bool:
         """
@@ -431,15 +543,21 @@ class PDFLayoutOptimizer:
         if not text:
             return max_font_size, False
 
-        # 从最大字号开始尝试
-        for font_size in range(max_font_size, min_font_size - 1, -1):
-            if not self._check_text_overflow(text, font_size, max_width):
-                # 如果需要缩小字号
-                needs_adjustment = font_size < max_font_size
-                return font_size, needs_adjustment
+        units = self._text_width_units(text)
+        if units <= 0:
+            return max_font_size, False
+
+        # 宽度与字号成正比，不溢出的最大字号可直接求出；再校正浮点取整误差
+        font_size = min(max_font_size, int(max_width // units))
+        if font_size * units > max_width:
+            font_size -= 1
+        elif font_size < max_font_size and (font_size + 1) * units <= max_width:
+            font_size += 1
 
-        # 如果连最小字号都溢出，返回最小字号并标记需要调整
-        return min_font_size, True
+        if font_size < min_font_size:
+            # 如果连最小字号都溢出，返回最小字号并标记需要调整
+            return min_font_size, True
+        return font_size, font_size < max_font_size
 
     def _detect_kpi_overflow_issues(self, stats: Dict[str, Any]) -> List[str]:
         """
@@ -1397,8 +1515,35 @@ main > .chapter:first-of-type {{
         return css
 
 
+class LayoutStatsVisitor(IRVisitor):
+    """
+    统计布局相关的文档特征，作为 walk_document 的访问者使用。
+
+    与历史行为保持一致：只统计经由 ``blocks`` 嵌套可达的节点，
+    列表项与表格单元格内部的 block 不计入。
+    """
+
+    def __init__(self, optimizer: PDFLayoutOptimizer):
+        self.optimizer = optimizer
+        self.stats: Dict[str, Any] = optimizer._empty_stats()
+
+    def begin(self, document_ir: Dict[str, Any]) -> None:
+        self.stats = self.optimizer._empty_stats()
+        self.optimizer._analyze_hero(document_ir, self.stats)
+
+    def generic_visit(self, ref: BlockRef) -> None:
+        if ref.nested_in_container:
+            return
+        self.optimizer._analyze_block(ref.block, self.stats)
+
+    def finish(self) -> None:
+        logger.info(f"文档分析完成: {self.stats}")
+
+
 __all__ = [
     'PDFLayoutOptimizer',
+    'load_glyph_advances',
+    'LayoutStatsVisitor',
     'PDFLayoutConfig',
     'PageLayout',
     'KPICardLayout',
@@ -12,7 +12,7 @@ import sys
 import io
 import re
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence, Tuple
 from datetime import datetime
 from loguru import logger
 from ReportEngine.utils.dependency_check import (
@@ -71,6 +71,7 @@ from .html_renderer import HTMLRenderer
 from .pdf_layout_optimizer import PDFLayoutOptimizer, PDFLayoutConfig
 from .chart_to_svg import create_chart_converter
 from .math_to_svg import MathToSVG
+from ReportEngine.ir.traversal import BlockRef, IRVisitor, walk_document
 from ReportEngine.utils.chart_review_service import get_chart_review_service
 try:
     from wordcloud import WordCloud
@@ -204,167 +205,137 @@ class PDFRenderer:
         返回:
             Dict[str, str]: widgetId到SVG字符串的映射
         """
-        svg_map = {}
-
         if not hasattr(self, 'chart_converter') or not self.chart_converter:
             logger.warning("图表转换器未初始化，跳过图表转换")
-            return svg_map
-
-        # 遍历所有章节
-        chapters = document_ir.get('chapters', [])
-        for chapter in chapters:
-            blocks = chapter.get('blocks', [])
-            self._extract_and_convert_widgets(blocks, svg_map)
+            return {}
 
-        logger.info(f"成功转换 {len(svg_map)} 个图表为SVG")
-        return svg_map
+        visitor = _ChartSVGVisitor(self)
+        walk_document(document_ir, [visitor])
+        return visitor.svg_map
 
     def _convert_wordclouds_to_images(self, document_ir: Dict[str, Any]) -> Dict[str, str]:
         """
         将document_ir中的词云widget转换为PNG并返回data URI映射
         """
-        img_map: Dict[str, str] = {}
-
         if not WORDCLOUD_AVAILABLE:
             logger.debug("wordcloud库未安装，词云将使用表格兜底")
-            return img_map
+            return {}
 
-        # 遍历所有章节
-        chapters = document_ir.get('chapters', [])
-        for chapter in chapters:
-            blocks = chapter.get('blocks', [])
-            self._extract_wordcloud_widgets(blocks, img_map)
+        visitor = _WordcloudImageVisitor(self)
+        walk_document(document_ir, [visitor])
+        return visitor.img_map
 
-        if img_map:
-            logger.info(f"成功转换 {len(img_map)} 个词云为图片")
-        return img_map
-
-    def _extract_and_convert_widgets(
+    def _convert_visual_assets(
         self,
-        blocks: list,
-        svg_map: Dict[str, str]
-    ) -> None:
+        document_ir: Dict[str, Any],
+        extra_visitors: Sequence[IRVisitor] = ()
+    ) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
         """
-        递归遍历blocks，找到所有widget并转换为SVG
+        单次遍历IR，同时完成图表SVG、词云图片与数学公式SVG的转换。
 
         参数:
-            blocks: block列表
+            document_ir: Document IR数据（math块会被写入mathId）
+            extra_visitors: 需要融合进同一次遍历的其他访问者（如布局统计）
+
+        返回:
+            Tuple: (图表SVG映射, 词云图片映射, 公式SVG映射)
+        """
+        visitors: List[IRVisitor] = list(extra_visitors)
+
+        chart_visitor = None
+        if getattr(self, 'chart_converter', None):
+            chart_visitor = _ChartSVGVisitor(self)
+            visitors.append(chart_visitor)
+        else:
+            logger.warning("图表转换器未初始化，跳过图表转换")
+
+        wordcloud_visitor = None
+        if WORDCLOUD_AVAILABLE:
+            wordcloud_visitor = _WordcloudImageVisitor(self)
+            visitors.append(wordcloud_visitor)
+        else:
+            logger.debug("wordcloud库未安装，词云将使用表格兜底")
+
+        math_visitor = None
+        if getattr(self, 'math_converter', None):
+            math_visitor = _MathSVGVisitor(self)
+            visitors.append(math_visitor)
+        else:
+            logger.warning("数学公式转换器未初始化，跳过公式转换")
+
+        walk_document(document_ir, visitors)
+
+        return (
+            chart_visitor.svg_map if chart_visitor else {},
+            wordcloud_visitor.img_map if wordcloud_visitor else {},
+            math_visitor.svg_map if math_visitor else {},
+        )
+
+    def _convert_chart_block(self, block: Dict[str, Any], svg_map: Dict[str, str]) -> None:
+        """
+        将单个chart.js widget转换为SVG并写入svg_map
+
+        参数:
+            block: widget block
             svg_map: 用于存储转换结果的字典
         """
-        for block in blocks:
-            if not isinstance(block, dict):
-                continue
+        widget_id = block.get('widgetId')
+        widget_type = block.get('widgetType', '')
+
+        # 只处理chart.js类型的widget
+        if not (widget_id and isinstance(widget_type, str) and widget_type.startswith('chart.js')):
+            return
+
+        widget_type_lower = widget_type.lower()
+        props = block.get('props')
+        props_type = str(props.get('type') or '').lower() if isinstance(props, dict) else ''
+        if 'wordcloud' in widget_type_lower or 'wordcloud' in props_type:
+            logger.debug(f"检测到词云 {widget_id}，跳过SVG转换并使用图片注入流程")
+            return
+
+        failed, fail_reason = self.html_renderer._has_chart_failure(block)
+        if block.get("_chart_renderable") is False or failed:
+            logger.debug(
+                f"跳过转换失败的图表 {widget_id}"
+                f"{f'，原因: {fail_reason}' if fail_reason else ''}"
+            )
+            return
+        try:
+            svg_content = self.chart_converter.convert_widget_to_svg(
+                block,
+                width=800,
+                height=500,
+                dpi=100
+            )
+            if svg_content:
+                svg_map[widget_id] = svg_content
+                logger.debug(f"图表 {widget_id} 转换为SVG成功")
+            else:
+                logger.warning(f"图表 {widget_id} 转换为SVG失败")
+        except Exception as e:
+            logger.error(f"转换图表 {widget_id} 时出错: {e}")
 
-            block_type = block.get('type')
-
-            # 处理widget类型
-            if block_type == 'widget':
-                widget_id = block.get('widgetId')
-                widget_type = block.get('widgetType', '')
-
-                # 只处理chart.js类型的widget
-                if widget_id and widget_type.startswith('chart.js'):
-                    widget_type_lower = widget_type.lower()
-                    props = block.get('props')
-                    props_type = str(props.get('type') or '').lower() if isinstance(props, dict) else ''
-                    if 'wordcloud' in widget_type_lower or 'wordcloud' in props_type:
-                        logger.debug(f"检测到词云 {widget_id}，跳过SVG转换并使用图片注入流程")
-                        continue
-
-                    failed, fail_reason = self.html_renderer._has_chart_failure(block)
-                    if block.get("_chart_renderable") is False or failed:
-                        logger.debug(
-                            f"跳过转换失败的图表 {widget_id}"
-                            f"{f'，原因: {fail_reason}' if fail_reason else ''}"
-                        )
-                        continue
-                    try:
-                        svg_content = self.chart_converter.convert_widget_to_svg(
-                            block,
-                            width=800,
-                            height=500,
-                            dpi=100
-                        )
-                        if svg_content:
-                            svg_map[widget_id] = svg_content
-                            logger.debug(f"图表 {widget_id} 转换为SVG成功")
-                        else:
-                            logger.warning(f"图表 {widget_id} 转换为SVG失败")
-                    except Exception as e:
-                        logger.error(f"转换图表 {widget_id} 时出错: {e}")
-
-            # 递归处理嵌套的blocks
-            nested_blocks = block.get('blocks')
-            if isinstance(nested_blocks, list):
-                self._extract_and_convert_widgets(nested_blocks, svg_map)
-
-            # 处理列表项
-            if block_type == 'list':
-                items = block.get('items', [])
-                for item in items:
-                    if isinstance(item, list):
-                        self._extract_and_convert_widgets(item, svg_map)
-
-            # 处理表格单元格
-            if block_type == 'table':
-                rows = block.get('rows', [])
-                for row in rows:
-                    cells = row.get('cells', [])
-                    for cell in cells:
-                        cell_blocks = cell.get('blocks', [])
-                        if isinstance(cell_blocks, list):
-                            self._extract_and_convert_widgets(cell_blocks, svg_map)
-
-    def _extract_wordcloud_widgets(
-        self,
-        blocks: list,
-        img_map: Dict[str, str]
-    ) -> None:
+    def _convert_wordcloud_block(self, block: Dict[str, Any], img_map: Dict[str, str]) -> None:
         """
-        递归遍历blocks，找到词云widget并生成图片
+        若widget为词云则生成图片并写入img_map
         """
-        for block in blocks:
-            if not isinstance(block, dict):
-                continue
+        widget_id = block.get('widgetId')
+        widget_type = block.get('widgetType', '')
 
-            block_type = block.get('type')
-            if block_type == 'widget':
-                widget_id = block.get('widgetId')
-                widget_type = block.get('widgetType', '')
-
-                props = block.get('props')
-                props_type = str(props.get('type') or '') if isinstance(props, dict) else ''
-                is_wordcloud = (
-                    isinstance(widget_type, str) and 'wordcloud' in widget_type.lower()
-                ) or ('wordcloud' in props_type.lower())
-
-                if widget_id and is_wordcloud:
-                    try:
-                        data_uri = self._generate_wordcloud_image(block)
-                        if data_uri:
-                            img_map[widget_id] = data_uri
-                            logger.debug(f"词云 {widget_id} 转换为图片成功")
-                    except Exception as exc:
-                        logger.warning(f"生成词云图片失败 {widget_id}: {exc}")
-
-            nested_blocks = block.get('blocks')
-            if isinstance(nested_blocks, list):
-                self._extract_wordcloud_widgets(nested_blocks, img_map)
-
-            if block_type == 'list':
-                items = block.get('items', [])
-                for item in items:
-                    if isinstance(item, list):
-                        self._extract_wordcloud_widgets(item, img_map)
-
-            if block_type == 'table':
-                rows = block.get('rows', [])
-                for row in rows:
-                    cells = row.get('cells', [])
-                    for cell in cells:
-                        cell_blocks = cell.get('blocks', [])
-                        if isinstance(cell_blocks, list):
-                            self._extract_wordcloud_widgets(cell_blocks, img_map)
+        props = block.get('props')
+        props_type = str(props.get('type') or '') if isinstance(props, dict) else ''
+        is_wordcloud = (
+            isinstance(widget_type, str) and 'wordcloud' in widget_type.lower()
+        ) or ('wordcloud' in props_type.lower())
+
+        if widget_id and is_wordcloud:
+            try:
+                data_uri = self._generate_wordcloud_image(block)
+                if data_uri:
+                    img_map[widget_id] = data_uri
+                    logger.debug(f"词云 {widget_id} 转换为图片成功")
+            except Exception as exc:
+                logger.warning(f"生成词云图片失败 {widget_id}: {exc}")
 
     def _normalize_wordcloud_items(self, block: Dict[str, Any]) -> list:
         """
@@ -436,162 +407,123 @@ class PDFRenderer:
         返回:
             Dict[str, str]: 公式块ID到SVG字符串的映射
         """
-        svg_map = {}
-
         if not hasattr(self, 'math_converter') or not self.math_converter:
             logger.warning("数学公式转换器未初始化，跳过公式转换")
-            return svg_map
-
-        # 遍历所有章节，保持全局计数器避免ID重复
-        block_counter = [0]
-        chapters = document_ir.get('chapters', [])
-        for chapter in chapters:
-            blocks = chapter.get('blocks', [])
-            self._extract_and_convert_math_blocks(blocks, svg_map, block_counter)
+            return {}
 
-        logger.info(f"成功转换 {len(svg_map)} 个数学公式为SVG")
-        return svg_map
+        visitor = _MathSVGVisitor(self)
+        walk_document(document_ir, [visitor])
+        return visitor.svg_map
 
-    def _extract_and_convert_math_blocks(
+    def _convert_math_block(
         self,
-        blocks: list,
+        block: Dict[str, Any],
         svg_map: Dict[str, str],
-        block_counter: list = None
+        block_counter: list
     ) -> None:
         """
-        递归遍历blocks，找到所有math块并转换为SVG
+        转换单个block中的数学公式：math块整体转换，其余block提取内联公式
 
         参数:
-            blocks: block列表
+            block: 当前block
             svg_map: 用于存储转换结果的字典
-            block_counter: 用于生成唯一ID的计数器
+            block_counter: 全局计数器（单元素列表），保证ID不重复
         """
-        if block_counter is None:
-            block_counter = [0]
-
-        def _extract_inline_math_from_inlines(inlines: list):
-            """从段落内联节点中提取数学公式"""
-            if not isinstance(inlines, list):
-                return
-            for run in inlines:
-                if not isinstance(run, dict):
-                    continue
-                marks = run.get('marks') or []
-                math_mark = next((m for m in marks if m.get('type') == 'math'), None)
-
-                if math_mark:
-                    # 仅单个math mark
-                    raw = math_mark.get('value') or run.get('text') or ''
-                    latex = self._normalize_latex(raw)
-                    # 行内mark统一按inline处理，避免误将行内公式当成display
-                    is_display = False
-                    if not latex:
-                        continue
-                    block_counter[0] += 1
-                    math_id = run.get('mathId') or f"math-inline-{block_counter[0]}"
-                    run['mathId'] = math_id
-                    try:
-                        svg_content = (
-                            self.math_converter.convert_display_to_svg(latex)
-                            if is_display else
-                            self.math_converter.convert_inline_to_svg(latex)
-                        )
-                        if svg_content:
-                            svg_map[math_id] = svg_content
-                            logger.debug(f"公式 {math_id} 转换为SVG成功")
-                        else:
-                            logger.warning(f"公式 {math_id} 转换为SVG失败: {latex[:50]}...")
-                    except Exception as exc:
-                        logger.error(f"转换内联公式 {latex[:50]}... 时出错: {exc}")
-                    continue
+        if block.get('type') != 'math':
+            # 提取段落、表格等内部的内联公式
+            inlines = block.get('inlines')
+            if inlines:
+                self._convert_inline_math(inlines, svg_map, block_counter)
+            return
+
+        latex = self._normalize_latex(block.get('latex', ''))
+        if not latex:
+            return
+        block_counter[0] += 1
+        math_id = f"math-block-{block_counter[0]}"
+        try:
+            svg_content = self.math_converter.convert_display_to_svg(latex)
+            if svg_content:
+                svg_map[math_id] = svg_content
+                # 将ID添加到block中，以便后续注入时识别
+                block['mathId'] = math_id
+                logger.debug(f"公式 {math_id} 转换为SVG成功")
+            else:
+                logger.warning(f"公式 {math_id} 转换为SVG失败: {latex[:50]}...")
+        except Exception as e:
+            logger.error(f"转换公式 {latex[:50]}... 时出错: {e}")
 
-                # 无math mark，尝试解析文本中的多个公式
-                text_val = run.get('text')
-                if not isinstance(text_val, str):
-                    continue
-                segments = self._find_all_math_in_text(text_val)
-                if not segments:
+    def _convert_inline_math(
+        self,
+        inlines: list,
+        svg_map: Dict[str, str],
+        block_counter: list
+    ) -> None:
+        """从段落内联节点中提取数学公式并转换为SVG"""
+        if not isinstance(inlines, list):
+            return
+        for run in inlines:
+            if not isinstance(run, dict):
+                continue
+            marks = run.get('marks') or []
+            math_mark = next((m for m in marks if m.get('type') == 'math'), None)
+
+            if math_mark:
+                # 仅单个math mark
+                raw = math_mark.get('value') or run.get('text') or ''
+                latex = self._normalize_latex(raw)
+                # 行内mark统一按inline处理，避免误将行内公式当成display
+                is_display = False
+                if not latex:
                     continue
-                ids_for_html: list[str] = []
-                for idx, (latex, is_display) in enumerate(segments, start=1):
-                    if not latex:
-                        continue
-                    block_counter[0] += 1
-                    math_id = f"auto-math-{block_counter[0]}"
-                    ids_for_html.append(math_id)
-                    try:
-                        svg_content = (
-                            self.math_converter.convert_display_to_svg(latex)
-                            if is_display else
-                            self.math_converter.convert_inline_to_svg(latex)
-                        )
-                        if svg_content:
-                            svg_map[math_id] = svg_content
-                            logger.debug(f"公式 {math_id} 转换为SVG成功")
-                        else:
-                            logger.warning(f"公式 {math_id} 转换为SVG失败: {latex[:50]}...")
-                    except Exception as exc:
-                        logger.error(f"转换内联公式 {latex[:50]}... 时出错: {exc}")
-                if ids_for_html:
-                    # 将ID列表写回run，便于HTML渲染时使用相同ID（顺序对应segments）
-                    run['mathIds'] = ids_for_html
-
-        for block in blocks:
-            if not isinstance(block, dict):
+                block_counter[0] += 1
+                math_id = run.get('mathId') or f"math-inline-{block_counter[0]}"
+                run['mathId'] = math_id
+                try:
+                    svg_content = (
+                        self.math_converter.convert_display_to_svg(latex)
+                        if is_display else
+                        self.math_converter.convert_inline_to_svg(latex)
+                    )
+                    if svg_content:
+                        svg_map[math_id] = svg_content
+                        logger.debug(f"公式 {math_id} 转换为SVG成功")
+                    else:
+                        logger.warning(f"公式 {math_id} 转换为SVG失败: {latex[:50]}...")
+                except Exception as exc:
+                    logger.error(f"转换内联公式 {latex[:50]}... 时出错: {exc}")
                 continue
 
-            block_type = block.get('type')
-
-            # 处理math类型
-            if block_type == 'math':
-                latex = self._normalize_latex(block.get('latex', ''))
-                if latex:
-                    block_counter[0] += 1
-                    math_id = f"math-block-{block_counter[0]}"
-                    try:
-                        svg_content = self.math_converter.convert_display_to_svg(latex)
-                        if svg_content:
-                            svg_map[math_id] = svg_content
-                            # 将ID添加到block中，以便后续注入时识别
-                            block['mathId'] = math_id
-                            logger.debug(f"公式 {math_id} 转换为SVG成功")
-                        else:
-                            logger.warning(f"公式 {math_id} 转换为SVG失败: {latex[:50]}...")
-                    except Exception as e:
-                        logger.error(f"转换公式 {latex[:50]}... 时出错: {e}")
-            else:
-                # 提取段落、表格等内部的内联公式
-                inlines = block.get('inlines')
-                if inlines:
-                    _extract_inline_math_from_inlines(inlines)
-
-            # 递归处理嵌套的blocks
-            nested_blocks = block.get('blocks')
-            if isinstance(nested_blocks, list):
-                self._extract_and_convert_math_blocks(nested_blocks, svg_map, block_counter)
-
-            # 处理列表项
-            if block_type == 'list':
-                items = block.get('items', [])
-                for item in items:
-                    if isinstance(item, list):
-                        self._extract_and_convert_math_blocks(item, svg_map, block_counter)
-
-            # 处理表格单元格
-            if block_type == 'table':
-                rows = block.get('rows', [])
-                for row in rows:
-                    cells = row.get('cells', [])
-                    for cell in cells:
-                        cell_blocks = cell.get('blocks', [])
-                        if isinstance(cell_blocks, list):
-                            self._extract_and_convert_math_blocks(cell_blocks, svg_map, block_counter)
-
-            # 处理callout内部的blocks
-            if block_type == 'callout':
-                callout_blocks = block.get('blocks', [])
-                if isinstance(callout_blocks, list):
-                    self._extract_and_convert_math_blocks(callout_blocks, svg_map, block_counter)
+            # 无math mark，尝试解析文本中的多个公式
+            text_val = run.get('text')
+            if not isinstance(text_val, str):
+                continue
+            segments = self._find_all_math_in_text(text_val)
+            if not segments:
+                continue
+            ids_for_html: list[str] = []
+            for idx, (latex, is_display) in enumerate(segments, start=1):
+                if not latex:
+                    continue
+                block_counter[0] += 1
+                math_id = f"auto-math-{block_counter[0]}"
+                ids_for_html.append(math_id)
+                try:
+                    svg_content = (
+                        self.math_converter.convert_display_to_svg(latex)
+                        if is_display else
+                        self.math_converter.convert_inline_to_svg(latex)
+                    )
+                    if svg_content:
+                        svg_map[math_id] = svg_content
+                        logger.debug(f"公式 {math_id} 转换为SVG成功")
+                    else:
+                        logger.warning(f"公式 {math_id} 转换为SVG失败: {latex[:50]}...")
+                except Exception as exc:
+                    logger.error(f"转换内联公式 {latex[:50]}... 时出错: {exc}")
+            if ids_for_html:
+                # 将ID列表写回run，便于HTML渲染时使用相同ID（顺序对应segments）
+                run['mathIds'] = ids_for_html
 
     def _inject_svg_into_html(self, html: str, svg_map: Dict[str, str]) -> str:
         """
@@ -841,10 +773,25 @@ class PDFRenderer:
         返回:
             str: 优化后的HTML内容
         """
-        # 如果启用布局优化，先分析文档并生成优化配置
-        if optimize_layout:
+        # 关键修复：先预处理图表，确保数据有效
+        logger.info("预处理图表数据...")
+        preprocessed_ir = self._preprocess_charts(document_ir, ir_file_path)
+
+        # 单次遍历预处理后的IR：布局统计 + 图表SVG + 词云PNG + 公式SVG
+        # （图表修复不影响布局统计关心的 KPI/表格/段落特征）
+        logger.info("开始转换图表、词云与数学公式...")
+        layout_visitor = self.layout_optimizer.create_stats_visitor() if optimize_layout else None
+        svg_map, wordcloud_map, math_svg_map = self._convert_visual_assets(
+            preprocessed_ir,
+            extra_visitors=[layout_visitor] if layout_visitor else ()
+        )
+
+        # 如果启用布局优化，根据统计结果生成优化配置
+        if layout_visitor:
             logger.info("启用PDF布局优化...")
-            layout_config = self.layout_optimizer.optimize_for_document(document_ir)
+            layout_config = self.layout_optimizer.optimize_for_document(
+                preprocessed_ir, stats=layout_visitor.stats
+            )
 
             # 保存优化日志
             log_dir = Path('logs/pdf_layouts')
@@ -852,31 +799,11 @@ class PDFRenderer:
             log_file = log_dir / f"layout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
             # 保存配置和优化日志
-            optimization_log = self.layout_optimizer._log_optimization(
-                self.layout_optimizer._analyze_document(document_ir),
-                layout_config
-            )
             self.layout_optimizer.config = layout_config
-            self.layout_optimizer.save_config(log_file, optimization_log)
+            self.layout_optimizer.save_config(log_file, self.layout_optimizer.last_optimization)
         else:
             layout_config = self.layout_optimizer.config
 
-        # 关键修复：先预处理图表，确保数据有效
-        logger.info("预处理图表数据...")
-        preprocessed_ir = self._preprocess_charts(document_ir, ir_file_path)
-
-        # 转换图表为SVG（使用预处理后的IR）
-        logger.info("开始转换图表为SVG矢量图形...")
-        svg_map = self._convert_charts_to_svg(preprocessed_ir)
-
-        # 转换词云为PNG
-        logger.info("开始转换词云为图片...")
-        wordcloud_map = self._convert_wordclouds_to_images(preprocessed_ir)
-
-        # 转换数学公式为SVG
-        logger.info("开始转换数学公式为SVG矢量图形...")
-        math_svg_map = self._convert_math_to_svg(preprocessed_ir)
-
         # 使用HTML渲染器生成基础HTML（使用预处理后的IR，以便复用mathId等标记）
         html = self.html_renderer.render(preprocessed_ir, ir_file_path=ir_file_path)
 
@@ -1606,4 +1533,48 @@ button.ghost-btn {{
         )
 
 
+class _ChartSVGVisitor(IRVisitor):
+    """遍历时把chart.js widget转换为SVG"""
+
+    def __init__(self, renderer: PDFRenderer):
+        self.renderer = renderer
+        self.svg_map: Dict[str, str] = {}
+
+    def visit_widget(self, ref: BlockRef) -> None:
+        self.renderer._convert_chart_block(ref.block, self.svg_map)
+
+    def finish(self) -> None:
+        logger.info(f"成功转换 {len(self.svg_map)} 个图表为SVG")
+
+
+class _WordcloudImageVisitor(IRVisitor):
+    """遍历时把词云widget渲染为PNG data URI"""
+
+    def __init__(self, renderer: PDFRenderer):
+        self.renderer = renderer
+        self.img_map: Dict[str, str] = {}
+
+    def visit_widget(self, ref: BlockRef) -> None:
+        self.renderer._convert_wordcloud_block(ref.block, self.img_map)
+
+    def finish(self) -> None:
+        if self.img_map:
+            logger.info(f"成功转换 {len(self.img_map)} 个词云为图片")
+
+
+class _MathSVGVisitor(IRVisitor):
+    """遍历时把math块与内联公式转换为SVG，全局计数器保证ID不重复"""
+
+    def __init__(self, renderer: PDFRenderer):
+        self.renderer = renderer
+        self.svg_map: Dict[str, str] = {}
+        self.block_counter = [0]
+
+    def visit(self, ref: BlockRef) -> None:
+        self.renderer._convert_math_block(ref.block, self.svg_map, self.block_counter)
+
+    def finish(self) -> None:
+        logger.info(f"成功转换 {len(self.svg_map)} 个数学公式为SVG")
+
+
 __all__ = ["PDFRenderer"]
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+提示词编码模式的token对比基准。
+
+对 report_template/ 下的每个模板，按文档设计、篇幅规划、章节生成三类节点
+构造与运行时结构一致的payload，分别以 pretty/compact/dsl 三种编码模式
+生成系统提示词+用户提示词，统计token数并与 pretty 对比。
+
+安装了 tiktoken 时使用 cl100k_base 精确计数；否则在 context_packing.estimate_tokens
+的基础上把每段“换行+缩进”计为 1 token（BPE分词器中缩进通常合并为单个token，
+而 estimate_tokens 本身忽略空白，无法体现缩进JSON的开销）。
+
+使用方法:
+    python -m ReportEngine.scripts.benchmark_prompt_encoding
+    python -m ReportEngine.scripts.benchmark_prompt_encoding --report-chars 4000 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from ReportEngine.core import parse_template_sections
+from ReportEngine.ir import ALLOWED_BLOCK_TYPES
+from ReportEngine.prompts import (
+    PROMPT_ENCODINGS,
+    build_chapter_user_prompt,
+    build_document_layout_prompt,
+    build_word_budget_prompt,
+    get_system_prompt,
+)
+from ReportEngine.utils.context_packing import estimate_tokens
+
+TEMPLATE_DIR = Path(__file__).parent.parent / "report_template"
+ENGINES = ("query_engine", "media_engine", "insight_engine")
+_LINE_INDENT = re.compile(r"\n[ \t]*")
+
+
+def _estimate_with_layout(text: str) -> int:
+    """estimate_tokens + 换行缩进段数"""
+    return estimate_tokens(text) + len(_LINE_INDENT.findall(text))
+
+
+def _token_counter() -> Tuple[str, Callable[[str], int]]:
+    """优先使用 tiktoken，缺失时使用启发式估算"""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "tiktoken/cl100k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        return "estimate_tokens+换行缩进", _estimate_with_layout
+
+
+def _sample_reports(template_markdown: str, report_chars: int) -> Dict[str, str]:
+    """用模板原文拼出固定长度的占位报告，保证各模式的正文部分完全相同"""
+    if report_chars <= 0:
+        return {engine: "" for engine in ENGINES}
+    filler = (template_markdown * (report_chars // max(len(template_markdown), 1) + 1))[:report_chars]
+    return {engine: filler for engine in ENGINES}
+
+
+def _build_prompts(
+    template_name: str, template_markdown: str, report_chars: int, encoding: str
+) -> Dict[str, List[Tuple[str, str]]]:
+    """返回 节点 -> [(system, user), ...]，结构与各节点 run() 中的payload一致"""
+    sections = parse_template_sections(template_markdown)
+    section_dicts = [section.to_dict() for section in sections]
+    reports = _sample_reports(template_markdown, report_chars)
+    forum_logs = reports["query_engine"][: report_chars // 2]
+    overview = {"title": sections[0].title if sections else "", "chapters": section_dicts}
+    query = template_name
+
+    layout_payload = {
+        "query": query,
+        "template": {"raw": template_markdown, "sections": section_dicts},
+        "templateOverview": overview,
+        "reports": reports,
+        "forumLogs": forum_logs,
+    }
+    design = {
+        "title": query,
+        "tocPlan": [
+            {"chapterId": s.chapter_id, "display": f"{s.number} {s.title}", "allowSwot": False}
+            for s in sections
+        ],
+        "themeTokens": {"colors": {"primary": "#1a365d", "accent": "#3182ce"}},
+    }
+    budget_payload = {
+        "query": query,
+        "design": design,
+        "sections": section_dicts,
+        "templateOverview": overview,
+        "reports": reports,
+        "forumLogs": forum_logs,
+    }
+    chapter_prompts = []
+    for section in sections:
+        payload = {
+            "section": {
+                "chapterId": section.chapter_id,
+                "title": section.title,
+                "slug": section.slug,
+                "order": section.order,
+                "number": section.number,
+                "outline": section.outline,
+            },
+            "globalContext": {
+                "query": query,
+                "templateName": template_name,
+                "themeTokens": design["themeTokens"],
+                "styleDirectives": {},
+                "layout": design,
+                "templateOverview": overview,
+            },
+            "reports": reports,
+            "forumLogs": forum_logs,
+            "dataBundles": [],
+            "constraints": {
+                "language": "zh-CN",
+                "maxTokens": 4096,
+                "allowedBlocks": ALLOWED_BLOCK_TYPES,
+                "allowSwot": False,
+                "allowPest": False,
+                "styleHints": {
+                    "expectWidgets": True,
+                    "forceHeadingAnchors": True,
+                    "allowInlineMix": True,
+                },
+            },
+            "chapterPlan": {"chapterId": section.chapter_id, "targetWords": 1200},
+            "wordPlan": {"totalWords": 1200 * len(sections)},
+        }
+        chapter_prompts.append(
+            (
+                get_system_prompt("chapter", encoding),
+                build_chapter_user_prompt(payload, shared_sources=True, encoding=encoding),
+            )
+        )
+    return {
+        "document_layout": [
+            (
+                get_system_prompt("document_layout", encoding),
+                build_document_layout_prompt(layout_payload, encoding),
+            )
+        ],
+        "word_budget": [
+            (
+                get_system_prompt("word_budget", encoding),
+                build_word_budget_prompt(budget_payload, encoding),
+            )
+        ],
+        "chapter": chapter_prompts,
+    }
+
+
+def run_benchmark(report_chars: int) -> Dict[str, object]:
+    """统计每个模板、每个节点在各编码模式下的 system/user token 数"""
+    counter_name, count = _token_counter()
+    rows = []
+    for path in sorted(TEMPLATE_DIR.glob("*.md")):
+        markdown = path.read_text(encoding="utf-8")
+        per_mode = {
+            encoding: _build_prompts(path.stem, markdown, report_chars, encoding)
+            for encoding in PROMPT_ENCODINGS
+        }
+        for node in ("document_layout", "word_budget", "chapter"):
+            row = {"template": path.stem, "node": node, "calls": len(per_mode["pretty"][node])}
+            for encoding in PROMPT_ENCODINGS:
+                prompts = per_mode[encoding][node]
+                row[encoding] = {
+                    "system": sum(count(system) for system, _ in prompts),
+                    "user": sum(count(user) for _, user in prompts),
+                }
+            rows.append(row)
+    totals = {
+        encoding: sum(row[encoding]["system"] + row[encoding]["user"] for row in rows)
+        for encoding in PROMPT_ENCODINGS
+    }
+    return {"counter": counter_name, "reportChars": report_chars, "rows": rows, "totals": totals}
+
+
+def _print_table(result: Dict[str, object]) -> None:
+    baseline = result["totals"]["pretty"] or 1
+    print(f"计数方式: {result['counter']}，每引擎占位报告 {result['reportChars']} 字符")
+    header = f"{'模板':<24}{'节点':<18}{'调用':>5}" + "".join(f"{mode:>14}" for mode in PROMPT_ENCODINGS)
+    print(header)
+    print("-" * len(header))
+    for row in result["rows"]:
+        cells = "".join(
+            f"{row[mode]['system'] + row[mode]['user']:>14,}" for mode in PROMPT_ENCODINGS
+        )
+        print(f"{row['template'][:22]:<24}{row['node']:<18}{row['calls']:>5}{cells}")
+    print("-" * len(header))
+    totals = result["totals"]
+    print(f"{'合计':<47}" + "".join(f"{totals[mode]:>14,}" for mode in PROMPT_ENCODINGS))
+    print(
+        f"{'相对pretty':<45}"
+        + "".join(f"{totals[mode] / baseline:>14.1%}" for mode in PROMPT_ENCODINGS)
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比提示词编码模式的token消耗")
+    parser.add_argument(
+        "--report-chars",
+        type=int,
+        default=2000,
+        help="每个引擎占位报告的字符数（各模式相同，用于模拟正文占比）",
+    )
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.report_chars)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        _print_table(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
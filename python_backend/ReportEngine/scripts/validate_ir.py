@@ -3,6 +3,7 @@
 IR 文档验证工具。
 
 命令行工具，用于：
+- 使用与章节生成节点相同的编译后Schema校验器检查各章节结构
 - 扫描指定 JSON 文件中的所有图表和表格
 - 报告结构问题和数据缺失
 - 支持自动修复常见问题
@@ -30,6 +31,8 @@ if str(project_root) not in sys.path:
 
 from loguru import logger
 
+from ReportEngine.ir import IRValidator
+from ReportEngine.ir.traversal import iter_document_blocks
 from ReportEngine.utils.chart_validator import (
     ChartValidator,
     ChartRepairer,
@@ -77,7 +80,7 @@ class DocumentReport:
         return sum(len(issue.warnings) for issue in self.issues)
 
 
-class IRValidator:
+class DocumentValidator:
     """IR 文档验证器"""
 
     def __init__(
@@ -86,7 +89,9 @@ class IRValidator:
         table_validator: Optional[TableValidator] = None,
         chart_repairer: Optional[ChartRepairer] = None,
         table_repairer: Optional[TableRepairer] = None,
+        schema_validator: Optional[IRValidator] = None,
     ):
+        self.schema_validator = schema_validator or IRValidator()
         self.chart_validator = chart_validator or ChartValidator()
         self.table_validator = table_validator or TableValidator()
         self.chart_repairer = chart_repairer or ChartRepairer(self.chart_validator)
@@ -109,90 +114,42 @@ class IRValidator:
         """
         report = DocumentReport(file_path=file_path)
 
-        # 遍历所有章节
-        chapters = document.get("chapters", [])
+        # 章节结构校验（Schema 契约），不可自动修复
+        chapters = document.get("chapters") or document.get("sections") or []
         for chapter_idx, chapter in enumerate(chapters):
-            if not isinstance(chapter, dict):
-                continue
-
-            chapter_id = chapter.get("chapterId", f"chapter-{chapter_idx}")
-            blocks = chapter.get("blocks", [])
-
-            self._validate_blocks(
-                blocks,
-                f"chapters[{chapter_idx}].blocks",
-                chapter_id,
-                report,
-            )
-
-        return report
-
-    def _validate_blocks(
-        self,
-        blocks: List[Any],
-        path: str,
-        chapter_id: str,
-        report: DocumentReport,
-    ):
-        """递归验证 blocks 列表"""
-        if not isinstance(blocks, list):
-            return
-
-        for idx, block in enumerate(blocks):
-            if not isinstance(block, dict):
+            valid, errors = self.schema_validator.validate_chapter(chapter)
+            if valid:
                 continue
+            chapter_id = chapter.get("chapterId") if isinstance(chapter, dict) else None
+            report.issues.append(BlockIssue(
+                block_type="schema",
+                block_id=chapter_id or f"chapter-{chapter_idx}",
+                path=f"chapters[{chapter_idx}]",
+                errors=errors,
+            ))
 
+        # 单次遍历所有章节（含嵌套 blocks、列表项与表格单元格）
+        for ref in iter_document_blocks(document):
             report.total_blocks += 1
-            block_path = f"{path}[{idx}]"
-            block_type = block.get("type", "")
-            block_id = block.get("widgetId") or block.get("id") or f"block-{idx}"
+            block = ref.block
+            block_type = ref.type
+            block_id = ref.block_id or f"block-{ref.index}"
 
             # 根据类型验证
             if block_type == "widget":
                 widget_type = (block.get("widgetType") or "").lower()
                 if "chart.js" in widget_type:
                     report.chart_count += 1
-                    self._validate_chart(block, block_path, block_id, report)
+                    self._validate_chart(block, ref.path, block_id, report)
                 elif "wordcloud" in widget_type:
                     report.wordcloud_count += 1
-                    self._validate_wordcloud(block, block_path, block_id, report)
+                    self._validate_wordcloud(block, ref.path, block_id, report)
 
             elif block_type == "table":
                 report.table_count += 1
-                self._validate_table(block, block_path, block_id, report)
-
-            # 递归处理嵌套 blocks
-            nested_blocks = block.get("blocks")
-            if isinstance(nested_blocks, list):
-                self._validate_blocks(nested_blocks, f"{block_path}.blocks", chapter_id, report)
+                self._validate_table(block, ref.path, block_id, report)
 
-            # 处理 table rows 中的 blocks
-            if block_type == "table":
-                rows = block.get("rows", [])
-                for row_idx, row in enumerate(rows):
-                    if isinstance(row, dict):
-                        cells = row.get("cells", [])
-                        for cell_idx, cell in enumerate(cells):
-                            if isinstance(cell, dict):
-                                cell_blocks = cell.get("blocks", [])
-                                self._validate_blocks(
-                                    cell_blocks,
-                                    f"{block_path}.rows[{row_idx}].cells[{cell_idx}].blocks",
-                                    chapter_id,
-                                    report,
-                                )
-
-            # 处理 list items 中的 blocks
-            if block_type == "list":
-                items = block.get("items", [])
-                for item_idx, item in enumerate(items):
-                    if isinstance(item, list):
-                        self._validate_blocks(
-                            item,
-                            f"{block_path}.items[{item_idx}]",
-                            chapter_id,
-                            report,
-                        )
+        return report
 
     def _validate_chart(
         self,
@@ -327,83 +284,32 @@ class IRValidator:
         """
         fixed_count = 0
 
-        # 遍历所有章节
-        chapters = document.get("chapters", [])
-        for chapter in chapters:
-            if not isinstance(chapter, dict):
-                continue
-
-            blocks = chapter.get("blocks", [])
-            chapter["blocks"], chapter_fixed = self._repair_blocks(blocks)
-            fixed_count += chapter_fixed
-
-        return document, fixed_count
-
-    def _repair_blocks(
-        self,
-        blocks: List[Any],
-    ) -> Tuple[List[Any], int]:
-        """递归修复 blocks 列表"""
-        if not isinstance(blocks, list):
-            return blocks, 0
-
-        fixed_count = 0
-        repaired_blocks: List[Any] = []
-
-        for block in blocks:
-            if not isinstance(block, dict):
-                repaired_blocks.append(block)
-                continue
-
-            block_type = block.get("type", "")
+        # 先序遍历：修复结果就地写回当前 block，随后继续遍历修复后的子节点
+        for ref in iter_document_blocks(document):
+            block = ref.block
+            block_type = ref.type
+            result = None
 
             # 修复表格
             if block_type == "table":
                 result = self.table_repairer.repair(block)
-                if result.has_changes():
-                    block = result.repaired_block
-                    fixed_count += 1
-                    logger.info(f"修复表格: {result.changes}")
+                label = "表格"
 
             # 修复图表
             elif block_type == "widget":
                 widget_type = (block.get("widgetType") or "").lower()
                 if "chart.js" in widget_type:
                     result = self.chart_repairer.repair(block)
-                    if result.has_changes():
-                        block = result.repaired_block
-                        fixed_count += 1
-                        logger.info(f"修复图表: {result.changes}")
-
-            # 递归处理嵌套 blocks
-            nested_blocks = block.get("blocks")
-            if isinstance(nested_blocks, list):
-                block["blocks"], nested_fixed = self._repair_blocks(nested_blocks)
-                fixed_count += nested_fixed
-
-            # 处理 table rows 中的 blocks
-            if block_type == "table":
-                rows = block.get("rows", [])
-                for row in rows:
-                    if isinstance(row, dict):
-                        cells = row.get("cells", [])
-                        for cell in cells:
-                            if isinstance(cell, dict):
-                                cell_blocks = cell.get("blocks", [])
-                                cell["blocks"], cell_fixed = self._repair_blocks(cell_blocks)
-                                fixed_count += cell_fixed
-
-            # 处理 list items 中的 blocks
-            if block_type == "list":
-                items = block.get("items", [])
-                for i, item in enumerate(items):
-                    if isinstance(item, list):
-                        items[i], item_fixed = self._repair_blocks(item)
-                        fixed_count += item_fixed
+                    label = "图表"
 
-            repaired_blocks.append(block)
+            if result is not None and result.has_changes():
+                if result.repaired_block is not block:
+                    block.clear()
+                    block.update(result.repaired_block)
+                fixed_count += 1
+                logger.info(f"修复{label}: {result.changes}")
 
-        return repaired_blocks, fixed_count
+        return document, fixed_count
 
 
 def print_report(report: DocumentReport, verbose: bool = False):
@@ -444,7 +350,7 @@ def print_report(report: DocumentReport, verbose: bool = False):
 
 def validate_file(
     file_path: Path,
-    validator: IRValidator,
+    validator: DocumentValidator,
     fix: bool = False,
     verbose: bool = False,
 ) -> DocumentReport:
@@ -578,7 +484,7 @@ def main():
     print(f"找到 {len(files)} 个文件")
 
     # 创建验证器
-    validator = IRValidator()
+    validator = DocumentValidator()
 
     # 验证文件
     total_issues = 0
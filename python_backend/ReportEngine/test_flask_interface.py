@@ -0,0 +1,87 @@
+"""
+Report Engine Flask接口中任务对象的测试用例（磁盘事件日志的句柄释放、并发启动任务）。
+
+运行测试：
+    python -m pytest ReportEngine/test_flask_interface.py -v
+"""
+
+import threading
+
+import pytest
+
+from ReportEngine import flask_interface
+from ReportEngine.flask_interface import ReportTask
+from ReportEngine.utils.config import settings
+
+
+@pytest.fixture
+def event_log_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_LOG_ENABLED", True)
+    monkeypatch.setattr(settings, "EVENT_LOG_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _is_open(task):
+    return task.event_log._log_fp is not None
+
+
+@pytest.mark.parametrize("final_status", sorted(flask_interface.STREAM_TERMINAL_STATUSES))
+def test_final_status_closes_event_log(event_log_dir, final_status):
+    task = ReportTask("主题", "task_final")
+    task.update_status("running", 10)
+    assert _is_open(task)
+
+    task.update_status(final_status, 100)
+    assert not _is_open(task)
+    assert [e["payload"]["status"] for e in task.event_log.iter_since(None)] == ["running", final_status]
+
+
+def test_pruned_tasks_close_event_log(event_log_dir, monkeypatch):
+    monkeypatch.setattr(flask_interface, "tasks_registry", {})
+    tasks = []
+    for index in range(flask_interface.MAX_TASK_HISTORY + 1):
+        task = ReportTask("主题", f"task_{index}")
+        task.update_status("running", 10)
+        flask_interface.tasks_registry[task.task_id] = task
+        tasks.append(task)
+
+    with flask_interface.task_lock:
+        flask_interface._prune_task_history_locked()
+
+    assert "task_0" not in flask_interface.tasks_registry
+    assert not _is_open(tasks[0])
+    assert all(_is_open(task) for task in tasks[1:])
+
+
+def test_concurrent_starts_launch_one_task(event_log_dir, monkeypatch):
+    monkeypatch.setattr(flask_interface, "current_task", None)
+    monkeypatch.setattr(flask_interface, "tasks_registry", {})
+    monkeypatch.setattr(flask_interface, "report_agent", object())
+    monkeypatch.setattr(flask_interface, "clear_report_log", lambda: None)
+    monkeypatch.setattr(flask_interface, "run_report_generation", lambda *args: None)
+    # 让自动生成与HTTP请求同时越过前置检查，再争抢任务槽位
+    barrier = threading.Barrier(2)
+
+    def engines_ready():
+        barrier.wait(timeout=5)
+        return {"ready": True}
+
+    monkeypatch.setattr(flask_interface, "check_engines_ready", engines_ready)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flask_interface._start_report_task("主题")))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(status for _, _, status in results) == [200, 400]
+    started = next(task for task, _, status in results if status == 200)
+    assert flask_interface.current_task is started
+    assert list(flask_interface.tasks_registry) == [started.task_id]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -8,10 +8,14 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from loguru import logger
 
+from ReportEngine.utils.chart_validator import ChartValidator, WordCloudValidator
 from ReportEngine.utils.config import settings
+from ReportEngine.utils.repair_cache import RepairCache, build_block_cache_key, get_repair_cache
+from ReportEngine.utils.table_validator import TableValidator
 
 
 # 图表修复提示词
@@ -236,6 +240,41 @@ WORDCLOUD_REPAIR_SYSTEM_PROMPT = """你是一个专业的词云数据修复助
 """
 
 
+# 长生命周期的LLM客户端缓存：同一组 (api_key, base_url, model) 只创建一次，
+# 复用底层 HTTP 连接池，供并发修复线程共享
+_shared_clients: Dict[Tuple[str, Optional[str], str], Any] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_llm_client(api_key: str, base_url: Optional[str], model_name: str):
+    """
+    获取（必要时创建）共享的 LLMClient。
+
+    修复函数会在多个线程中被并发调用，OpenAI 客户端本身是线程安全的，
+    因此按配置缓存单个实例，避免每次修复都重新建立连接。
+
+    Args:
+        api_key: API密钥
+        base_url: API基础URL
+        model_name: 模型名称
+
+    Returns:
+        LLMClient: 共享的客户端实例
+    """
+    key = (api_key, base_url, model_name)
+    client = _shared_clients.get(key)
+    if client is not None:
+        return client
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            from ReportEngine.llms import LLMClient
+
+            client = LLMClient(api_key=api_key, base_url=base_url, model_name=model_name)
+            _shared_clients[key] = client
+    return client
+
+
 def build_table_repair_prompt(
     table_block: Dict[str, Any],
     validation_errors: List[str]
@@ -362,6 +401,37 @@ def build_chart_repair_prompt(
     return prompt
 
 
+def _load_cached_repair(
+    cache: Optional[RepairCache],
+    namespace: str,
+    cache_key: str,
+) -> Optional[Dict[str, Any]]:
+    """从磁盘缓存读取已修复的block，未命中返回None"""
+    if cache is None:
+        return None
+    cached = cache.get(namespace, cache_key)
+    if isinstance(cached, dict) and isinstance(cached.get('repaired_block'), dict):
+        return cached['repaired_block']
+    return None
+
+
+def _store_api_repair(
+    cache: Optional[RepairCache],
+    namespace: str,
+    cache_key: str,
+    repaired: Any,
+) -> None:
+    """将LLM修复结果写入磁盘缓存"""
+    if cache is None or not isinstance(repaired, dict):
+        return
+    cache.put(namespace, cache_key, {
+        'success': True,
+        'repaired_block': repaired,
+        'method': 'api',
+        'changes': [],
+    })
+
+
 def create_llm_repair_functions() -> List:
     """
     创建LLM修复函数列表。
@@ -381,10 +451,14 @@ def create_llm_repair_functions() -> List:
     if settings.REPORT_ENGINE_API_KEY and settings.REPORT_ENGINE_BASE_URL:
         def repair_with_report_engine(widget_block: Dict[str, Any], errors: List[str]) -> Optional[Dict[str, Any]]:
             """使用ReportEngine的LLM修复图表"""
+            cache = get_repair_cache()
+            cache_key = build_block_cache_key(widget_block)
+            cached = _load_cached_repair(cache, 'chart', cache_key)
+            if cached is not None:
+                logger.debug("图表修复命中磁盘缓存")
+                return cached
             try:
-                from ReportEngine.llms import LLMClient
-
-                client = LLMClient(
+                client = get_shared_llm_client(
                     api_key=settings.REPORT_ENGINE_API_KEY,
                     base_url=settings.REPORT_ENGINE_BASE_URL,
                     model_name=settings.REPORT_ENGINE_MODEL_NAME or "gpt-4",
@@ -403,6 +477,9 @@ def create_llm_repair_functions() -> List:
 
                 # 解析响应
                 repaired = json.loads(response)
+                # 'chart' 命名空间只由本函数写入，只缓存校验通过的结果
+                if isinstance(repaired, dict) and ChartValidator().validate(repaired).is_valid:
+                    _store_api_repair(cache, 'chart', cache_key, repaired)
                 return repaired
 
             except Exception as e:
@@ -417,9 +494,7 @@ def create_llm_repair_functions() -> List:
         def repair_with_forum_engine(widget_block: Dict[str, Any], errors: List[str]) -> Optional[Dict[str, Any]]:
             """使用ForumEngine的LLM修复图表"""
             try:
-                from ReportEngine.llms import LLMClient
-
-                client = LLMClient(
+                client = get_shared_llm_client(
                     api_key=settings.FORUM_HOST_API_KEY,
                     base_url=settings.FORUM_HOST_BASE_URL,
                     model_name=settings.FORUM_HOST_MODEL_NAME or "gpt-4",
@@ -451,9 +526,7 @@ def create_llm_repair_functions() -> List:
         def repair_with_insight_engine(widget_block: Dict[str, Any], errors: List[str]) -> Optional[Dict[str, Any]]:
             """使用InsightEngine的LLM修复图表"""
             try:
-                from ReportEngine.llms import LLMClient
-
-                client = LLMClient(
+                client = get_shared_llm_client(
                     api_key=settings.INSIGHT_ENGINE_API_KEY,
                     base_url=settings.INSIGHT_ENGINE_BASE_URL,
                     model_name=settings.INSIGHT_ENGINE_MODEL_NAME or "gpt-4",
@@ -485,9 +558,7 @@ def create_llm_repair_functions() -> List:
         def repair_with_media_engine(widget_block: Dict[str, Any], errors: List[str]) -> Optional[Dict[str, Any]]:
             """使用MediaEngine的LLM修复图表"""
             try:
-                from ReportEngine.llms import LLMClient
-
-                client = LLMClient(
+                client = get_shared_llm_client(
                     api_key=settings.MEDIA_ENGINE_API_KEY,
                     base_url=settings.MEDIA_ENGINE_BASE_URL,
                     model_name=settings.MEDIA_ENGINE_MODEL_NAME or "gpt-4",
@@ -537,10 +608,14 @@ def create_table_repair_functions() -> List:
     if settings.REPORT_ENGINE_API_KEY and settings.REPORT_ENGINE_BASE_URL:
         def repair_table_with_report_engine(table_block: Dict[str, Any], errors: List[str]) -> Optional[Dict[str, Any]]:
             """使用 ReportEngine 的 LLM 修复表格"""
+            cache = get_repair_cache()
+            cache_key = build_block_cache_key(table_block)
+            cached = _load_cached_repair(cache, 'table', cache_key)
+            if cached is not None:
+                logger.debug("表格修复命中磁盘缓存")
+                return cached
             try:
-                from ReportEngine.llms import LLMClient
-
-                client = LLMClient(
+                client = get_shared_llm_client(
                     api_key=settings.REPORT_ENGINE_API_KEY,
                     base_url=settings.REPORT_ENGINE_BASE_URL,
                     model_name=settings.REPORT_ENGINE_MODEL_NAME or "gpt-4",
@@ -559,6 +634,9 @@ def create_table_repair_functions() -> List:
 
                 # 解析响应
                 repaired = json.loads(response)
+                # 'table' 命名空间只由本函数写入，只缓存校验通过的结果
+                if isinstance(repaired, dict) and TableValidator().validate(repaired).is_valid:
+                    _store_api_repair(cache, 'table', cache_key, repaired)
                 return repaired
 
             except Exception as e:
@@ -591,10 +669,14 @@ def create_wordcloud_repair_functions() -> List:
     if settings.REPORT_ENGINE_API_KEY and settings.REPORT_ENGINE_BASE_URL:
         def repair_wordcloud_with_report_engine(widget_block: Dict[str, Any], errors: List[str]) -> Optional[Dict[str, Any]]:
             """使用 ReportEngine 的 LLM 修复词云"""
+            cache = get_repair_cache()
+            cache_key = build_block_cache_key(widget_block)
+            cached = _load_cached_repair(cache, 'wordcloud', cache_key)
+            if cached is not None:
+                logger.debug("词云修复命中磁盘缓存")
+                return cached
             try:
-                from ReportEngine.llms import LLMClient
-
-                client = LLMClient(
+                client = get_shared_llm_client(
                     api_key=settings.REPORT_ENGINE_API_KEY,
                     base_url=settings.REPORT_ENGINE_BASE_URL,
                     model_name=settings.REPORT_ENGINE_MODEL_NAME or "gpt-4",
@@ -613,6 +695,9 @@ def create_wordcloud_repair_functions() -> List:
 
                 # 解析响应
                 repaired = json.loads(response)
+                # 与图表/表格一致，只缓存校验通过的结果
+                if isinstance(repaired, dict) and WordCloudValidator().validate(repaired).is_valid:
+                    _store_api_repair(cache, 'wordcloud', cache_key, repaired)
                 return repaired
 
             except Exception as e:
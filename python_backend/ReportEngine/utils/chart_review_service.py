@@ -4,6 +4,9 @@
 提供单例服务，确保所有渲染器共享修复状态，避免重复修复。
 修复成功后可自动持久化到 IR 文件。
 
+审查分两阶段：先遍历整本 IR 完成规范化与验证，再把验证失败的图表
+一次性交给 ChartRepairer.repair_batch，需要 LLM 修复的图表并发提交。
+
 线程安全说明：
 - 验证器和修复器实例是无状态的，可安全共享
 - 每次 review_document 调用会创建独立的 ReviewSession
@@ -13,17 +16,19 @@
 from __future__ import annotations
 
 import copy
-import json
 import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
 
+from ReportEngine.ir.traversal import iter_document_blocks
+from ReportEngine.utils.config import settings
 from ReportEngine.utils.chart_validator import (
     ChartValidator,
     ChartRepairer,
+    RepairResult,
     ValidationResult,
     create_chart_validator,
     create_chart_repairer
@@ -184,17 +189,17 @@ class ChartReviewService:
                 self._last_stats = session_stats
             return session_stats
 
-        has_repairs = False
-
-        # 遍历所有章节
-        for chapter in document_ir.get("chapters", []) or []:
-            if not isinstance(chapter, dict):
+        # 阶段一：遍历所有章节，规范化 + 验证，收集验证失败的图表
+        pending: List[Tuple[Dict[str, Any], ValidationResult]] = []
+        for ref in iter_document_blocks(document_ir):
+            if ref.type != "widget":
                 continue
-            blocks = chapter.get("blocks", [])
-            if isinstance(blocks, list):
-                chapter_repairs = self._walk_and_review_blocks(blocks, chapter, session_stats)
-                if chapter_repairs:
-                    has_repairs = True
+            validation_result = self._review_chart_block(ref.block, ref.chapter, session_stats)
+            if validation_result is not None:
+                pending.append((ref.block, validation_result))
+
+        # 阶段二：本地修复 + 并发 API 修复（共享 LLM 客户端）
+        has_repairs = self._repair_pending_blocks(pending, session_stats)
 
         # 输出统计信息
         self._log_stats(session_stats)
@@ -209,70 +214,14 @@ class ChartReviewService:
 
         return session_stats
 
-    def _walk_and_review_blocks(
-        self,
-        blocks: List[Any],
-        chapter_context: Dict[str, Any] | None,
-        session_stats: ReviewStats
-    ) -> bool:
-        """
-        递归遍历 blocks 并审查图表。
-
-        参数:
-            blocks: 要遍历的 block 列表
-            chapter_context: 章节上下文
-            session_stats: 本次审查会话的统计对象
-
-        返回:
-            bool: 是否有修复发生
-        """
-        has_repairs = False
-
-        for block in blocks or []:
-            if not isinstance(block, dict):
-                continue
-
-            # 检查是否是图表 widget
-            if block.get("type") == "widget":
-                repaired = self._review_chart_block(block, chapter_context, session_stats)
-                if repaired:
-                    has_repairs = True
-
-            # 递归处理嵌套的 blocks
-            nested_blocks = block.get("blocks")
-            if isinstance(nested_blocks, list):
-                if self._walk_and_review_blocks(nested_blocks, chapter_context, session_stats):
-                    has_repairs = True
-
-            # 处理 list 类型的 items
-            if block.get("type") == "list":
-                for item in block.get("items", []):
-                    if isinstance(item, list):
-                        if self._walk_and_review_blocks(item, chapter_context, session_stats):
-                            has_repairs = True
-
-            # 处理 table 类型的 cells
-            if block.get("type") == "table":
-                for row in block.get("rows", []):
-                    if not isinstance(row, dict):
-                        continue
-                    for cell in row.get("cells", []):
-                        if isinstance(cell, dict):
-                            cell_blocks = cell.get("blocks", [])
-                            if isinstance(cell_blocks, list):
-                                if self._walk_and_review_blocks(cell_blocks, chapter_context, session_stats):
-                                    has_repairs = True
-
-        return has_repairs
-
     def _review_chart_block(
         self,
         block: Dict[str, Any],
         chapter_context: Dict[str, Any] | None,
         session_stats: ReviewStats
-    ) -> bool:
+    ) -> Optional[ValidationResult]:
         """
-        审查单个图表 block。
+        审查单个图表 block（仅验证，不修复）。
 
         参数:
             block: 要审查的 block
@@ -280,25 +229,25 @@ class ChartReviewService:
             session_stats: 本次审查会话的统计对象
 
         返回:
-            bool: 是否进行了修复
+            ValidationResult | None: 验证失败时返回验证结果（需进入修复阶段），否则返回 None
         """
         widget_type = block.get("widgetType", "")
         if not isinstance(widget_type, str):
-            return False
+            return None
 
         # 只处理 chart.js 类型（词云单独处理，不需要修复）
         is_chart = widget_type.startswith("chart.js")
         is_wordcloud = "wordcloud" in widget_type.lower()
 
         if not is_chart:
-            return False
+            return None
 
         widget_id = block.get("widgetId", "unknown")
 
         # 检查是否已审查过
         if block.get("_chart_reviewed"):
             logger.debug(f"图表 {widget_id} 已审查过，跳过")
-            return False
+            return None
 
         session_stats.total += 1
 
@@ -308,7 +257,7 @@ class ChartReviewService:
             block["_chart_reviewed"] = True
             block["_chart_review_status"] = "valid"
             block["_chart_review_method"] = "none"
-            return False
+            return None
 
         # 先进行数据规范化（从章节上下文补充数据）
         self._normalize_chart_block(block, chapter_context)
@@ -324,12 +273,51 @@ class ChartReviewService:
             block["_chart_review_method"] = "none"
             if validation_result.warnings:
                 logger.debug(f"图表 {widget_id} 验证通过，但有警告: {validation_result.warnings}")
-            return False
+            return None
 
-        # 验证失败，尝试修复
+        # 验证失败，进入修复阶段
         logger.warning(f"图表 {widget_id} 验证失败: {validation_result.errors}")
+        return validation_result
+
+    def _repair_pending_blocks(
+        self,
+        pending: List[Tuple[Dict[str, Any], ValidationResult]],
+        session_stats: ReviewStats
+    ) -> bool:
+        """
+        批量修复验证失败的图表并回写结果。
+
+        需要 API 修复的图表由 ChartRepairer.repair_batch 并发提交，
+        并发数由 CHART_REPAIR_MAX_WORKERS 控制。
 
-        repair_result = self.repairer.repair(block, validation_result)
+        返回:
+            bool: 是否有修复发生
+        """
+        if not pending:
+            return False
+
+        repair_results = self.repairer.repair_batch(pending, max_workers=self._max_workers())
+
+        has_repairs = False
+        for (block, validation_result), repair_result in zip(pending, repair_results):
+            if self._apply_repair_result(block, validation_result, repair_result, session_stats):
+                has_repairs = True
+        return has_repairs
+
+    def _apply_repair_result(
+        self,
+        block: Dict[str, Any],
+        validation_result: ValidationResult,
+        repair_result: RepairResult,
+        session_stats: ReviewStats
+    ) -> bool:
+        """
+        将修复结果写回 block 并更新统计。
+
+        返回:
+            bool: 是否进行了修复
+        """
+        widget_id = block.get("widgetId", "unknown")
 
         if repair_result.success and repair_result.repaired_block:
             # 修复成功，覆盖原始 block 数据
@@ -366,6 +354,14 @@ class ChartReviewService:
         logger.warning(f"图表 {widget_id} 修复失败，已标记为不可渲染")
         return False
 
+    @staticmethod
+    def _max_workers() -> int:
+        """读取 API 修复并发数配置，非法值回退为串行。"""
+        try:
+            return max(1, int(getattr(settings, "CHART_REPAIR_MAX_WORKERS", 4)))
+        except (TypeError, ValueError):
+            return 1
+
     def _normalize_chart_block(
         self,
         block: Dict[str, Any],
@@ -510,6 +506,51 @@ class ChartReviewService:
         "_chart_error_reason",
     ])
 
+    def _strip_block(self, block: Dict[str, Any]) -> None:
+        """递归移除 block 及其嵌套结构中的内部元数据"""
+        if not isinstance(block, dict):
+            return
+
+        # 移除当前 block 的内部键
+        for key in self._INTERNAL_METADATA_KEYS:
+            block.pop(key, None)
+
+        # 递归处理嵌套的 blocks
+        nested_blocks = block.get("blocks")
+        if isinstance(nested_blocks, list):
+            for nested in nested_blocks:
+                self._strip_block(nested)
+
+        # 处理 list 类型的 items
+        if block.get("type") == "list":
+            for item in block.get("items", []):
+                if isinstance(item, list):
+                    for sub_block in item:
+                        self._strip_block(sub_block)
+
+        # 处理 table 类型的 cells
+        if block.get("type") == "table":
+            for row in block.get("rows", []):
+                if not isinstance(row, dict):
+                    continue
+                for cell in row.get("cells", []):
+                    if isinstance(cell, dict):
+                        cell_blocks = cell.get("blocks", [])
+                        if isinstance(cell_blocks, list):
+                            for cell_block in cell_blocks:
+                                self._strip_block(cell_block)
+
+    def strip_chapter_metadata(self, chapter: Any) -> Any:
+        """返回移除内部元数据后的单章副本（只复制当前章节）"""
+        if not isinstance(chapter, dict):
+            return chapter
+        cleaned = copy.deepcopy(chapter)
+        blocks = cleaned.get("blocks", [])
+        if isinstance(blocks, list):
+            for block in blocks:
+                self._strip_block(block)
+        return cleaned
+
     def _strip_internal_metadata(self, document_ir: Dict[str, Any]) -> Dict[str, Any]:
         """
         移除文档中所有内部元数据键，返回干净的副本用于持久化。
@@ -517,71 +558,39 @@ class ChartReviewService:
         这些内部标记仅用于渲染过程的状态跟踪，不应保存到 IR 文件中，
         以避免污染文档结构和导致重复使用时的不一致行为。
         """
-        cleaned = copy.deepcopy(document_ir)
-
-        def strip_from_block(block: Dict[str, Any]) -> None:
-            """递归移除 block 及其嵌套结构中的内部元数据"""
-            if not isinstance(block, dict):
-                return
-
-            # 移除当前 block 的内部键
-            for key in self._INTERNAL_METADATA_KEYS:
-                block.pop(key, None)
-
-            # 递归处理嵌套的 blocks
-            nested_blocks = block.get("blocks")
-            if isinstance(nested_blocks, list):
-                for nested in nested_blocks:
-                    strip_from_block(nested)
-
-            # 处理 list 类型的 items
-            if block.get("type") == "list":
-                for item in block.get("items", []):
-                    if isinstance(item, list):
-                        for sub_block in item:
-                            strip_from_block(sub_block)
-
-            # 处理 table 类型的 cells
-            if block.get("type") == "table":
-                for row in block.get("rows", []):
-                    if not isinstance(row, dict):
-                        continue
-                    for cell in row.get("cells", []):
-                        if isinstance(cell, dict):
-                            cell_blocks = cell.get("blocks", [])
-                            if isinstance(cell_blocks, list):
-                                for cell_block in cell_blocks:
-                                    strip_from_block(cell_block)
-
-        # 处理所有章节
-        for chapter in cleaned.get("chapters", []) or []:
-            if not isinstance(chapter, dict):
-                continue
-            blocks = chapter.get("blocks", [])
-            if isinstance(blocks, list):
-                for block in blocks:
-                    strip_from_block(block)
-
+        cleaned = copy.deepcopy({k: v for k, v in document_ir.items() if k != "chapters"})
+        if "chapters" in document_ir:
+            cleaned["chapters"] = [
+                self.strip_chapter_metadata(chapter) for chapter in document_ir.get("chapters") or []
+            ]
         return cleaned
 
     def _save_ir_to_file(self, document_ir: Dict[str, Any], file_path: str | Path) -> None:
-        """保存 IR 到文件（移除内部元数据后）"""
-        try:
-            path = Path(file_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
+        """
+        保存 IR 到文件（移除内部元数据后）。
 
-            # 移除内部元数据键，保持 IR 文件干净
-            cleaned_ir = self._strip_internal_metadata(document_ir)
+        按章节逐个复制、清理并写出，峰值内存只多出一个章节的副本，
+        而不是整本文档的深拷贝；与其他IR写入一样遵循 DOCUMENT_IR_PRETTY。
+        """
+        # 延迟导入：ir.document_io 依赖 utils.serialization，避免 utils 包初始化时循环导入
+        from ReportEngine.ir.document_io import write_document_ir
 
-            path.write_text(
-                json.dumps(cleaned_ir, ensure_ascii=False, indent=2),
-                encoding="utf-8"
+        try:
+            path = Path(file_path)
+            chapters = (
+                self.strip_chapter_metadata(chapter)
+                for chapter in document_ir.get("chapters", []) or []
+            )
+            write_document_ir(
+                path,
+                document_ir,
+                pretty=bool(getattr(settings, "DOCUMENT_IR_PRETTY", False)),
+                chapters=chapters,
             )
             logger.info(f"ChartReviewService: 修复后的 IR 已保存到 {path}")
         except Exception as e:
             logger.exception(f"ChartReviewService: 保存 IR 文件失败: {e}")
 
-
 # 全局单例实例
 _chart_review_service: Optional[ChartReviewService] = None
 
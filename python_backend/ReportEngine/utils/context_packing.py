@@ -0,0 +1,421 @@
+"""
+按 token 预算打包多来源上下文。
+
+三引擎报告动辄数万字，且彼此大量转述同一批新闻；直接整篇塞进规划类提示词
+既慢又贵，简单截断又会丢掉后半部分的关键信息。本模块把文本切成段落后：
+
+1. 用 MinHash（bottom-k 变体，字符 5-gram）剔除跨来源的近似重复段落；
+2. 用 BM25 按与主题的相关度给段落打分；
+3. 按来源权重分配 token 预算，各来源先按相关度填满自己的份额，
+   剩余预算再按全局相关度分给其他段落；
+4. 选中的段落按原文顺序拼回，保持叙述连贯。
+
+总量本就在预算内且没有重复时原样返回，不做任何改写。
+
+``pack_sources`` 用于一次性打包；同一批素材需要按不同查询多次取回时
+（如每个章节按自己的提纲取材），使用 ``PassageIndex`` 只切分/去重/分词一次。
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+_CJK_CHAR = re.compile(r"[㐀-䶿一-鿿豈-﫿]")
+_LATIN_WORD = re.compile(r"[a-z0-9]+(?:[._-][a-z0-9]+)*")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n|\n(?=#{1,6}\s)")
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;\n])|(?<=\.\s)")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数：每个汉字约 1 token，其余非空白字符约 4 个计 1 token。
+
+    不依赖具体模型的分词器，只用于预算分配。
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_CHAR.findall(text))
+    other = len(text) - cjk - sum(1 for ch in text if ch.isspace())
+    return cjk + math.ceil(max(other, 0) / 4)
+
+
+def tokenize(text: str) -> List[str]:
+    """检索用分词：英文/数字按词，中文按相邻二元组（单字段落退化为单字）"""
+    lowered = (text or "").lower()
+    terms = _LATIN_WORD.findall(lowered)
+    for run in re.findall(r"[㐀-䶿一-鿿豈-﫿]+", lowered):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def split_passages(text: str, max_chars: int = 800, min_chars: int = 40) -> List[str]:
+    """
+    把文本切成段落：按空行/Markdown 标题切分，过长的段落再按句末标点或换行切开，
+    过短的碎片并入前一段。
+    """
+    passages: List[str] = []
+    for block in _PARAGRAPH_BREAK.split(text or ""):
+        block = block.strip()
+        if not block:
+            continue
+        if len(block) <= max_chars:
+            pieces = [block]
+        else:
+            pieces, current = [], ""
+            for sentence in _SENTENCE_END.split(block):
+                if current and len(current) + len(sentence) > max_chars:
+                    pieces.append(current)
+                    current = ""
+                current += sentence
+            if current:
+                pieces.append(current)
+        for piece in pieces:
+            if passages and len(piece) < min_chars and len(passages[-1]) + len(piece) <= max_chars:
+                passages[-1] = f"{passages[-1]}\n{piece}"
+            else:
+                passages.append(piece)
+    return passages
+
+
+class MinHasher:
+    """
+    bottom-k MinHash：每段文本只保留 k 个最小的 shingle 哈希作为签名。
+
+    只需一次哈希即可得到签名，估计 Jaccard 相似度的误差与 k 个独立置换相当。
+    哈希基于进程内的 ``hash()``，签名只在本进程内可比。
+    """
+
+    def __init__(self, k: int = 64, shingle_size: int = 5):
+        self.k = k
+        self.shingle_size = shingle_size
+
+    def shingles(self, text: str) -> Set[str]:
+        normalized = _NON_WORD.sub(" ", (text or "").lower()).strip()
+        size = self.shingle_size
+        if len(normalized) <= size:
+            return {normalized} if normalized else set()
+        return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """返回升序排列的 k 个最小哈希"""
+        return tuple(heapq.nsmallest(self.k, {hash(sh) for sh in self.shingles(text)}))
+
+    def similarity(self, sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """用两签名并集的 bottom-k 估计 Jaccard 相似度"""
+        if not sig_a or not sig_b:
+            return 0.0
+        union_k = heapq.nsmallest(self.k, set(sig_a) | set(sig_b))
+        both = set(sig_a) & set(sig_b)
+        return sum(1 for value in union_k if value in both) / len(union_k)
+
+
+class NearDuplicateFilter:
+    """
+    增量近似去重：以签名中最小的若干个哈希做分桶找候选，再用相似度确认。
+
+    近似重复段落的最小哈希高度重合，因此无需两两比较。
+    """
+
+    def __init__(self, threshold: float = 0.8, k: int = 64, probes: int = 4):
+        self.threshold = threshold
+        self.hasher = MinHasher(k=k)
+        self.probes = probes
+        self._signatures: List[Tuple[int, ...]] = []
+        self._signature_sets: List[frozenset] = []
+        self._buckets: Dict[int, List[int]] = {}
+
+    def add(self, text: str) -> bool:
+        """登记一段文本；与已登记文本近似重复时返回 False"""
+        signature = self.hasher.signature(text)
+        if not signature:
+            return True
+        signature_set = frozenset(signature)
+        # 估计值的分子不超过两签名的交集，交集不足时无需精确计算
+        min_shared = self.threshold * min(self.hasher.k, len(signature))
+        candidates: Set[int] = set()
+        for value in signature[:self.probes]:
+            candidates.update(self._buckets.get(value, ()))
+        for idx in candidates:
+            if len(signature_set & self._signature_sets[idx]) < min_shared:
+                continue
+            if self.hasher.similarity(signature, self._signatures[idx]) >= self.threshold:
+                return False
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        self._signature_sets.append(signature_set)
+        for value in signature[:self.probes]:
+            self._buckets.setdefault(value, []).append(position)
+        return True
+
+
+def bm25_scores(
+    query_terms: Iterable[str],
+    documents: Sequence[Sequence[str]],
+    k1: float = 1.5,
+    b: float = 0.75,
+) -> List[float]:
+    """
+    对已分词的文档集合计算 BM25 得分。
+
+    参数:
+        query_terms: 查询词
+        documents: 每个文档的词序列
+    """
+    query = set(query_terms)
+    total = len(documents)
+    if not total or not query:
+        return [0.0] * total
+    avg_len = sum(len(doc) for doc in documents) / total or 1.0
+    doc_freq: Counter = Counter()
+    frequencies = []
+    for doc in documents:
+        tf = Counter(term for term in doc if term in query)
+        frequencies.append(tf)
+        doc_freq.update(tf.keys())
+    idf = {
+        term: math.log(1 + (total - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+        for term in query
+    }
+    scores = []
+    for doc, tf in zip(documents, frequencies):
+        norm = k1 * (1 - b + b * len(doc) / avg_len)
+        scores.append(sum(idf[t] * f * (k1 + 1) / (f + norm) for t, f in tf.items()))
+    return scores
+
+
+@dataclass
+class PackedContext:
+    """打包结果与统计"""
+
+    texts: Dict[str, str]
+    tokens: Dict[str, int] = field(default_factory=dict)
+    original_tokens: int = 0
+    duplicates_dropped: int = 0
+    passages_dropped: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+
+@dataclass
+class _Passage:
+    source: str
+    position: int
+    text: str
+    tokens: int
+
+
+def _split_sources(
+    sources: Dict[str, str], dedup_threshold: float
+) -> Tuple[List[_Passage], int]:
+    """切分全部来源并跨来源去重，返回保留的段落与丢弃的重复段数"""
+    dedup = NearDuplicateFilter(threshold=dedup_threshold)
+    passages: List[_Passage] = []
+    duplicates = 0
+    for name, text in sources.items():
+        for position, chunk in enumerate(split_passages(text or "")):
+            if not dedup.add(chunk):
+                duplicates += 1
+                continue
+            passages.append(_Passage(name, position, chunk, estimate_tokens(chunk)))
+    return passages, duplicates
+
+
+def _select_within_budget(
+    passages: Sequence[_Passage],
+    scores: Sequence[float],
+    names: Iterable[str],
+    budget_tokens: int,
+    weights: Optional[Dict[str, float]],
+) -> Tuple[Dict[str, str], Dict[str, int], int]:
+    """
+    按来源份额 + 全局相关度在预算内选段，返回 (各来源文本, 各来源token, 选中段数)。
+
+    各来源先在自己的份额内装入相关段落，剩余预算再按全局相关度（相同时按原文顺序）分配。
+    """
+    names = list(names)
+    weights = {name: (weights or {}).get(name, 1.0) for name in names}
+    weight_sum = sum(weights.values()) or 1.0
+    quotas = {name: budget_tokens * weights[name] / weight_sum for name in names}
+    # 相关度相同时保留原文靠前的段落
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], passages[i].position))
+
+    selected: Set[int] = set()
+    used = {name: 0 for name in names}
+    # 份额只留给命中查询的段落，不相关的段落不挤占其他来源的相关内容
+    for idx in ranked:
+        passage = passages[idx]
+        if scores[idx] > 0 and used[passage.source] + passage.tokens <= quotas[passage.source]:
+            selected.add(idx)
+            used[passage.source] += passage.tokens
+
+    # 未用完的份额按全局相关度分给其他段落
+    remaining = budget_tokens - sum(used.values())
+    for idx in ranked:
+        if remaining <= 0:
+            break
+        passage = passages[idx]
+        if idx not in selected and passage.tokens <= remaining:
+            selected.add(idx)
+            used[passage.source] += passage.tokens
+            remaining -= passage.tokens
+
+    chosen: Dict[str, List[str]] = {name: [] for name in names}
+    for idx, passage in enumerate(passages):
+        if idx in selected:
+            chosen[passage.source].append(passage.text)
+    texts = {name: "\n\n".join(chosen[name]) for name in names}
+    return texts, used, len(selected)
+
+
+def pack_sources(
+    sources: Dict[str, str],
+    query: str,
+    budget_tokens: int,
+    weights: Optional[Dict[str, float]] = None,
+    dedup_threshold: float = 0.8,
+) -> PackedContext:
+    """
+    在总 token 预算内打包多个来源的文本。
+
+    参数:
+        sources: 来源名 -> 原文
+        query: 主题/查询词，用于相关度排序
+        budget_tokens: 总 token 预算
+        weights: 各来源的预算权重（默认均分，缺失的来源权重为 1）
+        dedup_threshold: 判定近似重复的 Jaccard 阈值
+
+    返回:
+        PackedContext: 各来源打包后的文本与统计
+    """
+    original_tokens = {name: estimate_tokens(text or "") for name, text in sources.items()}
+    total_original = sum(original_tokens.values())
+    passages, duplicates = _split_sources(sources, dedup_threshold)
+
+    if not duplicates and total_original <= budget_tokens:
+        return PackedContext(
+            texts={name: text or "" for name, text in sources.items()},
+            tokens=original_tokens,
+            original_tokens=total_original,
+        )
+
+    scores = bm25_scores(tokenize(query), [tokenize(p.text) for p in passages])
+    texts, used, selected = _select_within_budget(passages, scores, sources, budget_tokens, weights)
+    return PackedContext(
+        texts=texts,
+        tokens=used,
+        original_tokens=total_original,
+        duplicates_dropped=duplicates,
+        passages_dropped=len(passages) - selected,
+    )
+
+
+class PassageIndex:
+    """
+    可重复查询的段落索引。
+
+    构建时完成切分、跨来源去重、分词与 BM25 统计（词频、文档频率、倒排表），
+    之后每次 ``retrieve`` 只对含查询词的段落打分并按预算选段。
+    只读，构建完成后可被多个线程同时查询。
+    """
+
+    def __init__(
+        self,
+        sources: Dict[str, str],
+        dedup_threshold: float = 0.8,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.sources = {name: text or "" for name, text in sources.items()}
+        self.original_tokens = {name: estimate_tokens(text) for name, text in self.sources.items()}
+        self.passages, self.duplicates_dropped = _split_sources(self.sources, dedup_threshold)
+        self.k1 = k1
+        self.b = b
+
+        self._term_freqs: List[Counter] = []
+        self._norms: List[float] = []
+        self._postings: Dict[str, List[int]] = {}
+        lengths = []
+        for idx, passage in enumerate(self.passages):
+            tf = Counter(tokenize(passage.text))
+            self._term_freqs.append(tf)
+            lengths.append(sum(tf.values()))
+            for term in tf:
+                self._postings.setdefault(term, []).append(idx)
+        avg_len = (sum(lengths) / len(lengths) if lengths else 0) or 1.0
+        self._norms = [k1 * (1 - b + b * length / avg_len) for length in lengths]
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.original_tokens.values())
+
+    def scores(self, query: str) -> List[float]:
+        """对全部段落计算 BM25 得分（不含查询词的段落为 0）"""
+        scores = [0.0] * len(self.passages)
+        total = len(self.passages)
+        k1 = self.k1
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for idx in postings:
+                f = self._term_freqs[idx][term]
+                scores[idx] += idf * f * (k1 + 1) / (f + self._norms[idx])
+        return scores
+
+    def retrieve(
+        self,
+        query: str,
+        budget_tokens: int,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> PackedContext:
+        """
+        取回与查询最相关的段落，语义与 ``pack_sources`` 相同。
+
+        参数:
+            query: 查询文本（如章节标题+提纲+强调点）
+            budget_tokens: 总 token 预算
+            weights: 各来源的预算权重
+        """
+        total_original = self.total_tokens
+        if not self.duplicates_dropped and total_original <= budget_tokens:
+            return PackedContext(
+                texts=dict(self.sources),
+                tokens=dict(self.original_tokens),
+                original_tokens=total_original,
+            )
+        texts, used, selected = _select_within_budget(
+            self.passages, self.scores(query), self.sources, budget_tokens, weights
+        )
+        return PackedContext(
+            texts=texts,
+            tokens=used,
+            original_tokens=total_original,
+            duplicates_dropped=self.duplicates_dropped,
+            passages_dropped=len(self.passages) - selected,
+        )
+
+
+__all__ = [
+    "MinHasher",
+    "NearDuplicateFilter",
+    "PackedContext",
+    "PassageIndex",
+    "bm25_scores",
+    "estimate_tokens",
+    "pack_sources",
+    "split_passages",
+    "tokenize",
+]
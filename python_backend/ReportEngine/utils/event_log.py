@@ -0,0 +1,268 @@
+"""
+任务事件的磁盘追加日志。
+
+ReportTask 的内存历史只保留最近 1000 条事件，进程重启后全部丢失。本模块为每个任务
+维护一个只追加的分段日志，SSE 断线重连时可按 Last-Event-ID 直接定位回放：
+
+- 目录结构：``<root>/<task_id>/<首事件ID>.log`` + 同名 ``.idx``；
+- ``.log`` 为 JSON Lines，每行一个事件；
+- ``.idx`` 为定长二进制记录 ``(event_id, offset)``（各 8 字节小端），
+  读取时二分查找后直接 seek，无需线性扫描；
+- 单段超过 ``segment_max_bytes`` 时滚动新段，段数超过 ``max_segments`` 时删除最旧段；
+- ``prune_event_logs`` 只保留最近 N 个任务的日志目录。
+
+写入失败只记录日志并停用该任务的持久化，不影响实时推送。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from ReportEngine.utils.serialization import dumps_bytes, loads
+
+_INDEX_RECORD = struct.Struct("<QQ")
+_SEGMENT_SUFFIX = ".log"
+_INDEX_SUFFIX = ".idx"
+_SAFE_TASK_ID = re.compile(r"[A-Za-z0-9_\-][A-Za-z0-9_.\-]*")
+
+
+def _is_safe_task_id(task_id: str) -> bool:
+    """任务ID会作为目录名使用，禁止路径分隔符与 . / .. 等特殊名称"""
+    return bool(task_id) and _SAFE_TASK_ID.fullmatch(task_id) is not None
+
+
+class TaskEventLog:
+    """
+    单个任务的分段事件日志。
+
+    写入端线程安全（内部互斥锁）；读取端每次打开独立文件句柄，可与写入并发。
+    """
+
+    def __init__(
+        self,
+        root_dir: str | Path,
+        task_id: str,
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        max_segments: int = 16,
+    ):
+        """
+        打开（或创建）任务日志目录，已有日志会被续写。
+
+        参数:
+            root_dir: 所有任务日志的根目录
+            task_id: 任务ID，作为子目录名
+            segment_max_bytes: 单个分段的最大字节数
+            max_segments: 每个任务保留的最大分段数
+        """
+        if not _is_safe_task_id(task_id):
+            raise ValueError(f"非法的任务ID: {task_id!r}")
+        self.task_id = task_id
+        self.directory = Path(root_dir) / task_id
+        self.segment_max_bytes = max(1024, int(segment_max_bytes))
+        self.max_segments = max(1, int(max_segments))
+        self._lock = threading.Lock()
+        self._log_fp = None
+        self._idx_fp = None
+        self._segment_size = 0
+        self._last_event_id = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._last_event_id = self._scan_last_event_id()
+
+    # ====== 写入 ======
+
+    @property
+    def last_event_id(self) -> int:
+        """已写入的最大事件ID（空日志为0）"""
+        return self._last_event_id
+
+    def append(self, event: Dict[str, Any]) -> None:
+        """
+        追加一条事件。事件必须带递增的整数 ``id``。
+
+        参数:
+            event: 已分配ID的事件字典
+        """
+        event_id = int(event["id"])
+        line = dumps_bytes(event) + b"\n"
+        with self._lock:
+            if self._log_fp is None or self._segment_size >= self.segment_max_bytes:
+                self._roll_segment_locked(event_id)
+            offset = self._segment_size
+            self._log_fp.write(line)
+            self._log_fp.flush()
+            self._idx_fp.write(_INDEX_RECORD.pack(event_id, offset))
+            self._idx_fp.flush()
+            self._segment_size += len(line)
+            self._last_event_id = event_id
+
+    def close(self) -> None:
+        """关闭当前分段的文件句柄"""
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self) -> None:
+        for fp in (self._log_fp, self._idx_fp):
+            if fp is not None:
+                try:
+                    fp.close()
+                except OSError:
+                    pass
+        self._log_fp = None
+        self._idx_fp = None
+
+    def _roll_segment_locked(self, first_event_id: int) -> None:
+        """关闭当前分段并以 first_event_id 开启新分段，随后执行分段保留策略"""
+        self._close_locked()
+        stem = f"{first_event_id:012d}"
+        log_path = self.directory / f"{stem}{_SEGMENT_SUFFIX}"
+        self._log_fp = open(log_path, "ab")
+        self._idx_fp = open(self.directory / f"{stem}{_INDEX_SUFFIX}", "ab")
+        self._segment_size = log_path.stat().st_size
+
+        segments = self._segment_ids()
+        for stale in segments[:-self.max_segments]:
+            for suffix in (_SEGMENT_SUFFIX, _INDEX_SUFFIX):
+                try:
+                    (self.directory / f"{stale:012d}{suffix}").unlink()
+                except FileNotFoundError:
+                    pass
+
+    # ====== 读取 ======
+
+    def _segment_ids(self) -> List[int]:
+        """按顺序返回现存分段的首事件ID"""
+        ids = []
+        for path in self.directory.glob(f"*{_SEGMENT_SUFFIX}"):
+            try:
+                ids.append(int(path.stem))
+            except ValueError:
+                continue
+        return sorted(ids)
+
+    def _scan_last_event_id(self) -> int:
+        """从最后一个分段的索引末尾恢复最大事件ID"""
+        segments = self._segment_ids()
+        if not segments:
+            return 0
+        idx_path = self.directory / f"{segments[-1]:012d}{_INDEX_SUFFIX}"
+        try:
+            size = idx_path.stat().st_size
+            if size < _INDEX_RECORD.size:
+                return segments[-1] - 1
+            with open(idx_path, "rb") as fp:
+                fp.seek((size // _INDEX_RECORD.size - 1) * _INDEX_RECORD.size)
+                event_id, _ = _INDEX_RECORD.unpack(fp.read(_INDEX_RECORD.size))
+            return event_id
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _seek_offset(idx_path: Path, after_id: int) -> Optional[int]:
+        """在索引中二分查找第一个 id > after_id 的记录，返回其在 .log 中的偏移"""
+        try:
+            with open(idx_path, "rb") as fp:
+                count = os.fstat(fp.fileno()).st_size // _INDEX_RECORD.size
+                lo, hi = 0, count
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    fp.seek(mid * _INDEX_RECORD.size)
+                    event_id, _ = _INDEX_RECORD.unpack(fp.read(_INDEX_RECORD.size))
+                    if event_id <= after_id:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                if lo >= count:
+                    return None
+                fp.seek(lo * _INDEX_RECORD.size)
+                _, offset = _INDEX_RECORD.unpack(fp.read(_INDEX_RECORD.size))
+                return offset
+        except OSError:
+            return None
+
+    def iter_since(self, last_event_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        按顺序产出 id 大于 last_event_id 的事件（None 表示从最早保留的事件开始）。
+
+        早于保留范围的 ID 会从最旧的分段开始回放。
+        """
+        after_id = int(last_event_id) if last_event_id is not None else 0
+        segments = self._segment_ids()
+        # 定位包含 after_id + 1 的分段：首事件ID不大于它的最后一个分段
+        start = 0
+        for pos, first_id in enumerate(segments):
+            if first_id <= after_id + 1:
+                start = pos
+        for first_id in segments[start:]:
+            stem = f"{first_id:012d}"
+            offset = 0
+            if first_id <= after_id:
+                offset = self._seek_offset(self.directory / f"{stem}{_INDEX_SUFFIX}", after_id)
+                if offset is None:
+                    continue
+            try:
+                with open(self.directory / f"{stem}{_SEGMENT_SUFFIX}", "rb") as fp:
+                    fp.seek(offset)
+                    for raw in fp:
+                        # 写入端可能正在追加，忽略不完整的最后一行
+                        if not raw.endswith(b"\n"):
+                            break
+                        try:
+                            event = loads(raw)
+                        except ValueError:
+                            continue
+                        if int(event.get("id", 0)) > after_id:
+                            yield event
+            except FileNotFoundError:
+                # 分段在读取期间被保留策略删除
+                continue
+
+
+def prune_event_logs(
+    root_dir: str | Path,
+    keep: int,
+    exclude: Optional[str] = None,
+) -> int:
+    """
+    只保留最近修改的 keep 个任务日志目录，返回删除的目录数。
+
+    参数:
+        root_dir: 事件日志根目录
+        keep: 保留的任务数
+        exclude: 始终保留的任务ID（通常是当前任务）
+    """
+    root = Path(root_dir)
+    if not root.is_dir():
+        return 0
+    task_dirs = [p for p in root.iterdir() if p.is_dir() and p.name != exclude]
+    task_dirs.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    removed = 0
+    for stale in task_dirs[max(0, keep):]:
+        try:
+            shutil.rmtree(stale)
+            removed += 1
+        except OSError as exc:
+            logger.warning(f"清理事件日志失败 {stale}: {exc}")
+    return removed
+
+
+def has_event_log(root_dir: str | Path, task_id: str) -> bool:
+    """任务是否存在磁盘事件日志"""
+    if not _is_safe_task_id(task_id):
+        return False
+    task_dir = Path(root_dir) / task_id
+    return task_dir.is_dir() and any(task_dir.glob(f"*{_SEGMENT_SUFFIX}"))
+
+
+__all__ = [
+    "TaskEventLog",
+    "prune_event_logs",
+    "has_event_log",
+]
@@ -0,0 +1,202 @@
+"""
+热路径JSON序列化。
+
+SSE事件推送、事件日志、章节/manifest落盘、图谱存取、修复缓存key与LLM输出解析
+都会频繁编解码JSON。本模块按可用性自动选择后端：
+
+- ``orjson``（首选）：C实现，编码/解码通常比标准库快数倍；
+- ``msgspec``：同为C实现的备选；
+- ``json``：标准库兜底，保证没有可选依赖时行为不变。
+
+对外输出统一为紧凑JSON（无多余空格、非ASCII字符原样保留，布局同
+``ensure_ascii=False, separators=(",", ":")``），``indent=True`` 时为2空格缩进。
+快速后端无法处理的输入（超出64位的整数、孤立代理字符、过深的嵌套等）自动回退到标准库，
+错误类型与标准库一致：编码失败抛 ``TypeError``/``ValueError``，解码失败抛
+``json.JSONDecodeError``。
+
+解析结果与标准库一致，但输出文本并非逐字节相同，已知差异：
+
+- 浮点数的写法：orjson 输出 ``1e20``/``1.5e-7``，标准库为 ``1e+20``/``1.5e-07``；
+- ``datetime``/``date``/``UUID``/dataclass 由快速后端原生编码，不经过 ``default``，
+  例如 ``default=str`` 时 datetime 输出 ``2024-01-01T08:00:00`` 而非 ``2024-01-01 08:00:00``；
+- orjson 把 NaN/Infinity 编码为 ``null``（标准库输出非标准的 ``NaN`` 字面量，
+  浏览器端 ``JSON.parse`` 本就无法解析）。
+
+因此需要跨环境逐字节稳定的场景（如 :func:`canonical_hash` 生成的持久化缓存key）
+固定使用标准库，不随后端切换。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Callable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - 取决于运行环境
+    msgspec = None
+
+JSON_BACKENDS: Tuple[str, ...] = tuple(
+    name
+    for name, module in (("orjson", orjson), ("msgspec", msgspec), ("json", json))
+    if module is not None
+)
+
+_backend = JSON_BACKENDS[0]
+
+
+def available_backends() -> Tuple[str, ...]:
+    """返回当前环境可用的后端，按优先级排序"""
+    return JSON_BACKENDS
+
+
+def get_backend() -> str:
+    """返回当前使用的后端名称"""
+    return _backend
+
+
+def set_backend(name: str) -> str:
+    """
+    切换后端（主要用于基准测试与排障）。
+
+    参数:
+        name: orjson/msgspec/json，或 auto 表示按优先级自动选择。
+
+    返回:
+        str: 切换前的后端名称，便于调用方恢复。
+    """
+    global _backend
+    previous = _backend
+    if name == "auto":
+        _backend = JSON_BACKENDS[0]
+    elif name in JSON_BACKENDS:
+        _backend = name
+    else:
+        raise ValueError(f"JSON后端不可用: {name}（可用: {', '.join(JSON_BACKENDS)}）")
+    return previous
+
+
+def _stdlib_dumps(obj: Any, indent: bool, sort_keys: bool, default: Optional[Callable]) -> str:
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys, default=default)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=default
+    )
+
+
+def _fast_dumps(obj: Any, indent: bool, sort_keys: bool, default: Optional[Callable]) -> Optional[bytes]:
+    """用快速后端编码，无法处理时返回 None 交由标准库兜底"""
+    if _backend == "orjson":
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            return None
+    if _backend == "msgspec":
+        try:
+            data = msgspec.json.encode(
+                obj, enc_hook=default, order="sorted" if sort_keys else None
+            )
+            return msgspec.json.format(data, indent=2) if indent else data
+        except (TypeError, ValueError, msgspec.EncodeError):
+            return None
+    return None
+
+
+def dumps_bytes(
+    obj: Any,
+    *,
+    indent: bool = False,
+    sort_keys: bool = False,
+    default: Optional[Callable[[Any], Any]] = None,
+) -> bytes:
+    """
+    编码为UTF-8字节串。写文件/套接字时优先使用，省去一次 str 往返。
+
+    参数:
+        obj: 待编码对象。
+        indent: 是否2空格缩进。
+        sort_keys: 是否按键排序（生成稳定哈希时使用）。
+        default: 无法直接编码的对象的转换函数，语义同 ``json.dumps(default=...)``。
+    """
+    data = _fast_dumps(obj, indent, sort_keys, default)
+    if data is not None:
+        return data
+    return _stdlib_dumps(obj, indent, sort_keys, default).encode("utf-8")
+
+
+def dumps(
+    obj: Any,
+    *,
+    indent: bool = False,
+    sort_keys: bool = False,
+    default: Optional[Callable[[Any], Any]] = None,
+) -> str:
+    """
+    编码为字符串，参数同 :func:`dumps_bytes`。
+
+    回退时直接返回标准库的字符串：含孤立代理字符（如 ``"\\ud800"``）的文本
+    无法编码为UTF-8，不能再经字节串中转。
+    """
+    data = _fast_dumps(obj, indent, sort_keys, default)
+    if data is not None:
+        return data.decode("utf-8")
+    return _stdlib_dumps(obj, indent, sort_keys, default)
+
+
+def loads(data: str | bytes | bytearray | memoryview) -> Any:
+    """
+    解码JSON文本或字节串。
+
+    快速后端拒绝的输入交给标准库重新解析，以保留标准库的宽松语义
+    （NaN/Infinity）和带行列号的 ``JSONDecodeError``。
+    """
+    if _backend == "orjson":
+        try:
+            return orjson.loads(data)
+        except (ValueError, TypeError):
+            pass
+    elif _backend == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except (ValueError, TypeError, msgspec.DecodeError):
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def canonical_hash(obj: Any) -> str:
+    """
+    计算对象的稳定哈希（按键排序的紧凑JSON的MD5）。
+
+    固定使用标准库编码，保证同一对象在有无 orjson/msgspec 的环境中得到相同的哈希；
+    无法编码的值按 ``str()`` 处理；编码彻底失败时退回 ``repr``，保证总能得到哈希。
+    """
+    try:
+        payload = _stdlib_dumps(obj, False, True, str).encode("utf-8", errors="surrogatepass")
+    except Exception:
+        payload = repr(obj).encode("utf-8", errors="ignore")
+    return hashlib.md5(payload).hexdigest()
+
+
+__all__ = [
+    "JSON_BACKENDS",
+    "available_backends",
+    "canonical_hash",
+    "dumps",
+    "dumps_bytes",
+    "get_backend",
+    "loads",
+    "set_backend",
+]
@@ -0,0 +1,133 @@
+"""
+图表/表格/词云 LLM 修复函数的测试用例（使用桩客户端，不访问网络）。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_chart_repair_api.py -v
+"""
+
+import json
+
+import pytest
+
+from ReportEngine.utils import chart_repair_api
+from ReportEngine.utils.chart_validator import ChartRepairer, ChartValidator
+from ReportEngine.utils.config import settings
+from ReportEngine.utils.repair_cache import RepairCache, build_block_cache_key
+
+BROKEN_CHART = {
+    "type": "widget",
+    "widgetType": "chart.js/bar",
+    "widgetId": "chart-1",
+    "props": {"type": "bar"},
+    "data": {"labels": ["甲", "乙"], "datasets": "bad"},
+}
+REPAIRED_CHART = {
+    "type": "widget",
+    "widgetType": "chart.js/bar",
+    "widgetId": "chart-1",
+    "props": {"type": "bar"},
+    "data": {"labels": ["甲", "乙"], "datasets": [{"label": "销量", "data": [1, 2]}]},
+}
+BROKEN_WORDCLOUD = {"type": "widget", "widgetType": "wordcloud", "widgetId": "wc-1", "data": {"words": "增长"}}
+REPAIRED_WORDCLOUD = {
+    "type": "widget",
+    "widgetType": "wordcloud",
+    "widgetId": "wc-1",
+    "data": {"words": [{"word": "增长", "weight": 1}]},
+}
+BROKEN_TABLE = {"type": "table", "rows": [{"cells": [{"blocks": "甲"}]}]}
+REPAIRED_TABLE = {
+    "type": "table",
+    "rows": [{"cells": [{"blocks": [{"type": "paragraph", "inlines": [{"text": "甲"}]}]}]}],
+}
+
+
+class StubClient:
+    """按顺序返回预设响应，并记录调用次数"""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def invoke(self, system_prompt, user_prompt, **kwargs):
+        self.calls += 1
+        return self.response
+
+
+@pytest.fixture
+def repair_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_ENGINE_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "REPORT_ENGINE_BASE_URL", "http://llm.invalid")
+    monkeypatch.setattr(settings, "FORUM_HOST_API_KEY", None)
+    monkeypatch.setattr(settings, "INSIGHT_ENGINE_API_KEY", None)
+    monkeypatch.setattr(settings, "MEDIA_ENGINE_API_KEY", None)
+    cache = RepairCache(tmp_path / "repair.sqlite3")
+    monkeypatch.setattr(chart_repair_api, "get_repair_cache", lambda: cache)
+    client = StubClient(None)
+    monkeypatch.setattr(chart_repair_api, "get_shared_llm_client", lambda **kwargs: client)
+    yield client, cache
+    cache.close()
+
+
+@pytest.mark.parametrize(
+    "factory, namespace, broken, repaired",
+    [
+        (chart_repair_api.create_llm_repair_functions, "chart", BROKEN_CHART, REPAIRED_CHART),
+        (chart_repair_api.create_table_repair_functions, "table", BROKEN_TABLE, REPAIRED_TABLE),
+        (chart_repair_api.create_wordcloud_repair_functions, "wordcloud", BROKEN_WORDCLOUD, REPAIRED_WORDCLOUD),
+    ],
+)
+def test_repair_returns_and_caches_result(repair_env, factory, namespace, broken, repaired):
+    client, cache = repair_env
+    client.response = json.dumps(repaired, ensure_ascii=False)
+    repair_fn = factory()[0]
+
+    assert repair_fn(broken, ["数据格式错误"]) == repaired
+    record = cache.get(namespace, build_block_cache_key(broken))
+    assert record["repaired_block"] == repaired
+    other = "chart" if namespace != "chart" else "table"
+    assert cache.get(other, build_block_cache_key(broken)) is None
+
+    # 第二次直接命中磁盘缓存，不再调用LLM
+    assert repair_fn(broken, ["数据格式错误"]) == repaired
+    assert client.calls == 1
+
+
+@pytest.mark.parametrize(
+    "factory, namespace, broken",
+    [
+        (chart_repair_api.create_llm_repair_functions, "chart", BROKEN_CHART),
+        (chart_repair_api.create_table_repair_functions, "table", BROKEN_TABLE),
+        (chart_repair_api.create_wordcloud_repair_functions, "wordcloud", BROKEN_WORDCLOUD),
+    ],
+)
+def test_invalid_reply_is_not_cached(repair_env, factory, namespace, broken):
+    client, cache = repair_env
+    client.response = json.dumps(broken, ensure_ascii=False)
+    repair_fn = factory()[0]
+
+    # 仍返回给修复器做校验，但不会作为成功结果写入缓存
+    assert repair_fn(broken, ["数据格式错误"]) == broken
+    assert cache.get(namespace, build_block_cache_key(broken)) is None
+
+
+def test_chart_repairer_persists_only_llm_repairs(repair_env):
+    client, cache = repair_env
+    repairer = ChartRepairer(ChartValidator(), chart_repair_api.create_llm_repair_functions())
+
+    # 本地规则即可修复的图表直接重算，不写入磁盘缓存
+    local = repairer.repair(dict(BROKEN_CHART))
+    assert local.success and local.method == "local"
+    assert cache.stats()["entries"] == 0 and client.calls == 0
+
+    broken = {**BROKEN_CHART, "widgetId": "chart-2", "data": {"labels": ["甲"], "datasets": ["bad"]}}
+    repaired = {**broken, "data": {"labels": ["甲"], "datasets": [{"label": "销量", "data": [1]}]}}
+    client.response = json.dumps(repaired, ensure_ascii=False)
+    result = repairer.repair(dict(broken))
+    assert result.success and result.method == "api"
+    # 只有LLM修复函数写一条 'chart' 记录，ChartRepairer 本身不再重复落盘
+    assert cache.stats()["entries"] == 1 and client.calls == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -10,6 +10,7 @@ from ReportEngine.utils.chart_validator import (
     ChartValidator,
     ChartRepairer,
     ValidationResult,
+    WordCloudValidator,
     RepairResult,
     create_chart_validator,
     create_chart_repairer
@@ -234,6 +235,28 @@ class TestChartValidator:
         assert result.is_valid
 
 
+class TestWordCloudValidator:
+    """测试WordCloudValidator类"""
+
+    @pytest.mark.parametrize("block", [
+        {"widgetType": "wordcloud", "data": {"words": [{"word": "增长", "weight": 3}]}},
+        {"widgetType": "chart.js/wordcloud", "props": {"items": [["增长", 3], "回购"]}},
+        {"widgetType": "wordcloud", "data": [{"text": "增长", "value": 1}, {"value": 2}]},
+    ])
+    def test_valid_wordcloud(self, block):
+        assert WordCloudValidator().validate(block).is_valid
+
+    @pytest.mark.parametrize("block", [
+        {"widgetType": "wordcloud", "data": {}},
+        {"widgetType": "wordcloud", "data": {"words": [{"weight": 1}, {"word": " "}]}},
+        {"widgetType": "chart.js/bar", "data": {"words": [{"word": "增长"}]}},
+        "wordcloud",
+    ])
+    def test_invalid_wordcloud(self, block):
+        result = WordCloudValidator().validate(block)
+        assert not result.is_valid and result.errors
+
+
 class TestChartRepairer:
     """测试ChartRepairer类"""
 
@@ -418,6 +441,82 @@ class TestChartRepairer:
         assert "label" in result.repaired_block["data"]["datasets"][0]
 
 
+class TestChartRepairerBatch:
+    """测试ChartRepairer的两阶段批量修复"""
+
+    @staticmethod
+    def _broken_block(widget_id):
+        """本地规则无法修复的图表（datasets 元素不是对象）"""
+        return {
+            "type": "widget",
+            "widgetType": "chart.js/bar",
+            "widgetId": widget_id,
+            "props": {"type": "bar"},
+            "data": {"labels": ["A"], "datasets": ["bad"]},
+        }
+
+    def setup_method(self):
+        """每个测试前初始化"""
+        import threading
+
+        self.calls = []
+        self.lock = threading.Lock()
+
+        def fake_llm_repair(widget_block, errors):
+            with self.lock:
+                self.calls.append(widget_block.get("widgetId"))
+            repaired = dict(widget_block)
+            repaired["props"] = {"type": "bar"}
+            repaired["data"] = {"labels": ["A"], "datasets": [{"label": "系列1", "data": [1]}]}
+            return repaired
+
+        self.validator = create_chart_validator()
+        self.repairer = create_chart_repairer(
+            validator=self.validator,
+            llm_repair_fns=[fake_llm_repair],
+        )
+
+    def test_batch_results_keep_order(self):
+        """批量结果与输入一一对应，本地与API修复混合"""
+        local_fixable = {
+            "widgetType": "chart.js/bar",
+            "props": {"type": "bar"},
+            "data": {"labels": ["A", "B"], "datasets": [{"data": [10, 20]}]},
+        }
+        items = [
+            (self._broken_block("c1"), None),
+            (local_fixable, None),
+            (self._broken_block("c2"), None),
+        ]
+        results = self.repairer.repair_batch(items, max_workers=4)
+
+        assert [r.method for r in results] == ["api", "local", "api"]
+        assert all(r.success for r in results)
+        assert results[0].repaired_block["widgetId"] == "c1"
+        assert results[2].repaired_block["widgetId"] == "c2"
+        assert sorted(self.calls) == ["c1", "c2"]
+
+    def test_batch_deduplicates_identical_charts(self):
+        """同一批次内容相同的图表只调用一次LLM"""
+        items = [(self._broken_block("same"), None) for _ in range(3)]
+        results = self.repairer.repair_batch(items, max_workers=4)
+
+        assert self.calls == ["same"]
+        assert all(r.method == "api" for r in results)
+        # 每个结果都是独立副本
+        results[0].repaired_block["props"]["type"] = "line"
+        assert results[1].repaired_block["props"]["type"] == "bar"
+
+    def test_repair_uses_cache_after_batch(self):
+        """批量修复结果写入缓存，单个修复不再调用LLM"""
+        block = self._broken_block("cached")
+        self.repairer.repair_batch([(block, None)])
+        result = self.repairer.repair(block)
+
+        assert result.method == "api"
+        assert self.calls == ["cached"]
+
+
 class TestValidatorIntegration:
     """集成测试"""
 
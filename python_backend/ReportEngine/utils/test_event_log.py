@@ -0,0 +1,90 @@
+"""
+任务事件磁盘日志的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_event_log.py -v
+"""
+
+import pytest
+from ReportEngine.utils.event_log import TaskEventLog, has_event_log, prune_event_logs
+
+
+def _event(event_id, size=0):
+    return {"id": event_id, "type": "log", "payload": {"line": "x" * size}}
+
+
+class TestTaskEventLog:
+    """测试分段写入、按ID定位与保留策略"""
+
+    def test_seek_across_segments(self, tmp_path):
+        log = TaskEventLog(tmp_path, "task_1", segment_max_bytes=1024)
+        for i in range(1, 51):
+            log.append(_event(i, size=100))
+        assert len(list((tmp_path / "task_1").glob("*.log"))) > 1
+
+        assert [e["id"] for e in log.iter_since(None)] == list(range(1, 51))
+        assert [e["id"] for e in log.iter_since(37)] == list(range(38, 51))
+        assert list(log.iter_since(50)) == []
+
+    def test_reopen_after_restart(self, tmp_path):
+        log = TaskEventLog(tmp_path, "task_1")
+        for i in range(1, 6):
+            log.append(_event(i))
+        log.close()
+
+        reopened = TaskEventLog(tmp_path, "task_1")
+        assert reopened.last_event_id == 5
+        reopened.append(_event(6))
+        assert [e["id"] for e in reopened.iter_since(3)] == [4, 5, 6]
+
+    def test_append_after_close_reopens(self, tmp_path):
+        log = TaskEventLog(tmp_path, "task_1")
+        log.append(_event(1))
+        log.close()
+        log.close()
+        log.append(_event(2))
+        assert [e["id"] for e in log.iter_since(None)] == [1, 2]
+
+    def test_segment_retention(self, tmp_path):
+        log = TaskEventLog(tmp_path, "task_1", segment_max_bytes=1024, max_segments=2)
+        for i in range(1, 101):
+            log.append(_event(i, size=200))
+        assert len(list((tmp_path / "task_1").glob("*.log"))) == 2
+        replayed = [e["id"] for e in log.iter_since(1)]
+        assert replayed[-1] == 100
+        assert replayed == list(range(replayed[0], 101))
+
+    def test_rejects_unsafe_task_id(self, tmp_path):
+        with pytest.raises(ValueError):
+            TaskEventLog(tmp_path, "..")
+        assert not has_event_log(tmp_path, "..")
+
+    def test_prune_keeps_recent_tasks(self, tmp_path):
+        for name in ["a", "b", "c"]:
+            TaskEventLog(tmp_path, name).append(_event(1))
+        assert prune_event_logs(tmp_path, keep=1, exclude="a") == 1
+        assert has_event_log(tmp_path, "a")
+        assert len([p for p in tmp_path.iterdir()]) == 2
+
+
+class TestReportTaskHistory:
+    """内存历史被挤出后从磁盘日志回放"""
+
+    def test_history_falls_back_to_disk(self, tmp_path, monkeypatch):
+        from ReportEngine import flask_interface
+        from ReportEngine.utils.config import settings
+
+        monkeypatch.setattr(settings, "EVENT_LOG_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "EVENT_LOG_ENABLED", True)
+        task = flask_interface.ReportTask("主题", "report_test")
+        for i in range(1200):
+            task.publish_event("log", {"line": str(i)})
+
+        assert len(task.event_history) == 1000
+        assert [e["id"] for e in task.history_since(1195)] == [1196, 1197, 1198, 1199, 1200]
+        assert len(task.history_since(None)) == 1200
+        assert task.history_since(10)[0]["id"] == 11
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
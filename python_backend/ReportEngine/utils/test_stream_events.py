@@ -0,0 +1,195 @@
+"""
+SSE 流式事件合并工具的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_stream_events.py -v
+"""
+
+import asyncio
+import threading
+import time
+from queue import Queue
+
+import pytest
+from queue import Empty
+
+from ReportEngine.utils.stream_events import (
+    AsyncSubscriberQueue,
+    ChunkCoalescer,
+    acollect_chunk_batch,
+    SubscriberQueue,
+    coalesce_chunk_events,
+    collect_chunk_batch,
+    parse_client_batching,
+)
+
+
+def _chunk(event_id, delta, chapter="c1"):
+    return {
+        "id": event_id,
+        "type": "chapter_chunk",
+        "payload": {"chapterId": chapter, "title": chapter, "delta": delta},
+    }
+
+
+class TestChunkCoalescer:
+    """测试任务级delta合并"""
+
+    def test_flushes_on_size(self):
+        frames = []
+        coalescer = ChunkCoalescer(frames.append, window_ms=10_000, max_bytes=4)
+        for delta in ["ab", "c", "d", "e"]:
+            coalescer.add({"chapterId": "c1", "delta": delta})
+        assert frames == [{"chapterId": "c1", "delta": "abcd", "chunks": 3}]
+        coalescer.flush()
+        assert frames[-1] == {"chapterId": "c1", "delta": "e", "chunks": 1}
+
+    def test_flushes_on_chapter_switch(self):
+        frames = []
+        coalescer = ChunkCoalescer(frames.append, window_ms=10_000, max_bytes=1024)
+        coalescer.add({"chapterId": "c1", "delta": "a"})
+        coalescer.add({"chapterId": "c2", "delta": "b"})
+        assert [f["chapterId"] for f in frames] == ["c1"]
+        coalescer.close()
+        assert [f["delta"] for f in frames] == ["a", "b"]
+
+    def test_flushes_on_timer(self):
+        frames = []
+        coalescer = ChunkCoalescer(frames.append, window_ms=20, max_bytes=1024)
+        coalescer.add({"chapterId": "c1", "delta": "a"})
+        coalescer.add({"chapterId": "c1", "delta": "b"})
+        deadline = time.time() + 2
+        while not frames and time.time() < deadline:
+            time.sleep(0.01)
+        assert frames == [{"chapterId": "c1", "delta": "ab", "chunks": 2}]
+
+    def test_single_flusher_thread_across_windows(self):
+        frames = []
+        coalescer = ChunkCoalescer(frames.append, window_ms=5, max_bytes=1024)
+        threads_before = threading.active_count()
+        for index in range(5):
+            coalescer.add({"chapterId": "c1", "delta": str(index)})
+            deadline = time.time() + 2
+            while len(frames) <= index and time.time() < deadline:
+                time.sleep(0.005)
+            assert threading.active_count() == threads_before + 1
+        assert [f["delta"] for f in frames] == ["0", "1", "2", "3", "4"]
+        flusher = coalescer._flusher
+        coalescer.close()
+        assert coalescer._flusher is None and not flusher.is_alive()
+
+    def test_disabled_passes_through(self):
+        frames = []
+        coalescer = ChunkCoalescer(frames.append, window_ms=0, max_bytes=0)
+        coalescer.add({"chapterId": "c1", "delta": "a"})
+        assert frames == [{"chapterId": "c1", "delta": "a"}]
+
+
+class TestClientBatching:
+    """测试订阅端的合并"""
+
+    def test_coalesce_keeps_other_events_in_order(self):
+        events = [
+            _chunk(1, "a"),
+            _chunk(2, "b"),
+            {"id": 3, "type": "stage", "payload": {}},
+            _chunk(4, "c", chapter="c2"),
+        ]
+        merged = coalesce_chunk_events(events)
+        assert [e["id"] for e in merged] == [2, 3, 4]
+        assert merged[0]["payload"]["delta"] == "ab"
+        assert merged[0]["payload"]["chunks"] == 2
+
+    def test_coalesce_respects_max_bytes(self):
+        events = [_chunk(i, "xx") for i in range(1, 5)]
+        merged = coalesce_chunk_events(events, max_bytes=4)
+        assert [e["payload"]["delta"] for e in merged] == ["xxxx", "xxxx"]
+
+    def test_collect_drains_backlog_and_returns_leftover(self):
+        queue = Queue()
+        for event in [_chunk(2, "b"), _chunk(3, "c"), {"id": 4, "type": "completed"}]:
+            queue.put(event)
+        merged, leftover = collect_chunk_batch(_chunk(1, "a"), queue, window_ms=0, max_bytes=1024)
+        assert merged["id"] == 3
+        assert merged["payload"]["delta"] == "abc"
+        assert leftover["type"] == "completed"
+
+    def test_parse_client_batching(self):
+        assert parse_client_batching({}, 2048) == {"window_ms": 0, "max_bytes": 16384}
+        assert parse_client_batching(
+            {"chunk_window_ms": "200", "chunk_max_bytes": "bad"}, 2048
+        ) == {"window_ms": 200, "max_bytes": 16384}
+
+
+class TestSubscriberQueue:
+    """测试有界订阅队列的丢弃策略与重新同步"""
+
+    def test_coalesces_chunks_when_full(self):
+        queue = SubscriberQueue(maxsize=2)
+        queue.put({"id": 1, "type": "stage"})
+        for i in range(2, 6):
+            queue.put(_chunk(i, "x"))
+        assert queue.qsize() == 2
+        assert queue.get()["type"] == "stage"
+        merged = queue.get()
+        assert merged["id"] == 5 and merged["payload"]["delta"] == "xxxx"
+        assert not queue.needs_resync
+        assert queue.stats()["coalesced"] == 3
+
+    def test_never_drops_critical_events(self):
+        queue = SubscriberQueue(maxsize=2)
+        queue.put({"id": 1, "type": "log"})
+        queue.put({"id": 2, "type": "status"})
+        queue.put({"id": 3, "type": "completed"})
+        queue.put({"id": 4, "type": "status"})
+        types = [queue.get_nowait()["type"] for _ in range(queue.qsize())]
+        assert types == ["status", "completed", "status"]
+        assert queue.needs_resync
+        stats = queue.stats()
+        assert stats["dropped"] == 1 and stats["lag"] == 0
+
+    def test_resync_skips_already_delivered(self):
+        queue = SubscriberQueue(maxsize=1)
+        queue.put({"id": 1, "type": "status"})
+        queue.put({"id": 2, "type": "log"})
+        assert queue.needs_resync
+        assert queue.begin_resync() == 0
+        # 模拟从历史补发到 2，随后队列中的重复事件被跳过
+        queue.mark_delivered(2)
+        queue.put({"id": 2, "type": "log"})
+        queue.put({"id": 3, "type": "status"})
+        assert queue.get_nowait()["id"] == 3
+        with pytest.raises(Empty):
+            queue.get(timeout=0.01)
+
+
+class TestAsyncSubscriberQueue:
+    """测试供ASGI使用的异步订阅队列"""
+
+    def test_wakes_on_put_from_other_thread(self):
+        async def scenario():
+            queue = AsyncSubscriberQueue(maxsize=10)
+            timer = threading.Timer(0.05, queue.put, args=({"id": 1, "type": "progress"},))
+            timer.start()
+            event = await queue.aget(timeout=2)
+            assert event["id"] == 1
+            with pytest.raises(Empty):
+                await queue.aget(timeout=0.01)
+
+        asyncio.run(scenario())
+
+    def test_async_batch_keeps_order(self):
+        async def scenario():
+            queue = AsyncSubscriberQueue(maxsize=10)
+            for idx, delta in enumerate(["a", "b"], start=2):
+                queue.put(_chunk(idx, delta))
+            queue.put({"id": 4, "type": "chapter_status"})
+            merged, leftover = await acollect_chunk_batch(_chunk(1, "x"), queue, 0, 1024)
+            assert merged["payload"]["delta"] == "xab"
+            assert leftover["id"] == 4
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -14,19 +14,31 @@ import sys
 import json
 import time
 import re
+import heapq
+import math
+import sqlite3
+import threading
 import argparse
+import asyncio
 import requests
 import logging
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 # Third-party imports
+import httpx
 from dotenv import load_dotenv
 from loguru import logger
 from duckduckgo_search import DDGS
 import trafilatura
 
+# Local imports
+from supabase_writer import SupabaseWriter
+
 # ================= Configuration & Setup =================
 
 # Determine Paths
@@ -44,8 +56,36 @@ SUPABASE_KEY = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY") or os.getenv("SUPABASE
 
 # Constants
 MAX_SEARCH_RESULTS = 5
-MAX_SCRAPE_THREADS = 5
-MAX_CONTENT_LENGTH = 15000  # Truncate combined text to avoid context overflow
+MAX_CONTENT_LENGTH = 15000  # Hard cap on the combined context (safety net after packing)
+MAX_ARTICLE_LENGTH = 20000  # Keep this much extracted text per page for context packing
+
+# Context packing (dedupe + relevance ranking inside a token budget)
+CONTEXT_TOKEN_BUDGET = 3500  # ~MAX_CONTENT_LENGTH characters of English text
+SOURCE_BUDGET_SHARE = {"official": 0.6, "community": 0.4}  # Unused share flows to the other source
+DEDUP_THRESHOLD = 0.8  # Estimated Jaccard similarity above which passages are duplicates
+MINHASH_K = 64
+
+# Fetch/extract pipeline
+MAX_CONCURRENT_FETCHES = 10  # Total in-flight HTTP requests
+MAX_FETCHES_PER_HOST = 2  # Be polite to a single site
+FETCH_TIMEOUT = 15  # Seconds per page
+MAX_EXTRACT_WORKERS = max(1, min(4, os.cpu_count() or 1))  # CPU-bound trafilatura.extract
+MAX_CONCURRENT_TOPICS = 3  # Batch mode: topics in flight at once (bounds LLM calls too)
+FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; NexusPulseBot/1.0)",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+# Rows that could not be written are kept here and re-sent on the next run
+SUPABASE_OUTBOX_DIR = os.getenv("SUPABASE_OUTBOX_DIR") or os.path.join(python_backend_dir, "cache", "outbox")
+
+# Scraped-page cache (extracted text + ETag/Last-Modified for conditional GETs)
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH") or os.path.join(python_backend_dir, "cache", "page_cache.sqlite3")
+PAGE_CACHE_TTL = 3600  # Seconds a cached page is served without revalidation
+PAGE_CACHE_MAX_AGE = 7 * 24 * 3600  # Entries not validated for this long are evicted
+PAGE_CACHE_MAX_BYTES = 50 * 1024 * 1024  # Total cached text size
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
 
 # Configure Logging
 logger.remove()
@@ -91,62 +131,455 @@ def search_web(topic: str, source_type: str) -> List[Dict]:
     logger.info(f"   ✅ Found {len(results)} links for {source_type}")
     return results
 
-def scrape_url(url_data: Dict) -> Dict:
-    """Scrape a single URL using Trafilatura"""
-    url = url_data["url"]
+def extract_text(html: str) -> Optional[str]:
+    """Run Trafilatura extraction (CPU-bound, safe to call in a worker process)"""
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            text = trafilatura.extract(downloaded, include_comments=True, include_tables=True)
-            if text:
-                return {
-                    "source": url_data["source_type"],
-                    "url": url,
-                    "content": text[:3000] # Limit per article
-                }
-    except Exception as e:
-        pass # Ignore individual failures
-    return None
+        return trafilatura.extract(html, include_comments=True, include_tables=True)
+    except Exception:
+        return None
 
-def collect_intelligence(topic: str) -> str:
-    """Parallel search and scrape workflow"""
-    # 1. Search
-    official_links = search_web(topic, "official")
-    community_links = search_web(topic, "community")
-    
+def create_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client shared by all page fetches"""
+    return httpx.AsyncClient(
+        headers=FETCH_HEADERS,
+        timeout=FETCH_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONCURRENT_FETCHES,
+            max_keepalive_connections=MAX_CONCURRENT_FETCHES,
+        ),
+    )
+
+def create_extract_pool():
+    """Process pool for extraction; falls back to threads where processes are unavailable"""
+    try:
+        return ProcessPoolExecutor(max_workers=MAX_EXTRACT_WORKERS)
+    except (OSError, NotImplementedError, PermissionError) as e:
+        logger.warning(f"⚠️ Process pool unavailable ({e}), extracting in threads.")
+        return ThreadPoolExecutor(max_workers=MAX_EXTRACT_WORKERS)
+
+def normalize_url(url: str) -> str:
+    """Cache key: lower-case scheme/host, no default port, fragment or tracking params, sorted query"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+class PageCache:
+    """
+    On-disk cache of extracted page text keyed by normalized URL.
+    Fresh entries (< ttl) skip the network; stale ones are revalidated with
+    If-None-Match/If-Modified-Since. Evicts by age and total size (LRU).
+    Access times from hits are buffered in memory and written in one batch
+    (on put/touch, eviction or close), so a hit is a single SELECT.
+    Methods block on sqlite; async callers run them via asyncio.to_thread.
+    """
+
+    def __init__(self, path: str, ttl: int = PAGE_CACHE_TTL,
+                 max_age: int = PAGE_CACHE_MAX_AGE, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}
+        self._conn = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, content TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "size INTEGER NOT NULL, validated_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        except Exception as e:
+            logger.warning(f"⚠️ Page cache disabled ({path}): {e}")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry with a 'fresh' flag, or None"""
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, etag, last_modified, validated_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[url] = time.time()
+        content, etag, last_modified, validated_at = row
+        return {
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": time.time() - validated_at < self.ttl,
+        }
+
+    def put(self, url: str, content: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(url, None)
+            self._flush_accessed()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, content, etag, last_modified, len(content.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+
+    def touch(self, url: str):
+        """Mark an entry as revalidated (304 Not Modified)"""
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(url, None)
+            self._flush_accessed()
+            self._conn.execute(
+                "UPDATE pages SET validated_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+            )
+            self._conn.commit()
+
+    def _flush_accessed(self):
+        """Write buffered access times (caller holds the lock and commits)"""
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE pages SET accessed_at = ? WHERE url = ?",
+                [(accessed_at, url) for url, accessed_at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones beyond max_bytes"""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            self._flush_accessed()
+            removed = self._conn.execute(
+                "DELETE FROM pages WHERE validated_at < ?", (time.time() - self.max_age,)
+            ).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM pages WHERE url IN (SELECT url FROM (SELECT url, SUM(size) OVER "
+                "(ORDER BY accessed_at DESC ROWS UNBOUNDED PRECEDING) AS total FROM pages) WHERE total > ?)",
+                (self.max_bytes,),
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._flush_accessed()
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+def open_page_cache() -> Optional[PageCache]:
+    """Page cache per configuration (None when disabled)"""
+    if not PAGE_CACHE_ENABLED:
+        return None
+    cache = PageCache(PAGE_CACHE_PATH)
+    return cache if cache._conn is not None else None
+
+class HostLimiter:
+    """Per-host concurrency caps on top of the client's global connection limit"""
+
+    def __init__(self, per_host: int = MAX_FETCHES_PER_HOST):
+        self.per_host = per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
+
+async def fetch_page(
+    client: httpx.AsyncClient,
+    url: str,
+    host_limiter: HostLimiter,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[httpx.Response]:
+    """Download one page; returns 200 (HTML) or 304 responses, None on any failure"""
+    async with host_limiter(url):
+        try:
+            resp = await client.get(url, headers=headers)
+            if resp.status_code == 304:
+                return resp
+            if resp.status_code != 200:
+                return None
+            content_type = resp.headers.get("content-type", "")
+            if content_type and "html" not in content_type and "xml" not in content_type:
+                return None
+            resp.text  # decode now so errors surface here
+            return resp
+        except (httpx.HTTPError, UnicodeDecodeError):
+            return None
+
+async def _extract_in_pool(extract_pool, html: str) -> Optional[str]:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(extract_pool, extract_text, html)
+    except BrokenProcessPool:
+        # Worker died (OOM, killed); keep going in-process for this page
+        return await asyncio.to_thread(extract_text, html)
+
+class PageScraper:
+    """
+    Two-stage scraper: async fetch, then extraction in the pool.
+    Each URL is scraped at most once, so topics sharing a source reuse the result.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        extract_pool,
+        host_limiter: Optional[HostLimiter] = None,
+        page_cache: Optional[PageCache] = None,
+    ):
+        self.client = client
+        self.extract_pool = extract_pool
+        self.host_limiter = host_limiter or HostLimiter()
+        self.page_cache = page_cache
+        self._pages: Dict[str, asyncio.Task] = {}
+        self.deduplicated = 0
+
+    async def _fetch_and_extract(self, url: str) -> Optional[str]:
+        cache_key = normalize_url(url)
+        cached = await asyncio.to_thread(self.page_cache.get, cache_key) if self.page_cache else None
+        if cached and cached["fresh"]:
+            self.page_cache.hits += 1
+            return cached["content"]
+
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        resp = await fetch_page(self.client, url, self.host_limiter, headers or None)
+        if resp is None:
+            # Network failure: a stale copy is better than nothing
+            return cached["content"] if cached else None
+        if resp.status_code == 304:
+            if not cached:
+                return None
+            await asyncio.to_thread(self.page_cache.touch, cache_key)
+            self.page_cache.revalidated += 1
+            return cached["content"]
+
+        text = await _extract_in_pool(self.extract_pool, resp.text)
+        if not text:
+            return None
+        text = text[:MAX_ARTICLE_LENGTH]
+        if self.page_cache:
+            await asyncio.to_thread(
+                self.page_cache.put,
+                cache_key, text, resp.headers.get("etag"), resp.headers.get("last-modified"),
+            )
+        return text
+
+    async def scrape(self, url_data: Dict) -> Optional[Dict]:
+        """Scrape one search result (shared across callers by URL)"""
+        url = url_data["url"]
+        if not url:
+            return None
+        page = self._pages.get(url)
+        if page is None:
+            page = asyncio.ensure_future(self._fetch_and_extract(url))
+            self._pages[url] = page
+        else:
+            self.deduplicated += 1
+        text = await page
+        if not text:
+            return None
+        return {
+            "source": url_data["source_type"],
+            "url": url,
+            "content": text
+        }
+
+    async def scrape_all(self, links: List[Dict]) -> List[Dict]:
+        """Fetch and extract all links; pages are extracted as soon as they arrive"""
+        unique_links = list({link["url"]: link for link in links}.values())
+        results = await asyncio.gather(*(self.scrape(link) for link in unique_links))
+        return [item for item in results if item]
+
+@asynccontextmanager
+async def open_scraper():
+    """Create a PageScraper with its own client and extraction pool"""
+    client = create_http_client()
+    extract_pool = create_extract_pool()
+    page_cache = open_page_cache()
+    scraper = PageScraper(client, extract_pool, page_cache=page_cache)
+    try:
+        yield scraper
+    finally:
+        await client.aclose()
+        extract_pool.shutdown(wait=False, cancel_futures=True)
+        if page_cache:
+            if page_cache.hits or page_cache.revalidated:
+                logger.info(
+                    f"🗄️ Page cache: {page_cache.hits} fresh hits, {page_cache.revalidated} revalidated (304)."
+                )
+            await asyncio.to_thread(page_cache.evict)
+            await asyncio.to_thread(page_cache.close)
+
+async def search_sources(topic: str) -> List[Dict]:
+    """Issue the official and community searches concurrently"""
+    official_links, community_links = await asyncio.gather(
+        asyncio.to_thread(search_web, topic, "official"),
+        asyncio.to_thread(search_web, topic, "community"),
+    )
     if not community_links:
         logger.warning("⚠️ Source B (Community) returned 0 results. Proceeding with Official News only.")
+    return official_links + community_links
 
-    all_links = official_links + community_links
-    
-    if not all_links:
-        logger.warning("⚠️ No search results found.")
-        return ""
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~1 per CJK character, ~1 per 4 other non-space characters"""
+    cjk = len(re.findall(r"[\u3400-\u9fff]", text))
+    other = len(re.sub(r"\s", "", text)) - cjk
+    return cjk + (max(other, 0) + 3) // 4
 
-    # 2. Scrape in Parallel
-    logger.info(f"🕷️ Scraping {len(all_links)} URLs...")
-    scraped_data = []
-    
-    with ThreadPoolExecutor(max_workers=MAX_SCRAPE_THREADS) as executor:
-        futures = [executor.submit(scrape_url, link) for link in all_links]
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                scraped_data.append(result)
-    
-    logger.success(f"📦 Successfully scraped {len(scraped_data)} pages.")
-    
-    # 3. Format for LLM
+def split_passages(text: str, min_chars: int = 80) -> List[str]:
+    """Split extracted text into paragraphs, merging very short lines into the previous one"""
+    passages = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if passages and len(line) < min_chars:
+            passages[-1] += "\n" + line
+        else:
+            passages.append(line)
+    return passages
+
+def minhash_signature(text: str, k: int = MINHASH_K) -> frozenset:
+    """Bottom-k MinHash over character 5-grams"""
+    normalized = re.sub(r"[\W_]+", " ", text.lower()).strip()
+    shingles = {normalized[i:i + 5] for i in range(max(1, len(normalized) - 4))}
+    return frozenset(heapq.nsmallest(k, {hash(sh) for sh in shingles}))
+
+def minhash_similarity(sig_a: frozenset, sig_b: frozenset, k: int = MINHASH_K) -> float:
+    """Estimated Jaccard similarity of two bottom-k signatures"""
+    if not sig_a or not sig_b:
+        return 0.0
+    union_k = heapq.nsmallest(k, sig_a | sig_b)
+    return sum(1 for h in union_k if h in sig_a and h in sig_b) / len(union_k)
+
+def relevance_scores(topic: str, passages: List[str]) -> List[float]:
+    """BM25-style relevance of each passage to the topic"""
+    terms = set(re.findall(r"[a-z0-9]+", topic.lower())) | set(re.findall(r"[\u3400-\u9fff]", topic))
+    docs = [re.findall(r"[a-z0-9]+|[\u3400-\u9fff]", p.lower()) for p in passages]
+    if not docs or not terms:
+        return [0.0] * len(docs)
+    avg_len = sum(len(d) for d in docs) / len(docs) or 1.0
+    df = {t: sum(1 for d in docs if t in d) for t in terms}
+    idf = {t: math.log(1 + (len(docs) - df[t] + 0.5) / (df[t] + 0.5)) for t in terms}
+    scores = []
+    for doc in docs:
+        norm = 1.5 * (0.25 + 0.75 * len(doc) / avg_len)
+        scores.append(sum(idf[t] * doc.count(t) * 2.5 / (doc.count(t) + norm) for t in terms if t in doc))
+    return scores
+
+def pack_context(scraped_data: List[Dict], topic: str, budget_tokens: int = CONTEXT_TOKEN_BUDGET) -> List[Dict]:
+    """
+    Replace blind truncation with budget-aware packing:
+    drop near-duplicate passages across articles, rank the rest by relevance
+    to the topic, fill a token budget per source type, keep original order.
+    """
+    passages = []  # (article index, position, text, tokens)
+    seen: List[frozenset] = []
+    duplicates = 0
+    for art_idx, item in enumerate(scraped_data):
+        for pos, text in enumerate(split_passages(item["content"])):
+            sig = minhash_signature(text)
+            min_shared = DEDUP_THRESHOLD * len(sig)
+            if any(len(sig & other) >= min_shared and minhash_similarity(sig, other) >= DEDUP_THRESHOLD
+                   for other in seen):
+                duplicates += 1
+                continue
+            seen.append(sig)
+            passages.append((art_idx, pos, text, estimate_tokens(text)))
+
+    scores = relevance_scores(topic, [p[2] for p in passages])
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], passages[i][0], passages[i][1]))
+    quotas = {src: budget_tokens * share for src, share in SOURCE_BUDGET_SHARE.items()}
+    used = {src: 0 for src in quotas}
+    selected = set()
+    for i in ranked:
+        src = scraped_data[passages[i][0]]["source"]
+        if used.get(src, 0) + passages[i][3] <= quotas.get(src, 0):
+            selected.add(i)
+            used[src] = used.get(src, 0) + passages[i][3]
+    remaining = budget_tokens - sum(used.values())
+    for i in ranked:
+        if i not in selected and passages[i][3] <= remaining:
+            selected.add(i)
+            remaining -= passages[i][3]
+
+    packed = []
+    for art_idx, item in enumerate(scraped_data):
+        texts = [p[2] for i, p in enumerate(passages) if p[0] == art_idx and i in selected]
+        if texts:
+            packed.append({**item, "content": "\n".join(texts)})
+    logger.info(
+        f"🧮 Context packed: {len(selected)}/{len(passages)} passages, "
+        f"{duplicates} duplicates dropped, ~{budget_tokens - remaining} tokens"
+    )
+    return packed
+
+def format_context(scraped_data: List[Dict]) -> str:
+    """Format scraped pages for the LLM"""
     context_str = ""
     for item in scraped_data:
         context_str += f"\n--- SOURCE ({item['source']}): {item['url']} ---\n{item['content']}\n"
-    
     return context_str[:MAX_CONTENT_LENGTH]
 
-def analyze_with_llm(topic: str, context: str) -> Dict:
+async def collect_intelligence_async(topic: str, scraper: Optional[PageScraper] = None) -> str:
+    """
+    Concurrent search, then a fetch -> extract pipeline.
+    Pass a shared scraper to reuse its client, pool and page cache across topics.
+    """
+    # 1. Search (both sources at once)
+    all_links = await search_sources(topic)
+
+    if not all_links:
+        logger.warning(f"⚠️ No search results found for {topic}.")
+        return ""
+
+    # 2. Fetch + extract
+    logger.info(f"🕷️ Scraping {len(all_links)} URLs...")
+    if scraper is None:
+        async with open_scraper() as own_scraper:
+            scraped_data = await own_scraper.scrape_all(all_links)
+    else:
+        scraped_data = await scraper.scrape_all(all_links)
+
+    logger.success(f"📦 Successfully scraped {len(scraped_data)} pages.")
+
+    # 3. Pack within the token budget and format for LLM
+    return format_context(pack_context(scraped_data, topic))
+
+def collect_intelligence(topic: str) -> str:
+    """Parallel search and scrape workflow"""
+    return asyncio.run(collect_intelligence_async(topic))
+
+def analyze_with_llm(topic: str, context: str, session: Optional[requests.Session] = None) -> Dict:
     """
     Call DeepSeek/Gemini to generate the report.
     Returns parsed JSON object with 'content', 'sentiment_score', etc.
+    Pass a shared requests.Session to reuse the connection across topics.
     """
     if not DEEPSEEK_API_KEY:
         logger.error("❌ API Key missing. Cannot analyze.")
@@ -208,7 +641,7 @@ def analyze_with_llm(topic: str, context: str) -> Dict:
     }
 
     try:
-        response = requests.post(api_url, json=payload, headers=headers, timeout=60)
+        response = (session or requests).post(api_url, json=payload, headers=headers, timeout=60)
         response.raise_for_status()
         result = response.json()
         raw_text = result['choices'][0]['message']['content']
@@ -239,19 +672,15 @@ def analyze_with_llm(topic: str, context: str) -> Dict:
         logger.error(f"❌ LLM Call Failed: {e}")
         return None
 
-def save_to_supabase(topic: str, report_data: Dict):
-    """Save report to Supabase market_news table"""
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        logger.warning("⚠️ Supabase credentials missing. Skipping DB save.")
-        return
-
+def build_report_row(topic: str, report_data: Dict) -> Dict:
+    """Build a market_news row from an analyzed report"""
     # Extract Title (First line or Topic)
     lines = report_data["content"].strip().split('\n')
     title = lines[0].replace('#', '').strip()
     if len(title) > 100 or not title:
         title = f"Intel: {topic}"
 
-    payload = {
+    return {
         "title": title,
         "content": report_data["content"],
         "metadata": {
@@ -263,31 +692,106 @@ def save_to_supabase(topic: str, report_data: Dict):
         "created_at": datetime.now().isoformat()
     }
 
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=minimal"
-    }
+def insert_reports(rows: List[Dict]) -> bool:
+    """
+    Bulk-insert rows into market_news (retries with backoff; if the database
+    stays unreachable the rows go to the local outbox and are re-sent next run).
+    Returns False only when rows were permanently rejected.
+    """
+    with SupabaseWriter(SUPABASE_URL, SUPABASE_KEY, outbox_dir=SUPABASE_OUTBOX_DIR) as writer:
+        result = writer.insert(rows)
+    if result.inserted:
+        logger.success(f"✅ {result.inserted} report(s) saved to Supabase!")
+    if result.queued:
+        logger.warning(f"📮 {result.queued} report(s) queued in outbox for the next run.")
+    return result.ok
 
-    try:
-        url = f"{SUPABASE_URL}/rest/v1/market_news"
-        resp = requests.post(url, json=payload, headers=headers)
-        if resp.status_code in [200, 201]:
-            logger.success("✅ Report saved to Supabase!")
-        else:
-            logger.error(f"❌ DB Save Failed: {resp.status_code} - {resp.text}")
-            sys.exit(1)
-    except Exception as e:
-        logger.error(f"❌ DB Connection Error: {e}")
+def save_to_supabase(topic: str, report_data: Dict):
+    """Save report to Supabase market_news table"""
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        logger.warning("⚠️ Supabase credentials missing. Skipping DB save.")
+        return
+
+    if not insert_reports([build_report_row(topic, report_data)]):
         sys.exit(1)
 
+# ================= Batch Mode =================
+
+def load_topics(topics_arg: Optional[str] = None, topics_file: Optional[str] = None) -> List[str]:
+    """
+    Collect topics from a comma-separated list and/or a file (one per line, # for comments).
+    Duplicates are dropped, order is kept.
+    """
+    topics = []
+    if topics_arg:
+        topics.extend(t.strip() for t in topics_arg.split(","))
+    if topics_file:
+        with open(topics_file, "r", encoding="utf-8") as f:
+            topics.extend(line.strip() for line in f if not line.lstrip().startswith("#"))
+    return list(dict.fromkeys(t for t in topics if t))
+
+async def _run_topic(
+    topic: str,
+    scraper: PageScraper,
+    budget: asyncio.Semaphore,
+    session: requests.Session,
+) -> Optional[Dict]:
+    """Collect + analyze one topic inside the global concurrency budget"""
+    async with budget:
+        logger.info(f"🚀 Starting Intelligence Mission: {topic}")
+        context = await collect_intelligence_async(topic, scraper)
+        if not context:
+            logger.error(f"❌ [{topic}] Insufficient Data.")
+            return None
+        report = await asyncio.to_thread(analyze_with_llm, topic, context, session)
+        if not report:
+            logger.error(f"❌ [{topic}] Analysis Failed.")
+            return None
+        return build_report_row(topic, report)
+
+async def run_batch_async(topics: List[str], concurrency: int = MAX_CONCURRENT_TOPICS) -> List[Optional[Dict]]:
+    """
+    Run several topics concurrently with one HTTP client, one extraction pool,
+    one LLM session and a shared page cache. Returns one row (or None) per topic.
+    """
+    budget = asyncio.Semaphore(max(1, concurrency))
+    with requests.Session() as session:
+        async with open_scraper() as scraper:
+            rows = await asyncio.gather(
+                *(_run_topic(topic, scraper, budget, session) for topic in topics)
+            )
+            if scraper.deduplicated:
+                logger.info(f"♻️ Reused {scraper.deduplicated} pages shared between topics.")
+    return rows
+
+def run_batch(topics: List[str], concurrency: int = MAX_CONCURRENT_TOPICS) -> bool:
+    """Batch entry point: analyze all topics, then bulk-insert the successful ones"""
+    logger.info(f"🚀 Batch mission: {len(topics)} topics (concurrency {concurrency})")
+    rows = asyncio.run(run_batch_async(topics, concurrency))
+    reports = [row for row in rows if row]
+    failed = [topic for topic, row in zip(topics, rows) if not row]
+    if failed:
+        logger.warning(f"⚠️ {len(failed)} topic(s) failed: {', '.join(failed)}")
+    if not reports:
+        logger.error("❌ Batch Aborted: no reports generated.")
+        return False
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        logger.warning("⚠️ Supabase credentials missing. Skipping DB save.")
+    elif not insert_reports(reports):
+        return False
+    return not failed
+
 # ================= Main Entry Point =================
 
 def main():
     parser = argparse.ArgumentParser(description="NexusPulse Intelligence Engine")
     parser.add_argument("--query", type=str, help="Target topic")
     parser.add_argument("--auto", action="store_true", help="Run in automatic mode") # Added for compatibility
+    parser.add_argument("--topics", type=str, help="Batch mode: comma-separated topics")
+    parser.add_argument("--topics-file", type=str, help="Batch mode: file with one topic per line")
+    parser.add_argument("--batch", action="store_true", help="Batch mode over the default topic list")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_TOPICS, help="Batch mode: topics in flight")
     args = parser.parse_args()
 
     # Default Topics
@@ -297,6 +801,13 @@ def main():
         "Bitcoin Regulation Leaks",
         "Apple VR Headset Sales"
     ]
+
+    if args.topics or args.topics_file or args.batch:
+        topics = load_topics(args.topics, args.topics_file) or TOPICS
+        if not run_batch(topics, args.concurrency):
+            sys.exit(1)
+        logger.success("🏆 Batch Mission Accomplished.")
+        return
     
     topic = args.query if args.query else TOPICS[0] # Default to first if random not desired
     
@@ -330,8 +841,8 @@ if __name__ == "__main__":
     parser.add_argument("--auto", action="store_true", help="Run in automatic mode") 
     parser.add_argument("--query", type=str, help="Optional query override", default=None) 
     
-    # 解析参数 
-    args = parser.parse_args() 
+    # 解析参数（批量模式等其余参数交给 main 处理） 
+    args, _ = parser.parse_known_args() 
     
     # 无论有没有 --auto，都直接启动主逻辑 
     print(f"🚀 Starting NexusPulse Engine... (Auto Mode: {args.auto})") 
@@ -0,0 +1,102 @@
+"""
+独立报告引擎的网页缓存测试用例（URL 归一化、TTL、304 重新验证与淘汰）。
+
+运行测试：
+    python -m pytest test_report_engine_only.py -v
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from report_engine_only import PageCache, PageScraper, normalize_url
+
+
+ARTICLE = "<html><body><article><h1>标题</h1><p>{}</p></article></body></html>".format(
+    "Quarterly revenue grew on strong demand for data-center products. " * 20
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    page_cache = PageCache(str(tmp_path / "pages.sqlite3"))
+    yield page_cache
+    page_cache.close()
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM:443/a?b=2&a=1#frag", "https://example.com/a?a=1&b=2"),
+        ("http://example.com:80", "http://example.com/"),
+        ("http://example.com:8080/x", "http://example.com:8080/x"),
+        ("https://example.com/p?utm_source=x&id=7&fbclid=y&empty=", "https://example.com/p?empty=&id=7"),
+        ("  https://example.com/p  ", "https://example.com/p"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_entries_go_stale_after_ttl(cache):
+    cache.put("https://a/", "正文", etag='"v1"')
+    entry = cache.get("https://a/")
+    assert entry["fresh"] and entry["content"] == "正文" and entry["etag"] == '"v1"'
+    cache.ttl = 0
+    assert cache.get("https://a/")["fresh"] is False
+    assert cache.get("https://missing/") is None
+
+
+def test_touch_renews_a_stale_entry(cache):
+    cache.ttl = 60
+    cache.put("https://a/", "正文")
+    cache._conn.execute("UPDATE pages SET validated_at = ?", (time.time() - 120,))
+    assert cache.get("https://a/")["fresh"] is False
+    cache.touch("https://a/")
+    assert cache.get("https://a/")["fresh"] is True
+
+
+def test_evict_drops_expired_then_least_recently_used(cache):
+    cache.max_bytes = 10
+    for url in ("https://old/", "https://a/", "https://b/", "https://c/"):
+        cache.put(url, "12345")
+    cache._conn.execute("UPDATE pages SET validated_at = ? WHERE url = ?", (0, "https://old/"))
+    cache._conn.execute("UPDATE pages SET accessed_at = accessed_at - 10 WHERE url = ?", ("https://a/",))
+    # 命中只在内存中记录访问时间，淘汰前统一写回
+    cache.get("https://a/")
+    assert cache.evict() == 2
+    remaining = {row[0] for row in cache._conn.execute("SELECT url FROM pages")}
+    assert remaining == {"https://a/", "https://c/"}
+
+
+def test_scraper_revalidates_stale_pages_with_304(cache):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html=ARTICLE, headers={"ETag": '"v1"'})
+
+    async def scrape_twice():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                link = {"url": "https://example.com/news?utm_medium=x", "source_type": "official"}
+                first = await PageScraper(client, pool, page_cache=cache).scrape(link)
+                cache.ttl = 0
+                second = await PageScraper(client, pool, page_cache=cache).scrape(link)
+                return first, second
+
+    first, second = asyncio.run(scrape_twice())
+    assert first and "Quarterly revenue" in first["content"]
+    assert second["content"] == first["content"]
+    assert seen == [None, '"v1"']
+    assert cache.revalidated == 1
+    assert cache.get("https://example.com/news")["etag"] == '"v1"'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
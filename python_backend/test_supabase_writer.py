@@ -0,0 +1,121 @@
+"""
+Supabase 批量写入器的测试用例（本地 PostgREST 兼容桩服务）。
+
+运行测试：
+    python -m pytest test_supabase_writer.py -v
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from supabase_writer import SupabaseWriter
+
+
+class PostgRESTStub:
+    """模拟 /rest/v1/<table> 的插入语义：批量、on_conflict 去重、可注入故障"""
+
+    def __init__(self):
+        self.rows = []
+        self.requests = 0
+        self.fail_next = 0
+        self.has_key_column = True
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stub.requests += 1
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if stub.fail_next:
+                    stub.fail_next -= 1
+                    return self._reply(503, {"message": "unavailable"})
+                rows = body if isinstance(body, list) else [body]
+                conflict = parse_qs(urlsplit(self.path).query).get("on_conflict", [None])[0]
+                if conflict and not stub.has_key_column:
+                    return self._reply(400, {"code": "PGRST204", "message": "column not found"})
+                seen = {row.get(conflict) for row in stub.rows} if conflict else set()
+                for row in rows:
+                    if conflict and row.get(conflict) in seen:
+                        continue
+                    stub.rows.append(row)
+                self._reply(201, None)
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def stub():
+    server = PostgRESTStub()
+    yield server
+    server.close()
+
+
+def _writer(url, tmp_path, **kwargs):
+    kwargs.setdefault("backoff_base", 0.01)
+    return SupabaseWriter(url, "key", outbox_dir=str(tmp_path / "outbox"), **kwargs)
+
+
+def _rows(count):
+    return [{"title": f"r{i}", "content": "c", "created_at": "2026-01-01T00:00:00"} for i in range(count)]
+
+
+def test_bulk_insert_in_batches(stub, tmp_path):
+    with _writer(stub.url, tmp_path, batch_size=2) as writer:
+        result = writer.insert(_rows(5))
+    assert (result.inserted, result.queued, result.failed) == (5, 0, 0)
+    assert stub.requests == 3
+    assert len(stub.rows) == 5
+
+
+def test_retry_is_idempotent(stub, tmp_path):
+    stub.fail_next = 2
+    with _writer(stub.url, tmp_path) as writer:
+        assert writer.insert(_rows(2)).inserted == 2
+        # 同一批数据再次提交不会产生重复行
+        writer.insert(_rows(2))
+    assert len(stub.rows) == 2
+
+
+def test_outbox_when_unreachable_then_flushed(stub, tmp_path):
+    stub.fail_next = 100
+    with _writer(stub.url, tmp_path, max_retries=1) as writer:
+        result = writer.insert(_rows(3))
+        assert result.queued == 3 and result.ok
+        assert len(writer.pending()) == 1
+
+    stub.fail_next = 0
+    with _writer(stub.url, tmp_path) as writer:
+        writer.insert(_rows(1)[:0])
+        assert writer.pending() == []
+    assert len(stub.rows) == 3
+
+
+def test_falls_back_without_idempotency_column(stub, tmp_path):
+    stub.has_key_column = False
+    with _writer(stub.url, tmp_path) as writer:
+        assert writer.insert(_rows(1)).inserted == 1
+        assert writer.use_idempotency is False
+    assert "idempotency_key" not in stub.rows[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
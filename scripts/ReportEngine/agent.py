@@ -10,6 +10,7 @@ Report Agent主类。
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from pathlib import Path
 from uuid import uuid4
@@ -24,7 +25,7 @@ from .core import (
     TemplateSection,
     parse_template_sections,
 )
-from .ir import IRValidator
+from .ir import IRValidator, write_document_ir
 from .llms import LLMClient
 from .nodes import (
     TemplateSelectionNode,
@@ -38,6 +39,9 @@ from .nodes import (
 from .renderers import HTMLRenderer
 from .state import ReportState
 from .utils.config import settings, Settings
+from .utils.context_packing import PassageIndex, pack_sources
+from .utils.input_watcher import InputWatcher
+from .utils.prompt_prefix import PromptPrefixTracker
 
 # GraphRAG 模块导入
 from .graphrag import (
@@ -60,6 +64,14 @@ class StageOutputFormatError(ValueError):
     """阶段性输出结构不符合预期时抛出的受控异常。"""
 
 
+# 三个子引擎导出 Markdown 报告的目录
+ENGINE_REPORT_DIRECTORIES = {
+    'insight': 'insight_engine_streamlit_reports',
+    'media': 'media_engine_streamlit_reports',
+    'query': 'query_engine_streamlit_reports'
+}
+
+
 class FileCountBaseline:
     """
     文件数量基准管理器。
@@ -79,6 +91,28 @@ class FileCountBaseline:
         """
         self.baseline_file = 'logs/report_baseline.json'
         self.baseline_data = self._load_baseline()
+        # 可选的目录索引（InputWatcher），挂载后不再逐次扫描目录
+        self.index: Optional[InputWatcher] = None
+
+    def attach_index(self, index: Optional[InputWatcher]):
+        """挂载（或传入None卸载）由 InputWatcher 维护的目录索引。"""
+        self.index = index
+
+    def _indexed(self, directories: Dict[str, str]) -> bool:
+        return self.index is not None and self.index.covers(directories)
+
+    def _count_files(self, directories: Dict[str, str]) -> Dict[str, int]:
+        """统计各目录的 `.md` 数量，索引可用时直接读取内存计数。"""
+        if self._indexed(directories):
+            counts = self.index.counts()
+            return {engine: counts.get(engine, 0) for engine in directories}
+        current_counts = {}
+        for engine, directory in directories.items():
+            if os.path.exists(directory):
+                current_counts[engine] = len([f for f in os.listdir(directory) if f.endswith('.md')])
+            else:
+                current_counts[engine] = 0
+        return current_counts
     
     def _load_baseline(self) -> Dict[str, int]:
         """
@@ -116,14 +150,7 @@ class FileCountBaseline:
         遍历每个引擎目录并统计 `.md` 文件数量，将结果持久化为
         初始基准。后续 `check_new_files` 会据此对比增量。
         """
-        current_counts = {}
-        
-        for engine, directory in directories.items():
-            if os.path.exists(directory):
-                md_files = [f for f in os.listdir(directory) if f.endswith('.md')]
-                current_counts[engine] = len(md_files)
-            else:
-                current_counts[engine] = 0
+        current_counts = self._count_files(directories)
         
         # 保存基准数据
         self.baseline_data = current_counts.copy()
@@ -140,23 +167,15 @@ class FileCountBaseline:
         - 统计新增数量，并判定是否所有引擎都已准备就绪；
         - 返回详细计数、缺失列表，供 Web 层提示给用户。
         """
-        current_counts = {}
+        current_counts = self._count_files(directories)
         new_files_found = {}
         all_have_new = True
         
-        for engine, directory in directories.items():
-            if os.path.exists(directory):
-                md_files = [f for f in os.listdir(directory) if f.endswith('.md')]
-                current_counts[engine] = len(md_files)
-                baseline_count = self.baseline_data.get(engine, 0)
-                
-                if current_counts[engine] > baseline_count:
-                    new_files_found[engine] = current_counts[engine] - baseline_count
-                else:
-                    new_files_found[engine] = 0
-                    all_have_new = False
+        for engine in directories:
+            baseline_count = self.baseline_data.get(engine, 0)
+            if current_counts[engine] > baseline_count:
+                new_files_found[engine] = current_counts[engine] - baseline_count
             else:
-                current_counts[engine] = 0
                 new_files_found[engine] = 0
                 all_have_new = False
         
@@ -172,9 +191,13 @@ class FileCountBaseline:
         """
         获取每个目录的最新文件。
 
-        通过 `os.path.getmtime` 找出最近写入的 Markdown，
+        通过 `os.path.getmtime` 找出最近写入的 Markdown（挂载索引时直接读取），
         以确保生成流程永远使用最新一版三引擎报告。
         """
+        if self._indexed(directories):
+            latest = self.index.latest_files()
+            return {engine: latest[engine] for engine in directories if engine in latest}
+
         latest_files = {}
         
         for engine, directory in directories.items():
@@ -227,7 +250,13 @@ class ReportAgent:
         self.json_rescue_clients = self._initialize_rescue_llms()
         
         # 初始化章级存储/校验/渲染组件
-        self.chapter_storage = ChapterStorage(self.config.CHAPTER_OUTPUT_DIR)
+        self.chapter_storage = ChapterStorage(
+            self.config.CHAPTER_OUTPUT_DIR,
+            fsync=self.config.CHAPTER_MANIFEST_FSYNC,
+            compact_every=self.config.CHAPTER_MANIFEST_COMPACT_EVERY,
+            stream_compression=self.config.CHAPTER_STREAM_COMPRESSION,
+            stream_flush_interval=self.config.CHAPTER_STREAM_FLUSH_INTERVAL,
+        )
         self.document_composer = DocumentComposer()
         self.validator = IRValidator()
         self.renderer = HTMLRenderer()
@@ -340,12 +369,7 @@ class ReportAgent:
         将 Insight/Media/Query 三个目录传入 `FileCountBaseline`，
         生成一次性的参考值，之后按增量判断三引擎是否产出新报告。
         """
-        directories = {
-            'insight': 'insight_engine_streamlit_reports',
-            'media': 'media_engine_streamlit_reports',
-            'query': 'query_engine_streamlit_reports'
-        }
-        self.file_baseline.initialize_baseline(directories)
+        self.file_baseline.initialize_baseline(dict(ENGINE_REPORT_DIRECTORIES))
     
     def _initialize_llm(self) -> LLMClient:
         """
@@ -411,15 +435,25 @@ class ReportAgent:
             self.llm_client,
             self.config.TEMPLATE_DIR
         )
-        self.document_layout_node = DocumentLayoutNode(self.llm_client)
-        self.word_budget_node = WordBudgetNode(self.llm_client)
+        self.document_layout_node = DocumentLayoutNode(
+            self.llm_client, prompt_encoding=self._prompt_encoding("document_layout")
+        )
+        self.word_budget_node = WordBudgetNode(
+            self.llm_client, prompt_encoding=self._prompt_encoding("word_budget")
+        )
         self.chapter_generation_node = ChapterGenerationNode(
             self.llm_client,
             self.validator,
             self.chapter_storage,
             fallback_llm_clients=self.json_rescue_clients,
             error_log_dir=self.config.JSON_ERROR_LOG_DIR,
+            prompt_encoding=self._prompt_encoding("chapter"),
         )
+
+    def _prompt_encoding(self, node: str) -> str:
+        """读取节点的提示词编码模式：PROMPT_ENCODING_OVERRIDES 优先，其次 PROMPT_ENCODING。"""
+        overrides = getattr(self.config, "PROMPT_ENCODING_OVERRIDES", None) or {}
+        return overrides.get(node) or getattr(self.config, "PROMPT_ENCODING", "pretty")
     
     def generate_report(
         self,
@@ -475,6 +509,7 @@ class ReportAgent:
         init_knowledge_log(force_reset=True)
 
         normalized_reports = self._normalize_reports(reports)
+        planning_reports = self._pack_planning_reports(query, normalized_reports)
 
         def emit(event_type: str, payload: Dict[str, Any]):
             """面向Report Engine流通道的事件分发器，保证错误不外泄。"""
@@ -489,6 +524,10 @@ class ReportAgent:
         logger.info(f"输入数据 - 报告数量: {len(reports)}, 论坛日志长度: {len(str(forum_logs))}")
         emit('stage', {'stage': 'agent_start', 'report_id': report_id, 'query': query})
 
+        # 统计本次运行各LLM调用之间可被前缀缓存复用的字节数
+        prefix_tracker = PromptPrefixTracker()
+        self.llm_client.prompt_observer = prefix_tracker.record
+
         try:
             template_result = self._select_template(query, reports, forum_logs, custom_template)
             template_result = self._ensure_mapping(
@@ -516,7 +555,7 @@ class ReportAgent:
                 lambda: self.document_layout_node.run(
                     sections,
                     template_text,
-                    normalized_reports,
+                    planning_reports,
                     forum_logs,
                     query,
                     template_overview,
@@ -536,7 +575,7 @@ class ReportAgent:
                 lambda: self.word_budget_node.run(
                     sections,
                     layout_design,
-                    normalized_reports,
+                    planning_reports,
                     forum_logs,
                     query,
                     template_overview,
@@ -858,6 +897,8 @@ class ReportAgent:
                     completion_status['warningMessage'] = self._CONTENT_SPARSE_WARNING_TEXT
                 emit('chapter_status', completion_status)
 
+            # 全部章节完成后把manifest日志合并进快照，留下单文件清单供调试与续跑
+            self.chapter_storage.compact_manifest(run_dir)
             document_ir = self.document_composer.build_document(
                 report_id,
                 manifest_meta,
@@ -890,7 +931,26 @@ class ReportAgent:
             logger.exception(f"报告生成过程中发生错误: {str(e)}")
             emit('error', {'stage': 'agent_failed', 'message': str(e)})
             raise
+        finally:
+            self.llm_client.prompt_observer = None
+            self._report_prompt_prefix_stats(prefix_tracker, emit)
     
+    def _report_prompt_prefix_stats(self, tracker: PromptPrefixTracker, emit: Callable[[str, Dict[str, Any]], None]):
+        """
+        输出本次运行的提示词公共前缀统计（日志 + metrics 事件）。
+
+        sharedPrefixBytes 越高，支持前缀缓存的服务商在首章之后的调用中
+        需要重新计算的输入越少。
+        """
+        summary = tracker.summary()
+        if not summary['calls']:
+            return
+        logger.info(
+            f"提示词前缀统计: {summary['calls']} 次调用，共 {summary['promptBytes']} 字节，"
+            f"可复用前缀 {summary['sharedPrefixBytes']} 字节（{summary['sharedRatio']:.1%}）"
+        )
+        emit('metrics', {'prompt_prefix': summary})
+
     def _select_template(self, query: str, reports: List[Any], forum_logs: str, custom_template: str):
         """
         选择报告模板。
@@ -978,20 +1038,47 @@ class ReportAgent:
                 if engine in ['insight', 'media', 'query']
             }
             
-            # 解析论坛日志
-            forum_entries = []
+            # 论坛日志以生成器逐行解析，GraphBuilder 取够 Host 发言后即停止读取
+            forum_entries = None
             if forum_logs:
                 forum_parser = ForumParser()
-                forum_entries = forum_parser.parse(forum_logs)
-                logger.info(f"解析论坛日志: {len(forum_entries)} 条记录")
+                forum_entries = forum_parser.iter_parse(self._stringify(forum_logs))
+            
+            # 增量模式：找到同主题上一版图谱，未变化的段落直接复用
+            storage = GraphStorage()
+            previous_graph = None
+            previous_path = None
+            if getattr(self.config, 'GRAPHRAG_INCREMENTAL', True):
+                previous_path = storage.find_previous_graph(query, exclude_dir=run_dir)
+                if previous_path:
+                    previous_graph = storage.load(previous_path)
+                    if previous_graph is None:
+                        previous_path = None
             
-            # 构建图谱
+            # 构建图谱：各引擎子图并行构建后按固定顺序合并
             builder = GraphBuilder()
-            graph = builder.build(query, states, forum_entries)
+            graph = builder.build(
+                query,
+                states,
+                forum_entries,
+                max_workers=self._graph_build_workers(),
+                previous=previous_graph,
+            )
+            delta = builder.last_delta.to_dict()
+            if previous_graph is not None:
+                logger.info(f"知识图谱增量构建: 基于 {previous_path}，{delta}")
             
             # 保存图谱
-            storage = GraphStorage()
-            graph_path = storage.save(graph, self.state.task_id, run_dir)
+            graph_path = storage.save(
+                graph,
+                self.state.task_id,
+                run_dir,
+                metadata={
+                    'report_id': self.state.task_id,
+                    'incremental': delta,
+                    'previous_graph': str(previous_path) if previous_path else None,
+                },
+            )
             logger.info(f"知识图谱已保存: {graph_path}")
             
             return graph
@@ -1072,6 +1159,8 @@ class ReportAgent:
             "template_name": template_result.get("template_name"),
             "reports": reports,
             "forum_logs": self._stringify(forum_logs),
+            "retrieval_index": self._build_retrieval_index(reports, forum_logs),
+            "chapter_context_tokens": self.config.CHAPTER_CONTEXT_TOKENS,
             "theme_tokens": theme_tokens,
             "style_directives": {
                 "tone": "analytical",
@@ -1106,6 +1195,63 @@ class ReportAgent:
             normalized[key] = self._stringify(value)
         return normalized
 
+    def _pack_planning_reports(self, query: str, reports: Dict[str, str]) -> Dict[str, str]:
+        """
+        为文档设计、篇幅规划等规划节点打包报告。
+
+        三引擎报告去除近似重复段落后，按与主题的相关度装入
+        `PLANNING_CONTEXT_TOKENS` 预算；章节生成仍使用完整报告。
+
+        参数:
+            query: 用户查询词，用于相关度排序。
+            reports: `_normalize_reports` 的输出。
+
+        返回:
+            dict: 与输入同键的打包后报告。
+        """
+        if not getattr(self.config, 'CONTEXT_PACKING_ENABLED', True):
+            return reports
+        try:
+            packed = pack_sources(reports, query, self.config.PLANNING_CONTEXT_TOKENS)
+        except Exception as exc:
+            logger.warning(f"规划上下文打包失败，使用完整报告: {exc}")
+            return reports
+        if packed.duplicates_dropped or packed.passages_dropped:
+            logger.info(
+                f"规划上下文打包: 约 {packed.original_tokens} -> {packed.total_tokens} tokens，"
+                f"去重 {packed.duplicates_dropped} 段，预算外 {packed.passages_dropped} 段"
+            )
+        return packed.texts
+
+    def _build_retrieval_index(self, reports: Dict[str, str], forum_logs: str) -> Optional[PassageIndex]:
+        """
+        为章节生成构建一次段落索引（三引擎报告 + 论坛日志）。
+
+        每章按自己的标题/提纲/强调点从索引中取回相关段落，
+        不再把全部素材重复塞进每一章的提示词。
+
+        参数:
+            reports: `_normalize_reports` 的输出。
+            forum_logs: 论坛日志原文。
+
+        返回:
+            PassageIndex | None: 未启用或构建失败时返回None，章节沿用完整素材。
+        """
+        if not getattr(self.config, 'CHAPTER_RETRIEVAL_ENABLED', True):
+            return None
+        sources = dict(reports)
+        sources['forum_logs'] = self._stringify(forum_logs)
+        try:
+            index = PassageIndex(sources)
+        except Exception as exc:
+            logger.warning(f"章节检索索引构建失败，章节将使用完整报告: {exc}")
+            return None
+        logger.info(
+            f"章节检索索引已构建: {len(index.passages)} 段，约 {index.total_tokens} tokens，"
+            f"去重 {index.duplicates_dropped} 段"
+        )
+        return index
+
     def _should_retry_inappropriate_content_error(self, error: Exception) -> bool:
         """
         判断LLM异常是否由内容安全/不当内容导致。
@@ -1545,11 +1691,11 @@ class ReportAgent:
         """
         filename = f"report_ir_{query_safe}_{timestamp}.json"
         ir_path = Path(self.config.DOCUMENT_IR_OUTPUT_DIR) / filename
-        ir_path.write_text(
-            json.dumps(document_ir, ensure_ascii=False, indent=2),
-            encoding="utf-8",
+        return write_document_ir(
+            ir_path,
+            document_ir,
+            pretty=bool(getattr(self.config, "DOCUMENT_IR_PRETTY", False)),
         )
-        return ir_path
     
     def _persist_planning_artifacts(
         self,
@@ -1679,44 +1825,75 @@ class ReportAgent:
         # 重要：清空上一次任务的状态数据，防止污染当前任务的知识图谱
         self._loaded_states = {}
 
-        # 加载报告文件
-        engines = ['query', 'media', 'insight']
+        # 三个引擎的 MD 读取与 State JSON 解析互不依赖，交给线程池流水线并发执行，
+        # 结果仍按 query/media/insight 的固定顺序收集，保证 reports 列表顺序不变
+        engines = [engine for engine in ['query', 'media', 'insight'] if engine in file_paths]
+        graphrag_enabled = self.config.GRAPHRAG_ENABLED
         state_parser = StateParser()
-        
-        for engine in engines:
-            if engine in file_paths:
+        max_workers = self._graph_build_workers()
+
+        def load_engine(engine: str) -> Tuple[Optional[str], Any]:
+            """读取单个引擎的 Markdown 报告，并按需解析同目录 State JSON。"""
+            try:
+                with open(file_paths[engine], 'r', encoding='utf-8') as f:
+                    report_content = f.read()
+            except Exception as e:
+                logger.exception(f"加载 {engine} 报告失败: {str(e)}")
+                return None, None
+
+            parsed_state = None
+            if graphrag_enabled:
                 try:
-                    with open(file_paths[engine], 'r', encoding='utf-8') as f:
-                        report_content = f.read()
-                    content['reports'].append(report_content)
-                    logger.info(f"已加载 {engine} 报告: {len(report_content)} 字符")
-                    
-                    # 新增：尝试查找并加载对应的 State JSON（用于 GraphRAG）
-                    if self.config.GRAPHRAG_ENABLED:
-                        state_path = state_parser.find_state_json(file_paths[engine])
-                        if state_path:
-                            parsed_state = state_parser.parse_from_file(engine, state_path)
-                            if parsed_state:
-                                content['states'][engine] = parsed_state
-                                # 同时保存到实例属性，供 _build_knowledge_graph 使用
-                                self._loaded_states[engine] = parsed_state
-                                logger.info(f"已加载 {engine} State JSON: {len(parsed_state.sections)} 个段落")
-                            
+                    state_path = state_parser.find_state_json(file_paths[engine])
+                    if state_path:
+                        parsed_state = state_parser.parse_from_file(engine, state_path)
                 except Exception as e:
-                    logger.exception(f"加载 {engine} 报告失败: {str(e)}")
-                    content['reports'].append("")
+                    logger.exception(f"加载 {engine} State JSON 失败: {str(e)}")
+            return report_content, parsed_state
 
-        # 加载论坛日志
-        if 'forum' in file_paths:
+        def load_forum() -> str:
+            """读取论坛日志全文（仍需原文作为提示词上下文）。"""
             try:
                 with open(file_paths['forum'], 'r', encoding='utf-8') as f:
-                    content['forum_logs'] = f.read()
-                logger.info(f"已加载论坛日志: {len(content['forum_logs'])} 字符")
+                    return f.read()
             except Exception as e:
                 logger.exception(f"加载论坛日志失败: {str(e)}")
+                return ''
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix="input-loader",
+        ) as executor:
+            engine_futures = {engine: executor.submit(load_engine, engine) for engine in engines}
+            forum_future = executor.submit(load_forum) if 'forum' in file_paths else None
+
+            for engine in engines:
+                report_content, parsed_state = engine_futures[engine].result()
+                if report_content is None:
+                    content['reports'].append("")
+                    continue
+                content['reports'].append(report_content)
+                logger.info(f"已加载 {engine} 报告: {len(report_content)} 字符")
+                if parsed_state:
+                    content['states'][engine] = parsed_state
+                    # 同时保存到实例属性，供 _build_knowledge_graph 使用
+                    self._loaded_states[engine] = parsed_state
+                    logger.info(f"已加载 {engine} State JSON: {len(parsed_state.sections)} 个段落")
+
+            if forum_future is not None:
+                content['forum_logs'] = forum_future.result()
+                if content['forum_logs']:
+                    logger.info(f"已加载论坛日志: {len(content['forum_logs'])} 字符")
 
         return content
 
+    def _graph_build_workers(self) -> int:
+        """读取输入加载/图谱构建的并行线程数，非法配置时回退为串行。"""
+        try:
+            return max(1, int(getattr(self.config, 'GRAPHRAG_BUILD_WORKERS', 3)))
+        except (TypeError, ValueError):
+            return 1
+
 
 def create_agent(config_file: Optional[str] = None) -> ReportAgent:
     """
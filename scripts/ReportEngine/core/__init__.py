@@ -7,11 +7,15 @@ Report Engine核心工具集合。
 
 from .template_parser import TemplateSection, parse_template_sections
 from .chapter_storage import ChapterStorage
+from .stream_capture import StreamCaptureWriter, iter_raw_stream, read_raw_stream
 from .stitcher import DocumentComposer
 
 __all__ = [
     "TemplateSection",
     "parse_template_sections",
     "ChapterStorage",
+    "StreamCaptureWriter",
+    "iter_raw_stream",
+    "read_raw_stream",
     "DocumentComposer",
 ]
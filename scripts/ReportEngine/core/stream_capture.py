@@ -0,0 +1,254 @@
+"""
+章节流式输出（stream.raw）的后台缓冲写入与读取。
+
+LLM 每个 token 级 delta 都直接 ``write`` 到文本文件，会让磁盘 I/O 落在读取
+HTTP 流、推送 SSE 的同一线程上。``StreamCaptureWriter`` 只在调用线程里把 delta
+追加到内存缓冲，由后台线程合并成大块写盘：
+
+- 缓冲达到 ``flush_bytes`` 或距上次写盘超过 ``flush_interval`` 秒时写一次；
+- 缓冲超过 ``max_buffer_bytes`` 时 ``write`` 阻塞等待后台线程追上，内存有上限；
+- ``close()`` 写完剩余数据后才返回；
+- 可选 gzip / zstd 压缩（zstd 需要 zstandard，缺失时退回 gzip）。
+
+写盘失败只记录日志并丢弃后续数据，不影响章节生成。调试工具通过
+``iter_raw_stream`` / ``read_raw_stream`` 读取，按文件头自动识别压缩格式。
+"""
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional
+
+from loguru import logger
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+STREAM_COMPRESSIONS = ("none", "gzip", "zstd")
+_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def resolve_compression(compression: Optional[str]) -> str:
+    """规范化压缩方式；zstandard 未安装时 zstd 退回 gzip"""
+    value = (compression or "none").lower()
+    if value not in STREAM_COMPRESSIONS:
+        raise ValueError(f"未知的压缩方式: {compression}（可选: {', '.join(STREAM_COMPRESSIONS)}）")
+    if value == "zstd" and zstandard is None:
+        logger.warning("未安装 zstandard，stream.raw 改用 gzip 压缩")
+        return "gzip"
+    return value
+
+
+def raw_stream_suffix(compression: str) -> str:
+    """返回压缩方式对应的文件后缀（stream.raw + 后缀）"""
+    return _SUFFIXES[compression]
+
+
+def _open_for_write(path: Path, compression: str) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"))
+    return open(path, "wb")
+
+
+class StreamCaptureWriter:
+    """
+    后台线程批量写盘的流式输出捕获器。
+
+    与文本文件对象一样提供 ``write(str)``，可作为上下文管理器使用。
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        compression: str = "none",
+        flush_bytes: int = 64 * 1024,
+        flush_interval: float = 0.5,
+        max_buffer_bytes: int = 4 * 1024 * 1024,
+    ):
+        """
+        参数:
+            path: 输出文件路径（调用方负责按压缩方式加后缀）
+            compression: none/gzip/zstd
+            flush_bytes: 缓冲达到该字节数即写盘
+            flush_interval: 两次写盘的最长间隔（秒）
+            max_buffer_bytes: 内存缓冲上限，超过时 write 阻塞
+        """
+        self.path = Path(path)
+        self.compression = resolve_compression(compression)
+        self.flush_bytes = max(1, int(flush_bytes))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.max_buffer_bytes = max(self.flush_bytes, int(max_buffer_bytes))
+        self.bytes_written = 0
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._closed = False
+        self._failed = False
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = _open_for_write(self.path, self.compression)
+        self._thread = threading.Thread(
+            target=self._run, name=f"stream-capture-{self.path.parent.name}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, text: str) -> int:
+        """追加一段文本到缓冲，返回字符数"""
+        if not text:
+            return 0
+        size = len(text)
+        with self._cond:
+            if self._closed:
+                raise ValueError("I/O operation on closed StreamCaptureWriter")
+            if self._failed:
+                return size
+            # 近似按字符数计量（UTF-8 下中文为3字节），足以约束内存
+            while self._buffered >= self.max_buffer_bytes and not self._failed:
+                self._cond.wait()
+            was_empty = not self._buffered
+            self._buffer.append(text)
+            self._buffered += size
+            # 缓冲从空变为非空时唤醒后台线程开始计时，超过阈值时立即写盘
+            if was_empty or self._buffered >= self.flush_bytes:
+                self._cond.notify_all()
+        return size
+
+    def flush(self) -> None:
+        """阻塞直到缓冲全部写入底层文件"""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._buffered and not self._failed:
+                self._cond.wait()
+
+    def close(self) -> None:
+        """写完剩余缓冲并关闭文件；可重复调用"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __enter__(self) -> "StreamCaptureWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        """后台线程：按大小/时间阈值取走缓冲并写盘，关闭时写完剩余数据"""
+        try:
+            while True:
+                with self._cond:
+                    while not self._closed and not self._buffer:
+                        self._cond.wait()
+                    deadline = time.monotonic() + self.flush_interval
+                    while (
+                        not self._closed
+                        and not self._flush_requested
+                        and self._buffered < self.flush_bytes
+                    ):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    chunks, self._buffer = self._buffer, []
+                    forced = self._flush_requested
+                    self._flush_requested = False
+                    closing = self._closed
+                if chunks:
+                    self._write_chunks(chunks, forced)
+                if closing:
+                    with self._cond:
+                        if not self._buffer:
+                            break
+        finally:
+            self._close_file()
+
+    def _write_chunks(self, chunks: List[str], forced: bool) -> None:
+        size = sum(len(chunk) for chunk in chunks)
+        if not self._failed:
+            try:
+                data = "".join(chunks).encode("utf-8")
+                self._fp.write(data)
+                self.bytes_written += len(data)
+                # 未压缩时每批都交给操作系统，便于调试时 tail；压缩流只在显式 flush 时同步，避免拉低压缩率
+                if forced or self.compression == "none":
+                    self._fp.flush()
+            except Exception as exc:
+                logger.warning(f"stream.raw 写入失败，后续输出不再落盘: {self.path} ({exc})")
+                self._failed = True
+        with self._cond:
+            self._buffered -= size
+            self._cond.notify_all()
+
+    def _close_file(self) -> None:
+        try:
+            self._fp.close()
+        except Exception as exc:
+            logger.warning(f"stream.raw 关闭失败: {self.path} ({exc})")
+        with self._cond:
+            self._buffer = []
+            self._buffered = 0
+            self._cond.notify_all()
+
+
+def open_raw_stream(path: str | Path) -> BinaryIO:
+    """按文件头识别压缩格式，返回解压后的二进制读取对象"""
+    path = Path(path)
+    with open(path, "rb") as fp:
+        magic = fp.read(4)
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(path, "rb")
+    if magic == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def iter_raw_stream(path: str | Path, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """逐块读取流式输出文本，适合查看很长的原始输出"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open_raw_stream(path) as fp:
+        while True:
+            data = fp.read(chunk_size)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def read_raw_stream(path: str | Path) -> str:
+    """读取完整的流式输出文本"""
+    return "".join(iter_raw_stream(path))
+
+
+__all__ = [
+    "STREAM_COMPRESSIONS",
+    "StreamCaptureWriter",
+    "iter_raw_stream",
+    "open_raw_stream",
+    "raw_stream_suffix",
+    "read_raw_stream",
+    "resolve_compression",
+]
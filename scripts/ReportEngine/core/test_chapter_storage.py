@@ -0,0 +1,84 @@
+"""
+章节存储manifest日志的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/core/test_chapter_storage.py -v
+"""
+
+import json
+import threading
+
+import pytest
+
+from ReportEngine.core import ChapterStorage
+
+
+def _meta(i):
+    return {"chapterId": f"S{i}", "title": f"第{i}章", "slug": f"s{i}", "order": i * 10}
+
+
+def test_journal_appends_and_compacts(tmp_path):
+    storage = ChapterStorage(str(tmp_path), compact_every=100)
+    run_dir = storage.start_session("r1", {"title": "报告"})
+
+    storage.begin_chapter(run_dir, _meta(2))
+    storage.begin_chapter(run_dir, _meta(1))
+    storage.persist_chapter(run_dir, _meta(2), {"chapterId": "S2", "order": 20, "blocks": []})
+
+    # 快照未改写，状态只存在于日志中
+    snapshot = json.loads((run_dir / "manifest.json").read_text(encoding="utf-8"))
+    assert snapshot["chapters"] == []
+    manifest = storage.read_manifest(run_dir)
+    assert [(c["chapterId"], c["status"]) for c in manifest["chapters"]] == [
+        ("S1", "streaming"),
+        ("S2", "ready"),
+    ]
+    assert manifest["metadata"] == {"title": "报告"}
+
+    compacted = storage.compact_manifest(run_dir)
+    assert compacted == manifest
+    assert json.loads((run_dir / "manifest.json").read_text(encoding="utf-8")) == manifest
+    assert (run_dir / "manifest.journal").read_bytes() == b""
+
+
+def test_torn_tail_and_auto_compaction(tmp_path):
+    storage = ChapterStorage(str(tmp_path), fsync="never", compact_every=3)
+    run_dir = storage.start_session("r2", {})
+    for i in range(4):
+        storage.begin_chapter(run_dir, _meta(i))
+    # 第3条记录触发压缩，日志中只剩第4条
+    assert len((run_dir / "manifest.journal").read_bytes().splitlines()) == 1
+
+    with open(run_dir / "manifest.journal", "ab") as fp:
+        fp.write(b'{"chapterId":"S9","ord')
+    reopened = ChapterStorage(str(tmp_path))
+    assert [c["chapterId"] for c in reopened.read_manifest(run_dir)["chapters"]] == ["S0", "S1", "S2", "S3"]
+
+
+def test_concurrent_writers(tmp_path):
+    storage = ChapterStorage(str(tmp_path), compact_every=7)
+    run_dir = storage.start_session("r3", {})
+
+    def worker(offset):
+        for i in range(offset, offset + 10):
+            storage.begin_chapter(run_dir, _meta(i))
+            storage.persist_chapter(run_dir, _meta(i), {"chapterId": f"S{i}"})
+
+    threads = [threading.Thread(target=worker, args=(n * 10,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    chapters = storage.read_manifest(run_dir)["chapters"]
+    assert [c["chapterId"] for c in chapters] == [f"S{i}" for i in range(40)]
+    assert {c["status"] for c in chapters} == {"ready"}
+
+
+def test_rejects_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        ChapterStorage(str(tmp_path), fsync="sometimes")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
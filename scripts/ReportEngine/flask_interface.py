@@ -8,19 +8,31 @@ Report Engine Flask接口。
 """
 
 import os
-import json
 import threading
 import time
 from collections import deque, defaultdict
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from queue import Queue, Empty
+from queue import Empty
 from flask import Blueprint, request, jsonify, Response, send_file, stream_with_context
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from loguru import logger
-from .agent import ReportAgent, create_agent
+from .agent import ENGINE_REPORT_DIRECTORIES, ReportAgent, create_agent
 from .nodes import ChapterJsonParseError
+from .ir import iter_chapters, load_document_ir, read_document_header
 from .utils.config import settings
+from .utils.serialization import dumps
+from .utils.event_log import TaskEventLog, has_event_log, prune_event_logs
+from .utils.input_watcher import InputWatcher
+from .utils.stream_events import (
+    CHUNK_EVENT_TYPE,
+    ChunkCoalescer,
+    SubscriberQueue,
+    collect_chunk_batch,
+    iter_coalesced_chunk_events,
+    parse_client_batching,
+)
 
 
 # 创建Blueprint
@@ -45,6 +57,17 @@ log_stream_handler_id: Optional[int] = None
 
 EXCLUDED_ENGINE_PATH_KEYWORDS = ("ForumEngine", "InsightEngine", "MediaEngine", "QueryEngine")
 
+# ====== 输入目录监听 ======
+# 三引擎报告目录的变化以 `inputs` 事件推送到这个保留的流键上
+FORUM_LOG_PATH = 'logs/forum.log'
+INPUTS_STREAM_KEY = '__inputs__'
+input_watcher: Optional[InputWatcher] = None
+inputs_lock = threading.Lock()
+inputs_event_seq = 0
+inputs_last_event: Optional[Dict[str, Any]] = None
+auto_generate_timer: Optional[threading.Timer] = None
+auto_generate_counts: Dict[str, int] = {}
+
 def _is_excluded_engine_log(record: Dict[str, Any]) -> bool:
     """
     判断日志是否来自其他引擎（Insight/Media/Query/Forum），用于过滤混入的日志。
@@ -122,25 +145,29 @@ def _setup_log_stream_forwarder():
     )
 
 
-def _register_stream(task_id: str) -> Queue:
+def _register_stream(task_id: str, queue: Optional[SubscriberQueue] = None) -> SubscriberQueue:
     """
     为指定任务注册一个事件队列，供SSE监听器消费。
 
-    返回的 Queue 会存入 `stream_subscribers`，SSE 生成器将不断读取。
+    返回的队列会存入 `stream_subscribers`，SSE 生成器将不断读取。
+    队列有界：慢客户端积压时优先合并/丢弃 chunk 与日志事件，并在之后
+    从持久化历史重新同步，不会无限占用内存。
 
     参数:
         task_id: 需要监听的任务ID。
+        queue: 调用方预先创建的队列（如ASGI端的 AsyncSubscriberQueue），默认新建。
 
     返回:
-        Queue: 线程安全的事件队列。
+        SubscriberQueue: 线程安全的有界事件队列。
     """
-    queue = Queue()
+    if queue is None:
+        queue = SubscriberQueue(settings.STREAM_SUBSCRIBER_QUEUE_SIZE)
     with stream_lock:
         stream_subscribers[task_id].append(queue)
     return queue
 
 
-def _unregister_stream(task_id: str, queue: Queue):
+def _unregister_stream(task_id: str, queue: SubscriberQueue):
     """
     安全移除事件队列，避免内存泄漏。
 
@@ -172,7 +199,8 @@ def _broadcast_event(task_id: str, event: Dict[str, Any]):
         listeners = list(stream_subscribers.get(task_id, []))
     for queue in listeners:
         try:
-            queue.put(event, timeout=0.1)
+            # 有界队列的put永不阻塞，慢客户端不会拖慢生产者
+            queue.put(event)
         except Exception:
             logger.exception("推送流式事件失败，跳过当前监听队列")
 
@@ -192,6 +220,7 @@ def _prune_task_history_locked():
     sorted_tasks = sorted(tasks_registry.values(), key=lambda t: t.created_at)
     for task in sorted_tasks[:-MAX_TASK_HISTORY]:
         tasks_registry.pop(task.task_id, None)
+        task.close_event_log()
 
 
 def _get_task(task_id: str) -> Optional['ReportTask']:
@@ -212,6 +241,28 @@ def _get_task(task_id: str) -> Optional['ReportTask']:
         return tasks_registry.get(task_id)
 
 
+def _open_event_log(task_id: str) -> Optional[TaskEventLog]:
+    """
+    为任务打开磁盘事件日志，并按保留策略清理旧任务的日志。
+
+    未启用或打开失败时返回None，任务仍可仅依赖内存历史运行。
+    """
+    if not settings.EVENT_LOG_ENABLED:
+        return None
+    try:
+        event_log = TaskEventLog(
+            settings.EVENT_LOG_DIR,
+            task_id,
+            segment_max_bytes=settings.EVENT_LOG_SEGMENT_BYTES,
+            max_segments=settings.EVENT_LOG_MAX_SEGMENTS,
+        )
+        prune_event_logs(settings.EVENT_LOG_DIR, settings.EVENT_LOG_MAX_TASKS, exclude=task_id)
+        return event_log
+    except Exception as exc:
+        logger.warning(f"无法创建任务事件日志（{task_id}），仅保留内存历史: {exc}")
+        return None
+
+
 def _format_sse(event: Dict[str, Any]) -> str:
     """
     按SSE协议格式化消息。
@@ -224,7 +275,7 @@ def _format_sse(event: Dict[str, Any]) -> str:
     返回:
         str: SSE协议要求的字符串。
     """
-    payload = json.dumps(event, ensure_ascii=False)
+    payload = dumps(event)
     event_id = event.get('id', 0)
     event_type = event.get('type', 'message')
     return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
@@ -257,6 +308,7 @@ def initialize_report_engine():
         report_agent = create_agent()
         logger.info("Report Engine初始化成功")
         _setup_log_stream_forwarder()
+        _start_input_watcher()
 
         # 检测 PDF 生成依赖（Pango）
         try:
@@ -313,6 +365,16 @@ class ReportTask:
         self.event_history: deque = deque(maxlen=1000)
         self._event_lock = threading.Lock()
         self.last_event_id = 0
+        # 磁盘追加日志：内存历史被挤出或进程重启后仍可按ID回放
+        self.event_log = _open_event_log(task_id)
+        if self.event_log is not None:
+            self.last_event_id = self.event_log.last_event_id
+        # 章节delta先合并成帧再入历史/广播，避免细碎事件淹没订阅队列
+        self._chunk_coalescer = ChunkCoalescer(
+            lambda payload: self._append_event(CHUNK_EVENT_TYPE, payload),
+            window_ms=settings.STREAM_CHUNK_FLUSH_MS,
+            max_bytes=settings.STREAM_CHUNK_FLUSH_BYTES,
+        )
 
     def update_status(self, status: str, progress: int = None, error_message: str = ""):
         """
@@ -342,6 +404,17 @@ class ReportTask:
                 'task': self.to_dict(),
             }
         )
+        if status in STREAM_TERMINAL_STATUSES:
+            # 终态后不再有章节流：停止合并器的刷新线程
+            self._chunk_coalescer.close()
+            # 终态事件已落盘，释放日志文件句柄；之后若仍有事件写入会自动重新打开
+            self.close_event_log()
+
+    def close_event_log(self) -> None:
+        """关闭磁盘事件日志的文件句柄（回放读取不受影响，可重复调用）。"""
+        with self._event_lock:
+            if self.event_log is not None:
+                self.event_log.close()
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式，方便直接返回给JSON API。"""
@@ -370,10 +443,21 @@ class ReportTask:
         """
         将任意事件放入缓存并广播，所有新增逻辑均配套中文说明。
 
+        chapter_chunk 交给合并器按时间/字节窗口成帧发布；其他事件立即发布，
+        发布前先冲刷未满的帧，保证前端看到的顺序与产生顺序一致。
+
         参数:
             event_type: SSE中的event名称。
             payload: 实际业务数据。
         """
+        if event_type == CHUNK_EVENT_TYPE:
+            self._chunk_coalescer.add(payload)
+            return
+        self._chunk_coalescer.flush()
+        self._append_event(event_type, payload)
+
+    def _append_event(self, event_type: str, payload: Dict[str, Any]) -> None:
+        """分配事件ID、写入历史并广播给所有订阅者。"""
         timestamp = datetime.utcnow().isoformat() + 'Z'
         event: Dict[str, Any] = {
             'id': 0,
@@ -386,6 +470,12 @@ class ReportTask:
             self.last_event_id += 1
             event['id'] = self.last_event_id
             self.event_history.append(event)
+            if self.event_log is not None:
+                try:
+                    self.event_log.append(event)
+                except Exception as exc:
+                    logger.warning(f"写入任务事件日志失败，停止持久化（{self.task_id}）: {exc}")
+                    self.event_log = None
         _broadcast_event(self.task_id, event)
 
     def history_since(self, last_event_id: Optional[int]) -> List[Dict[str, Any]]:
@@ -398,10 +488,33 @@ class ReportTask:
         返回:
             list[dict]: 从 last_event_id 之后的事件列表。
         """
+        return list(self.iter_history_since(last_event_id))
+
+    def iter_history_since(self, last_event_id: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """
+        惰性产出 last_event_id 之后的事件。
+
+        请求的区间仍在内存历史内时直接按ID偏移切片；已被挤出内存（或从头回放）
+        时改从磁盘事件日志定位读取，不必把全部事件常驻内存。
+        """
         with self._event_lock:
-            if last_event_id is None:
-                return list(self.event_history)
-            return [evt for evt in self.event_history if evt['id'] > last_event_id]
+            oldest_id = self.event_history[0]['id'] if self.event_history else None
+            truncated = oldest_id is not None and oldest_id > 1
+            needs_disk = self.event_log is not None and truncated and (
+                last_event_id is None or last_event_id + 1 < oldest_id
+            )
+            if not needs_disk:
+                if last_event_id is None or oldest_id is None:
+                    snapshot = list(self.event_history)
+                else:
+                    # 事件ID连续递增，可直接换算为deque中的起始位置
+                    start = max(0, last_event_id - oldest_id + 1)
+                    snapshot = list(islice(self.event_history, start, None))
+                    if snapshot and snapshot[0]['id'] <= last_event_id:
+                        snapshot = [evt for evt in snapshot if evt['id'] > last_event_id]
+        if needs_disk:
+            return self.event_log.iter_since(last_event_id)
+        return iter(snapshot)
 
 
 def check_engines_ready() -> Dict[str, Any]:
@@ -411,14 +524,6 @@ def check_engines_ready() -> Dict[str, Any]:
     调用 ReportAgent 的基准检测逻辑，并附带论坛日志存在性，
     是 /status、/generate 的前置校验。
     """
-    directories = {
-        'insight': 'insight_engine_streamlit_reports',
-        'media': 'media_engine_streamlit_reports',
-        'query': 'query_engine_streamlit_reports'
-    }
-
-    forum_log_path = 'logs/forum.log'
-
     if not report_agent:
         return {
             'ready': False,
@@ -426,13 +531,120 @@ def check_engines_ready() -> Dict[str, Any]:
         }
 
     return report_agent.check_input_files(
-        directories['insight'],
-        directories['media'],
-        directories['query'],
-        forum_log_path
+        ENGINE_REPORT_DIRECTORIES['insight'],
+        ENGINE_REPORT_DIRECTORIES['media'],
+        ENGINE_REPORT_DIRECTORIES['query'],
+        FORUM_LOG_PATH
     )
 
 
+def _start_input_watcher():
+    """
+    启动三引擎输入目录监听，并把索引挂到 ReportAgent 的文件基准上。
+
+    之后 /status、/generate 的就绪检查直接读取内存索引；目录变化时
+    推送 `inputs` 事件，并按配置自动触发生成。重复调用只会替换旧的监听器。
+    """
+    global input_watcher
+    if not settings.INPUT_WATCHER_ENABLED or not report_agent:
+        return
+    if input_watcher is not None:
+        input_watcher.stop()
+    try:
+        watcher = InputWatcher(
+            ENGINE_REPORT_DIRECTORIES,
+            poll_interval=settings.INPUT_WATCHER_POLL_SECONDS,
+        )
+        watcher.add_listener(_on_inputs_changed)
+        watcher.start()
+    except Exception as exc:
+        logger.warning(f"输入目录监听启动失败，回退为逐次扫描: {exc}")
+        return
+    input_watcher = watcher
+    report_agent.file_baseline.attach_index(watcher)
+    with inputs_lock:
+        auto_generate_counts.clear()
+        auto_generate_counts.update(report_agent.file_baseline.baseline_data)
+
+
+def _inputs_snapshot(engine: Optional[str] = None) -> Dict[str, Any]:
+    """构造 `inputs` 事件（ID 在输入流内单调递增，供 Last-Event-ID 使用）。"""
+    global inputs_event_seq
+    status = check_engines_ready()
+    with inputs_lock:
+        inputs_event_seq += 1
+        event_id = inputs_event_seq
+    return {
+        'id': event_id,
+        'type': 'inputs',
+        'task_id': INPUTS_STREAM_KEY,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'payload': {
+            'engine': engine,
+            'ready': status.get('ready', False),
+            'current_counts': status.get('current_counts', {}),
+            'new_files_found': status.get('new_files_found', {}),
+            'files_found': status.get('files_found', []),
+            'missing_files': status.get('missing_files', []),
+            'latest_files': status.get('latest_files', {}),
+            'watcher_mode': input_watcher.mode if input_watcher else None,
+        }
+    }
+
+
+def _on_inputs_changed(engine: str):
+    """InputWatcher 回调：广播最新就绪状态，并视配置安排自动生成。"""
+    global inputs_last_event
+    try:
+        event = _inputs_snapshot(engine)
+    except Exception:
+        logger.exception("构造输入目录事件失败")
+        return
+    with inputs_lock:
+        inputs_last_event = event
+    _broadcast_event(INPUTS_STREAM_KEY, event)
+    if settings.INPUT_AUTO_GENERATE and event['payload']['ready']:
+        _schedule_auto_generate(event['payload']['current_counts'])
+
+
+def _schedule_auto_generate(current_counts: Dict[str, int]):
+    """
+    三引擎都比上次自动生成时多出新报告时，防抖后自动开始生成。
+
+    引擎通常会陆续写出多份文件，每次变化都会重置计时器，
+    等目录安静 `INPUT_AUTO_GENERATE_DELAY` 秒后才真正触发。
+    """
+    global auto_generate_timer
+    with inputs_lock:
+        if not all(
+            current_counts.get(engine, 0) > auto_generate_counts.get(engine, 0)
+            for engine in ENGINE_REPORT_DIRECTORIES
+        ):
+            return
+        if auto_generate_timer is not None:
+            auto_generate_timer.cancel()
+        auto_generate_timer = threading.Timer(settings.INPUT_AUTO_GENERATE_DELAY, _run_auto_generate)
+        auto_generate_timer.daemon = True
+        auto_generate_timer.start()
+
+
+def _run_auto_generate():
+    """防抖计时器到期：再次确认就绪后启动报告生成。"""
+    global auto_generate_timer
+    with inputs_lock:
+        auto_generate_timer = None
+    status = check_engines_ready()
+    if not status.get('ready'):
+        return
+    task, error, _ = _start_report_task(settings.INPUT_AUTO_GENERATE_QUERY)
+    if task is None:
+        logger.info(f"跳过自动生成: {error.get('error') if error else '未知原因'}")
+        return
+    with inputs_lock:
+        auto_generate_counts.update(status.get('current_counts', {}))
+    logger.info(f"三引擎均有新报告，已自动开始生成: {task.task_id}")
+
+
 def run_report_generation(task: ReportTask, query: str, custom_template: str = ""):
     """
     在后台线程中运行报告生成。
@@ -616,22 +828,7 @@ def generate_report():
     返回:
         Response: JSON，包含 task_id 与 SSE stream url。
     """
-    global current_task
-
     try:
-        # 检查是否有任务在运行
-        with task_lock:
-            if current_task and current_task.status == "running":
-                return jsonify({
-                    'success': False,
-                    'error': '已有报告生成任务在运行中',
-                    'current_task': current_task.to_dict()
-                }), 400
-
-            # 如果有已完成的任务，清理它
-            if current_task and current_task.status in ["completed", "error"]:
-                current_task = None
-
         # 获取请求参数
         data = request.get_json() or {}
         if not isinstance(data, dict):
@@ -640,59 +837,16 @@ def generate_report():
         query = data.get('query', '智能舆情分析报告')
         custom_template = data.get('custom_template', '')
 
-        # 清空日志文件
-        clear_report_log()
-
-        # 检查Report Engine是否初始化
-        if not report_agent:
-            return jsonify({
-                'success': False,
-                'error': 'Report Engine未初始化'
-            }), 500
-
-        # 检查输入文件是否准备就绪
-        engines_status = check_engines_ready()
-        if not engines_status['ready']:
-            return jsonify({
-                'success': False,
-                'error': '输入文件未准备就绪',
-                'missing_files': engines_status.get('missing_files', [])
-            }), 400
-
-        # 创建新任务
-        task_id = f"report_{int(time.time())}"
-        task = ReportTask(query, task_id, custom_template)
-
-        with task_lock:
-            current_task = task
-            tasks_registry[task_id] = task
-            _prune_task_history_locked()
-
-        # 通过主动推送pending事件告知前端任务已经排队
-        task.publish_event(
-            'status',
-            {
-                'status': task.status,
-                'progress': task.progress,
-                'message': '任务已排队，等待资源空闲',
-                'task': task.to_dict(),
-            }
-        )
-
-        # 在后台线程中运行报告生成
-        thread = threading.Thread(
-            target=run_report_generation,
-            args=(task, query, custom_template),
-            daemon=True
-        )
-        thread.start()
+        task, error, status_code = _start_report_task(query, custom_template)
+        if task is None:
+            return jsonify(error), status_code
 
         return jsonify({
             'success': True,
-            'task_id': task_id,
+            'task_id': task.task_id,
             'message': '报告生成已启动',
             'task': task.to_dict(),
-            'stream_url': f"/api/report/stream/{task_id}"
+            'stream_url': f"/api/report/stream/{task.task_id}"
         })
 
     except Exception as e:
@@ -703,6 +857,77 @@ def generate_report():
         }), 500
 
 
+def _start_report_task(query: str, custom_template: str = ""):
+    """
+    排队并在后台线程启动一次报告生成（/generate 与自动生成共用）。
+
+    参数:
+        query: 报告主题。
+        custom_template: 自定义模板字符串（可选）。
+
+    返回:
+        tuple: (task, error, status_code)。启动成功时 error 为 None，
+        失败时 task 为 None、error 为可直接返回给前端的错误体。
+    """
+    global current_task
+
+    # 检查Report Engine是否初始化
+    if not report_agent:
+        return None, {
+            'success': False,
+            'error': 'Report Engine未初始化'
+        }, 500
+
+    # 检查输入文件是否准备就绪
+    engines_status = check_engines_ready()
+    if not engines_status['ready']:
+        return None, {
+            'success': False,
+            'error': '输入文件未准备就绪',
+            'missing_files': engines_status.get('missing_files', [])
+        }, 400
+
+    # 检查与占位必须在同一把锁内完成：InputWatcher的自动生成定时器
+    # 可能与HTTP请求同时进入，分两次加锁会让两者都通过检查
+    with task_lock:
+        if current_task and current_task.status in ("pending", "running"):
+            return None, {
+                'success': False,
+                'error': '已有报告生成任务在运行中',
+                'current_task': current_task.to_dict()
+            }, 400
+
+        # 创建新任务，替换已结束的旧任务
+        task_id = f"report_{int(time.time())}"
+        task = ReportTask(query, task_id, custom_template)
+        current_task = task
+        tasks_registry[task_id] = task
+        _prune_task_history_locked()
+
+    # 清空日志文件
+    clear_report_log()
+
+    # 通过主动推送pending事件告知前端任务已经排队
+    task.publish_event(
+        'status',
+        {
+            'status': task.status,
+            'progress': task.progress,
+            'message': '任务已排队，等待资源空闲',
+            'task': task.to_dict(),
+        }
+    )
+
+    # 在后台线程中运行报告生成
+    thread = threading.Thread(
+        target=run_report_generation,
+        args=(task, query, custom_template),
+        daemon=True
+    )
+    thread.start()
+    return task, None, 200
+
+
 @report_bp.route('/progress/<task_id>', methods=['GET'])
 def get_progress(task_id: str):
     """
@@ -747,6 +972,55 @@ def get_progress(task_id: str):
         }), 500
 
 
+def _sse_response(generator) -> Response:
+    """包装SSE响应并关闭代理缓冲。"""
+    response = Response(
+        stream_with_context(generator),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _parse_last_event_id(header_value: Optional[str]) -> Optional[int]:
+    """解析 Last-Event-ID 请求头，非法值视为未提供。"""
+    try:
+        return int(header_value) if header_value else None
+    except ValueError:
+        return None
+
+
+def _heartbeat_event(task_id: str, status: str) -> Dict[str, Any]:
+    """构造心跳事件（字符串ID，不进入历史与磁盘日志）。"""
+    return {
+        'id': f"hb-{int(time.time() * 1000)}",
+        'type': 'heartbeat',
+        'task_id': task_id,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'payload': {'status': status}
+    }
+
+
+def _replay_event_log_response(task_id: str, last_event_id: Optional[int], max_bytes: int) -> Response:
+    """
+    仅从磁盘事件日志回放（任务已不在内存中），回放完毕即结束连接。
+
+    参数:
+        task_id: 任务ID。
+        last_event_id: 客户端记录的最后一个事件ID。
+        max_bytes: chapter_chunk 合并帧的字节上限。
+    """
+    event_log = TaskEventLog(settings.EVENT_LOG_DIR, task_id)
+    logger.info(f"任务 {task_id} 不在内存中，从磁盘事件日志回放（Last-Event-ID={last_event_id}）")
+
+    def replay_generator():
+        for event in iter_coalesced_chunk_events(event_log.iter_since(last_event_id), max_bytes):
+            yield _format_sse(event)
+
+    return _sse_response(replay_generator())
+
+
 @report_bp.route('/stream/<task_id>', methods=['GET'])
 def stream_task(task_id: str):
     """
@@ -754,7 +1028,10 @@ def stream_task(task_id: str):
 
     - 自动补发Last-Event-ID之后的历史事件；
     - 周期性发送心跳以防代理中断；
-    - 任务结束后自动注销监听。
+    - 任务结束后自动注销监听；
+    - 支持 `chunk_window_ms`/`chunk_max_bytes` 查询参数，按客户端需要进一步合并
+      chapter_chunk（积压越多帧越大，状态类事件不受影响）；
+    - 任务已不在内存（如进程重启）但存在磁盘事件日志时，回放日志后结束。
 
     参数:
         task_id: 任务唯一标识。
@@ -762,16 +1039,16 @@ def stream_task(task_id: str):
     返回:
         Response: `text/event-stream` 类型响应。
     """
+    last_event_id = _parse_last_event_id(request.headers.get('Last-Event-ID'))
+
+    batching = parse_client_batching(request.args, settings.STREAM_CHUNK_FLUSH_BYTES)
+
     task = _get_task(task_id)
     if not task:
+        if settings.EVENT_LOG_ENABLED and has_event_log(settings.EVENT_LOG_DIR, task_id):
+            return _replay_event_log_response(task_id, last_event_id, batching['max_bytes'])
         return jsonify({'success': False, 'error': '任务不存在'}), 404
 
-    last_event_header = request.headers.get('Last-Event-ID')
-    try:
-        last_event_id = int(last_event_header) if last_event_header else None
-    except ValueError:
-        last_event_id = None
-
     def client_disconnected() -> bool:
         """
         尽早探测客户端是否已经断开，避免继续写入触发BrokenPipe。
@@ -797,34 +1074,54 @@ def stream_task(task_id: str):
         last_data_ts = time.time()
         try:
             # 断线重连场景下，先补发历史事件，保证界面状态一致
-            history = task.history_since(last_event_id)
+            history = iter_coalesced_chunk_events(
+                task.iter_history_since(last_event_id), batching['max_bytes']
+            )
             for event in history:
                 yield _format_sse(event)
+                queue.mark_delivered(event.get('id'))
                 if event.get('type') != 'heartbeat':
                     last_data_ts = time.time()
 
             finished = task.status in STREAM_TERMINAL_STATUSES
+            carried_event = None
             while True:
-                if finished:
+                # 终态后仍需发完已取出/已缓冲的事件，以及待补发的积压缺口
+                if finished and carried_event is None and not queue.needs_resync and not queue.qsize():
                     break
                 if client_disconnected():
                     logger.info(f"SSE客户端已断开，停止推送: {task_id}")
                     break
+                # 积压导致丢弃过事件：清空缓冲，从持久化历史补发缺口
+                if queue.needs_resync:
+                    resync_from = queue.begin_resync()
+                    carried_event = None
+                    logger.info(
+                        f"SSE订阅者积压，从事件 {resync_from} 之后重新同步（task {task_id}）: {queue.stats()}"
+                    )
+                    for event in iter_coalesced_chunk_events(
+                        task.iter_history_since(resync_from), batching['max_bytes']
+                    ):
+                        yield _format_sse(event)
+                        queue.mark_delivered(event.get('id'))
+                        last_data_ts = time.time()
+                        if event.get('type') in ("completed", "error", "cancelled"):
+                            finished = True
+                    continue
                 event = None
                 try:
-                    event = queue.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                    if carried_event is not None:
+                        event, carried_event = carried_event, None
+                    else:
+                        event = queue.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                    event, carried_event = collect_chunk_batch(
+                        event, queue, batching['window_ms'], batching['max_bytes']
+                    )
                 except Empty:
                     if task.status in STREAM_TERMINAL_STATUSES:
                         logger.info(f"任务 {task_id} 已结束且无新事件，SSE自动收口")
                         break
-                    heartbeat = {
-                        'id': f"hb-{int(time.time() * 1000)}",
-                        'type': 'heartbeat',
-                        'task_id': task_id,
-                        'timestamp': datetime.utcnow().isoformat() + 'Z',
-                        'payload': {'status': task.status}
-                    }
-                    event = heartbeat
+                    event = _heartbeat_event(task_id, task.status)
                 if event is None:
                     logger.warning(f"SSE推送获取事件失败（task {task_id}），提前结束")
                     break
@@ -858,13 +1155,77 @@ def stream_task(task_id: str):
         finally:
             _unregister_stream(task_id, queue)
 
-    response = Response(
-        stream_with_context(event_generator()),
-        mimetype='text/event-stream'
-    )
-    response.headers['Cache-Control'] = 'no-cache'
-    response.headers['X-Accel-Buffering'] = 'no'
-    return response
+    return _sse_response(event_generator())
+
+
+def _current_inputs_event(last_event_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    新连接的首帧：返回最近一次 `inputs` 快照（尚无快照时现场生成）。
+
+    客户端 Last-Event-ID 已是最新时返回None，避免重连后重复推送。
+    """
+    with inputs_lock:
+        event = inputs_last_event
+    if event is None:
+        event = _inputs_snapshot()
+    if last_event_id is not None and last_event_id >= event['id']:
+        return None
+    return event
+
+
+@report_bp.route('/inputs/stream', methods=['GET'])
+def stream_inputs():
+    """
+    三引擎输入就绪状态的SSE推送，替代前端对 /status 的轮询。
+
+    连接后先发送一帧当前快照，之后每当任一引擎目录出现新报告
+    （由 InputWatcher 检测）推送一条 `inputs` 事件；空闲时发送心跳。
+
+    返回:
+        Response: `text/event-stream` 类型响应。
+    """
+    last_event_id = _parse_last_event_id(request.headers.get('Last-Event-ID'))
+
+    def event_generator():
+        queue = _register_stream(INPUTS_STREAM_KEY)
+        try:
+            event = _current_inputs_event(last_event_id)
+            if event is not None:
+                queue.mark_delivered(event['id'])
+                yield _format_sse(event)
+            while True:
+                try:
+                    event = queue.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                except Empty:
+                    event = _heartbeat_event(INPUTS_STREAM_KEY, input_watcher.mode if input_watcher else 'disabled')
+                try:
+                    yield _format_sse(event)
+                except (GeneratorExit, ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+                    logger.info("输入状态SSE客户端已断开")
+                    break
+        finally:
+            _unregister_stream(INPUTS_STREAM_KEY, queue)
+
+    return _sse_response(event_generator())
+
+
+@report_bp.route('/stream/<task_id>/metrics', methods=['GET'])
+def stream_metrics(task_id: str):
+    """
+    返回任务各SSE订阅者的积压/滞后指标，便于排查慢客户端。
+
+    参数:
+        task_id: 任务唯一标识。
+    """
+    with stream_lock:
+        listeners = list(stream_subscribers.get(task_id, []))
+    task = _get_task(task_id)
+    return jsonify({
+        'success': True,
+        'task_id': task_id,
+        'last_event_id': task.last_event_id if task else None,
+        'subscribers': [queue.stats() for queue in listeners],
+    })
 
 
 @report_bp.route('/result/<task_id>', methods=['GET'])
@@ -1247,16 +1608,11 @@ def export_markdown(task_id: str):
                 'error': 'IR文件不存在，无法生成Markdown'
             }), 404
 
-        with open(task.ir_file_path, 'r', encoding='utf-8') as f:
-            document_ir = json.load(f)
-
-        from .renderers import MarkdownRenderer
-        renderer = MarkdownRenderer()
-        # 传入 ir_file_path，修复后的图表会自动保存到 IR 文件
-        markdown_text = renderer.render(document_ir, ir_file_path=task.ir_file_path)
+        # 逐章读取IR并流式写出Markdown，避免整本IR与整篇Markdown同时驻留内存
+        header = read_document_header(task.ir_file_path)
 
-        metadata = document_ir.get('metadata') if isinstance(document_ir, dict) else {}
-        topic = (metadata or {}).get('topic') or (metadata or {}).get('title') or (metadata or {}).get('query') or task.query
+        metadata = header.get('metadata') or {}
+        topic = metadata.get('topic') or metadata.get('title') or metadata.get('query') or task.query
         safe_topic = _safe_filename_segment(topic or 'report')
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"report_{safe_topic}_{timestamp}.md"
@@ -1264,7 +1620,18 @@ def export_markdown(task_id: str):
         output_dir = Path(settings.OUTPUT_DIR)
         output_dir.mkdir(parents=True, exist_ok=True)
         md_path = output_dir / filename
-        md_path.write_text(markdown_text, encoding='utf-8')
+
+        from .renderers import MarkdownRenderer
+        renderer = MarkdownRenderer()
+        # 传入 ir_file_path，修复后的图表会自动保存到 IR 文件
+        chunks = renderer.iter_render(
+            header,
+            iter_chapters(task.ir_file_path),
+            ir_file_path=task.ir_file_path,
+        )
+        with md_path.open('w', encoding='utf-8') as md_file:
+            for chunk in chunks:
+                md_file.write(chunk)
 
         task.markdown_file_path = str(md_path.resolve())
         task.markdown_file_relative_path = os.path.relpath(task.markdown_file_path, os.getcwd())
@@ -1338,9 +1705,8 @@ def export_pdf(task_id: str):
                 'error': 'IR文件不存在'
             }), 404
 
-        # 读取IR数据
-        with open(task.ir_file_path, 'r', encoding='utf-8') as f:
-            document_ir = json.load(f)
+        # 读取IR数据（PDF需要整本文档做目录与布局优化）
+        document_ir = load_document_ir(task.ir_file_path)
 
         # 检查是否启用布局优化
         optimize = request.args.get('optimize', 'true').lower() == 'true'
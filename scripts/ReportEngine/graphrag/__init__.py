@@ -4,14 +4,14 @@ GraphRAG 知识图谱模块
 提供基于结构化数据的知识图谱构建、存储与查询功能。
 典型用法：
 1) 使用 `StateParser`/`ForumParser` 解析三引擎 state JSON 与 forum.log；
-2) 调用 `GraphBuilder.build` 生成纯结构化的图对象；
+2) 调用 `GraphBuilder.build` 生成纯结构化的图对象（可传入上一版图谱增量复用）；
 3) 通过 `GraphStorage.save/load` 持久化或读取图数据；
 4) 以 `QueryEngine` 在章节侧执行多轮图查询。
 """
 
 from .state_parser import StateParser, ParsedState, ParsedSection, SearchRecord
 from .forum_parser import ForumParser, ForumEntry
-from .graph_builder import GraphBuilder
+from .graph_builder import GraphBuilder, GraphDelta
 from .graph_storage import GraphStorage, Graph, Node, Edge
 from .query_engine import QueryEngine, QueryParams, QueryResult
 
@@ -25,6 +25,7 @@ __all__ = [
     'ForumEntry',
     # 图谱核心
     'GraphBuilder',
+    'GraphDelta',
     'GraphStorage',
     'Graph',
     'Node',
@@ -7,7 +7,8 @@ Forum 日志解析器
 """
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
+import io
 import re
 
 
@@ -62,31 +63,63 @@ class ForumParser:
         Returns:
             ForumEntry 列表
         """
-        if not forum_logs:
-            return []
+        return list(self.iter_parse(forum_logs))
+    
+    def iter_parse(self, forum_logs: str) -> Iterator[ForumEntry]:
+        """
+        以生成器方式逐行解析 forum.log 内容
         
-        entries = []
+        通过 StringIO 按行迭代，不会像 split 那样一次性复制出整份行列表，
+        调用方可以边消费边停止（例如只需要前几条 Host 发言时）。
         
-        for line in forum_logs.strip().split('\n'):
-            if not line.strip():
-                continue
+        Args:
+            forum_logs: forum.log 文件内容
             
-            match = self.PATTERN.match(line)
-            if match:
-                timestamp, speaker, content = match.groups()
-                speaker_upper = speaker.upper()
-                
-                if speaker_upper in self.VALID_SPEAKERS:
-                    # 处理转义的换行符
-                    content = content.replace('\\n', '\n')
-                    
-                    entries.append(ForumEntry(
-                        timestamp=timestamp,
-                        speaker=speaker_upper,
-                        content=content
-                    ))
-        
-        return entries
+        Yields:
+            ForumEntry 对象
+        """
+        if not forum_logs:
+            return
+        yield from self.iter_lines(io.StringIO(forum_logs))
+    
+    def iter_lines(self, lines: Iterable[str]) -> Iterator[ForumEntry]:
+        """
+        解析任意行迭代器（StringIO、文件对象、列表均可）
+        
+        Args:
+            lines: 日志行迭代器
+            
+        Yields:
+            ForumEntry 对象
+        """
+        for line in lines:
+            entry = self._parse_line(line)
+            if entry is not None:
+                yield entry
+    
+    def _parse_line(self, line: str) -> Optional[ForumEntry]:
+        """解析单行日志，非规范行返回 None"""
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            return None
+        
+        match = self.PATTERN.match(line)
+        if not match:
+            return None
+        
+        timestamp, speaker, content = match.groups()
+        speaker_upper = speaker.upper()
+        if speaker_upper not in self.VALID_SPEAKERS:
+            return None
+        
+        # 处理转义的换行符
+        content = content.replace('\\n', '\n')
+        
+        return ForumEntry(
+            timestamp=timestamp,
+            speaker=speaker_upper,
+            content=content
+        )
     
     def get_host_insights(self, entries: List[ForumEntry]) -> List[str]:
         """
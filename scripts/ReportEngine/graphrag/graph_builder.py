@@ -4,12 +4,29 @@
 基于结构化的 State JSON 和 Forum 日志构建知识图谱，无需 LLM 提取实体。
 """
 
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, List, Optional
 import hashlib
+import json
 
 from .state_parser import ParsedState, ParsedSection
 from .forum_parser import ForumEntry
-from .graph_storage import Graph, Node
+from .graph_storage import Graph, Node, Edge
+
+
+@dataclass
+class GraphDelta:
+    """增量构建统计：相对上一版图谱复用/新增/过期的规模"""
+    reused_sections: int = 0
+    rebuilt_sections: int = 0
+    added_nodes: int = 0
+    expired_nodes: int = 0
+    
+    def to_dict(self) -> Dict[str, int]:
+        """转换为字典"""
+        return asdict(self)
 
 
 class GraphBuilder:
@@ -35,42 +52,112 @@ class GraphBuilder:
     - contains: 引擎包含段落 (Engine → Section)
     - searched: 段落执行搜索 (Section → SearchQuery)
     - found: 搜索发现来源 (SearchQuery → Source)
+    
+    增量模式：传入上一版图谱 previous 时，每个段落按内容哈希（content_hash）
+    比对，未变化的段落直接复用旧图中的段落/搜索词/来源节点与边，变化或
+    新增的段落重新构建；旧图中不再出现的节点自然过期，不会带入新图。
     """
     
+    # 论坛 Host 发言最多转为多少个 Section 节点
+    MAX_HOST_SECTIONS = 5
+    
+    def __init__(self):
+        # 最近一次 build 的增量统计（未传 previous 时全部计为重建）
+        self.last_delta = GraphDelta()
+    
     def build(self, topic: str, states: Dict[str, ParsedState],
-              forum_entries: Optional[List[ForumEntry]] = None) -> Graph:
+              forum_entries: Optional[Iterable[ForumEntry]] = None,
+              max_workers: int = 1,
+              previous: Optional[Graph] = None) -> Graph:
         """
         构建知识图谱
         
         Args:
             topic: 用户查询主题
             states: 引擎状态字典 {engine_name: ParsedState}
-            forum_entries: Forum 日志条目列表
+            forum_entries: Forum 日志条目（列表或 ForumParser 的生成器均可）
+            max_workers: 并行构建引擎子图的线程数，<=1 时串行构建
+            previous: 上一次运行的图谱，提供时按内容哈希复用未变化的段落
             
         Returns:
             构建的 Graph 对象
+        
+        各引擎子图互不依赖，可以并行构建；合并时严格按 states 的顺序进行，
+        因此无论是否并行，节点/边顺序与来源节点去重结果都保持一致。
         """
+        previous_out = self._index_outgoing(previous) if previous else None
         graph = Graph()
         
         # 1. 创建主题节点
-        topic_node = graph.add_node(
-            node_type="topic",
-            name=topic,
-            node_id=f"T_{self._hash(topic)}"
-        )
+        topic_node = self._add_topic_node(graph, topic)
         
-        # 2. 处理每个引擎的状态
-        for engine_name, state in states.items():
-            self._add_engine_nodes(graph, topic_node, engine_name, state)
+        # 2. 处理每个引擎的状态（各自构建子图后按顺序合并）
+        items = list(states.items())
+        if max_workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(items)),
+                thread_name_prefix="graph-builder",
+            ) as executor:
+                subgraphs = list(executor.map(
+                    lambda item: self.build_engine_subgraph(
+                        topic, item[0], item[1], previous, previous_out
+                    ),
+                    items,
+                ))
+        else:
+            subgraphs = [
+                self.build_engine_subgraph(topic, engine_name, state, previous, previous_out)
+                for engine_name, state in items
+            ]
+        for subgraph in subgraphs:
+            graph.merge(subgraph)
         
-        # 3. 处理 Forum 日志（添加 Host 节点）
-        if forum_entries:
-            self._add_forum_nodes(graph, topic_node, forum_entries)
+        # 3. 处理 Forum 日志（添加 Host 节点）；生成器需先探测是否为空
+        if forum_entries is not None:
+            entries_iter = iter(forum_entries)
+            first_entry = next(entries_iter, None)
+            if first_entry is not None:
+                self._add_forum_nodes(graph, topic_node, chain([first_entry], entries_iter))
         
+        self.last_delta = self._compute_delta(graph, previous)
         return graph
     
+    def build_engine_subgraph(self, topic: str, engine_name: str,
+                              state: ParsedState,
+                              previous: Optional[Graph] = None,
+                              previous_out: Optional[Dict[str, List[Edge]]] = None) -> Graph:
+        """
+        构建单个引擎的子图（包含主题节点以便合并时连边）
+        
+        Args:
+            topic: 用户查询主题
+            engine_name: 引擎名称
+            state: 引擎解析结果
+            previous: 上一版图谱（可选），用于复用未变化的段落
+            previous_out: 上一版图谱的出边索引，缺省时自动生成
+            
+        Returns:
+            仅包含该引擎相关节点/边的 Graph
+        """
+        if previous is not None and previous_out is None:
+            previous_out = self._index_outgoing(previous)
+        subgraph = Graph()
+        topic_node = self._add_topic_node(subgraph, topic)
+        self._add_engine_nodes(subgraph, topic_node, engine_name, state, previous, previous_out)
+        return subgraph
+    
+    def _add_topic_node(self, graph: Graph, topic: str) -> Node:
+        """创建主题节点"""
+        return graph.add_node(
+            node_type="topic",
+            name=topic,
+            node_id=f"T_{self._hash(topic)}"
+        )
+    
     def _add_engine_nodes(self, graph: Graph, topic_node: Node,
-                          engine_name: str, state: ParsedState) -> None:
+                          engine_name: str, state: ParsedState,
+                          previous: Optional[Graph] = None,
+                          previous_out: Optional[Dict[str, List[Edge]]] = None) -> None:
         """添加引擎相关节点"""
         # 创建引擎节点
         engine_node = graph.add_node(
@@ -84,12 +171,19 @@ class GraphBuilder:
         # Topic → Engine 关系
         graph.add_edge(topic_node, engine_node, "analyzed_by")
         
-        # 处理段落
+        # 处理段落：内容哈希未变化时直接复用上一版图谱中的子树
         for section in state.sections:
-            self._add_section_nodes(graph, engine_node, engine_name, section)
+            content_hash = self._section_hash(section)
+            if previous is not None and self._reuse_section(
+                graph, engine_node, f"{engine_name}_S{section.order}",
+                content_hash, previous, previous_out or {}
+            ):
+                continue
+            self._add_section_nodes(graph, engine_node, engine_name, section, content_hash)
     
     def _add_section_nodes(self, graph: Graph, engine_node: Node,
-                           engine_name: str, section: ParsedSection) -> None:
+                           engine_name: str, section: ParsedSection,
+                           content_hash: Optional[str] = None) -> None:
         """添加段落相关节点"""
         # 创建段落节点
         section_id = f"{engine_name}_S{section.order}"
@@ -100,7 +194,8 @@ class GraphBuilder:
             title=section.title,
             order=section.order,
             summary=section.summary,
-            engine=engine_name
+            engine=engine_name,
+            content_hash=content_hash or self._section_hash(section)
         )
         
         # Engine → Section 关系
@@ -161,7 +256,7 @@ class GraphBuilder:
         graph.add_edge(query_node, source_node, "found")
     
     def _add_forum_nodes(self, graph: Graph, topic_node: Node,
-                         entries: List[ForumEntry]) -> None:
+                         entries: Iterable[ForumEntry]) -> None:
         """添加 Forum 日志相关节点"""
         # 创建 Host 引擎节点（如果不存在）
         host_node = graph.get_node('host')
@@ -174,10 +269,10 @@ class GraphBuilder:
             )
             graph.add_edge(topic_node, host_node, "analyzed_by")
         
-        # 提取 Host 的关键发言作为 Section
-        host_entries = [e for e in entries if e.is_host and not e.is_system]
+        # 提取 Host 的关键发言作为 Section（惰性过滤，取够即停止读取后续日志）
+        host_entries = (e for e in entries if e.is_host and not e.is_system)
         
-        for idx, entry in enumerate(host_entries[:5]):  # 最多取 5 条
+        for idx, entry in enumerate(islice(host_entries, self.MAX_HOST_SECTIONS)):
             section_id = f"host_S{idx}"
             section_node = graph.add_node(
                 node_type="section",
@@ -192,6 +287,94 @@ class GraphBuilder:
             
             graph.add_edge(host_node, section_node, "contains")
     
+    def _reuse_section(self, graph: Graph, engine_node: Node, section_id: str,
+                       content_hash: str, previous: Graph,
+                       previous_out: Dict[str, List[Edge]]) -> bool:
+        """
+        从上一版图谱复制未变化的段落子树（段落 → 搜索词 → 来源）
+        
+        Returns:
+            是否复用成功；哈希不一致或旧图缺失该段落时返回 False
+        """
+        prev_section = previous.get_node(section_id)
+        if prev_section is None or prev_section.get('content_hash') != content_hash:
+            return False
+        
+        section_node = self._copy_node(graph, prev_section)
+        graph.add_edge(engine_node, section_node, "contains")
+        
+        for searched in previous_out.get(section_id, []):
+            prev_query = previous.get_node(searched.to_id)
+            if searched.relation != "searched" or prev_query is None:
+                continue
+            query_node = self._copy_node(graph, prev_query)
+            graph.add_edge(section_node, query_node, "searched",
+                           searched.weight, **searched.attributes)
+            
+            for found in previous_out.get(prev_query.id, []):
+                prev_source = previous.get_node(found.to_id)
+                if found.relation != "found" or prev_source is None:
+                    continue
+                # 来源节点跨段落共享，已存在时沿用（与全量构建的去重规则一致）
+                source_node = graph.get_node(prev_source.id) or self._copy_node(graph, prev_source)
+                graph.add_edge(query_node, source_node, "found",
+                               found.weight, **found.attributes)
+        return True
+    
+    @staticmethod
+    def _copy_node(graph: Graph, node: Node) -> Node:
+        """将旧图节点按原 ID/属性复制到新图"""
+        return graph.add_node(
+            node_type=node.type,
+            name=node.name,
+            node_id=node.id,
+            **dict(node.attributes)
+        )
+    
+    @staticmethod
+    def _index_outgoing(graph: Graph) -> Dict[str, List[Edge]]:
+        """一次性建立出边索引，避免逐段落线性扫描全部边"""
+        outgoing: Dict[str, List[Edge]] = {}
+        for edge in graph.edges:
+            outgoing.setdefault(edge.from_id, []).append(edge)
+        return outgoing
+    
+    @staticmethod
+    def _compute_delta(graph: Graph, previous: Optional[Graph]) -> GraphDelta:
+        """对比新旧图谱，统计段落复用与节点增减"""
+        sections = graph.get_nodes_by_type('section')
+        if previous is None:
+            return GraphDelta(
+                rebuilt_sections=len(sections),
+                added_nodes=graph.node_count,
+            )
+        
+        reused = 0
+        for node in sections:
+            prev = previous.get_node(node.id)
+            content_hash = node.get('content_hash')
+            if prev is not None and content_hash and prev.get('content_hash') == content_hash:
+                reused += 1
+        
+        new_ids = set(graph.nodes)
+        old_ids = set(previous.nodes)
+        return GraphDelta(
+            reused_sections=reused,
+            rebuilt_sections=len(sections) - reused,
+            added_nodes=len(new_ids - old_ids),
+            expired_nodes=len(old_ids - new_ids),
+        )
+    
+    @classmethod
+    def _section_hash(cls, section: ParsedSection) -> str:
+        """段落内容哈希：覆盖标题、摘要与全部搜索记录"""
+        payload: List[Any] = [section.title, section.order, section.summary]
+        payload.extend(
+            [s.query, s.url, s.title, s.content, s.score]
+            for s in section.search_history
+        )
+        return cls._hash(json.dumps(payload, ensure_ascii=False, sort_keys=True))
+    
     @staticmethod
     def _hash(text: str) -> str:
         """生成短哈希"""
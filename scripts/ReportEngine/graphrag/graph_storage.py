@@ -8,10 +8,11 @@ from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional, Set
 import re
 from datetime import datetime
-import json
 from pathlib import Path
 import hashlib
 
+from ..utils.serialization import dumps, loads
+
 
 @dataclass
 class Node:
@@ -216,6 +217,33 @@ class Graph:
         
         return edge
     
+    def merge(self, other: 'Graph') -> 'Graph':
+        """
+        将另一张图合并到当前图（原地修改）
+        
+        节点按 ID 去重，已存在的节点保留当前图中的版本（与 add_node 语义一致）；
+        边按原顺序追加并同步邻接表。用于 GraphBuilder 合并并行构建的引擎子图。
+        
+        Args:
+            other: 待合并的图
+            
+        Returns:
+            当前图（便于链式调用）
+        """
+        for node_id, node in other._nodes.items():
+            if node_id not in self._nodes:
+                self._nodes[node_id] = node
+                self._adjacency[node_id] = set()
+        
+        for edge in other._edges:
+            self._edges.append(edge)
+            if edge.from_id in self._adjacency:
+                self._adjacency[edge.from_id].add(edge.to_id)
+            if edge.to_id in self._adjacency:
+                self._adjacency[edge.to_id].add(edge.from_id)
+        
+        return self
+    
     def get_neighbors(self, node_id: str) -> List[Node]:
         """获取邻居节点"""
         neighbor_ids = self._adjacency.get(node_id, set())
@@ -301,9 +329,13 @@ class GraphStorage:
     将 Graph 对象序列化为 JSON（graphrag.json），路径与 ChapterStorage 输出目录一致，
     便于 Web/Report 引擎共享。支持按报告ID查找、列举最新图谱，供 Flask API 或
     GraphRAGQueryNode 直接读取。
+
+    每个图谱旁另存一份很小的摘要文件（graphrag.meta.json：task_id/topic/created_at/stats），
+    按主题查找、列举图谱时只读摘要，不必完整解析图谱文件。
     """
     
     FILENAME = "graphrag.json"
+    META_FILENAME = "graphrag.meta.json"
 
     @staticmethod
     def _normalize_identifier(value: str) -> str:
@@ -314,7 +346,7 @@ class GraphStorage:
         """检查图文件中的 task_id/report_id 是否与目标匹配。"""
         try:
             with open(graph_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = loads(f.read())
             candidates = [
                 data.get('task_id'),
                 data.get('report_id'),
@@ -337,7 +369,8 @@ class GraphStorage:
             # 回退到默认值
             return Path("final_reports/chapters")
     
-    def save(self, graph: Graph, task_id: str, run_dir: Path) -> Path:
+    def save(self, graph: Graph, task_id: str, run_dir: Path,
+             metadata: Optional[Dict[str, Any]] = None) -> Path:
         """
         保存图谱到 JSON 文件
         
@@ -345,6 +378,7 @@ class GraphStorage:
             graph: 图谱对象
             task_id: 任务ID
             run_dir: 运行目录
+            metadata: 附加元数据（如增量构建统计），可选
             
         Returns:
             保存的文件路径
@@ -355,14 +389,75 @@ class GraphStorage:
         output = {
             'task_id': task_id,
             'created_at': datetime.now().isoformat(),
+            'topic': next((n.name for n in graph.get_nodes_by_type('topic')), ''),
             **graph.to_dict()
         }
+        if metadata:
+            output['metadata'] = metadata
         
         file_path = run_dir / self.FILENAME
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+            f.write(dumps(output, indent=True))
+        self._write_summary(run_dir, self._summary_from(output))
         
         return file_path
+
+    @staticmethod
+    def _summary_from(data: Dict[str, Any]) -> Dict[str, Any]:
+        """从完整图谱数据中提取摘要；旧版文件没有顶层 topic 时取 topic 节点名称"""
+        topic = data.get('topic')
+        if topic is None:
+            topic = next(
+                (n.get('name') for n in data.get('nodes', []) if n.get('type') == 'topic'),
+                ''
+            )
+        return {
+            'task_id': data.get('task_id'),
+            'topic': topic,
+            'created_at': data.get('created_at'),
+            'stats': data.get('stats', {}),
+        }
+
+    def _write_summary(self, run_dir: Path, summary: Dict[str, Any]) -> None:
+        """将摘要写入 run_dir 下的 graphrag.meta.json；写入失败时静默跳过，下次读取会再补写"""
+        try:
+            with open(run_dir / self.META_FILENAME, 'w', encoding='utf-8') as f:
+                f.write(dumps(summary))
+        except OSError:
+            pass
+
+    def read_summary(self, graph_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取图谱摘要（task_id/topic/created_at/stats）
+        
+        Args:
+            graph_path: 图谱文件路径
+            
+        Returns:
+            摘要字典；图谱文件不可读时返回 None
+        
+        摘要文件缺失、损坏或早于图谱文件时，完整读取一次图谱并补写摘要。
+        """
+        graph_path = Path(graph_path)
+        meta_path = graph_path.parent / self.META_FILENAME
+        try:
+            if meta_path.stat().st_mtime >= graph_path.stat().st_mtime:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    summary = loads(f.read())
+                if isinstance(summary, dict):
+                    return summary
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(graph_path, 'r', encoding='utf-8') as f:
+                data = loads(f.read())
+        except Exception:
+            return None
+        if not isinstance(data, dict):
+            return None
+        summary = self._summary_from(data)
+        self._write_summary(graph_path.parent, summary)
+        return summary
     
     def load(self, path: Path) -> Optional[Graph]:
         """
@@ -387,7 +482,7 @@ class GraphStorage:
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = loads(f.read())
             return Graph.from_dict(data)
         except Exception:
             return None
@@ -482,6 +577,44 @@ class GraphStorage:
         
         return latest_path
     
+    def find_previous_graph(self, topic: str, exclude_dir: Optional[Path] = None,
+                            max_candidates: int = 20) -> Optional[Path]:
+        """
+        查找同一主题最近一次生成的图谱，用于增量构建
+        
+        Args:
+            topic: 用户查询主题
+            exclude_dir: 需要排除的运行目录（通常为当前任务目录）
+            max_candidates: 最多检查的图谱文件数（按修改时间倒序）
+            
+        Returns:
+            图谱文件路径，未找到返回 None
+        
+        只读取各图谱的摘要文件比对主题（见 :meth:`read_summary`）。
+        """
+        chapters_dir = self.chapters_dir
+        if not topic or not chapters_dir.exists():
+            return None
+        
+        excluded = Path(exclude_dir).resolve() if exclude_dir else None
+        candidates = []
+        for run_dir in chapters_dir.iterdir():
+            if not run_dir.is_dir():
+                continue
+            if excluded is not None and run_dir.resolve() == excluded:
+                continue
+            graph_path = run_dir / self.FILENAME
+            if graph_path.exists():
+                candidates.append((graph_path.stat().st_mtime, graph_path))
+        
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        for _, graph_path in candidates[:max_candidates]:
+            summary = self.read_summary(graph_path)
+            if summary and summary.get('topic') == topic:
+                return graph_path
+        
+        return None
+    
     def list_all_graphs(self) -> List[Dict[str, Any]]:
         """
         列出所有可用的图谱
@@ -500,19 +633,16 @@ class GraphStorage:
             
             graph_path = run_dir / self.FILENAME
             if graph_path.exists():
-                try:
-                    with open(graph_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    graphs.append({
-                        'path': str(graph_path),
-                        'report_id': data.get('task_id', run_dir.name),
-                        'created_at': data.get('created_at'),
-                        'stats': data.get('stats', {}),
-                        'dir_name': run_dir.name
-                    })
-                except Exception:
+                summary = self.read_summary(graph_path)
+                if summary is None:
                     continue
+                graphs.append({
+                    'path': str(graph_path),
+                    'report_id': summary.get('task_id') or run_dir.name,
+                    'created_at': summary.get('created_at'),
+                    'stats': summary.get('stats', {}),
+                    'dir_name': run_dir.name
+                })
         
         # 按创建时间排序
         graphs.sort(key=lambda x: x.get('created_at', ''), reverse=True)
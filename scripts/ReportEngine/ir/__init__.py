@@ -13,7 +13,24 @@ from .schema import (
     ALLOWED_INLINE_MARKS,
     ENGINE_AGENT_TITLES,
 )
+from .compiler import SchemaCompiler, get_block_validator
 from .validator import IRValidator
+from .document_io import (
+    DocumentIRWriter,
+    iter_chapters,
+    load_document_ir,
+    read_document_header,
+    write_document_ir,
+)
+from .traversal import (
+    BlockRef,
+    BlockIndex,
+    IRVisitor,
+    iter_blocks,
+    iter_document_blocks,
+    walk_document,
+    build_block_index,
+)
 
 __all__ = [
     "IR_VERSION",
@@ -23,4 +40,18 @@ __all__ = [
     "ALLOWED_INLINE_MARKS",
     "ENGINE_AGENT_TITLES",
     "IRValidator",
+    "SchemaCompiler",
+    "get_block_validator",
+    "BlockRef",
+    "BlockIndex",
+    "IRVisitor",
+    "iter_blocks",
+    "iter_document_blocks",
+    "walk_document",
+    "build_block_index",
+    "DocumentIRWriter",
+    "iter_chapters",
+    "load_document_ir",
+    "read_document_header",
+    "write_document_ir",
 ]
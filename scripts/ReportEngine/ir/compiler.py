@@ -0,0 +1,491 @@
+"""
+把 ir/schema.py 编译为专用的校验函数。
+
+章节每次生成/修复后、导出前都要做结构校验，校验器必须几乎零开销，
+并且与提示词中的 Schema 保持同一份契约。这里在首次使用时把 Schema 生成为
+Python 源码并 ``exec`` 一次，之后直接调用生成的函数：
+
+- 每种 block 生成一个函数，按 ``type`` 查表分发，不再 ``getattr`` 拼方法名；
+- 非递归的 ``$ref``（inlineRun/inlineMark/swotItem…）直接内联进调用方，
+  只有递归的 block 才产生函数调用；
+- 路径只在出错分支中构造：正常路径不创建任何路径字符串或元组之外的对象，
+  报错时由 ``format_path`` 还原为 ``blocks[2].rows[0].cells[1]`` 这样的写法。
+
+编译规则（与历史手写校验器的宽严一致）：
+
+- required / minItems / anyOf(required) / oneOf / $ref / if-then(const) 全部强制；
+  anyOf 分支若给出 ``{"type": "string", "pattern": "\\S"}``，该字段须为非空白字符串；
+- array、带 properties 的 object 始终检查类型并递归；
+- integer、object 类型与 enum 仅对必填字段强制，可选字段的 enum 仅在 Schema 给出
+  description（即向 LLM 明示只允许这些值）时强制；可选的 string/number/boolean
+  不做类型检查，由渲染层统一字符串化；
+- 可选字段取值为 null 视同缺省。
+
+Schema 表达不了的少量业务约束放在 ``BLOCK_RULES`` 中，在对应 block 校验后执行。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .schema import CHAPTER_JSON_SCHEMA
+
+# 校验函数签名：(取值, 路径, 错误列表) -> None
+Check = Callable[[Any, Any, List[str]], None]
+
+_TYPE_LABELS = {
+    "string": "字符串",
+    "object": "对象",
+    "array": "数组",
+    "number": "数值",
+    "integer": "整数",
+    "boolean": "布尔值",
+}
+_PY_TYPES = {
+    "string": "str",
+    "object": "dict",
+    "array": "list",
+    "number": "(int, float)",
+    "integer": "int",
+    "boolean": "bool",
+}
+
+
+def format_path(path: Any) -> str:
+    """把 ``(父路径, 段)`` 链还原为字符串，段为 int 时渲染为 ``[i]``"""
+    parts: List[str] = []
+    while isinstance(path, tuple):
+        path, segment = path
+        parts.append(f"[{segment}]" if isinstance(segment, int) else segment)
+    parts.append(path)
+    return "".join(reversed(parts))
+
+
+def _schema_type(schema: Dict[str, Any]) -> Optional[str]:
+    schema_type = schema.get("type")
+    if isinstance(schema_type, str):
+        return schema_type
+    if "items" in schema:
+        return "array"
+    if "properties" in schema:
+        return "object"
+    return None
+
+
+def _ref_name(schema: Dict[str, Any]) -> str:
+    return schema["$ref"].rsplit("/", 1)[-1]
+
+
+def _is_discriminated(variants: List[Any]) -> bool:
+    """oneOf 的每个变体是否都以 properties.type.const 区分"""
+    return all(
+        isinstance(variant, dict)
+        and isinstance(((variant.get("properties") or {}).get("type") or {}).get("const"), str)
+        for variant in variants
+    )
+
+
+def _is_nonblank_string(schema: Any) -> bool:
+    """``{"type": "string", "minLength"/"pattern": "\\S"}``：要求非空白字符串"""
+    return (
+        isinstance(schema, dict)
+        and schema.get("type") == "string"
+        and bool(schema.get("minLength") or schema.get("pattern") == "\\S")
+    )
+
+
+def _required_any_of(schema: Dict[str, Any]) -> List[Tuple[str, bool]]:
+    """
+    把 anyOf(required) 展开为 (字段, 是否要求非空白字符串) 列表
+
+    每个分支形如 ``{"required": [...]}``，可附带只约束这些字段的 properties；
+    其他形式的 anyOf 不在编译范围内，返回空列表。
+    """
+    any_of = schema.get("anyOf")
+    if not any_of:
+        return []
+    fields: List[Tuple[str, bool]] = []
+    for item in any_of:
+        if not isinstance(item, dict) or not item.get("required") or not set(item) <= {"required", "properties"}:
+            return []
+        properties = item.get("properties") or {}
+        if not set(properties) <= set(item["required"]):
+            return []
+        fields.extend((name, _is_nonblank_string(properties.get(name))) for name in item["required"])
+    return fields
+
+
+def _conditions(schema: Dict[str, Any]):
+    """把 ``if {a: const} then {b: const}`` 规则展开为 (a, 值, b, 期望值)"""
+    for rule in schema.get("allOf") or []:
+        condition = (rule.get("if") or {}).get("properties") or {}
+        consequence = (rule.get("then") or {}).get("properties") or {}
+        if len(condition) != 1:
+            continue
+        (cond_field, cond_schema), = condition.items()
+        if "const" not in cond_schema:
+            continue
+        for field, field_schema in consequence.items():
+            if "const" in field_schema:
+                yield cond_field, cond_schema["const"], field, field_schema["const"]
+
+
+class SchemaCompiler:
+    """
+    JSON Schema（ir/schema.py 使用的子集）到校验函数的编译器。
+
+    ``compile(name)`` 为 ``#/definitions/<name>`` 生成函数；生成的源码保存在
+    ``source`` 中便于排查。递归引用（block 内嵌 block）编译为函数调用，其余内联。
+    """
+
+    def __init__(self, schema: Dict[str, Any], block_rules: Optional[Dict[str, Check]] = None):
+        self.definitions: Dict[str, Any] = schema.get("definitions") or {}
+        self.block_rules = block_rules or {}
+        self.source = ""
+        self._lines: List[str] = []
+        self._namespace: Dict[str, Any] = {"format_path": format_path}
+        self._functions: Dict[str, str] = {}
+        self._pending: List[str] = []
+        self._counter = 0
+
+    # ====== 入口 ======
+
+    def compile(self, name: str) -> Check:
+        """编译指定定义及其依赖的递归定义，返回校验函数"""
+        entry = self._function_for(name)
+        while self._pending:
+            self._emit_definition(self._pending.pop())
+        self.source = "\n".join(self._lines)
+        exec(compile(self.source, f"<ir-validator:{name}>", "exec"), self._namespace)
+        return self._namespace[entry]
+
+    # ====== 生成工具 ======
+
+    def _name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def _const(self, value: Any) -> str:
+        """把常量放入命名空间，返回引用名"""
+        name = self._name("_c")
+        self._namespace[name] = value
+        return name
+
+    def _line(self, indent: int, text: str) -> None:
+        self._lines.append("    " * indent + text)
+
+    def _error(self, indent: int, path: str, message: str, value: Optional[str] = None, tail: str = "") -> None:
+        """生成 errors.append(...)；path 为路径表达式，只在此分支求值"""
+        expr = f"format_path({path}) + {message!r}"
+        if value is not None:
+            expr += f" + str({value})"
+            if tail:
+                expr += f" + {tail!r}"
+        self._line(indent, f"errors.append({expr})")
+
+    def _function_for(self, name: str) -> str:
+        """递归定义对应的函数名（首次请求时登记待生成）"""
+        if name not in self._functions:
+            self._functions[name] = f"validate_{name}"
+            self._pending.append(name)
+        return self._functions[name]
+
+    # ====== 定义 ======
+
+    def _emit_definition(self, name: str) -> None:
+        definition = self.definitions[name]
+        function = self._functions[name]
+        variants = definition.get("oneOf") if isinstance(definition, dict) else None
+        if variants and _is_discriminated(variants):
+            self._emit_dispatch(function, variants)
+            return
+        self._line(0, f"def {function}(value, path, errors):")
+        before = len(self._lines)
+        self._node(definition, "value", "path", 1, {name})
+        if len(self._lines) == before:
+            self._line(1, "return None")
+        self._line(0, "")
+
+    def _emit_dispatch(self, function: str, variants: List[Dict[str, Any]]) -> None:
+        """按 type 常量分发的 oneOf：每个变体一个函数 + 查表分发"""
+        table: Dict[str, str] = {}
+        for variant in variants:
+            block_type = variant["properties"]["type"]["const"]
+            variant_function = f"{function}_{block_type}"
+            table[block_type] = variant_function
+            self._line(0, f"def {variant_function}(value, path, errors):")
+            before = len(self._lines)
+            self._object_fields(variant, "value", "path", 1, set(), skip=("type",))
+            rule = self.block_rules.get(block_type)
+            if rule is not None:
+                self._line(1, f"{self._const(rule)}(value, path, errors)")
+            if len(self._lines) == before:
+                self._line(1, "return None")
+            self._line(0, "")
+        table_name = self._name("_table")
+        self._line(0, f"{table_name} = {{{', '.join(f'{k!r}: {v}' for k, v in table.items())}}}")
+        self._line(0, f"def {function}(value, path, errors):")
+        self._line(1, "if not isinstance(value, dict):")
+        self._error(2, "path", " 必须是对象")
+        self._line(2, "return")
+        self._line(1, 'block_type = value.get("type")')
+        self._line(1, f"handler = {table_name}.get(block_type) if isinstance(block_type, str) else None")
+        self._line(1, "if handler is None:")
+        self._error(2, "path", ".type 不被支持: ", "block_type")
+        self._line(2, "return")
+        self._line(1, "handler(value, path, errors)")
+        self._line(0, "")
+
+    # ====== 节点 ======
+
+    def _node(self, schema: Any, var: str, path: str, indent: int, stack: Set[str]) -> None:
+        """为结构性节点生成检查代码（array / object / oneOf / $ref / 非空字符串）"""
+        if not isinstance(schema, dict) or not schema:
+            return
+        if "$ref" in schema:
+            name = _ref_name(schema)
+            definition = self.definitions[name]
+            variants = definition.get("oneOf") if isinstance(definition, dict) else None
+            if name in stack or (variants and _is_discriminated(variants)):
+                self._line(indent, f"{self._function_for(name)}({var}, {path}, errors)")
+            else:
+                self._node(definition, var, path, indent, stack | {name})
+            return
+        variants = schema.get("oneOf")
+        if variants:
+            self._one_of(variants, var, path, indent, stack)
+            return
+        schema_type = _schema_type(schema)
+        if schema_type == "array":
+            self._array(schema, var, path, indent, stack)
+        elif schema_type == "object" and schema.get("properties"):
+            self._line(indent, f"if not isinstance({var}, dict):")
+            self._error(indent + 1, path, " 必须是对象")
+            self._line(indent, "else:")
+            before = len(self._lines)
+            self._object_fields(schema, var, path, indent + 1, stack)
+            if len(self._lines) == before:
+                self._line(indent + 1, "pass")
+        elif _is_nonblank_string(schema):
+            self._line(indent, f"if not isinstance({var}, str) or not {var}.strip():")
+            self._error(indent + 1, path, " 不能为空字符串")
+
+    def _is_structural(self, schema: Any) -> bool:
+        if not isinstance(schema, dict) or not schema:
+            return False
+        if "$ref" in schema or schema.get("oneOf"):
+            return True
+        schema_type = _schema_type(schema)
+        return (
+            schema_type == "array"
+            or (schema_type == "object" and bool(schema.get("properties")))
+            or _is_nonblank_string(schema)
+        )
+
+    def _one_of(self, variants: List[Dict[str, Any]], var: str, path: str, indent: int, stack: Set[str]) -> None:
+        """按取值的Python类型选择变体（ir中的oneOf均为不同类型的并集）"""
+        labels = []
+        keyword = "if"
+        for variant in variants:
+            schema_type = _schema_type(variant)
+            if schema_type not in _PY_TYPES:
+                continue
+            labels.append(_TYPE_LABELS[schema_type])
+            self._line(indent, f"{keyword} isinstance({var}, {_PY_TYPES[schema_type]}):")
+            before = len(self._lines)
+            self._node(variant, var, path, indent + 1, stack)
+            if len(self._lines) == before:
+                self._line(indent + 1, "pass")
+            keyword = "elif"
+        self._line(indent, "else:")
+        self._error(indent + 1, path, f" 必须是{'或'.join(labels)}")
+
+    def _array(self, schema: Dict[str, Any], var: str, path: str, indent: int, stack: Set[str]) -> None:
+        min_items = schema.get("minItems") or 0
+        message = " 必须是非空数组" if min_items else " 必须是数组"
+        condition = f"not isinstance({var}, list)"
+        if min_items:
+            condition += f" or len({var}) < {int(min_items)}"
+        self._line(indent, f"if {condition}:")
+        self._error(indent + 1, path, message)
+        items = schema.get("items")
+        if not self._is_structural(items):
+            return
+        index, item = self._name("i"), self._name("x")
+        self._line(indent, "else:")
+        self._line(indent + 1, f"for {index}, {item} in enumerate({var}):")
+        self._node(items, item, f"({path}, {index})", indent + 2, stack)
+
+    def _object_fields(
+        self,
+        schema: Dict[str, Any],
+        var: str,
+        path: str,
+        indent: int,
+        stack: Set[str],
+        skip=(),
+    ) -> None:
+        """对象字段检查；调用方已确认 var 为 dict"""
+        required = set(schema.get("required") or [])
+        for name, prop in (schema.get("properties") or {}).items():
+            if name in skip or not isinstance(prop, dict):
+                continue
+            is_required = name in required
+            field_path = f"({path}, {'.' + name!r})"
+            if self._is_structural(prop):
+                field = self._name("f")
+                self._line(indent, f"{field} = {var}.get({name!r})")
+                if is_required:
+                    self._line(indent, f"if {field} is None and {name!r} not in {var}:")
+                    self._error(indent + 1, path, f".{name} {self._missing_message(prop)}")
+                    self._line(indent, "else:")
+                else:
+                    self._line(indent, f"if {field} is not None:")
+                self._node(prop, field, field_path, indent + 1, stack)
+                continue
+            leaf = self._leaf_checks(prop, is_required)
+            if not leaf:
+                if is_required:
+                    self._line(indent, f"if {name!r} not in {var}:")
+                    self._error(indent + 1, path, f".{name} 缺失")
+                continue
+            field = self._name("f")
+            self._line(indent, f"{field} = {var}.get({name!r})")
+            if is_required:
+                self._line(indent, f"if {field} is None and {name!r} not in {var}:")
+                self._error(indent + 1, path, f".{name} {self._missing_message(prop)}")
+                self._line(indent, "else:")
+            else:
+                self._line(indent, f"if {field} is not None:")
+            for emit in leaf:
+                emit(field, field_path, indent + 1)
+
+        any_of = _required_any_of(schema)
+        if any_of:
+            parts = []
+            for name, nonblank in any_of:
+                if nonblank:
+                    value = self._name("v")
+                    parts.append(
+                        f"not (isinstance(({value} := {var}.get({name!r})), str) and {value}.strip())"
+                    )
+                else:
+                    parts.append(f"{var}.get({name!r}) is None")
+            names = "/".join(name for name, _ in any_of)
+            qualifier = "非空的 " if any(nonblank for _, nonblank in any_of) else " "
+            self._line(indent, f"if {' and '.join(parts)}:")
+            self._error(indent + 1, path, f" 需要至少包含{qualifier}{names} 之一")
+        for cond_field, cond_value, field, expected in _conditions(schema):
+            self._line(
+                indent,
+                f"if {var}.get({cond_field!r}) == {cond_value!r} and {field!r} in {var} "
+                f"and {var}[{field!r}] != {expected!r}:",
+            )
+            self._error(indent + 1, path, f".{field} 必须与{cond_field}一致，应为: {expected}")
+
+    # ====== 叶子检查 ======
+
+    @staticmethod
+    def _missing_message(schema: Dict[str, Any]) -> str:
+        """必填字段缺失时的提示语，按字段类型给出与类型错误一致的说法"""
+        schema_type = _schema_type(schema)
+        if schema_type == "array":
+            return "必须是非空数组" if schema.get("minItems") else "必须是数组"
+        if schema_type == "object":
+            return "必须是对象"
+        if schema_type == "integer":
+            return "必须是整数"
+        return "缺失"
+
+    def _leaf_checks(self, schema: Dict[str, Any], required: bool) -> List[Callable[[str, str, int], None]]:
+        """非结构性字段的检查生成器，宽严规则见模块说明"""
+        checks: List[Callable[[str, str, int], None]] = []
+        schema_type = _schema_type(schema)
+        if required and schema_type == "object":
+            def expect_object(var, path, indent):
+                self._line(indent, f"if not isinstance({var}, dict):")
+                self._error(indent + 1, path, " 必须是对象")
+            checks.append(expect_object)
+        if "const" in schema:
+            expected = schema["const"]
+
+            def const(var, path, indent):
+                self._line(indent, f"if {var} != {expected!r}:")
+                self._error(indent + 1, path, f" 必须为 {expected}")
+            checks.append(const)
+        if "enum" in schema and (required or schema.get("description")):
+            allowed = self._const(frozenset(schema["enum"]))
+            hint = "/".join(str(item) for item in schema["enum"])
+
+            def enum(var, path, indent):
+                self._line(indent, f"if {var}.__hash__ is None or {var} not in {allowed}:")
+                self._error(indent + 1, path, " 取值非法: ", var, f"（允许值: {hint}）")
+            checks.append(enum)
+        if required and schema_type == "integer":
+            minimum, maximum = schema.get("minimum"), schema.get("maximum")
+
+            def integer(var, path, indent):
+                self._line(indent, f"if not isinstance({var}, int) or isinstance({var}, bool):")
+                self._error(indent + 1, path, " 必须是整数")
+                bounds = []
+                if minimum is not None:
+                    bounds.append(f"{var} < {minimum!r}")
+                if maximum is not None:
+                    bounds.append(f"{var} > {maximum!r}")
+                if bounds:
+                    self._line(indent, f"elif {' or '.join(bounds)}:")
+                    self._error(indent + 1, path, f" 超出范围 {minimum}..{maximum}: ", var)
+            checks.append(integer)
+        return checks
+
+
+# ====== Schema 之外的业务约束 ======
+
+_ENGINE_QUOTE_MARKS = frozenset({"bold", "italic"})
+
+
+def _engine_quote_rule(block, path, errors):
+    """engineQuote 内部只允许 paragraph，且 marks 仅限 bold/italic"""
+    inner = block.get("blocks")
+    if not isinstance(inner, list):
+        return
+    for index, sub_block in enumerate(inner):
+        if not isinstance(sub_block, dict):
+            continue
+        if sub_block.get("type") != "paragraph":
+            errors.append(f"{format_path(path)}.blocks[{index}].type 仅允许 paragraph")
+            continue
+        inlines = sub_block.get("inlines")
+        if not isinstance(inlines, list):
+            continue
+        for run_index, run in enumerate(inlines):
+            marks = run.get("marks") if isinstance(run, dict) else None
+            if not isinstance(marks, list):
+                continue
+            for mark_index, mark in enumerate(marks):
+                if isinstance(mark, dict) and mark.get("type") not in _ENGINE_QUOTE_MARKS:
+                    errors.append(
+                        f"{format_path(path)}.blocks[{index}].inlines[{run_index}]"
+                        f".marks[{mark_index}].type 仅允许 bold/italic"
+                    )
+
+
+BLOCK_RULES: Dict[str, Check] = {
+    "engineQuote": _engine_quote_rule,
+}
+
+
+@lru_cache(maxsize=1)
+def get_block_validator() -> Check:
+    """章节 block 的编译后校验函数（进程内只编译一次）"""
+    return SchemaCompiler(CHAPTER_JSON_SCHEMA, BLOCK_RULES).compile("block")
+
+
+__all__ = [
+    "BLOCK_RULES",
+    "Check",
+    "SchemaCompiler",
+    "format_path",
+    "get_block_validator",
+]
@@ -0,0 +1,65 @@
+"""
+Schema简写记法与提示词编码模式的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/ir/test_schema_dsl.py -v
+"""
+
+import json
+
+import pytest
+
+from ReportEngine.ir import ALLOWED_BLOCK_TYPES, CHAPTER_JSON_SCHEMA
+from ReportEngine.ir.schema_dsl import schema_to_dsl, type_expr
+from ReportEngine.prompts import (
+    SYSTEM_PROMPT_CHAPTER_JSON,
+    build_chapter_user_prompt,
+    encode_payload,
+    get_system_prompt,
+)
+
+
+def test_type_expr_basic_constructs():
+    schema = {
+        "type": "object",
+        "required": ["level"],
+        "properties": {
+            "level": {"type": "integer", "minimum": 1, "maximum": 6},
+            "tone": {"type": "string", "enum": ["info", "warning"]},
+            "items": {"type": "array", "items": {"$ref": "#/definitions/inline"}},
+        },
+    }
+    assert type_expr(schema) == '{level!:int(1..6), tone:"info"|"warning", items:[inline]}'
+
+
+def test_chapter_schema_dsl_covers_every_block_type():
+    dsl = schema_to_dsl(CHAPTER_JSON_SCHEMA)
+    for block_type in ALLOWED_BLOCK_TYPES:
+        assert f'type!:"{block_type}"' in dsl, block_type
+    assert len(dsl) < len(json.dumps(CHAPTER_JSON_SCHEMA, ensure_ascii=False, separators=(",", ":")))
+
+
+def test_encoding_modes_keep_payload_semantics():
+    payload = {
+        "section": {"chapterId": "S1", "title": "概览"},
+        "globalContext": {"query": "主题"},
+        "reports": {"query_engine": "素材"},
+        "constraints": {"allowedBlocks": ["paragraph"]},
+    }
+    assert json.loads(encode_payload(payload, "compact")) == payload
+    pretty = build_chapter_user_prompt(payload, encoding="pretty")
+    compact = build_chapter_user_prompt(payload, encoding="compact")
+    assert len(compact) < len(pretty)
+    assert "\n  " not in compact.split("<SHARED CONTEXT>", 1)[1]
+
+
+def test_system_prompt_encodings():
+    assert get_system_prompt("chapter", "pretty") == SYSTEM_PROMPT_CHAPTER_JSON
+    assert get_system_prompt("chapter", "unknown") == SYSTEM_PROMPT_CHAPTER_JSON
+    lengths = [len(get_system_prompt("chapter", mode)) for mode in ("pretty", "compact", "dsl")]
+    assert lengths == sorted(lengths, reverse=True)
+    assert "记法：" in get_system_prompt("chapter", "dsl")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,116 @@
+"""
+编译后章节校验器的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/ir/test_validator.py -v
+"""
+
+import pytest
+
+from ReportEngine.ir import ALLOWED_BLOCK_TYPES, IRValidator
+from ReportEngine.ir.compiler import format_path
+
+
+def _chapter(*blocks):
+    return {"chapterId": "S1", "title": "概览", "anchor": "s1", "order": 1, "blocks": list(blocks)}
+
+
+def _paragraph(text="正文", marks=None):
+    run = {"text": text}
+    if marks is not None:
+        run["marks"] = marks
+    return {"type": "paragraph", "inlines": [run]}
+
+
+VALID_BLOCKS = {
+    "heading": {"type": "heading", "level": 2, "text": "标题", "anchor": "h"},
+    "paragraph": _paragraph(marks=[{"type": "bold"}]),
+    "list": {"type": "list", "listType": "bullet", "items": [[_paragraph()]]},
+    "table": {"type": "table", "rows": [{"cells": [{"blocks": [_paragraph()]}]}]},
+    "swotTable": {"type": "swotTable", "strengths": ["品牌力", {"title": "渠道", "impact": "高"}]},
+    "pestTable": {"type": "pestTable", "political": [{"title": "监管", "trend": "中性"}]},
+    "blockquote": {"type": "blockquote", "blocks": [_paragraph()]},
+    "engineQuote": {"type": "engineQuote", "engine": "media", "title": "Media Agent", "blocks": [_paragraph()]},
+    "hr": {"type": "hr"},
+    "code": {"type": "code", "content": "print(1)"},
+    "math": {"type": "math", "latex": "x^2"},
+    "figure": {"type": "figure", "img": {"src": "a.png"}},
+    "callout": {"type": "callout", "tone": "info", "blocks": [_paragraph()]},
+    "kpiGrid": {"type": "kpiGrid", "items": [{"label": "声量", "value": 120}]},
+    "widget": {"type": "widget", "widgetId": "w1", "widgetType": "chart.js/bar", "data": {}},
+    "toc": {"type": "toc"},
+}
+
+
+def test_every_block_type_has_a_valid_example():
+    assert set(VALID_BLOCKS) == set(ALLOWED_BLOCK_TYPES)
+    valid, errors = IRValidator().validate_chapter(_chapter(*VALID_BLOCKS.values()))
+    assert valid, errors
+
+
+def test_chapter_level_errors():
+    validator = IRValidator()
+    assert validator.validate_chapter([]) == (False, ["chapter必须是对象"])
+    valid, errors = validator.validate_chapter({"blocks": []})
+    assert not valid
+    assert "missing chapter.chapterId" in errors
+    assert errors[-1] == "chapter.blocks必须是非空数组"
+
+
+@pytest.mark.parametrize(
+    "block, expected",
+    [
+        ({"type": "nope"}, "blocks[0].type 不被支持: nope"),
+        ({"type": "heading", "text": "x", "anchor": "a"}, "blocks[0].level 必须是整数"),
+        ({"type": "paragraph", "inlines": []}, "blocks[0].inlines 必须是非空数组"),
+        (
+            {"type": "list", "listType": "bullet", "items": [[{"type": "callout", "tone": "x", "blocks": [_paragraph()]}]]},
+            "blocks[0].items[0][0].tone 取值非法: x（允许值: info/warning/success/danger）",
+        ),
+        (
+            {"type": "table", "rows": [{"cells": [{"blocks": [_paragraph(marks=["bold"])]}]}]},
+            "blocks[0].rows[0].cells[0].blocks[0].inlines[0].marks[0] 必须是对象",
+        ),
+        ({"type": "swotTable", "threats": [""]}, "blocks[0].threats[0] 不能为空字符串"),
+        ({"type": "swotTable", "threats": ["   "]}, "blocks[0].threats[0] 不能为空字符串"),
+        *[
+            (
+                {"type": "swotTable", "strengths": [item]},
+                "blocks[0].strengths[0] 需要至少包含非空的 title/label/text/detail/description 之一",
+            )
+            for item in ({}, {"title": ""}, {"title": "  "}, {"title": 0}, {"title": {}}, {"text": True})
+        ],
+        ({"type": "pestTable"}, "blocks[0] 需要至少包含 political/economic/social/technological 之一"),
+        ({"type": "widget", "widgetId": "w", "widgetType": "chart.js/bar"}, "blocks[0] 需要至少包含 data/dataRef 之一"),
+        (
+            {"type": "engineQuote", "engine": "query", "title": "Media Agent", "blocks": [_paragraph()]},
+            "blocks[0].title 必须与engine一致，应为: Query Agent",
+        ),
+        (
+            {"type": "engineQuote", "engine": "query", "title": "Query Agent", "blocks": [_paragraph(marks=[{"type": "code"}])]},
+            "blocks[0].blocks[0].inlines[0].marks[0].type 仅允许 bold/italic",
+        ),
+    ],
+)
+def test_block_errors(block, expected):
+    valid, errors = IRValidator().validate_chapter(_chapter(block))
+    assert not valid
+    assert expected in errors
+
+
+def test_optional_null_fields_are_ignored():
+    block = {"type": "paragraph", "inlines": [{"text": "a", "marks": None}], "align": None}
+    assert IRValidator().validate_chapter(_chapter(block)) == (True, [])
+
+
+def test_swot_item_accepts_any_nonblank_text_field():
+    block = {"type": "swotTable", "strengths": [{"title": "  ", "label": "ok"}, {"description": "d"}, "文字"]}
+    assert IRValidator().validate_chapter(_chapter(block)) == (True, [])
+
+
+def test_format_path():
+    assert format_path(((("blocks", 2), ".items"), 0)) == "blocks[2].items[0]"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -6,7 +6,7 @@ Report Engine 默认的OpenAI兼容LLM客户端封装。
 
 import os
 import sys
-from typing import Any, Dict, Optional, Generator
+from typing import Any, Callable, Dict, Optional, Generator
 from loguru import logger
 
 from openai import OpenAI
@@ -64,8 +64,18 @@ class LLMClient:
         if base_url:
             client_kwargs["base_url"] = base_url
         self.client = OpenAI(**client_kwargs)
+        # 可选的提示词观察回调 (system_prompt, user_prompt)，用于统计前缀缓存命中等
+        self.prompt_observer: Optional[Callable[[str, str], Any]] = None
+
+    def _observe_prompt(self, system_prompt: str, user_prompt: str) -> None:
+        """通知提示词观察者，回调异常不影响正常调用"""
+        if self.prompt_observer is None:
+            return
+        try:
+            self.prompt_observer(system_prompt, user_prompt)
+        except Exception as exc:  # pragma: no cover - 仅记录
+            logger.debug(f"提示词观察回调失败: {exc}")
 
-    @with_retry(LLM_RETRY_CONFIG)
     def invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
         """
         以非流式方式调用LLM，并返回一次性完成的完整响应。
@@ -78,6 +88,13 @@ class LLMClient:
         Returns:
             去除首尾空白后的LLM响应文本
         """
+        # 观察放在重试之外：一次逻辑调用只记录一次，重试不重复计数
+        self._observe_prompt(system_prompt, user_prompt)
+        return self._invoke_with_retry(system_prompt, user_prompt, **kwargs)
+
+    @with_retry(LLM_RETRY_CONFIG)
+    def _invoke_with_retry(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        """发送一次非流式请求（重试由装饰器负责）"""
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
@@ -111,6 +128,11 @@ class LLMClient:
         产出:
             str: 每次yield一段delta文本，方便上层实时渲染。
         """
+        self._observe_prompt(system_prompt, user_prompt)
+        yield from self._stream_chunks(system_prompt, user_prompt, **kwargs)
+
+    def _stream_chunks(self, system_prompt: str, user_prompt: str, **kwargs) -> Generator[str, None, None]:
+        """发送一次流式请求并逐段产出delta（不通知观察者）"""
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
@@ -140,7 +162,6 @@ class LLMClient:
             logger.error(f"流式请求失败: {str(e)}")
             raise e
     
-    @with_retry(LLM_RETRY_CONFIG)
     def stream_invoke_to_string(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
         """
         流式调用LLM并安全地拼接为完整字符串（避免UTF-8多字节字符截断）。
@@ -153,9 +174,15 @@ class LLMClient:
         返回:
             str: 将所有delta拼接后的完整响应。
         """
+        self._observe_prompt(system_prompt, user_prompt)
+        return self._stream_to_string_with_retry(system_prompt, user_prompt, **kwargs)
+
+    @with_retry(LLM_RETRY_CONFIG)
+    def _stream_to_string_with_retry(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        """完整消费一次流式请求并解码（重试由装饰器负责）"""
         # 以字节形式收集所有块
         byte_chunks = []
-        for chunk in self.stream_invoke(system_prompt, user_prompt, **kwargs):
+        for chunk in self._stream_chunks(system_prompt, user_prompt, **kwargs):
             byte_chunks.append(chunk.encode('utf-8'))
         
         # 拼接所有字节，然后一次性解码
@@ -0,0 +1,69 @@
+"""
+LLMClient 提示词观察回调的测试用例（重试不重复计数）。
+
+运行测试：
+    python -m pytest ReportEngine/llms/test_base.py -v
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from ReportEngine.llms.base import LLMClient
+
+
+def _retry_once(func):
+    """模拟 with_retry：首次失败后重试一次"""
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except RuntimeError:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _message(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _delta(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    client = LLMClient(api_key="test-key", model_name="test-model", base_url="http://llm.invalid")
+    observed = []
+    client.prompt_observer = lambda system_prompt, user_prompt: observed.append(user_prompt)
+    attempts = []
+
+    def create(**kwargs):
+        attempts.append(kwargs.get("stream", False))
+        if len(attempts) == 1:
+            raise RuntimeError("临时错误")
+        if kwargs.get("stream"):
+            return iter([_delta("你"), _delta("好")])
+        return _message(" 你好 ")
+
+    monkeypatch.setattr(client.client.chat.completions, "create", create)
+    monkeypatch.setattr(client, "_invoke_with_retry", _retry_once(client._invoke_with_retry))
+    monkeypatch.setattr(client, "_stream_to_string_with_retry", _retry_once(client._stream_to_string_with_retry))
+    return client, observed, attempts
+
+
+def test_invoke_observes_prompt_once_across_retries(llm):
+    client, observed, attempts = llm
+    assert client.invoke("系统", "用户") == "你好"
+    assert len(attempts) == 2
+    assert observed == ["用户"]
+
+
+def test_stream_to_string_observes_prompt_once_across_retries(llm):
+    client, observed, attempts = llm
+    assert client.stream_invoke_to_string("系统", "用户") == "你好"
+    assert attempts == [True, True]
+    assert observed == ["用户"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
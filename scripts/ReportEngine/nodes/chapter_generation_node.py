@@ -8,6 +8,7 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 import re
@@ -23,12 +24,12 @@ from ..ir import (
     IRValidator,
 )
 from ..prompts import (
-    SYSTEM_PROMPT_CHAPTER_JSON,
-    SYSTEM_PROMPT_CHAPTER_JSON_REPAIR,
     SYSTEM_PROMPT_CHAPTER_JSON_RECOVERY,
     build_chapter_repair_prompt,
     build_chapter_recovery_payload,
     build_chapter_user_prompt,
+    get_system_prompt,
+    normalize_encoding,
 )
 from ..utils.json_parser import RobustJSONParser, JSONParseError
 from .base_node import BaseNode
@@ -89,6 +90,15 @@ class ChapterValidationError(ValueError):
         self.errors: List[str] = list(errors or [])
 
 
+@dataclass
+class ChapterContentStats:
+    """单遍规整章节时顺带统计的篇幅特征，供正文密度校验使用。"""
+
+    body_characters: int = 0
+    narrative_characters: int = 0
+    non_heading_blocks: int = 0
+
+
 class ChapterGenerationNode(BaseNode):
     """
     负责按章节调用LLM并校验JSON结构。
@@ -131,6 +141,15 @@ class ChapterGenerationNode(BaseNode):
     _PARAGRAPH_FRAGMENT_MAX_CHARS = 80
     _PARAGRAPH_FRAGMENT_NO_TERMINATOR_MAX_CHARS = 240
     _TERMINATION_PUNCTUATION = set("。！？!?；;……")
+    _HEADING_LIKE_TYPES = frozenset({"heading", "divider", "toc"})
+    _NARRATIVE_CONTAINER_TYPES = frozenset({"callout", "blockquote", "engineQuote"})
+    # 章节检索的来源预算权重：论坛日志多为三引擎结论的复述，份额减半
+    _CHAPTER_SOURCE_WEIGHTS = {
+        "query_engine": 1.0,
+        "media_engine": 1.0,
+        "insight_engine": 1.0,
+        "forum_logs": 0.5,
+    }
 
     def __init__(
         self,
@@ -139,6 +158,7 @@ class ChapterGenerationNode(BaseNode):
         storage: ChapterStorage,
         fallback_llm_clients: Optional[List[Tuple[str, Any]]] = None,
         error_log_dir: Optional[str | Path] = None,
+        prompt_encoding: str = "pretty",
     ):
         """
         记录LLM客户端/校验器/章节存储器，便于run方法调度。
@@ -147,8 +167,10 @@ class ChapterGenerationNode(BaseNode):
             llm_client: 实际调用大模型的客户端
             validator: IR结构校验器
             storage: 负责章节流式落盘的存储器
+            prompt_encoding: 提示词编码模式（pretty/compact/dsl）
         """
         super().__init__(llm_client, "ChapterGenerationNode")
+        self.prompt_encoding = normalize_encoding(prompt_encoding)
         self.validator = validator
         self.storage = storage
         self.fallback_llm_clients: List[Tuple[str, Any]] = fallback_llm_clients or [
@@ -203,7 +225,12 @@ class ChapterGenerationNode(BaseNode):
         run_id = run_dir.name
         self._ensure_run_state(run_id)
         llm_payload = self._build_payload(section, context)
-        user_message = build_chapter_user_prompt(llm_payload)
+        # 未启用章节检索时各章素材相同，放入共享前缀以便复用前缀缓存
+        user_message = build_chapter_user_prompt(
+            llm_payload,
+            shared_sources=context.get("retrieval_index") is None,
+            encoding=self.prompt_encoding,
+        )
 
         # 检查是否有GraphRAG结果，决定是否使用增强提示词
         graph_enhanced = bool(context.get("graph_results"))
@@ -246,7 +273,7 @@ class ChapterGenerationNode(BaseNode):
         chapter_json.setdefault("anchor", section.slug)
         chapter_json.setdefault("title", section.title)
         chapter_json.setdefault("order", section.order)
-        self._sanitize_chapter_blocks(chapter_json)
+        content_stats = self._sanitize_chapter_blocks(chapter_json)
 
         valid, errors = self.validator.validate_chapter(chapter_json)
         if not valid and errors:
@@ -261,12 +288,12 @@ class ChapterGenerationNode(BaseNode):
                 chapter_json.setdefault("anchor", section.slug)
                 chapter_json.setdefault("title", section.title)
                 chapter_json.setdefault("order", section.order)
-                self._sanitize_chapter_blocks(chapter_json)
+                content_stats = self._sanitize_chapter_blocks(chapter_json)
                 valid, errors = self.validator.validate_chapter(chapter_json)
         content_error: ChapterContentError | None = None
         if valid and not placeholder_created:
             try:
-                self._ensure_content_density(chapter_json)
+                self._ensure_content_density(chapter_json, content_stats)
             except ChapterContentError as exc:
                 content_error = exc
 
@@ -306,10 +333,10 @@ class ChapterGenerationNode(BaseNode):
         返回:
             dict: 可以直接序列化进提示词的payload，兼顾章节信息与全局约束。
         """
-        reports = context.get("reports", {})
         # 章节篇幅规划（来自WordBudgetNode），用于指导字数与强调点
         chapter_plan_map = context.get("chapter_directives", {})
         chapter_plan = chapter_plan_map.get(section.chapter_id) if chapter_plan_map else {}
+        reports, forum_logs = self._retrieve_chapter_sources(section, context, chapter_plan)
 
         # 从 layout 的 tocPlan 中查找该章节是否允许使用SWOT块和PEST块
         allow_swot = self._get_chapter_swot_permission(section.chapter_id, context)
@@ -338,7 +365,7 @@ class ChapterGenerationNode(BaseNode):
                 "media_engine": reports.get("media_engine", ""),
                 "insight_engine": reports.get("insight_engine", ""),
             },
-            "forumLogs": context.get("forum_logs", ""),
+            "forumLogs": forum_logs,
             "dataBundles": context.get("data_bundles", []),
             "constraints": {
                 "language": "zh-CN",
@@ -386,6 +413,65 @@ class ChapterGenerationNode(BaseNode):
                 payload["globalContext"]["sectionBudgets"] = chapter_plan["sections"]
         return payload
 
+    def _retrieve_chapter_sources(
+        self,
+        section: TemplateSection,
+        context: Dict[str, Any],
+        chapter_plan: Optional[Dict[str, Any]],
+    ) -> Tuple[Dict[str, str], str]:
+        """
+        按章节取回相关素材。
+
+        上下文中有 `retrieval_index`（由Agent每次运行构建一次）时，以章节标题、
+        提纲、篇幅规划中的强调点和主题为查询，在 `chapter_context_tokens` 预算内
+        取回相关段落；否则返回完整的三引擎报告与论坛日志。
+
+        返回:
+            tuple: (reports映射, 论坛日志文本)
+        """
+        reports = context.get("reports", {})
+        forum_logs = context.get("forum_logs", "")
+        index = context.get("retrieval_index")
+        if index is None:
+            return reports, forum_logs
+
+        query_parts = [context.get("query") or "", section.title]
+        query_parts.extend(str(item) for item in section.outline or [])
+        query_parts.extend(self._collect_plan_text(chapter_plan))
+        try:
+            packed = index.retrieve(
+                "\n".join(part for part in query_parts if part),
+                context.get("chapter_context_tokens", 12000),
+                weights=self._CHAPTER_SOURCE_WEIGHTS,
+            )
+        except Exception as exc:
+            logger.warning(f"{section.title} 章节上下文检索失败，使用完整报告: {exc}")
+            return reports, forum_logs
+        if packed.passages_dropped:
+            logger.info(
+                f"{section.title} 章节上下文: 约 {packed.original_tokens} -> {packed.total_tokens} tokens"
+            )
+        texts = packed.texts
+        return (
+            {key: texts.get(key, "") for key in ("query_engine", "media_engine", "insight_engine")},
+            texts.get("forum_logs", ""),
+        )
+
+    @classmethod
+    def _collect_plan_text(cls, value: Any) -> List[str]:
+        """递归收集篇幅规划中的文本（强调点、理由、小节标题等），忽略数字与ID。"""
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, dict):
+            texts: List[str] = []
+            for key, item in value.items():
+                if key not in ("chapterId", "anchor", "slug"):
+                    texts.extend(cls._collect_plan_text(item))
+            return texts
+        if isinstance(value, (list, tuple)):
+            return [text for item in value for text in cls._collect_plan_text(item)]
+        return []
+
     def _get_chapter_swot_permission(self, chapter_id: str, context: Dict[str, Any]) -> bool:
         """
         从 layout 的 tocPlan 中查找指定章节是否允许使用 SWOT 块。
@@ -478,9 +564,13 @@ class ChapterGenerationNode(BaseNode):
         # 根据是否启用GraphRAG选择不同的系统提示词
         if graph_enhanced:
             from ..graphrag.prompts import SYSTEM_PROMPT_CHAPTER_GRAPH_ENHANCEMENT
-            system_prompt = SYSTEM_PROMPT_CHAPTER_JSON + "\n\n" + SYSTEM_PROMPT_CHAPTER_GRAPH_ENHANCEMENT
+            system_prompt = (
+                get_system_prompt("chapter", self.prompt_encoding)
+                + "\n\n"
+                + SYSTEM_PROMPT_CHAPTER_GRAPH_ENHANCEMENT
+            )
         else:
-            system_prompt = SYSTEM_PROMPT_CHAPTER_JSON
+            system_prompt = get_system_prompt("chapter", self.prompt_encoding)
         
         chunks: List[str] = []
         with self.storage.capture_stream(chapter_dir) as stream_fp:
@@ -531,6 +621,7 @@ class ChapterGenerationNode(BaseNode):
             section_payload,
             generation_payload,
             raw_text,
+            encoding=self.prompt_encoding,
         )
         attempted_labels = self._rescue_attempted_labels.setdefault(section.chapter_id, set())
         for label, client in self.fallback_llm_clients:
@@ -963,10 +1054,12 @@ class ChapterGenerationNode(BaseNode):
         """将结构性错误的章节交给LLM兜底修复，保持Report Engine相同的API设置。"""
         if not validation_errors:
             return None
-        payload = build_chapter_repair_prompt(chapter, validation_errors, raw_text)
+        payload = build_chapter_repair_prompt(
+            chapter, validation_errors, raw_text, encoding=self.prompt_encoding
+        )
         try:
             response = self.llm_client.invoke(
-                SYSTEM_PROMPT_CHAPTER_JSON_REPAIR,
+                get_system_prompt("chapter_repair", self.prompt_encoding),
                 payload,
                 temperature=0.0,
                 top_p=0.05,
@@ -984,86 +1077,195 @@ class ChapterGenerationNode(BaseNode):
         logger.warning("章节JSON经多次本地修复仍不合规，已成功启用LLM兜底修复")
         return repaired
 
-    def _sanitize_chapter_blocks(self, chapter: Dict[str, Any]):
+    def _sanitize_chapter_blocks(self, chapter: Dict[str, Any]) -> ChapterContentStats:
         """
-        修正常见的结构性错误（例如list.items嵌套过深）。
+        修正常见的结构性错误（例如list.items嵌套过深），并顺带统计正文篇幅。
+
+        每一层blocks只遍历一次：先逐个规整block并递归其子结构，再在本层合并
+        句子片段，同时累计正文/叙述性字符数，_ensure_content_density 无需再遍历。
 
         参数:
             chapter: 章节JSON对象，会在原地被清理和规整。
+
+        返回:
+            ChapterContentStats: 规整后章节的篇幅统计。
         """
+        stats = ChapterContentStats()
+        blocks = chapter.get("blocks")
+        if not isinstance(blocks, list):
+            return stats
+        blocks, body_characters, narrative_characters = self._normalize_block_sequence(
+            blocks, top_level=True
+        )
+        chapter["blocks"] = blocks
+        stats.body_characters = body_characters
+        stats.narrative_characters = narrative_characters
+        stats.non_heading_blocks = sum(
+            1 for block in blocks if block.get("type") not in self._HEADING_LIKE_TYPES
+        )
+        return stats
 
-        def walk(blocks: List[Dict[str, Any]] | None):
-            """递归检查并修复嵌套结构，保证每个block合法"""
-            if not isinstance(blocks, list):
-                return
-            # 先过滤掉非字典类型的异常 block
-            valid_indices = []
-            for idx, block in enumerate(blocks):
-                if not isinstance(block, dict):
-                    # 尝试将字符串转换为 paragraph
-                    if isinstance(block, str) and block.strip():
-                        blocks[idx] = self._as_paragraph_block(block)
-                        valid_indices.append(idx)
-                        logger.warning(f"walk: 将字符串 block 转换为 paragraph")
-                    elif isinstance(block, list):
-                        # 尝试提取列表中的有效字典
-                        for item in block:
-                            if isinstance(item, dict):
-                                self._ensure_block_type(item)
-                                blocks[idx] = item
-                                valid_indices.append(idx)
-                                logger.warning(f"walk: 从列表中提取字典 block")
-                                break
-                        else:
-                            logger.warning(f"walk: 跳过无效的列表 block: {block}")
-                    else:
-                        logger.warning(f"walk: 跳过无效的 block（类型: {type(block).__name__}）")
+    def _normalize_block_sequence(
+        self,
+        blocks: List[Any],
+        top_level: bool = False,
+        merge: bool = True,
+    ) -> Tuple[List[Any], int, int]:
+        """
+        规整同一层的blocks并返回 (新列表, 正文字符数, 叙述性字符数)。
+
+        参数:
+            blocks: 当前层的block列表，非字典元素会被就地修复。
+            top_level: 章节顶层只保留字典block，无法修复的元素直接丢弃。
+            merge: 是否合并句子片段；其他类型block下挂的blocks只做规整，整棵子树都不合并。
+        """
+        # 先修复非字典类型的异常 block
+        for idx, block in enumerate(blocks):
+            if isinstance(block, dict):
+                continue
+            if isinstance(block, str) and block.strip():
+                blocks[idx] = self._as_paragraph_block(block)
+                logger.warning(f"walk: 将字符串 block 转换为 paragraph")
+            elif isinstance(block, list):
+                # 尝试提取列表中的有效字典
+                for item in block:
+                    if isinstance(item, dict):
+                        self._ensure_block_type(item)
+                        blocks[idx] = item
+                        logger.warning(f"walk: 从列表中提取字典 block")
+                        break
                 else:
-                    valid_indices.append(idx)
-            
-            for idx in valid_indices:
-                block = blocks[idx]
-                if not isinstance(block, dict):
+                    logger.warning(f"walk: 跳过无效的列表 block: {block}")
+            else:
+                logger.warning(f"walk: 跳过无效的 block（类型: {type(block).__name__}）")
+
+        body_characters = 0
+        narrative_characters = 0
+        for block in blocks:
+            if isinstance(block, dict):
+                block_body, block_narrative = self._normalize_block(block, merge)
+                body_characters += block_body
+                narrative_characters += block_narrative
+            elif not merge:
+                body_characters += self._count_loose_characters(block)
+        if not merge:
+            return blocks, body_characters, narrative_characters
+
+        merged: List[Any] = []
+        fragment_buffer: List[Dict[str, Any]] = []
+
+        def flush_buffer():
+            """将当前片段缓冲写入merged列表，必要时合并为单段paragraph"""
+            nonlocal fragment_buffer
+            if not fragment_buffer:
+                return
+            if len(fragment_buffer) == 1:
+                merged.append(fragment_buffer[0])
+            else:
+                merged.append(self._combine_paragraph_fragments(fragment_buffer))
+            fragment_buffer = []
+
+        for block in blocks:
+            if not isinstance(block, dict):
+                if top_level:
                     continue
-                self._ensure_block_type(block)
-                self._sanitize_block_content(block)
-                block_type = block.get("type")
-                if block_type == "list":
-                    # 自动修复 listType：确保是合法值
-                    self._normalize_list_type(block)
-                    items = block.get("items")
-                    normalized = self._normalize_list_items(items)
-                    if normalized:
-                        block["items"] = normalized
-                    for entry in block.get("items", []):
-                        walk(entry)
-                elif block_type in {"callout", "blockquote", "engineQuote"}:
-                    walk(block.get("blocks"))
-                elif block_type == "table":
-                    for row in block.get("rows", []):
-                        if not isinstance(row, dict):
-                            continue
-                        cells = row.get("cells") or []
-                        for cell in cells:
-                            if not isinstance(cell, dict):
-                                continue
-                            walk(cell.get("blocks"))
-                elif block_type == "widget":
-                    self._normalize_widget_block(block)
+                # 剩余的只可能是空字符串、不含字典的列表或其他无效值
+                if isinstance(block, list):
+                    logger.warning(f"检测到列表类型的 block，尝试提取有效内容: {block}")
+                    for item in block:
+                        if isinstance(item, str) and item.strip():
+                            merged.append(self._as_paragraph_block(item))
+                            characters = len(item.strip())
+                            body_characters += characters
+                            narrative_characters += characters
                 else:
-                    nested = block.get("blocks")
-                    if isinstance(nested, list):
-                        walk(nested)
+                    logger.warning(f"跳过无效的 block（类型: {type(block).__name__}）: {block}")
+                continue
+            if self._is_paragraph_fragment(block):
+                fragment_buffer.append(block)
+                continue
+            flush_buffer()
+            merged.append(block)
+
+        flush_buffer()
+        return merged, body_characters, narrative_characters
 
-        walk(chapter.get("blocks"))
+    def _normalize_block(self, block: Dict[str, Any], merge: bool = True) -> Tuple[int, int]:
+        """
+        规整单个block并递归其子结构，返回 (正文字符数, 叙述性字符数)。
 
-        blocks = chapter.get("blocks")
-        if isinstance(blocks, list):
-            # 在合并前先过滤掉所有非字典类型的 block
-            filtered_blocks = [b for b in blocks if isinstance(b, dict)]
-            chapter["blocks"] = self._merge_fragment_sequences(filtered_blocks)
+        - 正文忽略heading/divider/toc/widget，对list/table/callout等累加嵌套文本；
+        - 叙述性字符只计paragraph/list/callout/blockquote/engineQuote，避免被表格/图表“刷长”。
+        """
+        self._ensure_block_type(block)
+        self._sanitize_block_content(block)
+        block_type = block.get("type")
+
+        if block_type == "list":
+            # 自动修复 listType：确保是合法值
+            self._normalize_list_type(block)
+            normalized = self._normalize_list_items(block.get("items"))
+            if normalized:
+                block["items"] = normalized
+            body_characters = 0
+            narrative_characters = 0
+            items = block.get("items")
+            for entry in items if isinstance(items, list) else []:
+                if isinstance(entry, list):
+                    entry[:], entry_body, entry_narrative = self._normalize_block_sequence(entry, merge=merge)
+                    body_characters += entry_body
+                    narrative_characters += entry_narrative
+            return body_characters, narrative_characters
+
+        if block_type in self._NARRATIVE_CONTAINER_TYPES:
+            nested = block.get("blocks")
+            if not isinstance(nested, list):
+                return 0, 0
+            block["blocks"], body_characters, narrative_characters = self._normalize_block_sequence(
+                nested, merge=merge
+            )
+            return body_characters, narrative_characters
 
-    def _ensure_content_density(self, chapter: Dict[str, Any]):
+        if block_type == "table":
+            body_characters = 0
+            for row in block.get("rows") or []:
+                if not isinstance(row, dict):
+                    continue
+                for cell in row.get("cells") or []:
+                    if not isinstance(cell, dict):
+                        continue
+                    nested = cell.get("blocks")
+                    if isinstance(nested, list):
+                        cell["blocks"], cell_body, _ = self._normalize_block_sequence(nested, merge=merge)
+                        body_characters += cell_body
+            return body_characters, 0
+
+        if block_type == "widget":
+            self._normalize_widget_block(block)
+            return 0, 0
+
+        nested = block.get("blocks")
+        nested_body = 0
+        if isinstance(nested, list):
+            _, nested_body, _ = self._normalize_block_sequence(nested, merge=False)
+        if block_type == "paragraph":
+            characters = self._estimate_paragraph_characters(block)
+            return characters, characters
+        if block_type in self._HEADING_LIKE_TYPES:
+            return 0, 0
+        if isinstance(nested, list):
+            return nested_body, 0
+        return len(self._extract_block_text(block).strip()), 0
+
+    def _count_loose_characters(self, node: Any) -> int:
+        """统计未能修复为block的残留字符串（嵌套列表）的字符数"""
+        if isinstance(node, str):
+            return len(node.strip())
+        if isinstance(node, list):
+            return sum(self._count_loose_characters(item) for item in node)
+        return 0
+
+    def _ensure_content_density(self, chapter: Dict[str, Any], stats: ChapterContentStats):
         """
         校验章节正文密度。
 
@@ -1072,6 +1274,7 @@ class ChapterGenerationNode(BaseNode):
 
         参数:
             chapter: 当前章节JSON。
+            stats: _sanitize_chapter_blocks 返回的篇幅统计。
 
         异常:
             ChapterContentError: 当正文区块数量或字符数达不到下限时抛出。
@@ -1086,15 +1289,9 @@ class ChapterGenerationNode(BaseNode):
                 non_heading_blocks=0,
             )
 
-        non_heading_blocks = [
-            block
-            for block in blocks
-            if isinstance(block, dict)
-            and block.get("type") not in {"heading", "divider", "toc"}
-        ]
-        valid_block_count = len(non_heading_blocks)
-        body_characters = self._count_body_characters(blocks)
-        narrative_characters = self._count_narrative_characters(blocks)
+        valid_block_count = stats.non_heading_blocks
+        body_characters = stats.body_characters
+        narrative_characters = stats.narrative_characters
 
         if (
             valid_block_count < self._MIN_NON_HEADING_BLOCKS
@@ -1109,100 +1306,6 @@ class ChapterGenerationNode(BaseNode):
                 non_heading_blocks=valid_block_count,
             )
 
-    def _count_body_characters(self, blocks: Any) -> int:
-        """
-        递归统计正文字符数。
-
-        - 忽略heading/divider/widget等非正文类型；
-        - 对paragraph/list/table/callout等结构抽取嵌套文本；
-        - 仅用于粗粒度判断篇幅是否合理。
-
-        参数:
-            blocks: 章节的 blocks 列表或子树。
-
-        返回:
-            int: 估算的正文字符数量。
-        """
-
-        def walk(node: Any) -> int:
-            """递归下钻block树并返回字符估算，跳过非正文类型"""
-            if node is None:
-                return 0
-            if isinstance(node, list):
-                return sum(walk(item) for item in node)
-            if isinstance(node, str):
-                return len(node.strip())
-            if not isinstance(node, dict):
-                return 0
-
-            block_type = node.get("type")
-            if block_type in {"heading", "divider", "toc", "widget"}:
-                return 0
-
-            if block_type == "paragraph":
-                return self._estimate_paragraph_characters(node)
-
-            if block_type == "list":
-                total = 0
-                for item in node.get("items", []):
-                    total += walk(item)
-                return total
-
-            if block_type in {"blockquote", "callout", "engineQuote"}:
-                return walk(node.get("blocks"))
-
-            if block_type == "table":
-                total = 0
-                for row in node.get("rows", []):
-                    cells = row.get("cells") or []
-                    for cell in cells:
-                        total += walk(cell.get("blocks"))
-                return total
-
-            nested = node.get("blocks")
-            if isinstance(nested, list):
-                return walk(nested)
-
-            return len(self._extract_block_text(node).strip())
-
-        return walk(blocks)
-
-    def _count_narrative_characters(self, blocks: Any) -> int:
-        """
-        统计paragraph/callout/list/blockquote/engineQuote等叙述性结构的字符数，避免被表格/图表“刷长”。
-        """
-
-        def walk(node: Any) -> int:
-            """递归遍历叙述性节点，忽略图表/目录等非正文结构"""
-            if node is None:
-                return 0
-            if isinstance(node, list):
-                return sum(walk(item) for item in node)
-            if isinstance(node, str):
-                return len(node.strip())
-            if not isinstance(node, dict):
-                return 0
-
-            block_type = node.get("type")
-            if block_type == "paragraph":
-                return self._estimate_paragraph_characters(node)
-            if block_type == "list":
-                total = 0
-                for item in node.get("items", []):
-                    total += walk(item)
-                return total
-            if block_type in {"callout", "blockquote", "engineQuote"}:
-                return walk(node.get("blocks"))
-
-            # list项可能是匿名dict，兼容性遍历
-            if block_type is None:
-                nested = node.get("blocks")
-                if isinstance(nested, list):
-                    return walk(nested)
-            return 0
-
-        return walk(blocks)
-
     def _estimate_paragraph_characters(self, block: Dict[str, Any]) -> int:
         """提取paragraph文本长度，复用在多种统计中。"""
         inlines = block.get("inlines")
@@ -1700,99 +1803,6 @@ class ChapterGenerationNode(BaseNode):
             cleaned.append(run)
         return cleaned or [self._as_inline_run("")]
 
-    def _merge_fragment_sequences(self, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """合并被LLM拆成多段的句子片段，避免HTML出现大量孤立<p>"""
-        if not isinstance(blocks, list):
-            return blocks
-
-        merged: List[Dict[str, Any]] = []
-        fragment_buffer: List[Dict[str, Any]] = []
-
-        def flush_buffer():
-            """将当前片段缓冲写入merged列表，必要时合并为单段paragraph"""
-            nonlocal fragment_buffer
-            if not fragment_buffer:
-                return
-            if len(fragment_buffer) == 1:
-                merged.append(fragment_buffer[0])
-            else:
-                merged.append(self._combine_paragraph_fragments(fragment_buffer))
-            fragment_buffer = []
-
-        for block in blocks:
-            # 类型检查：跳过非字典类型的异常 block，避免 AttributeError
-            if not isinstance(block, dict):
-                # 尝试将非字典类型转换为 paragraph
-                if isinstance(block, str) and block.strip():
-                    converted = self._as_paragraph_block(block)
-                    logger.warning(f"检测到非字典类型的 block（字符串），已转换为 paragraph: {block[:50]}...")
-                    merged.append(converted)
-                elif isinstance(block, list):
-                    # 列表类型的 block 可能是 LLM 输出错误，尝试提取有效内容
-                    logger.warning(f"检测到列表类型的 block，尝试提取有效内容: {block}")
-                    for item in block:
-                        if isinstance(item, dict):
-                            self._ensure_block_type(item)
-                            merged.append(self._merge_nested_fragments(item))
-                        elif isinstance(item, str) and item.strip():
-                            merged.append(self._as_paragraph_block(item))
-                else:
-                    logger.warning(f"跳过无效的 block（类型: {type(block).__name__}）: {block}")
-                continue
-            if self._is_paragraph_fragment(block):
-                fragment_buffer.append(block)
-                continue
-            flush_buffer()
-            merged.append(self._merge_nested_fragments(block))
-
-        flush_buffer()
-        return merged
-
-    def _merge_nested_fragments(self, block: Dict[str, Any]) -> Dict[str, Any]:
-        """对嵌套结构（callout/blockquote/engineQuote/list/table）递归处理片段合并"""
-        # 类型检查：确保 block 是字典类型
-        if not isinstance(block, dict):
-            # 尝试将非字典类型转换为 paragraph
-            if isinstance(block, str) and block.strip():
-                logger.warning(f"_merge_nested_fragments 收到字符串类型，已转换为 paragraph")
-                return self._as_paragraph_block(block)
-            elif isinstance(block, list):
-                # 尝试提取列表中的第一个有效字典
-                for item in block:
-                    if isinstance(item, dict):
-                        self._ensure_block_type(item)
-                        return self._merge_nested_fragments(item)
-                logger.warning(f"_merge_nested_fragments 收到无效列表，返回空 paragraph")
-                return self._as_paragraph_block("")
-            else:
-                logger.warning(f"_merge_nested_fragments 收到无效类型（{type(block).__name__}），返回空 paragraph")
-                return self._as_paragraph_block("")
-        
-        block_type = block.get("type")
-        if block_type in {"callout", "blockquote", "engineQuote"}:
-            nested = block.get("blocks")
-            if isinstance(nested, list):
-                block["blocks"] = self._merge_fragment_sequences(nested)
-        elif block_type == "list":
-            items = block.get("items")
-            if isinstance(items, list):
-                for entry in items:
-                    if isinstance(entry, list):
-                        merged_entry = self._merge_fragment_sequences(entry)
-                        entry[:] = merged_entry
-        elif block_type == "table":
-            for row in block.get("rows", []):
-                if not isinstance(row, dict):
-                    continue
-                cells = row.get("cells") or []
-                for cell in cells:
-                    if not isinstance(cell, dict):
-                        continue
-                    nested_blocks = cell.get("blocks")
-                    if isinstance(nested_blocks, list):
-                        cell["blocks"] = self._merge_fragment_sequences(nested_blocks)
-        return block
-
     def _combine_paragraph_fragments(self, fragments: List[Dict[str, Any]]) -> Dict[str, Any]:
         """将多个句子片段合并为单个paragraph block"""
         template = dict(fragments[0])
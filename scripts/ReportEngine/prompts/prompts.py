@@ -6,13 +6,42 @@ Report Engine 的所有提示词定义。
 """
 
 import json
+from functools import lru_cache
 
 from ..ir import (
     ALLOWED_BLOCK_TYPES,
     ALLOWED_INLINE_MARKS,
+    CHAPTER_JSON_SCHEMA,
     CHAPTER_JSON_SCHEMA_TEXT,
     IR_VERSION,
 )
+from ..ir.schema_dsl import DSL_LEGEND, schema_to_dsl
+
+# ===== 提示词编码模式 =====
+# pretty：缩进JSON（历史行为）；compact：最小化JSON；
+# dsl：payload最小化，系统提示词中的Schema改写为简写记法（ir/schema_dsl.py）
+PROMPT_ENCODINGS = ("pretty", "compact", "dsl")
+
+
+def normalize_encoding(encoding) -> str:
+    """未知或空的编码模式回退为 pretty。"""
+    value = str(encoding or "pretty").strip().lower()
+    return value if value in PROMPT_ENCODINGS else "pretty"
+
+
+def encode_payload(payload, encoding: str = "pretty") -> str:
+    """按编码模式序列化提示词中的JSON数据。"""
+    if normalize_encoding(encoding) == "pretty":
+        return json.dumps(payload, ensure_ascii=False, indent=2)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_schema(schema: dict, encoding: str = "pretty") -> str:
+    """按编码模式输出Schema文本，dsl模式附带记法说明。"""
+    encoding = normalize_encoding(encoding)
+    if encoding == "dsl":
+        return f"{DSL_LEGEND}\n{schema_to_dsl(schema)}"
+    return encode_payload(schema, encoding)
 
 # ===== JSON Schema 定义 =====
 
@@ -465,16 +494,83 @@ SYSTEM_PROMPT_WORD_BUDGET = f"""
 """
 
 
-def build_chapter_user_prompt(payload: dict) -> str:
+# ===== 前缀缓存友好的用户提示词布局 =====
+# 服务商的前缀缓存只复用逐字节相同的开头部分：全书共享的上下文放在最前，
+# 每章/每个节点独有的内容追加在最后，且共享部分的序列化必须稳定。
+
+# constraints 中随章节变化的字段，归入章节部分
+_CHAPTER_LOCAL_CONSTRAINTS = (
+    "allowSwot",
+    "allowPest",
+    "wordTarget",
+    "minWords",
+    "maxWords",
+    "emphasis",
+    "sectionBudgets",
+)
+# 文档设计与篇幅规划共同的输入字段，按固定顺序置于提示词开头
+PLANNING_SHARED_FIELDS = ("query", "templateOverview", "reports", "forumLogs")
+
+_SHARED_CONTEXT_PREAMBLE = (
+    "输入分为两部分：<SHARED CONTEXT> 为全书共享的上下文，其后为本次任务独有的内容；"
+    "两部分出现同名字段（如 constraints）时合并理解，以后者为准。\n\n"
+)
+
+
+def _layered_prompt(shared: dict, local: dict, local_tag: str, encoding: str = "pretty") -> str:
+    """按“共享上下文在前、独有内容在后”的顺序拼接用户提示词。"""
+    return (
+        f"{_SHARED_CONTEXT_PREAMBLE}"
+        f"<SHARED CONTEXT>\n{encode_payload(shared, encoding)}\n</SHARED CONTEXT>\n\n"
+        f"<{local_tag}>\n{encode_payload(local, encoding)}\n</{local_tag}>"
+    )
+
+
+def split_chapter_payload(payload: dict, shared_sources: bool = False):
+    """
+    把章节payload拆成 (全书共享部分, 本章部分)。
+
+    共享部分：globalContext（除 sectionBudgets）、constraints 中与章节无关的字段、
+    dataBundles、wordPlan；shared_sources 为True（各章使用相同的完整素材）时
+    reports/forumLogs 也归入共享部分。其余字段（section、chapterPlan、graphResults 等）归入本章。
+    """
+    shared: dict = {}
+    local: dict = {}
+    source_keys = ("reports", "forumLogs")
+    for key, value in payload.items():
+        if key == "globalContext" and isinstance(value, dict):
+            shared[key] = {k: v for k, v in value.items() if k != "sectionBudgets"}
+            if "sectionBudgets" in value:
+                local[key] = {"sectionBudgets": value["sectionBudgets"]}
+        elif key == "constraints" and isinstance(value, dict):
+            shared[key] = {k: v for k, v in value.items() if k not in _CHAPTER_LOCAL_CONSTRAINTS}
+            chapter_constraints = {k: v for k, v in value.items() if k in _CHAPTER_LOCAL_CONSTRAINTS}
+            if chapter_constraints:
+                local[key] = chapter_constraints
+        elif key in ("dataBundles", "wordPlan") or (shared_sources and key in source_keys):
+            shared[key] = value
+        else:
+            local[key] = value
+    return shared, local
+
+
+def build_chapter_user_prompt(payload: dict, shared_sources: bool = False, encoding: str = "pretty") -> str:
     """
     将章节上下文序列化为提示词输入。
 
-    统一使用 `json.dumps(..., indent=2, ensure_ascii=False)`，便于LLM读取。
+    全书共享的上下文在前、本章内容在后，所有章节的提示词拥有逐字节相同的前缀，
+    便于服务商复用前缀缓存。序列化方式由 encoding 决定（见 `encode_payload`）。
+
+    参数:
+        payload: ChapterGenerationNode 构造的章节payload。
+        shared_sources: 各章是否使用相同的完整报告/论坛日志（未启用章节检索时为True）。
+        encoding: 提示词编码模式。
     """
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    shared, local = split_chapter_payload(payload, shared_sources=shared_sources)
+    return _layered_prompt(shared, local, "CHAPTER CONTEXT", encoding)
 
 
-def build_chapter_repair_prompt(chapter: dict, errors, original_text=None) -> str:
+def build_chapter_repair_prompt(chapter: dict, errors, original_text=None, encoding: str = "pretty") -> str:
     """
     构造章节修复输入payload，包含原始章节与校验错误。
     """
@@ -485,11 +581,11 @@ def build_chapter_repair_prompt(chapter: dict, errors, original_text=None) -> st
     if original_text:
         snippet = original_text[-2000:]
         payload["rawOutputTail"] = snippet
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    return encode_payload(payload, encoding)
 
 
 def build_chapter_recovery_payload(
-    section: dict, generation_payload: dict, raw_output: str
+    section: dict, generation_payload: dict, raw_output: str, encoding: str = "pretty"
 ) -> str:
     """
     构造跨引擎JSON抢修输入，附带章节元信息、生成指令与原始输出。
@@ -501,17 +597,59 @@ def build_chapter_recovery_payload(
         "generationPayload": generation_payload,
         "rawChapterOutput": raw_output[-8000:] if isinstance(raw_output, str) else raw_output,
     }
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    return encode_payload(payload, encoding)
+
+
+def _build_planning_prompt(payload: dict, encoding: str) -> str:
+    """规划类节点共用：PLANNING_SHARED_FIELDS 在前，节点独有字段在后。"""
+    shared = {key: payload[key] for key in PLANNING_SHARED_FIELDS if key in payload}
+    local = {key: value for key, value in payload.items() if key not in shared}
+    return _layered_prompt(shared, local, "TASK CONTEXT", encoding)
 
 
-def build_document_layout_prompt(payload: dict) -> str:
+def build_document_layout_prompt(payload: dict, encoding: str = "pretty") -> str:
     """将文档设计所需的上下文序列化为JSON字符串，供布局节点发送给LLM。"""
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    return _build_planning_prompt(payload, encoding)
 
 
-def build_word_budget_prompt(payload: dict) -> str:
+def build_word_budget_prompt(payload: dict, encoding: str = "pretty") -> str:
     """将篇幅规划输入转为字符串，便于送入LLM并保持字段精确。"""
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    return _build_planning_prompt(payload, encoding)
+
+
+# 系统提示词名称 -> (pretty版本, 内嵌的Schema, 其pretty文本)
+_SYSTEM_PROMPT_SCHEMAS = {
+    "chapter": (SYSTEM_PROMPT_CHAPTER_JSON, CHAPTER_JSON_SCHEMA, CHAPTER_JSON_SCHEMA_TEXT),
+    "chapter_repair": (SYSTEM_PROMPT_CHAPTER_JSON_REPAIR, CHAPTER_JSON_SCHEMA, CHAPTER_JSON_SCHEMA_TEXT),
+    "document_layout": (
+        SYSTEM_PROMPT_DOCUMENT_LAYOUT,
+        document_layout_output_schema,
+        json.dumps(document_layout_output_schema, ensure_ascii=False, indent=2),
+    ),
+    "word_budget": (
+        SYSTEM_PROMPT_WORD_BUDGET,
+        word_budget_output_schema,
+        json.dumps(word_budget_output_schema, ensure_ascii=False, indent=2),
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def get_system_prompt(name: str, encoding: str = "pretty") -> str:
+    """
+    返回指定编码模式下的系统提示词。
+
+    仅替换其中内嵌的Schema文本，其余说明保持不变；pretty 模式即原始的 SYSTEM_PROMPT_* 常量。
+
+    参数:
+        name: chapter / chapter_repair / document_layout / word_budget。
+        encoding: 提示词编码模式。
+    """
+    base_prompt, schema, pretty_text = _SYSTEM_PROMPT_SCHEMAS[name]
+    encoding = normalize_encoding(encoding)
+    if encoding == "pretty":
+        return base_prompt
+    return base_prompt.replace(pretty_text, encode_schema(schema, encoding), 1)
 
 
 # ==================== GraphRAG 增强提示词 ====================
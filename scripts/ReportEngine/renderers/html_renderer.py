@@ -21,6 +21,7 @@ from typing import Any, Dict, List
 from loguru import logger
 
 from ReportEngine.ir.schema import ENGINE_AGENT_TITLES
+from ReportEngine.ir.traversal import iter_document_blocks
 from ReportEngine.utils.chart_validator import (
     ChartValidator,
     ChartRepairer,
@@ -2685,35 +2686,9 @@ class HTMLRenderer:
 
         target_ir = document_ir or {}
 
-        def _walk_blocks(blocks: list, chapter_ctx: Dict[str, Any] | None = None) -> None:
-            for blk in blocks or []:
-                if not isinstance(blk, dict):
-                    continue
-                if blk.get("type") == "widget":
-                    self._ensure_chart_reviewed(blk, chapter_ctx, increment_stats=True)
-
-                nested_blocks = blk.get("blocks")
-                if isinstance(nested_blocks, list):
-                    _walk_blocks(nested_blocks, chapter_ctx)
-
-                if blk.get("type") == "list":
-                    for item in blk.get("items", []):
-                        if isinstance(item, list):
-                            _walk_blocks(item, chapter_ctx)
-
-                if blk.get("type") == "table":
-                    for row in blk.get("rows", []):
-                        cells = row.get("cells", [])
-                        for cell in cells:
-                            if isinstance(cell, dict):
-                                cell_blocks = cell.get("blocks", [])
-                                if isinstance(cell_blocks, list):
-                                    _walk_blocks(cell_blocks, chapter_ctx)
-
-        for chapter in target_ir.get("chapters", []) or []:
-            if not isinstance(chapter, dict):
-                continue
-            _walk_blocks(chapter.get("blocks", []), chapter)
+        for ref in iter_document_blocks(target_ir):
+            if ref.type == "widget":
+                self._ensure_chart_reviewed(ref.block, ref.chapter, increment_stats=True)
 
         return copy.deepcopy(target_ir) if clone else target_ir
 
@@ -0,0 +1,64 @@
+"""
+PDF布局优化器文本宽度估算与字号搜索的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/renderers/test_pdf_layout_optimizer.py -v
+"""
+
+import random
+
+import pytest
+
+from ReportEngine.renderers import pdf_layout_optimizer
+from ReportEngine.renderers.pdf_layout_optimizer import PDFLayoutOptimizer
+
+SAMPLE_CHARS = "中文亿元9876543210abcXYZ%％ ,.-😀"
+
+
+@pytest.fixture
+def optimizer():
+    return PDFLayoutOptimizer()
+
+
+def _stepwise_font_size(optimizer, text, max_width, min_font_size, max_font_size):
+    """逐级递减的参考实现"""
+    for font_size in range(max_font_size, min_font_size - 1, -1):
+        if not optimizer._check_text_overflow(text, font_size, max_width):
+            return font_size, font_size < max_font_size
+    return min_font_size, True
+
+
+def test_closed_form_matches_stepwise_search(optimizer):
+    rng = random.Random(7)
+    for _ in range(2000):
+        text = "".join(rng.choice(SAMPLE_CHARS) for _ in range(rng.randint(1, 60)))
+        max_width = rng.randint(0, 800)
+        min_font_size = rng.randint(8, 20)
+        max_font_size = rng.randint(min_font_size - 2, 40)
+        args = (text, max_width, min_font_size, max_font_size)
+        assert optimizer._calculate_safe_font_size(*args) == _stepwise_font_size(optimizer, *args)
+    assert optimizer._calculate_safe_font_size("", 100) == (32, False)
+
+
+def test_vectorized_and_scalar_widths_agree(optimizer, monkeypatch):
+    text = "数据增长12.5%，环比+3.2pt😀" * 10
+    vectorized = optimizer._text_width_units(text)
+    monkeypatch.setattr(PDFLayoutOptimizer, "_width_ndarray", None)
+    assert optimizer._text_width_units(text) == pytest.approx(vectorized)
+    assert optimizer._estimate_text_width(text, 14) == pytest.approx(14 * vectorized)
+
+
+def test_width_table_uses_font_advances():
+    pytest.importorskip("fontTools")
+    advances = pdf_layout_optimizer.load_glyph_advances()
+    assert advances[ord("中")] == pytest.approx(1.0)
+    table = PDFLayoutOptimizer._get_width_table()
+    margin = PDFLayoutOptimizer.GLYPH_WIDTH_MARGIN
+    assert table[ord("9")] == pytest.approx(advances[ord("9")] * margin)
+    # 字体未覆盖的字符按类别系数估算
+    assert ord("％") not in advances
+    assert table[ord("％")] == PDFLayoutOptimizer.CHAR_WIDTH_FACTOR["percent"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
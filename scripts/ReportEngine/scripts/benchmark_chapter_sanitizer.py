@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+章节规整（_sanitize_chapter_blocks + _ensure_content_density）的微基准。
+
+以 generate_all_blocks_demo 的全部章节为样本，每章节尝试都会执行一次规整与
+正文密度校验（含重试），这里按两组负载计时：
+
+- demo:       原样的演示章节，覆盖全部block类型；
+- fragmented: 将每个paragraph按inline拆成多个短片段，模拟LLM把句子拆散的输出，
+              同时放大片段合并的开销。
+
+每轮都在章节副本上执行（规整是原地修改），副本构造不计入耗时。
+
+使用方法:
+    python -m ReportEngine.scripts.benchmark_chapter_sanitizer
+    python -m ReportEngine.scripts.benchmark_chapter_sanitizer --repeat 500 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+from ReportEngine.nodes.chapter_generation_node import ChapterContentError, ChapterGenerationNode
+from ReportEngine.scripts.generate_all_blocks_demo import build_chapters
+
+
+def _fragment_blocks(blocks: Any) -> Any:
+    """把paragraph按inline拆成多个paragraph，递归处理嵌套blocks"""
+    if not isinstance(blocks, list):
+        return blocks
+    result: List[Any] = []
+    for block in blocks:
+        if not isinstance(block, dict):
+            result.append(block)
+            continue
+        if block.get("type") == "paragraph" and len(block.get("inlines") or []) > 1:
+            result.extend({"type": "paragraph", "inlines": [run]} for run in block["inlines"])
+            continue
+        if isinstance(block.get("blocks"), list):
+            block = dict(block, blocks=_fragment_blocks(block["blocks"]))
+        if block.get("type") == "list" and isinstance(block.get("items"), list):
+            block = dict(block, items=[_fragment_blocks(entry) for entry in block["items"]])
+        result.append(block)
+    return result
+
+
+def _build_workloads() -> Dict[str, List[Dict[str, Any]]]:
+    chapters = build_chapters()
+    fragmented = [dict(chapter, blocks=_fragment_blocks(chapter.get("blocks"))) for chapter in chapters]
+    return {"demo": chapters, "fragmented": fragmented}
+
+
+def _sanitize_and_check(node: ChapterGenerationNode, chapter: Dict[str, Any]) -> None:
+    stats = node._sanitize_chapter_blocks(chapter)
+    try:
+        node._ensure_content_density(chapter, stats)
+    except ChapterContentError:
+        pass
+
+
+def _time_workload(node: ChapterGenerationNode, chapters: List[Dict[str, Any]], repeat: int) -> float:
+    """取多轮中最快的一轮，返回每章节的微秒数"""
+    best = float("inf")
+    for _ in range(repeat):
+        copies = copy.deepcopy(chapters)
+        start = time.perf_counter()
+        for chapter in copies:
+            _sanitize_and_check(node, chapter)
+        best = min(best, time.perf_counter() - start)
+    return best / len(chapters) * 1e6
+
+
+def run_benchmark(repeat: int) -> Dict[str, Any]:
+    """对每组负载计时，返回每章节微秒数"""
+    # 规整方法不依赖LLM/存储，跳过构造函数以免创建日志目录
+    node = ChapterGenerationNode.__new__(ChapterGenerationNode)
+    workloads = _build_workloads()
+    logger.disable("ReportEngine")
+    try:
+        results = {name: _time_workload(node, chapters, repeat) for name, chapters in workloads.items()}
+    finally:
+        logger.enable("ReportEngine")
+    return {
+        "repeat": repeat,
+        "chapters": {name: len(chapters) for name, chapters in workloads.items()},
+        "usPerChapter": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="统计章节规整与正文密度校验的耗时")
+    parser.add_argument("--repeat", type=int, default=200, help="每组负载重复的轮数（取最快一轮）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    result = run_benchmark(max(args.repeat, 1))
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{'负载':<14}{'章节数':>8}{'µs/章节':>12}")
+    print("-" * 34)
+    for name, value in result["usPerChapter"].items():
+        print(f"{name:<14}{result['chapters'][name]:>8}{value:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
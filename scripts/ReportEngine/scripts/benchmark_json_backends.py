@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+JSON序列化后端的微基准。
+
+以 generate_all_blocks_demo 的全部章节为样本，模拟热路径上的典型负载：
+
+- sse_event:   publish_event → _format_sse，每个流式增量事件编码一次；
+- chapter_dump: ChapterStorage.persist_chapter，紧凑写出章节JSON；
+- manifest:     ChapterStorage._write_manifest，缩进写出manifest；
+- cache_key:    build_block_cache_key，按键排序编码 + MD5；
+- chapter_load: RobustJSONParser / load_chapters，解析章节JSON文本；
+- graph_roundtrip: GraphStorage.save/load，缩进编码与解析较大的图谱。
+
+对 utils.serialization 当前环境可用的每个后端分别计时，并以标准库 json 为基线给出加速比。
+
+使用方法:
+    python -m ReportEngine.scripts.benchmark_json_backends
+    python -m ReportEngine.scripts.benchmark_json_backends --repeat 500 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from ReportEngine.scripts.generate_all_blocks_demo import build_chapters
+from ReportEngine.utils import serialization
+from ReportEngine.utils.repair_cache import build_block_cache_key
+
+
+def _iter_widgets(blocks: List[Any]):
+    for block in blocks or []:
+        if not isinstance(block, dict):
+            continue
+        if block.get("type") == "widget":
+            yield block
+        yield from _iter_widgets(block.get("blocks"))
+
+
+def _build_workloads() -> Dict[str, Tuple[int, Callable[[], Any]]]:
+    """返回 负载名 -> (每轮操作数, 执行一轮的函数)"""
+    chapters = build_chapters()
+    chapter_texts = [json.dumps(chapter, ensure_ascii=False) for chapter in chapters]
+    widgets = [widget for chapter in chapters for widget in _iter_widgets(chapter.get("blocks"))]
+    events = [
+        {
+            "id": index,
+            "type": "chapter_chunk",
+            "task_id": "report-20250101-000000",
+            "timestamp": "2025-01-01T00:00:00",
+            "payload": {"chapterId": "S1", "delta": text[:80], "attempt": 1},
+        }
+        for index, text in enumerate(chapter_texts * 20)
+    ]
+    manifest = {
+        "reportId": "report-20250101-000000",
+        "chapters": [
+            {
+                "chapterId": chapter.get("chapterId"),
+                "slug": chapter.get("anchor"),
+                "title": chapter.get("title"),
+                "order": chapter.get("order"),
+                "status": "ready",
+                "files": {"raw": "stream.raw", "json": "chapter.json"},
+                "errors": [],
+            }
+            for chapter in chapters
+        ],
+    }
+    graph = {
+        "task_id": "report-20250101-000000",
+        "nodes": [
+            {"id": f"N{i:05d}", "type": "entity", "name": f"实体{i}", "properties": {"weight": i * 0.5}}
+            for i in range(2000)
+        ],
+        "edges": [
+            {"source": f"N{i:05d}", "target": f"N{(i * 7) % 2000:05d}", "relation": "关联", "weight": 1.0}
+            for i in range(4000)
+        ],
+    }
+
+    dumps, loads = serialization.dumps, serialization.loads
+
+    def graph_roundtrip() -> Any:
+        return loads(dumps(graph, indent=True))
+
+    return {
+        "sse_event": (len(events), lambda: [dumps(event) for event in events]),
+        "chapter_dump": (len(chapters), lambda: [dumps(chapter) for chapter in chapters]),
+        "manifest": (1, lambda: dumps(manifest, indent=True)),
+        "cache_key": (len(widgets), lambda: [build_block_cache_key(widget) for widget in widgets]),
+        "chapter_load": (len(chapter_texts), lambda: [loads(text) for text in chapter_texts]),
+        "graph_roundtrip": (1, graph_roundtrip),
+    }
+
+
+def _time_it(fn: Callable[[], Any], repeat: int) -> float:
+    """取多轮中最快的一轮，减少调度抖动"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(repeat: int) -> Dict[str, Any]:
+    """对每个可用后端运行全部负载，返回每次操作的微秒数"""
+    workloads = _build_workloads()
+    backends = list(serialization.available_backends())
+    results: Dict[str, Dict[str, float]] = {}
+    previous = serialization.get_backend()
+    try:
+        for backend in backends:
+            serialization.set_backend(backend)
+            results[backend] = {
+                name: _time_it(fn, repeat) / ops * 1e6 for name, (ops, fn) in workloads.items()
+            }
+    finally:
+        serialization.set_backend(previous)
+    return {"repeat": repeat, "backends": backends, "usPerOp": results}
+
+
+def _print_table(result: Dict[str, Any]) -> None:
+    backends = result["backends"]
+    baseline = result["usPerOp"]["json"]
+    header = f"{'负载':<18}" + "".join(f"{name + ' µs':>14}" for name in backends) + f"{'最佳加速':>10}"
+    print(header)
+    print("-" * len(header))
+    for workload, base in baseline.items():
+        cells = "".join(f"{result['usPerOp'][name][workload]:>14.2f}" for name in backends)
+        best = min(result["usPerOp"][name][workload] for name in backends)
+        print(f"{workload:<18}{cells}{base / best:>9.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比JSON序列化后端在热路径负载上的耗时")
+    parser.add_argument("--repeat", type=int, default=200, help="每个负载重复的轮数（取最快一轮）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    result = run_benchmark(max(args.repeat, 1))
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        _print_table(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Report Engine ASGI接口的测试用例（路由、404、事件日志回放与WSGI桥逐块转发）。
+
+运行测试：
+    python -m pytest ReportEngine/test_asgi_interface.py -v
+"""
+
+import asyncio
+import json
+
+import pytest
+from flask import Flask, Response
+
+from ReportEngine import asgi_interface
+from ReportEngine.asgi_interface import ReportASGIApp, create_flask_app
+from ReportEngine.utils.config import settings
+from ReportEngine.utils.event_log import TaskEventLog
+
+
+def _scope(path, method="GET", query=b"", headers=()):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": list(headers),
+    }
+
+
+def _call(app, scope, body=b""):
+    """驱动一次ASGI请求，返回发送出的全部消息"""
+    sent = []
+
+    async def run():
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+
+    asyncio.run(run())
+    return sent
+
+
+def _body(messages):
+    return b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+
+
+@pytest.fixture
+def app():
+    asgi_app = ReportASGIApp(create_flask_app(), max_workers=2, initialize=False)
+    yield asgi_app
+    asgi_app.shutdown(wait=True)
+
+
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        ("GET", "/api/report/stream/task_1", "task_1"),
+        ("POST", "/api/report/stream/task_1", None),
+        ("GET", "/api/report/stream/", None),
+        ("GET", "/api/report/stream/task_1/metrics", None),
+        ("GET", "/api/report/progress/task_1", None),
+    ],
+)
+def test_match_stream(app, method, path, expected):
+    assert app._match_stream(_scope(path, method)) == expected
+
+
+def test_unknown_task_stream_returns_404(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_LOG_DIR", str(tmp_path))
+    messages = _call(app, _scope("/api/report/stream/missing"))
+    assert messages[0]["status"] == 404
+    assert json.loads(_body(messages)) == {"success": False, "error": "任务不存在"}
+
+
+def test_finished_task_stream_replays_event_log(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EVENT_LOG_ENABLED", True)
+    log = TaskEventLog(tmp_path, "task_done")
+    for event_id, event_type in ((1, "status"), (2, "log"), (3, "completed")):
+        log.append({"id": event_id, "type": event_type, "task_id": "task_done", "payload": {}})
+    log.close()
+
+    messages = _call(app, _scope("/api/report/stream/task_done", headers=[(b"last-event-id", b"1")]))
+    assert messages[0]["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in messages[0]["headers"]
+    text = _body(messages).decode("utf-8")
+    assert "id: 1\n" not in text
+    assert "id: 2\n" in text and "id: 3\n" in text
+    assert messages[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+
+
+def test_event_log_replay_is_sent_in_batches(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EVENT_LOG_ENABLED", True)
+    monkeypatch.setattr(asgi_interface, "REPLAY_BATCH_SIZE", 2)
+    log = TaskEventLog(tmp_path, "task_long")
+    for event_id in range(1, 8):
+        log.append({"id": event_id, "type": "log", "task_id": "task_long", "payload": {}})
+    log.close()
+
+    batches = []
+    next_batch = app._next_batch
+
+    async def record(events):
+        batch = await next_batch(events)
+        batches.append(len(batch))
+        return batch
+
+    monkeypatch.setattr(app, "_next_batch", record)
+    text = _body(_call(app, _scope("/api/report/stream/task_long"))).decode("utf-8")
+    assert batches == [2, 2, 2, 1, 0]
+    assert all(f"id: {event_id}\n" in text for event_id in range(1, 8))
+
+
+def test_executor_is_created_lazily_and_released_on_shutdown():
+    asgi_app = ReportASGIApp(create_flask_app(), max_workers=1, initialize=False)
+    assert asgi_app._executor is None
+    messages = []
+
+    async def run():
+        incoming = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+
+        async def receive():
+            return next(incoming)
+
+        async def send(message):
+            messages.append((message["type"], asgi_app._executor is not None))
+
+        await asgi_app({"type": "lifespan"}, receive, send)
+
+    asyncio.run(run())
+    assert messages == [("lifespan.startup.complete", True), ("lifespan.shutdown.complete", False)]
+
+
+def test_forwarded_routes_keep_flask_responses(app):
+    messages = _call(app, _scope("/api/report/result/missing"))
+    assert messages[0]["status"] == 404
+    assert json.loads(_body(messages)) == {"success": False, "error": "任务不存在"}
+    assert dict(messages[0]["headers"])[b"content-type"] == b"application/json"
+
+
+def test_forwarded_body_is_streamed_in_chunks():
+    flask_app = Flask(__name__)
+    closed = []
+
+    @flask_app.route("/api/report/export/big")
+    def big():
+        def generate():
+            try:
+                for index in range(3):
+                    yield f"part{index};"
+            finally:
+                closed.append(True)
+
+        return Response(generate(), mimetype="text/plain")
+
+    asgi_app = ReportASGIApp(flask_app, max_workers=1, initialize=False)
+    try:
+        messages = _call(asgi_app, _scope("/api/report/export/big", query=b"x=1"))
+    finally:
+        asgi_app.shutdown(wait=True)
+
+    assert messages[0]["status"] == 200
+    bodies = [m for m in messages if m["type"] == "http.response.body"]
+    assert [m["body"] for m in bodies] == [b"part0;", b"part1;", b"part2;", b""]
+    assert all(m["more_body"] for m in bodies[:-1]) and not bodies[-1].get("more_body")
+    assert closed == [True]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
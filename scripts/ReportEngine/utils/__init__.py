@@ -20,6 +20,11 @@ from ReportEngine.utils.table_validator import (
     create_table_repairer,
 )
 
+from ReportEngine.utils.repair_cache import (
+    RepairCache,
+    get_repair_cache,
+)
+
 __all__ = [
     "ChartReviewService",
     "ReviewStats",
@@ -31,4 +36,6 @@ __all__ = [
     "TableRepairResult",
     "create_table_validator",
     "create_table_repairer",
+    "RepairCache",
+    "get_repair_cache",
 ]
@@ -22,12 +22,13 @@
 from __future__ import annotations
 
 import copy
-import json
-import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple, Callable
 from dataclasses import dataclass
 from loguru import logger
 
+from ReportEngine.utils.repair_cache import build_block_cache_key
+
 
 @dataclass
 class ValidationResult:
@@ -363,6 +364,79 @@ class ChartValidator:
         return result.is_valid
 
 
+class WordCloudValidator:
+    """
+    词云验证器 - 检查词云widget中是否有可渲染的词条。
+
+    ChartValidator 对非 chart.js 的 widget 直接放行，词云需要单独校验：
+    1. widgetType 包含 wordcloud；
+    2. 在 data.words/data.items/data/props.words/props.items/props.data 之一找到非空列表；
+    3. 至少有一个词条带有文字（字符串、[词, 权重] 或含 word/text/label 的对象）。
+    """
+
+    # 依次查找词条列表的位置：(顶层字段, 子字段)，子字段为 None 表示字段本身即列表
+    WORD_PATHS = (
+        ('data', 'words'),
+        ('data', 'items'),
+        ('data', None),
+        ('props', 'words'),
+        ('props', 'items'),
+        ('props', 'data'),
+    )
+
+    def validate(self, widget_block: Dict[str, Any]) -> ValidationResult:
+        """
+        验证词云格式。
+
+        Args:
+            widget_block: widget类型的block
+
+        Returns:
+            ValidationResult: 验证结果
+        """
+        errors: List[str] = []
+        warnings: List[str] = []
+
+        if not isinstance(widget_block, dict):
+            errors.append("widget_block必须是字典类型")
+            return ValidationResult(False, errors, warnings)
+
+        widget_type = widget_block.get('widgetType')
+        if not isinstance(widget_type, str) or 'wordcloud' not in widget_type.lower():
+            errors.append("widgetType必须是词云类型")
+
+        words = self._find_words(widget_block)
+        if not words:
+            errors.append("词云数据缺失：未在 data.words/data.items/props.words 等路径找到非空列表")
+        else:
+            usable = sum(1 for item in words if self._word_text(item))
+            if not usable:
+                errors.append("词云条目均缺少 word/text/label 文字")
+            elif usable < len(words):
+                warnings.append(f"{len(words) - usable} 个词云条目缺少文字，将被忽略")
+
+        return ValidationResult(len(errors) == 0, errors, warnings)
+
+    def _find_words(self, widget_block: Dict[str, Any]) -> List[Any]:
+        """返回第一个非空的词条列表"""
+        for field, key in self.WORD_PATHS:
+            value = widget_block.get(field)
+            if key is not None:
+                value = value.get(key) if isinstance(value, dict) else None
+            if isinstance(value, list) and value:
+                return value
+        return []
+
+    @staticmethod
+    def _word_text(item: Any) -> str:
+        """提取词条文字（无法识别时返回空串）"""
+        if isinstance(item, dict):
+            item = item.get('word') or item.get('text') or item.get('label')
+        elif isinstance(item, (list, tuple)) and item:
+            item = item[0]
+        return item.strip() if isinstance(item, str) else ''
+
+
 class ChartRepairer:
     """
     图表修复器 - 尝试修复图表数据。
@@ -384,6 +458,9 @@ class ChartRepairer:
         Args:
             validator: 图表验证器实例
             llm_repair_fns: LLM修复函数列表（对应4个Engine）
+
+        磁盘缓存只保存 LLM 修复结果，由 chart_repair_api 中的修复函数负责；
+        本地规则修复成本很低，每次重新计算。
         """
         self.validator = validator
         self.llm_repair_fns = llm_repair_fns or []
@@ -397,20 +474,7 @@ class ChartRepairer:
         - 优先使用widgetId；
         - 结合数据内容的哈希，避免同ID但内容变化时误用旧结果。
         """
-        widget_id = ""
-        if isinstance(widget_block, dict):
-            widget_id = widget_block.get('widgetId') or widget_block.get('id') or ""
-        try:
-            serialized = json.dumps(
-                widget_block,
-                ensure_ascii=False,
-                sort_keys=True,
-                default=str
-            )
-        except Exception:
-            serialized = repr(widget_block)
-        digest = hashlib.md5(serialized.encode('utf-8', errors='ignore')).hexdigest()
-        return f"{widget_id}:{digest}"
+        return build_block_cache_key(widget_block)
 
     def repair(
         self,
@@ -427,21 +491,93 @@ class ChartRepairer:
         Returns:
             RepairResult: 修复结果
         """
-        cache_key = self.build_cache_key(widget_block)
+        return self.repair_batch([(widget_block, validation_result)])[0]
 
-        cached = self._result_cache.get(cache_key)
-        if cached:
-            # 返回缓存的深拷贝，避免外部修改影响缓存
-            return copy.deepcopy(cached)
+    def repair_batch(
+        self,
+        items: List[Tuple[Dict[str, Any], Optional[ValidationResult]]],
+        max_workers: int = 1
+    ) -> List[RepairResult]:
+        """
+        两阶段批量修复多个图表。
 
-        def _cache_and_return(res: RepairResult) -> RepairResult:
-            """写入修复结果缓存并返回，避免重复调用下游修复逻辑"""
-            try:
-                self._result_cache[cache_key] = copy.deepcopy(res)
-            except Exception:
-                self._result_cache[cache_key] = res
-            return res
+        阶段一：逐个命中缓存/本地修复，收集仍需API修复的图表；
+        阶段二：将待API修复的图表交给线程池并发调用LLM（同一批次内
+        内容完全相同的图表只请求一次），最后按原顺序返回结果。
+
+        Args:
+            items: (widget_block, validation_result) 列表，validation_result 可为 None
+            max_workers: API修复阶段的最大并发数，<=1 时串行
+
+        Returns:
+            List[RepairResult]: 与 items 一一对应的修复结果
+        """
+        results: List[Optional[RepairResult]] = [None] * len(items)
+        # cache_key -> 阶段一的中间状态；同批次重复图表共享一次API修复
+        pending: Dict[str, Dict[str, Any]] = {}
+        pending_indexes: Dict[str, List[int]] = {}
+
+        for index, (widget_block, validation_result) in enumerate(items):
+            cache_key = self.build_cache_key(widget_block)
+            cached = self._result_cache.get(cache_key)
+            if cached:
+                # 返回缓存的深拷贝，避免外部修改影响缓存
+                results[index] = copy.deepcopy(cached)
+                continue
+            if cache_key in pending:
+                pending_indexes[cache_key].append(index)
+                continue
+
+            stage = self._repair_local_stage(widget_block, validation_result)
+            if stage.get('result') is not None:
+                results[index] = self._cache_result(cache_key, stage['result'])
+                continue
+            pending[cache_key] = stage
+            pending_indexes[cache_key] = [index]
+
+        if pending:
+            keys = list(pending.keys())
+            if max_workers > 1 and len(keys) > 1:
+                logger.info(f"并发API修复 {len(keys)} 个图表（并发数 {min(max_workers, len(keys))}）")
+                with ThreadPoolExecutor(
+                    max_workers=min(max_workers, len(keys)),
+                    thread_name_prefix="chart-repair",
+                ) as executor:
+                    api_results = list(executor.map(
+                        lambda key: self._repair_api_stage(pending[key]),
+                        keys,
+                    ))
+            else:
+                api_results = [self._repair_api_stage(pending[key]) for key in keys]
+
+            for key, result in zip(keys, api_results):
+                cached_result = self._cache_result(key, result)
+                first, *others = pending_indexes[key]
+                results[first] = cached_result
+                for index in others:
+                    results[index] = copy.deepcopy(cached_result)
+
+        return results  # type: ignore[return-value]
 
+    def _cache_result(self, cache_key: str, res: RepairResult) -> RepairResult:
+        """写入修复结果缓存并返回，避免重复调用下游修复逻辑"""
+        try:
+            self._result_cache[cache_key] = copy.deepcopy(res)
+        except Exception:
+            self._result_cache[cache_key] = res
+        return res
+
+    def _repair_local_stage(
+        self,
+        widget_block: Dict[str, Any],
+        validation_result: Optional[ValidationResult]
+    ) -> Dict[str, Any]:
+        """
+        修复阶段一：验证 + 本地规则修复。
+
+        返回的字典中 `result` 非空表示已得出最终结果；否则表示仍有严重错误
+        且存在可用的LLM修复函数，其余字段供 `_repair_api_stage` 继续处理。
+        """
         # 1. 如果没有验证结果，先验证
         if validation_result is None:
             validation_result = self.validator.validate(widget_block)
@@ -459,45 +595,65 @@ class ChartRepairer:
             repaired_validation = self.validator.validate(local_result.repaired_block)
             if repaired_validation.is_valid:
                 logger.info(f"本地修复成功: {local_result.changes}")
-                return _cache_and_return(
-                    RepairResult(True, local_result.repaired_block, 'local', local_result.changes)
-                )
+                return {
+                    'result': RepairResult(True, local_result.repaired_block, 'local', local_result.changes)
+                }
             else:
                 logger.warning(f"本地修复后仍然无效: {repaired_validation.errors}")
                 # 更新当前状态为本地修复后的结果，供API修复使用
                 current_validation = repaired_validation
                 current_block = local_result.repaired_block
 
-        # 4. 如果当前仍有严重错误，尝试API修复
+        stage = {
+            'result': None,
+            'widget_block': widget_block,
+            'validation_result': validation_result,
+            'local_result': local_result,
+            'current_block': current_block,
+            'current_validation': current_validation,
+        }
+
+        # 4. 如果当前仍有严重错误，交给API阶段
         # 注意：使用 current_validation 而非原始 validation_result
         if current_validation.has_critical_errors() and len(self.llm_repair_fns) > 0:
-            logger.info("本地修复失败或不足，尝试API修复")
-            # 传入本地已修复的数据（如果有），避免浪费本地修复的工作
-            api_result = self.repair_with_api(current_block, current_validation)
-
-            if api_result.success:
-                # 验证修复结果
-                api_repaired_validation = self.validator.validate(api_result.repaired_block)
-                if api_repaired_validation.is_valid:
-                    logger.info(f"API修复成功: {api_result.changes}")
-                    return _cache_and_return(api_result)
-                else:
-                    logger.warning(f"API修复后仍然无效: {api_repaired_validation.errors}")
+            return stage
+
+        stage['result'] = self._finalize_repair(stage)
+        return stage
+
+    def _repair_api_stage(self, stage: Dict[str, Any]) -> RepairResult:
+        """修复阶段二：调用LLM修复并得出最终结果（可在线程池中并发执行）。"""
+        logger.info("本地修复失败或不足，尝试API修复")
+        # 传入本地已修复的数据（如果有），避免浪费本地修复的工作
+        api_result = self.repair_with_api(stage['current_block'], stage['current_validation'])
+
+        if api_result.success:
+            # 验证修复结果
+            api_repaired_validation = self.validator.validate(api_result.repaired_block)
+            if api_repaired_validation.is_valid:
+                logger.info(f"API修复成功: {api_result.changes}")
+                return api_result
+            else:
+                logger.warning(f"API修复后仍然无效: {api_repaired_validation.errors}")
+
+        return self._finalize_repair(stage)
+
+    def _finalize_repair(self, stage: Dict[str, Any]) -> RepairResult:
+        """API修复不可用或失败后的兜底结果。"""
+        widget_block = stage['widget_block']
+        local_result = stage['local_result']
 
         # 5. 如果原始验证通过，返回原始或修复后的数据
-        if validation_result.is_valid:
+        if stage['validation_result'].is_valid:
             if local_result.has_changes():
-                return _cache_and_return(
-                    RepairResult(True, local_result.repaired_block, 'local', local_result.changes)
-                )
-            else:
-                return _cache_and_return(RepairResult(True, widget_block, 'none', []))
+                return RepairResult(True, local_result.repaired_block, 'local', local_result.changes)
+            return RepairResult(True, widget_block, 'none', [])
 
         # 6. 所有修复都失败，返回原始数据（或本地部分修复的数据）
         logger.warning("所有修复尝试失败，保持原始数据")
         # 如果本地有部分修复，返回本地修复后的数据（虽然验证仍失败，但可能比原始数据好）
         final_block = local_result.repaired_block if local_result.has_changes() else widget_block
-        return _cache_and_return(RepairResult(False, final_block, 'none', []))
+        return RepairResult(False, final_block, 'none', [])
 
     def repair_locally(
         self,
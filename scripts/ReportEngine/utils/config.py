@@ -5,7 +5,7 @@ Report Engine 配置模块，统一读取环境变量并提供类型安全的访
 import os
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Dict, Optional
 
 from loguru import logger
 
@@ -44,15 +44,47 @@ class Settings(BaseSettings):
         None, description="Media Engine LLM模型名称"
     )
     MAX_CONTENT_LENGTH: int = Field(200000, description="最大内容长度")
+    # 规划类节点（文档设计/篇幅规划）只需素材概貌：去重+按相关度装入token预算
+    CONTEXT_PACKING_ENABLED: bool = Field(True, description="规划节点是否使用按预算打包后的报告")
+    PLANNING_CONTEXT_TOKENS: int = Field(
+        24000, description="规划节点三引擎报告的总token预算（按引擎均分，未用完的份额可互借）"
+    )
+    # 章节生成按提纲从三引擎报告+论坛日志中检索相关段落，而非每章携带全文
+    CHAPTER_RETRIEVAL_ENABLED: bool = Field(True, description="章节生成是否按章节检索上下文")
+    CHAPTER_CONTEXT_TOKENS: int = Field(
+        12000, description="每章检索上下文（三引擎报告+论坛日志）的总token预算"
+    )
+    # 提示词编码：pretty=缩进JSON，compact=最小化JSON，dsl=最小化JSON+Schema简写记法
+    PROMPT_ENCODING: str = Field("compact", description="提示词中JSON/Schema的默认编码模式")
+    PROMPT_ENCODING_OVERRIDES: Dict[str, str] = Field(
+        default_factory=dict,
+        description="按节点覆盖编码模式，键为 chapter/document_layout/word_budget",
+    )
     OUTPUT_DIR: str = Field("final_reports", description="主输出目录")
     # 章节分块JSON会存储在该目录，便于溯源与断点续传
     CHAPTER_OUTPUT_DIR: str = Field(
         "final_reports/chapters", description="章节JSON缓存目录"
     )
+    CHAPTER_MANIFEST_FSYNC: str = Field(
+        "compact", description="章节manifest落盘策略：always/compact/never"
+    )
+    CHAPTER_MANIFEST_COMPACT_EVERY: int = Field(
+        64, description="manifest日志累计多少条记录后合并进快照"
+    )
+    CHAPTER_STREAM_COMPRESSION: str = Field(
+        "none", description="章节stream.raw压缩方式：none/gzip/zstd（zstd需安装zstandard）"
+    )
+    CHAPTER_STREAM_FLUSH_INTERVAL: float = Field(
+        0.5, description="章节stream.raw后台写盘的最长间隔（秒）"
+    )
     # 装订后的整本IR/manifest也会持久化，方便调试与审计
     DOCUMENT_IR_OUTPUT_DIR: str = Field(
         "final_reports/ir", description="整本IR/Manifest输出目录"
     )
+    DOCUMENT_IR_PRETTY: bool = Field(
+        False,
+        description="整本IR是否以缩进JSON保存；默认一章一行的紧凑格式，可逐章流式读取",
+    )
     CHAPTER_JSON_MAX_ATTEMPTS: int = Field(
         2, description="章节JSON解析失败时的最大尝试次数"
     )
@@ -63,6 +95,43 @@ class Settings(BaseSettings):
     LOG_FILE: str = Field("logs/report.log", description="日志输出文件")
     ENABLE_PDF_EXPORT: bool = Field(True, description="是否允许导出PDF")
     CHART_STYLE: str = Field("modern", description="图表样式：modern/classic/")
+    CHART_REPAIR_MAX_WORKERS: int = Field(
+        4, description="图表审查阶段并发调用LLM修复的最大线程数（1为串行）"
+    )
+    # 图表/表格/词云修复结果的磁盘缓存，重新导出旧报告时不再重复修复
+    REPAIR_CACHE_ENABLED: bool = Field(True, description="是否启用修复结果磁盘缓存")
+    REPAIR_CACHE_PATH: str = Field(
+        "final_reports/cache/repair_cache.sqlite3", description="修复结果缓存文件（SQLite）"
+    )
+    REPAIR_CACHE_MAX_ENTRIES: int = Field(5000, description="修复缓存最大条目数（LRU淘汰）")
+    REPAIR_CACHE_MAX_BYTES: int = Field(
+        64 * 1024 * 1024, description="修复缓存最大总字节数（LRU淘汰）"
+    )
+    # 章节流式输出合并：把LLM的细碎delta合并成帧后再推送SSE（两者均为0时逐条推送）
+    STREAM_CHUNK_FLUSH_MS: int = Field(50, description="chapter_chunk合并时间窗口（毫秒）")
+    STREAM_CHUNK_FLUSH_BYTES: int = Field(2048, description="chapter_chunk单帧最大字节数")
+    STREAM_SUBSCRIBER_QUEUE_SIZE: int = Field(
+        500, description="单个SSE订阅者的事件缓冲上限（超出后合并/丢弃chunk与日志并重新同步）"
+    )
+    ASGI_WSGI_WORKERS: int = Field(
+        16, description="ASGI服务中转发非流式接口到Flask蓝图的线程池大小"
+    )
+    # 三引擎输入目录监听：维护内存索引替代逐请求扫描，变化通过 /inputs/stream 推送
+    INPUT_WATCHER_ENABLED: bool = Field(True, description="是否启用输入目录监听（watchdog不可用时轮询）")
+    INPUT_WATCHER_POLL_SECONDS: float = Field(2.0, description="轮询模式的扫描间隔（秒）")
+    INPUT_AUTO_GENERATE: bool = Field(False, description="三引擎都产出新报告后是否自动开始生成")
+    INPUT_AUTO_GENERATE_DELAY: float = Field(
+        10.0, description="自动生成前的防抖等待（秒），等待引擎写完同一批文件"
+    )
+    INPUT_AUTO_GENERATE_QUERY: str = Field("智能舆情分析报告", description="自动生成使用的报告主题")
+    # 任务事件磁盘日志：SSE断线/进程重启后可按Last-Event-ID完整回放
+    EVENT_LOG_ENABLED: bool = Field(True, description="是否把任务事件写入磁盘追加日志")
+    EVENT_LOG_DIR: str = Field("logs/report_events", description="任务事件日志根目录")
+    EVENT_LOG_SEGMENT_BYTES: int = Field(
+        4 * 1024 * 1024, description="单个事件日志分段的最大字节数"
+    )
+    EVENT_LOG_MAX_SEGMENTS: int = Field(16, description="每个任务保留的事件日志分段数")
+    EVENT_LOG_MAX_TASKS: int = Field(20, description="保留事件日志的最近任务数")
     JSON_ERROR_LOG_DIR: str = Field(
         "logs/json_repair_failures", description="无法修复的JSON块落盘目录"
     )
@@ -74,6 +143,12 @@ class Settings(BaseSettings):
     GRAPHRAG_MAX_QUERIES: int = Field(
         default=3, description="GraphRAG每章节查询次数上限"
     )
+    GRAPHRAG_INCREMENTAL: bool = Field(
+        default=True, description="是否复用同主题上一版graphrag.json中未变化的段落（增量构建）"
+    )
+    GRAPHRAG_BUILD_WORKERS: int = Field(
+        default=3, description="并行加载三引擎输入/构建引擎子图的线程数（1为串行）"
+    )
 
     class Config:
         """Pydantic配置：允许从.env读取并兼容大小写"""
@@ -0,0 +1,251 @@
+"""
+三引擎报告目录的事件驱动索引。
+
+过去每次 /status、/generate 都要 ``os.listdir`` 三个目录并对每个 ``.md``
+调用 ``os.path.getmtime``，前端还会轮询 /status。本模块在后台维护一份内存索引：
+
+- 优先使用 watchdog（Linux 上为 inotify）监听文件创建/修改/删除/移动；
+- watchdog 不可用或目录尚不存在时退回后台轮询（每个周期扫描一次，而不是每个请求扫描一次）；
+- 索引记录每个目录下的报告文件及其 mtime，直接给出文件数与最新文件；
+- 变化时回调监听者，由 Web 层转成 SSE 事件或自动触发生成。
+
+watchdog 为可选依赖，未安装时自动使用轮询模式。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于运行环境
+    FileSystemEventHandler = object
+    Observer = None
+    WATCHDOG_AVAILABLE = False
+
+InputListener = Callable[[str], None]
+
+
+class _DirectoryEventHandler(FileSystemEventHandler):
+    """把 watchdog 事件转交给 InputWatcher"""
+
+    def __init__(self, watcher: "InputWatcher", engine: str):
+        super().__init__()
+        self.watcher = watcher
+        self.engine = engine
+
+    def on_any_event(self, event):
+        if getattr(event, "is_directory", False):
+            return
+        paths = [getattr(event, "src_path", None), getattr(event, "dest_path", None)]
+        self.watcher._on_fs_event(self.engine, [p for p in paths if p])
+
+
+class InputWatcher:
+    """
+    维护各引擎报告目录的内存索引。
+
+    线程安全：索引由内部锁保护，监听回调在锁外执行。
+    """
+
+    def __init__(
+        self,
+        directories: Dict[str, str],
+        poll_interval: float = 2.0,
+        use_watchdog: bool = True,
+        suffix: str = ".md",
+    ):
+        """
+        参数:
+            directories: 引擎名 -> 报告目录
+            poll_interval: 轮询周期（秒）；watchdog 模式下作为兜底校准周期的基数
+            use_watchdog: 是否尝试使用 watchdog
+            suffix: 需要索引的文件后缀
+        """
+        self.directories = {engine: os.path.normpath(path) for engine, path in directories.items()}
+        self.poll_interval = max(0.1, float(poll_interval))
+        self.suffix = suffix
+        self.use_watchdog = use_watchdog and WATCHDOG_AVAILABLE
+        self._files: Dict[str, Dict[str, float]] = {engine: {} for engine in self.directories}
+        self._watched: set = set()
+        self._lock = threading.RLock()
+        self._listeners: List[InputListener] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    # ====== 生命周期 ======
+
+    @property
+    def mode(self) -> str:
+        """当前工作模式：watchdog 或 polling"""
+        return "watchdog" if self._observer is not None else "polling"
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "InputWatcher":
+        """建立初始索引并启动监听（重复调用无副作用）"""
+        if self.running:
+            return self
+        self._stop.clear()
+        for engine in self.directories:
+            self._rescan(engine)
+        if self.use_watchdog:
+            try:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._schedule_missing()
+                self._observer.start()
+            except Exception as exc:
+                logger.warning(f"watchdog 启动失败，改用轮询: {exc}")
+                self._observer = None
+        self._thread = threading.Thread(target=self._run, name="report-input-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"输入目录监听已启动（{self.mode}）: {self.counts()}")
+        return self
+
+    def stop(self) -> None:
+        """停止监听线程与 watchdog"""
+        self._stop.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=2)
+            except Exception:
+                pass
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        """
+        后台循环。
+
+        轮询模式下每个周期重扫一次；watchdog 模式下只为尚未存在的目录补挂监听，
+        并以较长周期校准一次，防止丢事件。
+        """
+        ticks = 0
+        calibrate_every = 15
+        while not self._stop.wait(self.poll_interval):
+            ticks += 1
+            if self._observer is None:
+                self.rescan()
+                continue
+            self._schedule_missing()
+            if ticks % calibrate_every == 0:
+                self.rescan()
+
+    def _schedule_missing(self) -> None:
+        """为已出现但尚未监听的目录挂载 watchdog"""
+        for engine, directory in self.directories.items():
+            if engine in self._watched or not os.path.isdir(directory):
+                continue
+            self._observer.schedule(_DirectoryEventHandler(self, engine), directory, recursive=False)
+            self._watched.add(engine)
+            # 目录刚出现时里面可能已有文件
+            self._rescan(engine, notify=True)
+
+    # ====== 索引 ======
+
+    def _scan(self, directory: str) -> Dict[str, float]:
+        files: Dict[str, float] = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(self.suffix) and entry.is_file():
+                        try:
+                            files[entry.name] = entry.stat().st_mtime
+                        except OSError:
+                            continue
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        except OSError as exc:
+            logger.debug(f"扫描输入目录失败 {directory}: {exc}")
+        return files
+
+    def _rescan(self, engine: str, notify: bool = False) -> bool:
+        files = self._scan(self.directories[engine])
+        with self._lock:
+            changed = files != self._files.get(engine)
+            self._files[engine] = files
+        if changed and notify:
+            self._notify(engine)
+        return changed
+
+    def rescan(self) -> None:
+        """全量校准所有目录，发生变化的目录会通知监听者"""
+        for engine in self.directories:
+            self._rescan(engine, notify=True)
+
+    def _on_fs_event(self, engine: str, paths: List[str]) -> None:
+        directory = self.directories[engine]
+        changed = False
+        with self._lock:
+            files = self._files.setdefault(engine, {})
+            for path in paths:
+                if os.path.dirname(os.path.normpath(path)) != directory:
+                    continue
+                name = os.path.basename(path)
+                if not name.endswith(self.suffix):
+                    continue
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    mtime = None
+                if mtime is None:
+                    changed = files.pop(name, None) is not None or changed
+                elif files.get(name) != mtime:
+                    files[name] = mtime
+                    changed = True
+        if changed:
+            self._notify(engine)
+
+    def counts(self) -> Dict[str, int]:
+        """各引擎当前的报告文件数"""
+        with self._lock:
+            return {engine: len(files) for engine, files in self._files.items()}
+
+    def latest_files(self) -> Dict[str, str]:
+        """各引擎最近写入的报告路径（目录为空的引擎不出现在结果中）"""
+        latest: Dict[str, str] = {}
+        with self._lock:
+            for engine, files in self._files.items():
+                if files:
+                    name = max(files, key=files.get)
+                    latest[engine] = os.path.join(self.directories[engine], name)
+        return latest
+
+    def covers(self, directories: Dict[str, str]) -> bool:
+        """索引是否覆盖给定的目录映射（用于调用方判断能否直接使用索引）"""
+        return self.running and all(
+            self.directories.get(engine) == os.path.normpath(path)
+            for engine, path in directories.items()
+        )
+
+    # ====== 监听者 ======
+
+    def add_listener(self, listener: InputListener) -> None:
+        """注册变化回调，参数为发生变化的引擎名"""
+        self._listeners.append(listener)
+
+    def _notify(self, engine: str) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(engine)
+            except Exception:
+                logger.exception("输入目录变化回调执行失败")
+
+
+__all__ = [
+    "InputWatcher",
+    "WATCHDOG_AVAILABLE",
+]
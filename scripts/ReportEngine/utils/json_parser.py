@@ -16,6 +16,8 @@ import re
 from typing import Any, Dict, List, Optional, Tuple, Callable
 from loguru import logger
 
+from ReportEngine.utils.serialization import loads
+
 try:
     from json_repair import repair_json as _json_repair_fn
 except ImportError:
@@ -118,7 +120,7 @@ class RobustJSONParser:
         last_error: Optional[json.JSONDecodeError] = None
         for i, candidate in enumerate(candidates):
             try:
-                data = json.loads(candidate)
+                data = loads(candidate)
                 logger.debug(f"{context_name} JSON解析成功（候选{i + 1}/{len(candidates)}）")
                 return self._extract_and_validate(
                     data, expected_keys, extract_wrapper_key, context_name
@@ -134,7 +136,7 @@ class RobustJSONParser:
             repaired = self._attempt_json_repair(cleaned, context_name)
             if repaired:
                 try:
-                    data = json.loads(repaired)
+                    data = loads(repaired)
                     logger.info(f"{context_name} JSON通过json_repair库修复成功")
                     return self._extract_and_validate(
                         data, expected_keys, extract_wrapper_key, context_name
@@ -148,7 +150,7 @@ class RobustJSONParser:
             llm_repaired = self._attempt_llm_repair(cleaned, str(last_error), context_name)
             if llm_repaired:
                 try:
-                    data = json.loads(llm_repaired)
+                    data = loads(llm_repaired)
                     logger.info(f"{context_name} JSON通过LLM修复成功")
                     return self._extract_and_validate(
                         data, expected_keys, extract_wrapper_key, context_name
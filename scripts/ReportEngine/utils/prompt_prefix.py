@@ -0,0 +1,109 @@
+"""
+提示词公共前缀统计。
+
+支持前缀缓存（prompt/KV cache）的服务商会复用与之前请求逐字节相同的开头部分。
+本模块记录一次运行中所有 LLM 调用的 system+user 提示词，按系统提示词分组，
+统计每次调用与同组历史调用的最长公共前缀，用于衡量提示词布局的缓存友好程度。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """两个字符串最长公共前缀的字符数（二分比较切片，避免逐字符Python循环）"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+@dataclass
+class _PromptFamily:
+    system_bytes: int
+    calls: int = 0
+    prompt_bytes: int = 0
+    shared_bytes: int = 0
+    prompts: List[str] = field(default_factory=list)
+
+
+class PromptPrefixTracker:
+    """
+    记录提示词并统计可被前缀缓存复用的字节数。
+
+    同一系统提示词下，第二次及之后的调用中与任一历史调用相同的开头部分
+    （系统提示词 + user 的公共前缀）计为 shared_bytes。线程安全。
+    """
+
+    def __init__(self, max_prompts_per_family: int = 64):
+        self.max_prompts_per_family = max_prompts_per_family
+        self._families: Dict[str, _PromptFamily] = {}
+        self._labels: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, system_prompt: str, user_prompt: str) -> int:
+        """
+        记录一次调用，返回本次可复用的前缀字节数。
+
+        可直接作为 ``LLMClient.prompt_observer`` 使用。
+        """
+        system_prompt = system_prompt or ""
+        user_prompt = user_prompt or ""
+        key = hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            family = self._families.get(key)
+            if family is None:
+                family = _PromptFamily(system_bytes=len(system_prompt.encode("utf-8")))
+                self._families[key] = family
+                self._labels[key] = system_prompt.strip().split("\n", 1)[0][:40]
+            prompts = list(family.prompts)
+
+        shared = 0
+        if prompts:
+            prefix_chars = max(common_prefix_length(user_prompt, previous) for previous in prompts)
+            shared = family.system_bytes + len(user_prompt[:prefix_chars].encode("utf-8"))
+
+        with self._lock:
+            family.calls += 1
+            family.prompt_bytes += family.system_bytes + len(user_prompt.encode("utf-8"))
+            family.shared_bytes += shared
+            if len(family.prompts) < self.max_prompts_per_family:
+                family.prompts.append(user_prompt)
+        return shared
+
+    def summary(self) -> Dict[str, object]:
+        """按系统提示词分组的统计，以及整次运行的合计"""
+        with self._lock:
+            families = [
+                {
+                    "family": key,
+                    "label": self._labels.get(key, ""),
+                    "calls": family.calls,
+                    "promptBytes": family.prompt_bytes,
+                    "sharedPrefixBytes": family.shared_bytes,
+                }
+                for key, family in self._families.items()
+            ]
+        prompt_bytes = sum(item["promptBytes"] for item in families)
+        shared_bytes = sum(item["sharedPrefixBytes"] for item in families)
+        return {
+            "calls": sum(item["calls"] for item in families),
+            "promptBytes": prompt_bytes,
+            "sharedPrefixBytes": shared_bytes,
+            "sharedRatio": round(shared_bytes / prompt_bytes, 4) if prompt_bytes else 0.0,
+            "families": families,
+        }
+
+
+__all__ = [
+    "PromptPrefixTracker",
+    "common_prefix_length",
+]
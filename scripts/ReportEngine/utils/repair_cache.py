@@ -0,0 +1,278 @@
+"""
+修复结果持久化缓存。
+
+重新导出旧报告的 PDF/HTML 时，同一批图表/表格/词云会再次触发 LLM 修复。
+本模块提供基于 SQLite 的磁盘缓存，只保存 LLM/API 修复结果（本地规则修复
+代价很低，直接重算）：
+
+- 每类修复一个命名空间（chart/table/wordcloud），只由 chart_repair_api
+  中对应的修复函数读写，键为发送给 LLM 的 block 的 build_block_cache_key；
+- 值为修复后的 block、修复方法与变更说明（JSON）；
+- 以条目数和总字节数双重上限做 LRU 淘汰；
+- SQLite 自带文件锁，可在多个进程/线程之间安全共享。
+
+缓存读写失败只记录日志，永远不会影响修复主流程。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from ReportEngine.utils.serialization import canonical_hash, dumps, loads
+
+
+def build_block_cache_key(block: Any) -> str:
+    """
+    为 block 生成稳定的缓存key，保证同样的数据不会重复触发修复。
+
+    - 优先使用widgetId；
+    - 结合数据内容的哈希，避免同ID但内容变化时误用旧结果。
+    """
+    block_id = ""
+    if isinstance(block, dict):
+        block_id = block.get('widgetId') or block.get('id') or ""
+    return f"{block_id}:{canonical_hash(block)}"
+
+
+class RepairCache:
+    """
+    磁盘持久化、容量受限的 LRU 修复缓存。
+
+    线程安全：单连接 + 互斥锁；跨进程安全：依赖 SQLite 的文件锁与 WAL 模式。
+    命中时只做一次 SELECT，访问时间先记在内存里，在 put/淘汰/close 或
+    距上次写回超过 _TOUCH_FLUSH_INTERVAL 秒时批量写回，读路径不再提交事务。
+    """
+
+    # 每写入多少次检查一次容量，避免每次写入都做全表统计
+    _EVICT_CHECK_INTERVAL = 32
+    # 缓冲的访问时间最长多久写回一次（秒）
+    _TOUCH_FLUSH_INTERVAL = 30.0
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: int = 5000,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        初始化缓存（必要时创建数据库文件与表结构）。
+
+        参数:
+            path: SQLite 文件路径
+            max_entries: 最大条目数
+            max_bytes: 缓存值总字节数上限
+        """
+        self.path = Path(path)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._last_touch_flush = time.monotonic()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._open()
+
+    def _open(self) -> None:
+        """打开数据库连接并确保表结构存在。"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS repair_cache (
+                    namespace TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, cache_key)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_repair_cache_access ON repair_cache(last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        except Exception as exc:
+            logger.warning(f"RepairCache: 无法打开缓存文件 {self.path}，持久化缓存已禁用: {exc}")
+            self._conn = None
+
+    @property
+    def enabled(self) -> bool:
+        """缓存是否可用"""
+        return self._conn is not None
+
+    def get(self, namespace: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存并记录访问时间（缓冲在内存中，稍后批量写回）。
+
+        返回:
+            dict | None: 形如 {"repaired_block", "method", "changes", "success"} 的记录
+        """
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM repair_cache WHERE namespace = ? AND cache_key = ?",
+                    (namespace, cache_key),
+                ).fetchone()
+                if row is None:
+                    return None
+                self._touched[(namespace, cache_key)] = time.time()
+                if time.monotonic() - self._last_touch_flush >= self._TOUCH_FLUSH_INTERVAL:
+                    self._flush_touched_locked()
+                    self._conn.commit()
+            return loads(row[0])
+        except Exception as exc:
+            logger.debug(f"RepairCache: 读取缓存失败 ({namespace}/{cache_key}): {exc}")
+            return None
+
+    def put(self, namespace: str, cache_key: str, record: Dict[str, Any]) -> None:
+        """写入（或覆盖）一条缓存记录，必要时触发 LRU 淘汰。"""
+        if self._conn is None:
+            return
+        try:
+            value = dumps(record, default=str)
+            with self._lock:
+                self._touched.pop((namespace, cache_key), None)
+                self._flush_touched_locked()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO repair_cache "
+                    "(namespace, cache_key, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (namespace, cache_key, value, len(value.encode('utf-8')), time.time()),
+                )
+                self._conn.commit()
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= self._EVICT_CHECK_INTERVAL:
+                    self._evict_locked()
+        except Exception as exc:
+            logger.debug(f"RepairCache: 写入缓存失败 ({namespace}/{cache_key}): {exc}")
+
+    def evict(self) -> int:
+        """立即按容量上限淘汰最久未访问的记录，返回删除条数。"""
+        if self._conn is None:
+            return 0
+        try:
+            with self._lock:
+                return self._evict_locked()
+        except Exception as exc:
+            logger.debug(f"RepairCache: 淘汰缓存失败: {exc}")
+            return 0
+
+    def _evict_locked(self) -> int:
+        """在持有锁的前提下执行淘汰（先按条目数，再按总字节数）。"""
+        self._writes_since_evict = 0
+        self._flush_touched_locked()
+        conn = self._conn
+        removed = conn.execute(
+            "DELETE FROM repair_cache WHERE rowid IN ("
+            "SELECT rowid FROM repair_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        removed += conn.execute(
+            "DELETE FROM repair_cache WHERE rowid IN ("
+            "SELECT rowid FROM (SELECT rowid, SUM(size) OVER "
+            "(ORDER BY last_access DESC ROWS UNBOUNDED PRECEDING) AS total FROM repair_cache) "
+            "WHERE total > ?)",
+            (self.max_bytes,),
+        ).rowcount
+        conn.commit()
+        if removed:
+            logger.debug(f"RepairCache: 淘汰 {removed} 条最久未使用的记录")
+        return removed
+
+    def _flush_touched_locked(self) -> None:
+        """在持有锁时批量写回缓冲的访问时间（由调用方提交事务）。"""
+        self._last_touch_flush = time.monotonic()
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._conn.executemany(
+            "UPDATE repair_cache SET last_access = ? WHERE namespace = ? AND cache_key = ?",
+            [(accessed, namespace, cache_key) for (namespace, cache_key), accessed in touched.items()],
+        )
+
+    def flush(self) -> None:
+        """立即写回缓冲的访问时间。"""
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                self._flush_touched_locked()
+                self._conn.commit()
+        except Exception as exc:
+            logger.debug(f"RepairCache: 写回访问时间失败: {exc}")
+
+    def stats(self) -> Dict[str, int]:
+        """返回当前条目数与总字节数。"""
+        if self._conn is None:
+            return {'entries': 0, 'bytes': 0}
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM repair_cache"
+            ).fetchone()
+        return {'entries': int(entries), 'bytes': int(total)}
+
+    def clear(self) -> None:
+        """清空所有命名空间的缓存。"""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM repair_cache")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """写回缓冲的访问时间并关闭数据库连接。"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._flush_touched_locked()
+                    self._conn.commit()
+                except Exception as exc:
+                    logger.debug(f"RepairCache: 写回访问时间失败: {exc}")
+                self._conn.close()
+                self._conn = None
+
+
+_repair_cache: Optional[RepairCache] = None
+_repair_cache_lock = threading.Lock()
+
+
+def get_repair_cache() -> Optional[RepairCache]:
+    """
+    获取全局共享的修复缓存（按配置懒加载）。
+
+    REPAIR_CACHE_ENABLED 为 False 时返回 None，调用方应退回纯内存缓存。
+    """
+    global _repair_cache
+    from ReportEngine.utils.config import settings
+
+    if not getattr(settings, 'REPAIR_CACHE_ENABLED', True):
+        return None
+    if _repair_cache is None:
+        with _repair_cache_lock:
+            if _repair_cache is None:
+                _repair_cache = RepairCache(
+                    settings.REPAIR_CACHE_PATH,
+                    max_entries=settings.REPAIR_CACHE_MAX_ENTRIES,
+                    max_bytes=settings.REPAIR_CACHE_MAX_BYTES,
+                )
+    return _repair_cache if _repair_cache.enabled else None
+
+
+__all__ = [
+    'RepairCache',
+    'build_block_cache_key',
+    'get_repair_cache',
+]
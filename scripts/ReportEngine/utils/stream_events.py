@@ -0,0 +1,537 @@
+"""
+SSE 流式事件的合并工具。
+
+章节生成时 LLM 每个 delta 都会触发一次 ``chapter_chunk`` 事件，单章可达数千条，
+既挤爆订阅队列，也会把有用的状态事件挤出 1000 条的历史缓存。本模块提供：
+
+- ``ChunkCoalescer``：任务级合并器，按时间窗口（默认 50ms）或字节上限（默认 2KB）
+  把同一章节的连续 delta 合并为一帧再发布；
+- ``collect_chunk_batch`` / ``coalesce_chunk_events``：订阅端按客户端参数进一步合并，
+  用于慢客户端积压时的自适应批量下发与历史回放。
+
+- ``SubscriberQueue``：每个 SSE 订阅者的有界缓冲区，满载时先合并/丢弃 chunk 与日志
+  事件（状态、阶段、终态事件永不丢弃），记录滞后指标，并在发生丢弃后提示订阅端
+  从持久化历史重新同步；``AsyncSubscriberQueue`` 是供 asyncio 事件循环消费的变体。
+
+合并帧仍是 ``chapter_chunk`` 事件，``payload.delta`` 为拼接后的文本，
+``payload.chunks`` 记录合并的原始 delta 数，前端无需改动即可兼容。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CHUNK_EVENT_TYPE = "chapter_chunk"
+# 订阅者积压时可以丢弃的事件类型（可从持久化历史补回），其余事件永不丢弃
+DROPPABLE_EVENT_TYPES = frozenset({CHUNK_EVENT_TYPE, "log", "heartbeat"})
+
+
+def _delta_size(delta: Any) -> int:
+    """delta 的UTF-8字节数"""
+    return len(str(delta or "").encode("utf-8"))
+
+
+class ChunkCoalescer:
+    """
+    把同一章节的 chapter_chunk delta 合并成帧。
+
+    - 缓冲累计字节数达到 ``max_bytes`` 时立即发布；
+    - 否则在首个 delta 到达 ``window_ms`` 毫秒后由后台刷新线程发布；
+    - 章节切换或调用方显式 ``flush()``（如发布状态事件前）时立即发布，保证事件顺序。
+
+    刷新线程每个合并器只有一个，首帧到达时启动，在条件变量上按截止时间等待，
+    ``close()`` 时退出（之后再有数据会重新启动），不会每个窗口新建一个线程。
+    ``window_ms`` 与 ``max_bytes`` 均为 0 时不做合并，每个 delta 直接发布。
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[Dict[str, Any]], None],
+        window_ms: int = 50,
+        max_bytes: int = 2048,
+    ):
+        """
+        参数:
+            emit: 发布合并后 payload 的回调（通常为 ReportTask 的内部发布方法）
+            window_ms: 时间窗口（毫秒）
+            max_bytes: 单帧最大字节数
+        """
+        self._emit = emit
+        self.window_ms = max(0, int(window_ms or 0))
+        self.max_bytes = max(0, int(max_bytes or 0))
+        # 发布动作在锁内执行，保证刷新线程与生产线程的帧不会乱序
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._payload: Optional[Dict[str, Any]] = None
+        self._parts: List[str] = []
+        self._size = 0
+        self._deadline: Optional[float] = None
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用合并"""
+        return self.window_ms > 0 or self.max_bytes > 0
+
+    def add(self, payload: Dict[str, Any]) -> None:
+        """
+        追加一个 chapter_chunk payload。
+
+        参数:
+            payload: 形如 {chapterId, title, delta} 的原始事件数据
+        """
+        if not self.enabled:
+            self._emit(payload)
+            return
+
+        with self._lock:
+            if self._payload is not None and payload.get("chapterId") != self._payload.get("chapterId"):
+                self._flush_locked()
+
+            if self._payload is None:
+                self._payload = {k: v for k, v in payload.items() if k != "delta"}
+                self._start_timer_locked()
+
+            delta = str(payload.get("delta") or "")
+            self._parts.append(delta)
+            self._size += _delta_size(delta)
+
+            if self.max_bytes and self._size >= self.max_bytes:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """立即发布缓冲中的帧（无缓冲时不做任何事）"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """发布剩余数据并停止刷新线程"""
+        with self._lock:
+            self._flush_locked()
+            flusher, self._flusher = self._flusher, None
+            self._cond.notify_all()
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(timeout=1.0)
+
+    def _start_timer_locked(self) -> None:
+        """为当前帧设定发布截止时间，必要时启动刷新线程"""
+        if not self.window_ms:
+            return
+        self._deadline = time.monotonic() + self.window_ms / 1000.0
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="chunk-coalescer", daemon=True
+            )
+            self._flusher.start()
+        else:
+            self._cond.notify()
+
+    def _run_flusher(self) -> None:
+        """刷新线程：等待当前帧的截止时间到达后发布，close() 后退出"""
+        current = threading.current_thread()
+        with self._cond:
+            while self._flusher is current:
+                if self._deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                try:
+                    self._flush_locked()
+                except Exception:  # pragma: no cover - 发布回调自行记录错误，刷新线程不能退出
+                    self._deadline = None
+
+    def _flush_locked(self) -> None:
+        """在持有锁时发布当前帧"""
+        self._deadline = None
+        if self._payload is None:
+            return
+        frame = dict(self._payload)
+        frame["delta"] = "".join(self._parts)
+        frame["chunks"] = len(self._parts)
+        self._payload = None
+        self._parts = []
+        self._size = 0
+        self._emit(frame)
+
+
+class SubscriberQueue:
+    """
+    单个 SSE 订阅者的有界事件缓冲。
+
+    接口与 ``queue.Queue`` 的 put/get/get_nowait/qsize 兼容，区别在于 put 永不阻塞：
+
+    1. 未满时直接入队；
+    2. 已满且新事件是同章节 chunk 时，并入队尾的 chunk 帧；
+    3. 否则丢弃队列中最旧的可丢弃事件（chunk/log/heartbeat）腾出空间；
+    4. 队列里全是关键事件时：新事件可丢弃则丢弃，关键事件仍然入队（允许暂时超出上限）。
+
+    任何丢弃都会置位 ``needs_resync``，订阅端应调用 ``begin_resync`` 后
+    从持久化历史补发，之后 get 会自动跳过已补发过的事件ID。
+    """
+
+    def __init__(self, maxsize: int = 500):
+        self.maxsize = max(1, int(maxsize))
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self._needs_resync = False
+        self.last_enqueued_id = 0
+        self.last_delivered_id = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.delivered = 0
+        self.resyncs = 0
+        self.max_depth = 0
+
+    @staticmethod
+    def _event_id(event: Dict[str, Any]) -> Optional[int]:
+        """仅整数ID参与滞后计算（心跳等临时事件的ID为字符串）"""
+        event_id = event.get("id") if isinstance(event, dict) else None
+        return event_id if isinstance(event_id, int) else None
+
+    def put(self, event: Dict[str, Any], block: bool = True, timeout: Optional[float] = None) -> None:
+        """入队（永不阻塞，block/timeout 仅为兼容 Queue 接口）"""
+        with self._cond:
+            event_id = self._event_id(event)
+            if event_id is not None:
+                self.last_enqueued_id = max(self.last_enqueued_id, event_id)
+
+            if len(self._items) >= self.maxsize and not self._make_room_locked(event):
+                return
+
+            self._items.append(event)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify()
+
+    def _make_room_locked(self, event: Dict[str, Any]) -> bool:
+        """队列已满时执行合并/丢弃策略，返回新事件是否仍需入队"""
+        tail = self._items[-1] if self._items else None
+        if (
+            isinstance(tail, dict)
+            and event.get("type") == CHUNK_EVENT_TYPE
+            and can_merge_chunk([tail], event)
+        ):
+            self._items[-1] = merge_chunk_events([tail, event])
+            self.coalesced += 1
+            return False
+
+        for idx, queued in enumerate(self._items):
+            if isinstance(queued, dict) and queued.get("type") in DROPPABLE_EVENT_TYPES:
+                del self._items[idx]
+                self._record_drop_locked()
+                return True
+
+        if event.get("type") in DROPPABLE_EVENT_TYPES:
+            self._record_drop_locked()
+            return False
+        # 关键事件永不丢弃，允许暂时超出上限
+        return True
+
+    def _record_drop_locked(self) -> None:
+        self.dropped += 1
+        self._needs_resync = True
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        取出下一条事件，自动跳过ID不大于 last_delivered_id 的重复事件。
+
+        无事件时按 Queue 语义抛出 ``queue.Empty``。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                while self._items:
+                    event = self._items.popleft()
+                    event_id = self._event_id(event)
+                    if event_id is not None and event_id <= self.last_delivered_id:
+                        continue
+                    if event_id is not None:
+                        self.last_delivered_id = event_id
+                    self.delivered += 1
+                    return event
+                if not block:
+                    raise Empty
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Empty
+                self._cond.wait(remaining)
+
+    def get_nowait(self) -> Dict[str, Any]:
+        """非阻塞取出"""
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        """当前缓冲的事件数"""
+        with self._cond:
+            return len(self._items)
+
+    def mark_delivered(self, event_id: Any) -> None:
+        """记录通过其他途径（历史回放）已送达的事件ID"""
+        if isinstance(event_id, int):
+            with self._cond:
+                self.last_delivered_id = max(self.last_delivered_id, event_id)
+
+    @property
+    def needs_resync(self) -> bool:
+        """是否因丢弃事件需要从持久化历史补发"""
+        return self._needs_resync
+
+    def begin_resync(self) -> int:
+        """
+        开始一次重新同步：清空缓冲（这些事件会从历史中补回）并返回补发起点。
+
+        返回:
+            int: 订阅者最后收到的事件ID
+        """
+        with self._cond:
+            self._items.clear()
+            self._needs_resync = False
+            self.resyncs += 1
+            return self.last_delivered_id
+
+    def stats(self) -> Dict[str, int]:
+        """滞后与丢弃指标"""
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "maxsize": self.maxsize,
+                "lag": max(0, self.last_enqueued_id - self.last_delivered_id),
+                "last_delivered_id": self.last_delivered_id,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "resyncs": self.resyncs,
+            }
+
+
+class AsyncSubscriberQueue(SubscriberQueue):
+    """
+    供 asyncio 订阅端（ASGI SSE）使用的 ``SubscriberQueue``。
+
+    生产者仍在任意线程中同步 put（合并/丢弃/重新同步策略完全一致），
+    入队后通过 ``call_soon_threadsafe`` 唤醒事件循环；消费端 ``await aget()``
+    等待，不占用线程。
+    """
+
+    def __init__(self, maxsize: int = 500, loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__(maxsize)
+        self._loop = loop or asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def put(self, event: Dict[str, Any], block: bool = True, timeout: Optional[float] = None) -> None:
+        """同步入队并唤醒事件循环（事件循环已关闭时只入队）"""
+        super().put(event, block, timeout)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass
+
+    async def aget(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        异步取出下一条事件，超时抛出 ``queue.Empty``。
+
+        必须在创建队列的事件循环中调用。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._ready.clear()
+            try:
+                return self.get_nowait()
+            except Empty:
+                pass
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise Empty
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                raise Empty from None
+
+
+def merge_chunk_events(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    把若干条同章节的 chapter_chunk 事件合并为一条。
+
+    合并后沿用最后一条事件的 id/timestamp，保证 Last-Event-ID 断线续传不丢数据。
+    """
+    if len(events) == 1:
+        return events[0]
+    last = events[-1]
+    payload = dict(last.get("payload") or {})
+    payload["delta"] = "".join(str((evt.get("payload") or {}).get("delta") or "") for evt in events)
+    payload["chunks"] = sum(int((evt.get("payload") or {}).get("chunks") or 1) for evt in events)
+    merged = dict(last)
+    merged["payload"] = payload
+    return merged
+
+
+def can_merge_chunk(current: List[Dict[str, Any]], event: Dict[str, Any]) -> bool:
+    """判断 event 能否并入 current 这组 chapter_chunk"""
+    if not current or event.get("type") != CHUNK_EVENT_TYPE:
+        return False
+    chapter_id = (current[0].get("payload") or {}).get("chapterId")
+    return (event.get("payload") or {}).get("chapterId") == chapter_id
+
+
+def iter_coalesced_chunk_events(
+    events: Iterable[Dict[str, Any]],
+    max_bytes: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """
+    惰性合并事件序列中相邻的同章节 chapter_chunk，其余事件原样产出。
+
+    参数:
+        events: 按 id 排序的事件（可为磁盘日志的迭代器）
+        max_bytes: 单帧字节上限，0 表示不限
+    """
+    group: List[Dict[str, Any]] = []
+    group_size = 0
+
+    for event in events:
+        if event.get("type") != CHUNK_EVENT_TYPE:
+            if group:
+                yield merge_chunk_events(group)
+                group, group_size = [], 0
+            yield event
+            continue
+
+        size = _delta_size((event.get("payload") or {}).get("delta"))
+        if group and (not can_merge_chunk(group, event) or (max_bytes and group_size + size > max_bytes)):
+            yield merge_chunk_events(group)
+            group, group_size = [], 0
+        group.append(event)
+        group_size += size
+
+    if group:
+        yield merge_chunk_events(group)
+
+
+def coalesce_chunk_events(
+    events: Iterable[Dict[str, Any]],
+    max_bytes: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    合并事件序列中相邻的同章节 chapter_chunk，其余事件原样保留。
+
+    参数:
+        events: 按 id 排序的事件
+        max_bytes: 单帧字节上限，0 表示不限
+
+    返回:
+        list[dict]: 合并后的事件列表
+    """
+    return list(iter_coalesced_chunk_events(events, max_bytes))
+
+
+def parse_client_batching(args: Dict[str, Any], default_bytes: int) -> Dict[str, int]:
+    """
+    解析客户端请求中的批量参数（``chunk_window_ms``/``chunk_max_bytes``）。
+
+    非法值回退到默认：不额外等待，单帧上限为服务端默认值的 8 倍。
+    """
+    def _as_int(key: str, fallback: int) -> int:
+        try:
+            value = int(args.get(key, fallback))
+        except (TypeError, ValueError):
+            return fallback
+        return max(0, value)
+
+    return {
+        "window_ms": min(_as_int("chunk_window_ms", 0), 5000),
+        "max_bytes": _as_int("chunk_max_bytes", max(default_bytes, 1) * 8),
+    }
+
+
+def collect_chunk_batch(
+    first_event: Dict[str, Any],
+    queue: Queue | SubscriberQueue,
+    window_ms: int = 0,
+    max_bytes: int = 0,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    订阅端自适应批量：以 first_event 为起点，从队列中继续取出可合并的 chapter_chunk。
+
+    队列中已积压的事件会被立即合并（客户端越慢，帧越大）；``window_ms`` > 0 时
+    还会在窗口内等待新的 delta。遇到不可合并的事件即停止，并把它作为第二个返回值
+    交还调用方，保证事件顺序。
+
+    返回:
+        (合并后的事件, 取出但未合并的下一条事件或None)
+    """
+    if first_event.get("type") != CHUNK_EVENT_TYPE or not max_bytes:
+        return first_event, None
+
+    group = [first_event]
+    size = _delta_size((first_event.get("payload") or {}).get("delta"))
+    deadline = time.monotonic() + window_ms / 1000.0
+    leftover: Optional[Dict[str, Any]] = None
+
+    while size < max_bytes:
+        remaining = deadline - time.monotonic()
+        try:
+            event = queue.get(timeout=remaining) if remaining > 0 else queue.get_nowait()
+        except Empty:
+            break
+        event_size = _delta_size((event.get("payload") or {}).get("delta")) if isinstance(event, dict) else 0
+        if not isinstance(event, dict) or not can_merge_chunk(group, event) or size + event_size > max_bytes:
+            leftover = event
+            break
+        group.append(event)
+        size += event_size
+
+    return merge_chunk_events(group), leftover
+
+
+async def acollect_chunk_batch(
+    first_event: Dict[str, Any],
+    queue: AsyncSubscriberQueue,
+    window_ms: int = 0,
+    max_bytes: int = 0,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """``collect_chunk_batch`` 的异步版本，窗口等待期间不阻塞事件循环。"""
+    if first_event.get("type") != CHUNK_EVENT_TYPE or not max_bytes:
+        return first_event, None
+
+    group = [first_event]
+    size = _delta_size((first_event.get("payload") or {}).get("delta"))
+    deadline = time.monotonic() + window_ms / 1000.0
+    leftover: Optional[Dict[str, Any]] = None
+
+    while size < max_bytes:
+        remaining = deadline - time.monotonic()
+        try:
+            event = await queue.aget(timeout=remaining) if remaining > 0 else queue.get_nowait()
+        except Empty:
+            break
+        event_size = _delta_size((event.get("payload") or {}).get("delta")) if isinstance(event, dict) else 0
+        if not isinstance(event, dict) or not can_merge_chunk(group, event) or size + event_size > max_bytes:
+            leftover = event
+            break
+        group.append(event)
+        size += event_size
+
+    return merge_chunk_events(group), leftover
+
+
+__all__ = [
+    "CHUNK_EVENT_TYPE",
+    "DROPPABLE_EVENT_TYPES",
+    "ChunkCoalescer",
+    "SubscriberQueue",
+    "AsyncSubscriberQueue",
+    "merge_chunk_events",
+    "can_merge_chunk",
+    "coalesce_chunk_events",
+    "iter_coalesced_chunk_events",
+    "collect_chunk_batch",
+    "acollect_chunk_batch",
+    "parse_client_batching",
+]
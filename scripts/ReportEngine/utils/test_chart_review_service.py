@@ -0,0 +1,41 @@
+"""
+图表审查服务保存IR的测试用例（DOCUMENT_IR_PRETTY 与逐章写出）。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_chart_review_service.py -v
+"""
+
+import json
+
+import pytest
+
+from ReportEngine.ir.document_io import iter_chapters
+from ReportEngine.utils.chart_review_service import ChartReviewService
+from ReportEngine.utils.config import settings
+
+DOCUMENT = {
+    "version": "1.0",
+    "metadata": {"title": "测试报告"},
+    "chapters": [
+        {"chapterId": "c1", "blocks": [{"type": "paragraph", "inlines": [{"text": "甲"}]}]},
+        {"chapterId": "c2", "blocks": []},
+    ],
+}
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+def test_save_ir_follows_pretty_setting(tmp_path, monkeypatch, pretty):
+    monkeypatch.setattr(settings, "DOCUMENT_IR_PRETTY", pretty)
+    path = tmp_path / "report_ir.json"
+
+    ChartReviewService()._save_ir_to_file(DOCUMENT, path)
+
+    text = path.read_text(encoding="utf-8")
+    assert json.loads(text) == DOCUMENT
+    # 紧凑格式首行即文档头，缩进格式则逐字段换行
+    assert text.splitlines()[0].endswith('"chapters":[') is not pretty
+    assert [chapter["chapterId"] for chapter in iter_chapters(path)] == ["c1", "c2"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,110 @@
+"""
+上下文打包工具的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_context_packing.py -v
+"""
+
+import pytest
+
+from ReportEngine.utils.context_packing import (
+    NearDuplicateFilter,
+    PassageIndex,
+    bm25_scores,
+    estimate_tokens,
+    pack_sources,
+    split_passages,
+)
+
+
+def _paragraph(seed, topic="电池"):
+    return f"第{seed}段：关于{topic}供应链的观察，产能与订单情况持续变化，编号{seed}。" * 3
+
+
+class TestHelpers:
+    """测试估算、切分与去重"""
+
+    def test_estimate_tokens_mixed_text(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("中文") == 2
+        assert estimate_tokens("abcdefgh") == 2
+
+    def test_split_passages_breaks_long_blocks(self):
+        text = "\n\n".join(["短句。"] + ["很长的句子。" * 50])
+        passages = split_passages(text, max_chars=100)
+        assert all(len(p) <= 100 for p in passages)
+        assert "".join(passages).replace("\n", "") == text.replace("\n", "")
+
+    def test_near_duplicate_filter(self):
+        dedup = NearDuplicateFilter(threshold=0.8)
+        base = "Tesla shipped 420,000 vehicles in the quarter, beating analyst estimates by 5%."
+        assert dedup.add(base)
+        assert not dedup.add(base.replace("5%", "5 %"))
+        assert dedup.add("Bitcoin regulation leaks suggest a new framework for exchanges in Europe.")
+
+
+class TestPackSources:
+    """测试按预算打包"""
+
+    def test_within_budget_is_unchanged(self):
+        sources = {"a": "alpha report", "b": "beta report"}
+        packed = pack_sources(sources, "report", budget_tokens=1000)
+        assert packed.texts == sources
+        assert packed.duplicates_dropped == 0
+
+    def test_drops_cross_source_duplicates(self):
+        shared = _paragraph(1)
+        sources = {"a": f"{shared}\n\n{_paragraph(2)}", "b": f"{shared}\n\n{_paragraph(3)}"}
+        packed = pack_sources(sources, "电池", budget_tokens=10_000)
+        assert packed.duplicates_dropped == 1
+        assert shared not in packed.texts["b"]
+        assert packed.texts["a"].startswith(shared)
+
+    def test_budget_prefers_relevant_passages_and_keeps_order(self):
+        relevant = [_paragraph(i, "电池") for i in range(3)]
+        noise = [_paragraph(i + 10, "天气") for i in range(6)]
+        text = "\n\n".join(noise[:3] + relevant + noise[3:])
+        budget = estimate_tokens(relevant[0]) * 3 + 5
+        packed = pack_sources({"a": text}, "电池供应链", budget_tokens=budget)
+        assert packed.total_tokens <= budget
+        assert packed.texts["a"] == "\n\n".join(relevant)
+
+    def test_unused_quota_is_shared(self):
+        long_text = "\n\n".join(_paragraph(i) for i in range(10))
+        per_passage = estimate_tokens(_paragraph(0))
+        packed = pack_sources({"short": "", "long": long_text}, "电池", budget_tokens=per_passage * 6)
+        assert packed.tokens["long"] > per_passage * 3
+
+
+class TestPassageIndex:
+    """测试可重复查询的段落索引"""
+
+    def test_scores_match_bm25(self):
+        sources = {"a": "\n\n".join(_paragraph(i, t) for i, t in enumerate(["电池", "天气", "芯片"]))}
+        index = PassageIndex(sources)
+        from ReportEngine.utils.context_packing import tokenize
+
+        expected = bm25_scores(tokenize("电池芯片"), [tokenize(p.text) for p in index.passages])
+        assert index.scores("电池芯片") == pytest.approx(expected)
+
+    def test_retrieves_per_query(self):
+        battery = [_paragraph(i, "电池") for i in range(3)]
+        weather = [_paragraph(i + 10, "天气") for i in range(3)]
+        index = PassageIndex({
+            "report": "\n\n".join(battery + weather),
+            "forum": _paragraph(20, "天气"),
+        })
+        budget = estimate_tokens(battery[0]) * 3 + 5
+        packed = index.retrieve("电池", budget)
+        assert packed.total_tokens <= budget
+        assert packed.texts["report"] == "\n\n".join(battery)
+        assert packed.texts["forum"] == ""
+        assert "天气" in index.retrieve("天气", budget).texts["forum"]
+
+    def test_small_sources_returned_whole(self):
+        sources = {"a": "alpha report", "b": ""}
+        assert PassageIndex(sources).retrieve("anything", 1000).texts == sources
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
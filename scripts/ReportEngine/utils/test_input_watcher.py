@@ -0,0 +1,80 @@
+"""
+输入目录监听（InputWatcher）的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_input_watcher.py -v
+"""
+
+import os
+import threading
+import time
+
+from ReportEngine.utils.input_watcher import InputWatcher
+
+
+def _write(path, text="# report"):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestInputWatcher:
+    """轮询模式下的索引与通知"""
+
+    def test_indexes_existing_files(self, tmp_path):
+        insight = tmp_path / "insight"
+        insight.mkdir()
+        _write(insight / "a.md")
+        _write(insight / "notes.txt")
+        old = insight / "old.md"
+        _write(old)
+        os.utime(old, (1, 1))
+
+        watcher = InputWatcher({"insight": str(insight), "media": str(tmp_path / "missing")},
+                               poll_interval=0.05, use_watchdog=False).start()
+        try:
+            assert watcher.mode == "polling"
+            assert watcher.counts() == {"insight": 2, "media": 0}
+            assert watcher.latest_files() == {"insight": os.path.join(str(insight), "a.md")}
+        finally:
+            watcher.stop()
+
+    def test_notifies_on_new_file_and_created_directory(self, tmp_path):
+        media = tmp_path / "media"
+        changed = []
+        lock = threading.Lock()
+
+        def on_change(engine):
+            with lock:
+                changed.append(engine)
+
+        watcher = InputWatcher({"media": str(media)}, poll_interval=0.05, use_watchdog=False)
+        watcher.add_listener(on_change)
+        watcher.start()
+        try:
+            media.mkdir()
+            _write(media / "r1.md")
+            assert _wait_for(lambda: watcher.counts()["media"] == 1)
+            assert _wait_for(lambda: "media" in changed)
+            assert watcher.latest_files()["media"].endswith("r1.md")
+        finally:
+            watcher.stop()
+
+    def test_covers_requires_running_and_same_paths(self, tmp_path):
+        watcher = InputWatcher({"query": str(tmp_path)}, poll_interval=0.05, use_watchdog=False)
+        assert not watcher.covers({"query": str(tmp_path)})
+        watcher.start()
+        try:
+            assert watcher.covers({"query": str(tmp_path) + os.sep})
+            assert not watcher.covers({"query": str(tmp_path / "other")})
+            assert not watcher.covers({"insight": str(tmp_path)})
+        finally:
+            watcher.stop()
@@ -0,0 +1,75 @@
+"""
+提示词前缀统计与前缀缓存友好布局的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_prompt_prefix.py -v
+"""
+
+import json
+
+import pytest
+
+from ReportEngine.prompts import build_chapter_user_prompt, build_document_layout_prompt, build_word_budget_prompt
+from ReportEngine.utils.prompt_prefix import PromptPrefixTracker, common_prefix_length
+
+
+def _chapter_payload(chapter_id, allow_swot=False):
+    return {
+        "section": {"chapterId": chapter_id, "title": f"章节{chapter_id}", "outline": ["a"]},
+        "globalContext": {"query": "主题", "layout": {"title": "报告"}, "sectionBudgets": [chapter_id]},
+        "reports": {"query_engine": f"素材{chapter_id}"},
+        "forumLogs": "",
+        "dataBundles": [],
+        "constraints": {"language": "zh-CN", "allowedBlocks": ["paragraph"], "allowSwot": allow_swot},
+        "chapterPlan": {"targetWords": 800},
+        "wordPlan": {"totalWords": 40000},
+    }
+
+
+class TestPromptPrefixTracker:
+    """测试公共前缀统计"""
+
+    def test_common_prefix_length(self):
+        assert common_prefix_length("", "abc") == 0
+        assert common_prefix_length("abcd", "abxy") == 2
+        assert common_prefix_length("共享前缀A", "共享前缀B") == 4
+
+    def test_counts_shared_bytes_per_system_prompt(self):
+        tracker = PromptPrefixTracker()
+        assert tracker.record("sys", "shared-1") == 0
+        assert tracker.record("sys", "shared-2") == len("sys") + len("shared-")
+        assert tracker.record("other", "shared-3") == 0
+        summary = tracker.summary()
+        assert summary["calls"] == 3
+        assert summary["sharedPrefixBytes"] == 10
+        assert len(summary["families"]) == 2
+
+
+class TestLayeredPrompts:
+    """测试共享上下文在前的提示词布局"""
+
+    def test_chapter_prompts_share_prefix_up_to_chapter_part(self):
+        first = build_chapter_user_prompt(_chapter_payload("S1", allow_swot=True))
+        second = build_chapter_user_prompt(_chapter_payload("S2"))
+        shared_end = first.index("</SHARED CONTEXT>") + len("</SHARED CONTEXT>")
+        assert first[:shared_end] == second[:shared_end]
+        assert "S1" not in first[:shared_end]
+        chapter_part = json.loads(first[first.index("<CHAPTER CONTEXT>") + 17:first.index("</CHAPTER CONTEXT>")])
+        assert chapter_part["constraints"] == {"allowSwot": True}
+        assert chapter_part["globalContext"] == {"sectionBudgets": ["S1"]}
+        assert chapter_part["reports"] == {"query_engine": "素材S1"}
+
+    def test_shared_sources_move_reports_into_prefix(self):
+        prompt = build_chapter_user_prompt(_chapter_payload("S1"), shared_sources=True)
+        assert prompt.index('"reports"') < prompt.index("</SHARED CONTEXT>")
+
+    def test_planning_prompts_share_prefix(self):
+        common = {"query": "q", "templateOverview": {"title": "t"}, "reports": {"a": "b"}, "forumLogs": "f"}
+        layout = build_document_layout_prompt({"query": "q", "template": {"raw": "#"}, **common})
+        budget = build_word_budget_prompt({"design": {"title": "x"}, **common})
+        shared_end = layout.index("</SHARED CONTEXT>")
+        assert layout[:shared_end] == budget[:shared_end]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,69 @@
+"""
+修复结果磁盘缓存的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_repair_cache.py -v
+"""
+
+import pytest
+from ReportEngine.utils.repair_cache import RepairCache, build_block_cache_key
+
+
+def _record(i):
+    return {'success': True, 'repaired_block': {'i': i}, 'method': 'api', 'changes': []}
+
+
+class TestRepairCache:
+    """测试RepairCache的持久化与LRU淘汰"""
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+        cache = RepairCache(path)
+        cache.put('chart', 'k1', _record(1))
+        cache.close()
+
+        reopened = RepairCache(path)
+        assert reopened.get('chart', 'k1') == _record(1)
+        # 命名空间相互隔离
+        assert reopened.get('table', 'k1') is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = RepairCache(tmp_path / "cache.sqlite3", max_entries=3)
+        for i in range(4):
+            cache.put('chart', f'k{i}', _record(i))
+        # 访问 k0 后，最久未使用的是 k1
+        cache.get('chart', 'k0')
+        assert cache.evict() == 1
+        assert cache.get('chart', 'k1') is None
+        assert cache.get('chart', 'k0') is not None
+        assert cache.stats()['entries'] == 3
+
+    def test_hits_buffer_access_time_until_flush(self, tmp_path):
+        cache = RepairCache(tmp_path / "cache.sqlite3")
+        cache.put('chart', 'k', _record(0))
+        cache._conn.execute("UPDATE repair_cache SET last_access = 0")
+        cache._conn.commit()
+
+        def stored_access():
+            return cache._conn.execute("SELECT last_access FROM repair_cache").fetchone()[0]
+
+        assert cache.get('chart', 'k') == _record(0)
+        assert cache.get('chart', 'k') == _record(0)
+        assert stored_access() == 0
+        cache.flush()
+        assert stored_access() > 0
+
+    def test_evicts_by_bytes(self, tmp_path):
+        cache = RepairCache(tmp_path / "cache.sqlite3", max_bytes=1)
+        cache.put('chart', 'k', _record(0))
+        cache.evict()
+        assert cache.stats() == {'entries': 0, 'bytes': 0}
+
+    def test_block_key_changes_with_content(self):
+        block = {'widgetId': 'w1', 'data': [1]}
+        assert build_block_cache_key(block) == build_block_cache_key(dict(block))
+        assert build_block_cache_key(block) != build_block_cache_key({**block, 'data': [2]})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,77 @@
+"""
+JSON序列化后端的测试用例。
+
+运行测试：
+    python -m pytest ReportEngine/utils/test_serialization.py -v
+"""
+
+import hashlib
+import json
+from datetime import datetime
+
+import pytest
+
+from ReportEngine.utils import serialization
+
+
+SAMPLE = {
+    "chapterId": "S1",
+    "title": "概览 “引号” \n换行",
+    "order": 10,
+    "blocks": [{"type": "paragraph", "inlines": [{"text": "甲", "marks": []}]}],
+    "ratio": 0.125,
+    "flag": None,
+}
+
+
+@pytest.fixture(params=serialization.available_backends())
+def backend(request):
+    previous = serialization.set_backend(request.param)
+    yield request.param
+    serialization.set_backend(previous)
+
+
+def test_output_matches_stdlib_layout(backend):
+    assert serialization.dumps(SAMPLE) == json.dumps(SAMPLE, ensure_ascii=False, separators=(",", ":"))
+    assert serialization.dumps(SAMPLE, indent=True) == json.dumps(SAMPLE, ensure_ascii=False, indent=2)
+    assert serialization.dumps_bytes(SAMPLE) == serialization.dumps(SAMPLE).encode("utf-8")
+    assert serialization.loads(serialization.dumps_bytes(SAMPLE)) == SAMPLE
+
+
+def test_fallbacks_keep_stdlib_semantics(backend):
+    # 非字符串键、超出64位的整数、default 转换
+    assert serialization.loads(serialization.dumps({1: 2**70})) == {"1": 2**70}
+    assert serialization.dumps({"s": {1}}, default=list) == '{"s":[1]}'
+    assert serialization.loads('{"a": NaN}')["a"] != serialization.loads('{"a": NaN}')["a"]
+    with pytest.raises(json.JSONDecodeError):
+        serialization.loads('{"a": }')
+    with pytest.raises(TypeError):
+        serialization.dumps({"x": object()})
+
+
+def test_lone_surrogates_fall_back_to_stdlib_string(backend):
+    value = {"text": "坏\ud800字"}
+    assert serialization.dumps(value) == json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    assert serialization.loads(serialization.dumps(value)) == value
+
+
+def test_canonical_hash_does_not_depend_on_backend(backend):
+    value = {"at": datetime(2024, 1, 1, 8), "ratio": 1e20, "tiny": 1.5e-7}
+    payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+    assert serialization.canonical_hash(value) == hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def test_canonical_hash_is_key_order_independent(backend):
+    first = serialization.canonical_hash({"b": 1, "a": [1, {"y": 2, "x": 3}]})
+    second = serialization.canonical_hash({"a": [1, {"x": 3, "y": 2}], "b": 1})
+    assert first == second
+    assert serialization.canonical_hash({"x": object()})
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.set_backend("simdjson-not-installed")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -25,7 +25,6 @@ Report Engine 命令行版本
 import os
 import sys
 import json
-import requests
 import argparse
 from pathlib import Path
 from datetime import datetime
@@ -39,6 +38,7 @@ except ImportError:
     logger.warning("未安装 supabase 库，数据库存储功能将不可用")
 
 from config import settings as global_settings, Settings
+from supabase_writer import SupabaseWriter
 
 # 全局配置
 VERBOSE = False
@@ -430,37 +430,29 @@ def save_to_supabase(title: str, content: str):
         logger.error("❌ 缺少 Supabase 配置 (SUPABASE_URL 或 SUPABASE_KEY)")
         return
         
-    try:
-        logger.info("正在连接 Supabase (REST API)...")
-        
-        # 构造 REST API URL
-        # 假设 URL 格式为 https://xyz.supabase.co
-        api_url = f"{url}/rest/v1/market_news"
-        
-        headers = {
-            "apikey": key,
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal"
-        }
-        
-        data = {
-            "title": title,
-            "content": content,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        # 插入数据
-        logger.info(f"正在插入数据: {title}")
-        response = requests.post(api_url, headers=headers, json=data)
-        
-        if response.status_code in [200, 201]:
-            logger.success(f"✓ 数据已成功存入 market_news 表")
-        else:
-            logger.error(f"❌ 保存失败: {response.status_code} - {response.text}")
-        
-    except Exception as e:
-        logger.error(f"❌ 保存到 Supabase 失败: {e}")
+    data = {
+        "title": title,
+        "content": content,
+        "created_at": datetime.now().isoformat()
+    }
+    outbox_dir = os.environ.get("SUPABASE_OUTBOX_DIR") or str(
+        Path(__file__).resolve().parent / "cache" / "outbox"
+    )
+
+    # 共享写入器：keep-alive 会话、超时、指数退避重试、幂等键，
+    # 数据库不可达时写入本地 outbox，下次运行自动补发
+    logger.info(f"正在插入数据: {title}")
+    with SupabaseWriter(url, key, outbox_dir=outbox_dir) as writer:
+        result = writer.insert([data])
+
+    if result.inserted:
+        logger.success(f"✓ 数据已成功存入 market_news 表")
+    elif result.queued:
+        logger.warning(f"⚠ Supabase 暂不可用，报告已写入 outbox（{outbox_dir}），下次运行时补发")
+    else:
+        logger.error("❌ 保存到 Supabase 失败")
+
+
 def parse_bool_arg(value: str) -> bool:
     """将字符串解析为布尔值，用于命令行参数"""
     true_values = {"true", "1", "yes", "y", "on"}
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Supabase（PostgREST）批量写入客户端。
+
+report_engine_only.py 与 scripts/report_engine.py 共用，负责把报告写入 market_news：
+
+- 复用 keep-alive 的 requests.Session，每个请求都有超时；
+- 多行合并为一次 bulk insert（按 batch_size 分批）；
+- 每行带确定性的 idempotency_key，配合 ``on_conflict`` + ``ignore-duplicates``，
+  重试或补发不会产生重复行（表中尚无该列时自动降级为普通插入）；
+- 网络错误、408/429/5xx 按指数退避重试，尊重 Retry-After；
+- 重试耗尽后写入本地 outbox 目录，下次写入前（或手动调用 flush_outbox）自动补发。
+
+表结构变更见仓库根目录的 add_market_news_idempotency.sql。
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from loguru import logger
+
+IDEMPOTENCY_COLUMN = "idempotency_key"
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# PostgREST/PostgreSQL 的“列不存在”错误码：迁移未执行时降级
+MISSING_COLUMN_CODES = {"PGRST204", "42703", "42P10"}
+
+
+def idempotency_key(row: Dict) -> str:
+    """按行内容生成稳定的幂等键（同一行重试/补发得到同一个键）"""
+    payload = {k: v for k, v in row.items() if k != IDEMPOTENCY_COLUMN}
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class WriteResult:
+    """一次写入的结果统计"""
+
+    inserted: int = 0
+    queued: int = 0
+    failed: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """没有永久失败的行（进入 outbox 的行稍后会补发）"""
+        return self.failed == 0
+
+    def __iadd__(self, other: "WriteResult") -> "WriteResult":
+        self.inserted += other.inserted
+        self.queued += other.queued
+        self.failed += other.failed
+        return self
+
+
+class _RetryableError(Exception):
+    """可重试的失败（网络错误或临时性状态码）"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SupabaseWriter:
+    """
+    带重试与本地 outbox 的 PostgREST 批量写入器。
+
+    线程不安全：每个进程/任务持有一个实例即可。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        table: str = "market_news",
+        timeout: float = 15,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        batch_size: int = 50,
+        outbox_dir: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        """
+        参数:
+            url: Supabase 项目地址（https://xyz.supabase.co）
+            key: API Key
+            table: 目标表
+            timeout: 单次请求超时（秒）
+            max_retries: 可重试错误的最大重试次数
+            backoff_base: 指数退避基数（秒）
+            backoff_max: 单次退避上限（秒）
+            batch_size: 单个请求最多插入的行数
+            outbox_dir: 发送失败时暂存的目录，None 表示不落盘
+            session: 复用外部的 requests.Session
+        """
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/{table}"
+        self.table = table
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.batch_size = max(1, int(batch_size))
+        self.outbox_dir = outbox_dir
+        self.use_idempotency = True
+        self._owns_session = session is None
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+        })
+
+    # ====== 写入 ======
+
+    def insert(self, rows: Iterable[Dict]) -> WriteResult:
+        """
+        批量插入多行。先补发 outbox 中的积压，再按 batch_size 分批发送。
+
+        返回:
+            WriteResult: 成功/进入outbox/永久失败的行数
+        """
+        self.flush_outbox()
+        prepared = [self._with_key(row) for row in rows]
+        result = WriteResult()
+        for start in range(0, len(prepared), self.batch_size):
+            batch = prepared[start:start + self.batch_size]
+            try:
+                self._send_with_retry(batch)
+                result.inserted += len(batch)
+            except _RetryableError as e:
+                if self._enqueue(batch):
+                    logger.warning(f"⚠️ Supabase 暂不可用，{len(batch)} 行已写入 outbox 待补发: {e}")
+                    result.queued += len(batch)
+                else:
+                    logger.error(f"❌ Supabase 写入失败（重试已耗尽）: {e}")
+                    result.failed += len(batch)
+            except Exception as e:
+                logger.error(f"❌ Supabase 写入失败: {e}")
+                result.failed += len(batch)
+        return result
+
+    def _with_key(self, row: Dict) -> Dict:
+        if IDEMPOTENCY_COLUMN in row:
+            return row
+        return {**row, IDEMPOTENCY_COLUMN: idempotency_key(row)}
+
+    def _send_with_retry(self, rows: List[Dict], max_retries: Optional[int] = None) -> None:
+        """发送一批数据；可重试错误按指数退避重试，耗尽后抛出 _RetryableError"""
+        retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            try:
+                self._send(rows)
+                return
+            except _RetryableError as e:
+                if attempt >= retries:
+                    raise
+                delay = e.retry_after
+                if delay is None:
+                    delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                    delay *= random.uniform(0.5, 1.0)
+                attempt += 1
+                logger.info(f"Supabase 写入失败，{delay:.1f}s 后第 {attempt} 次重试: {e}")
+                time.sleep(delay)
+
+    def _send(self, rows: List[Dict]) -> None:
+        """单次 POST；永久失败抛 RuntimeError，临时失败抛 _RetryableError"""
+        params = None
+        prefer = "return=minimal"
+        payload = rows
+        if self.use_idempotency:
+            params = {"on_conflict": IDEMPOTENCY_COLUMN}
+            prefer += ",resolution=ignore-duplicates"
+        else:
+            payload = [{k: v for k, v in row.items() if k != IDEMPOTENCY_COLUMN} for row in rows]
+
+        try:
+            resp = self.session.post(
+                self.endpoint,
+                params=params,
+                json=payload,
+                headers={"Prefer": prefer},
+                timeout=self.timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise _RetryableError(str(e)) from e
+
+        if resp.status_code in (200, 201, 204):
+            return
+        if resp.status_code in RETRYABLE_STATUS:
+            raise _RetryableError(f"{resp.status_code} - {resp.text[:200]}", _retry_after(resp))
+        if self.use_idempotency and _error_code(resp) in MISSING_COLUMN_CODES:
+            logger.warning(
+                f"⚠️ {self.table} 缺少 {IDEMPOTENCY_COLUMN} 唯一列，降级为普通插入"
+                "（执行 add_market_news_idempotency.sql 以启用去重）"
+            )
+            self.use_idempotency = False
+            self._send(rows)
+            return
+        raise RuntimeError(f"{resp.status_code} - {resp.text[:500]}")
+
+    # ====== outbox ======
+
+    def _enqueue(self, rows: List[Dict]) -> bool:
+        """把一批数据原子地写入 outbox 目录"""
+        if not self.outbox_dir:
+            return False
+        try:
+            os.makedirs(self.outbox_dir, exist_ok=True)
+            name = f"{int(time.time() * 1000):015d}-{uuid.uuid4().hex[:8]}.json"
+            tmp_path = os.path.join(self.outbox_dir, f".{name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"table": self.table, "rows": rows}, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(self.outbox_dir, name))
+            return True
+        except OSError as e:
+            logger.error(f"❌ 写入 outbox 失败: {e}")
+            return False
+
+    def pending(self) -> List[str]:
+        """按时间顺序返回 outbox 中待补发的文件"""
+        if not self.outbox_dir or not os.path.isdir(self.outbox_dir):
+            return []
+        return sorted(
+            os.path.join(self.outbox_dir, name)
+            for name in os.listdir(self.outbox_dir)
+            if name.endswith(".json") and not name.startswith(".")
+        )
+
+    def flush_outbox(self) -> int:
+        """
+        补发 outbox 中的积压，返回成功补发的行数。
+
+        遇到临时性失败即停止（保持顺序，下次再试）；永久失败的文件改名为 .failed 保留。
+        """
+        flushed = 0
+        for path in self.pending():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ outbox 文件损坏，已跳过 {path}: {e}")
+                os.replace(path, f"{path}.failed")
+                continue
+            if entry.get("table", self.table) != self.table:
+                continue
+            rows = entry.get("rows") or []
+            try:
+                self._send_with_retry(rows, max_retries=1)
+            except _RetryableError:
+                break
+            except Exception as e:
+                logger.error(f"❌ outbox 补发被拒绝，已保留为 .failed: {e}")
+                os.replace(path, f"{path}.failed")
+                continue
+            os.remove(path)
+            flushed += len(rows)
+        if flushed:
+            logger.success(f"✅ 已补发 outbox 中的 {flushed} 行")
+        return flushed
+
+    def close(self) -> None:
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "SupabaseWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    try:
+        return min(60.0, max(0.0, float(value))) if value else None
+    except ValueError:
+        return None
+
+
+def _error_code(resp: requests.Response) -> Optional[str]:
+    try:
+        body = resp.json()
+    except ValueError:
+        return None
+    return body.get("code") if isinstance(body, dict) else None
+
+
+__all__ = [
+    "SupabaseWriter",
+    "WriteResult",
+    "idempotency_key",
+]